@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+分析流水线基准：各阶段吞吐与峰值内存，JSON 基线与回归比较
+
+用法: python benchmarks/bench_pipeline.py [run] [--records 10000,1000000] [--stages analyze_request,report]
+                                         [--save benchmarks/baselines/local.json] [--baseline FILE --threshold 0.2]
+      python benchmarks/bench_pipeline.py compare BASELINE.json CURRENT.json [--threshold 0.2]
+
+阶段（每个阶段在每个记录规模下各测一次）：
+- extract_addresses:      _extract_addresses_from_params（构造请求记录时的地址提取）
+- analyze_request:        逐条隐私维度分析
+- aggregate_by_dimension: 逐条分析结果按维度聚合
+- linkage:                地址关联图（并查集）
+- record_analysis:        analyze_records 完整单次遍历（隐私、关联、时序、calldata 与各统计）
+- report:                 由分析结果生成 Markdown 报告
+- html_report:            由分析结果生成 HTML 仪表盘，并把全部记录写成分页记录页（写入临时目录）
+- end_to_end:             本进程内替身节点（零延迟）上的负载测试，记录数为实际请求数
+
+合成记录按真实场景的方法分布生成（余额、nonce、estimateGas、eth_call、区块查询，部分为批量请求），
+地址从 --addresses 个地址中抽取。为使 10^7 规模也不必在内存中保存全部记录，记录池最多
+--pool 条，阶段按需循环遍历记录池；计时不含生成记录的耗时。
+吞吐取 --repeat 次中最快的一次；峰值内存为单独一次 tracemalloc 遍历中该阶段新增的 Python 分配峰值
+（tracemalloc 本身会拖慢执行，因此不与计时同一遍）。
+"""
+import argparse
+import gc
+import itertools
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.analyzers.linkage import LinkageAnalyzer  # noqa: E402
+from src.analyzers.privacy_analyzer import aggregate_by_dimension, analyze_request  # noqa: E402
+from src.collectors.runner import RECORD_PREVIEW_LIMIT, analyze_records, build_result  # noqa: E402
+from src.reporters.html_report import save_html_report  # noqa: E402
+from src.reporters.report_generator import generate_markdown_report  # noqa: E402
+from src.rpc_client import RPCRequestRecord, RPCResponseRecord, _extract_addresses_from_params  # noqa: E402
+
+STAGES = (
+    "extract_addresses",
+    "analyze_request",
+    "aggregate_by_dimension",
+    "linkage",
+    "record_analysis",
+    "report",
+    "html_report",
+    "end_to_end",
+)
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_POOL = 100_000
+# aggregate_by_dimension 预先计算的分析结果条数（循环使用，避免结果对象本身占满内存）
+RESULT_POOL = 10_000
+DEFAULT_THRESHOLD = 0.2
+# 低于这些绝对值的阶段不判定回归（毫秒级耗时、KB 级分配的相对波动没有意义）
+TIME_FLOOR_S = 0.01
+MEMORY_FLOOR_BYTES = 1 << 20
+
+WALLET_HEADERS = {
+    "metamask": {
+        "Content-Type": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0",
+        "Origin": "chrome-extension://nkbihfbeogaeaoehlefnkodbefgpgknn",
+    },
+    "trust_wallet": {
+        "Content-Type": "application/json",
+        "User-Agent": "TrustWallet/8.0 (iPhone; iOS 17.0)",
+        "X-Client": "trust-wallet-ios",
+    },
+    "coinbase_wallet": {
+        "Content-Type": "application/json",
+        "User-Agent": "CoinbaseWallet/28.0 (Android 14)",
+    },
+}
+PROVIDERS = ("infura", "alchemy", "chainstack")
+TOKEN = "0x779877a7b0d9e8603169ddbd7836e478b4624789"
+ROUTER = "0xc532a74256d3db42d0bf7a0400fefdbad7694008"
+TRANSFER_SELECTOR = "0xa9059cbb"
+AMOUNTS_OUT_SELECTOR = "0xd06ca61f"
+
+
+def _request(method: str, params: list, wallet: str, provider: str, ts: float, **extra) -> RPCRequestRecord:
+    return RPCRequestRecord(
+        method=method,
+        params=params,
+        wallet_id=wallet,
+        provider_id=provider,
+        headers_sent=dict(WALLET_HEADERS[wallet]),
+        timestamp=ts,
+        client_id=f"{wallet}@{provider}",
+        exposed_addresses=_extract_addresses_from_params(params),
+        exposed_params_summary=str(params)[:200] if method in ("eth_call", "eth_estimateGas") else "",
+        **extra,
+    )
+
+
+def synthetic_records(n: int, addresses: int = 10_000, seed: int = 1) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]:
+    """按场景的方法分布生成 n 条记录（批量请求的子调用连续产生，可能使总数略多于 n）"""
+    rng = random.Random(seed)
+    pool = [f"0x{rng.getrandbits(160):040x}" for _ in range(addresses)]
+    ts = 1_700_000_000.0
+    produced = 0
+    batch_seq = 0
+    while produced < n:
+        wallet = rng.choice(list(WALLET_HEADERS))
+        provider = rng.choice(PROVIDERS)
+        addr = rng.choice(pool)
+        ts += rng.expovariate(20.0)
+        kind = rng.randrange(6)
+        if kind == 0:
+            calls = [("eth_getBalance", [addr, "latest"])]
+        elif kind == 1:
+            # 批量：余额 + nonce
+            calls = [("eth_getBalance", [addr, "latest"]), ("eth_getTransactionCount", [addr, "latest"])]
+        elif kind == 2:
+            data = TRANSFER_SELECTOR + rng.choice(pool)[2:].zfill(64) + f"{rng.randrange(1 << 40):064x}"
+            calls = [("eth_estimateGas", [{"from": addr, "to": TOKEN, "data": data, "gas": "0x5208"}])]
+        elif kind == 3:
+            data = AMOUNTS_OUT_SELECTOR + f"{10**18:064x}" + f"{0x40:064x}" + f"{2:064x}" + TOKEN[2:].zfill(64) * 2
+            calls = [("eth_call", [{"from": addr, "to": ROUTER, "data": data, "gas": "0x100000"}, "latest"])]
+        elif kind == 4:
+            calls = [("eth_blockNumber", [])]
+        else:
+            calls = [("eth_getBlockByNumber", ["latest", False])]
+        batch = {}
+        if len(calls) > 1:
+            batch_seq += 1
+            batch = {"batch_id": f"bench-{batch_seq}", "batch_size": len(calls)}
+        for method, params in calls:
+            req = _request(method, params, wallet, provider, ts, **batch)
+            resp = RPCResponseRecord(
+                request=req,
+                result=hex(rng.randrange(1 << 32)),
+                error=None,
+                elapsed_ms=rng.lognormvariate(3, 0.5),
+                connection_reused=True,
+            )
+            produced += 1
+            yield req, resp
+
+
+def _cycle(pool: list, n: int) -> Iterator:
+    return itertools.islice(itertools.cycle(pool), n)
+
+
+def _stage_extract(pool: list, n: int) -> Callable[[], Any]:
+    params = [req.params for req, _ in pool]
+    return lambda: sum(len(_extract_addresses_from_params(p)) for p in _cycle(params, n))
+
+
+def _stage_analyze(pool: list, n: int) -> Callable[[], Any]:
+    return lambda: sum(len(analyze_request(req, resp)) for req, resp in _cycle(pool, n))
+
+
+def _stage_aggregate(pool: list, n: int) -> Callable[[], Any]:
+    results = [analyze_request(req, resp) for req, resp in pool[:RESULT_POOL]]
+    return lambda: aggregate_by_dimension(_cycle(results, n))
+
+
+def _stage_linkage(pool: list, n: int) -> Callable[[], Any]:
+    return lambda: LinkageAnalyzer().add_records(_cycle(pool, n)).summary()
+
+
+def _stage_record_analysis(pool: list, n: int) -> Callable[[], Any]:
+    return lambda: analyze_records(_cycle(pool, n), preview_limit=RECORD_PREVIEW_LIMIT)
+
+
+def _stage_report(pool: list, n: int) -> Callable[[], Any]:
+    analysis = analyze_records(_cycle(pool, n), preview_limit=RECORD_PREVIEW_LIMIT)
+    config = {"wallets": list(WALLET_HEADERS), "providers": list(PROVIDERS), "scenarios": [], "batch": True}
+    data = build_result(config, analysis, {}, [], wall_clock=1.0)
+    return lambda: generate_markdown_report(data)
+
+
+def _stage_html_report(pool: list, n: int) -> Callable[[], Any]:
+    analysis = analyze_records(_cycle(pool, n), preview_limit=RECORD_PREVIEW_LIMIT)
+    config = {"wallets": list(WALLET_HEADERS), "providers": list(PROVIDERS), "scenarios": [], "batch": True}
+    data = build_result(config, analysis, {}, [], wall_clock=1.0)
+
+    def _run():
+        with tempfile.TemporaryDirectory() as out_dir:
+            return save_html_report(data, Path(out_dir), records=_cycle(pool, n))
+    return _run
+
+
+STAGE_BUILDERS = {
+    "extract_addresses": _stage_extract,
+    "analyze_request": _stage_analyze,
+    "aggregate_by_dimension": _stage_aggregate,
+    "linkage": _stage_linkage,
+    "record_analysis": _stage_record_analysis,
+    "report": _stage_report,
+    "html_report": _stage_html_report,
+}
+
+
+def _time_best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak_bytes(fn: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base)
+
+
+def _row(stage: str, records: int, seconds: float, peak: Optional[int]) -> dict[str, Any]:
+    return {
+        "stage": stage,
+        "records": records,
+        "seconds": round(seconds, 6),
+        "records_per_s": round(records / seconds, 1) if seconds > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def _bench_end_to_end(duration_s: float, workers: int, memory: bool) -> dict[str, Any]:
+    """零延迟替身节点上的闭环负载测试：覆盖客户端、传输、记录与分析的完整路径"""
+    from src.collectors.load import run_load
+    from src.config_loader import STANDIN_PROVIDER_ID
+    from src.standin_server import StandinServer, get_standin_options
+
+    options = {
+        **get_standin_options(),
+        "latency": {"distribution": "fixed", "mean_ms": 0},
+        "method_latency": {},
+        "error_rate": 0.0,
+        "rate_limit_rate": 0.0,
+    }
+    with StandinServer(options):
+        def run():
+            return run_load(providers=[STANDIN_PROVIDER_ID], duration_s=duration_s, concurrency=workers)
+
+        data = run()
+        requests = data["summary"]["total_requests"]
+        seconds = data["summary"]["wall_clock_s"]
+        peak = _peak_bytes(run) if memory else None
+    return _row("end_to_end", requests, seconds, peak)
+
+
+def run_benchmarks(
+    sizes: list[int],
+    stages: list[str],
+    repeat: int = 3,
+    pool_size: int = DEFAULT_POOL,
+    addresses: int = 10_000,
+    seed: int = 1,
+    memory: bool = True,
+    e2e_duration_s: float = 5.0,
+    e2e_workers: int = 8,
+) -> dict[str, Any]:
+    results = {}
+    pool = list(synthetic_records(min(max(sizes), pool_size), addresses, seed)) if set(stages) - {"end_to_end"} else []
+    for n in sizes:
+        for stage in stages:
+            if stage == "end_to_end":
+                continue
+            fn = STAGE_BUILDERS[stage](pool, n)
+            seconds = _time_best(fn, repeat)
+            peak = _peak_bytes(fn) if memory else None
+            row = results[f"{stage}@{n}"] = _row(stage, n, seconds, peak)
+            print(_format_row(row), flush=True)
+            del fn
+    if "end_to_end" in stages:
+        row = results["end_to_end"] = _bench_end_to_end(e2e_duration_s, e2e_workers, memory)
+        print(_format_row(row), flush=True)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "pool": pool_size,
+            "addresses": addresses,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def _format_row(row: dict[str, Any]) -> str:
+    peak = f"{row['peak_bytes'] / 1e6:>10.1f}" if row["peak_bytes"] is not None else f"{'-':>10}"
+    return f"{row['stage']:<24}{row['records']:>10}{row['seconds']:>10.3f}{row['records_per_s'] or 0:>14.0f}{peak}"
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float, memory_threshold: float) -> list[str]:
+    """返回回归项说明；吞吐下降超过 threshold 或峰值内存增长超过 memory_threshold 视为回归
+
+    本次耗时低于 TIME_FLOOR_S、峰值内存低于 MEMORY_FLOOR_BYTES 的项不判定对应的回归
+    """
+    regressions = []
+    print(f"{'benchmark':<32}{'baseline/s':>14}{'current/s':>14}{'change':>9}{'peak MB':>10}{'change':>9}")
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<32}{'-':>14}{cur['records_per_s'] or 0:>14.0f}  (新增)")
+            continue
+        speed = (cur["records_per_s"] or 0) / base["records_per_s"] - 1 if base["records_per_s"] else 0.0
+        mem = None
+        if base.get("peak_bytes") and cur.get("peak_bytes") is not None:
+            mem = cur["peak_bytes"] / base["peak_bytes"] - 1
+        flags = []
+        if speed < -threshold and cur["seconds"] >= TIME_FLOOR_S:
+            flags.append(f"吞吐下降 {-speed:.0%}")
+        if mem is not None and mem > memory_threshold and cur["peak_bytes"] >= MEMORY_FLOOR_BYTES:
+            flags.append(f"峰值内存增长 {mem:.0%}")
+        peak = f"{cur['peak_bytes'] / 1e6:>10.1f}" if cur.get("peak_bytes") is not None else f"{'-':>10}"
+        print(
+            f"{key:<32}{base['records_per_s']:>14.0f}{cur['records_per_s'] or 0:>14.0f}{speed:>+9.0%}{peak}"
+            f"{(f'{mem:+.0%}' if mem is not None else '-'):>9}" + (f"  <- {', '.join(flags)}" if flags else "")
+        )
+        regressions.extend(f"{key}: {flag}" for flag in flags)
+    for key in baseline["results"]:
+        if key not in current["results"]:
+            print(f"{key:<32}  (本次未运行)")
+    return regressions
+
+
+def _load(path: str) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _report_regressions(regressions: list[str], threshold: float) -> int:
+    if regressions:
+        print(f"\n{len(regressions)} 项回归超过阈值：")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\n无超过阈值（{threshold:.0%}）的回归")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(prog="bench_pipeline.py compare", description="比较两份基准结果")
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="吞吐下降比例阈值")
+        parser.add_argument("--memory-threshold", type=float, default=None, help="峰值内存增长比例阈值，默认同 --threshold")
+        args = parser.parse_args(argv[1:])
+        memory_threshold = args.threshold if args.memory_threshold is None else args.memory_threshold
+        regressions = compare(_load(args.baseline), _load(args.current), args.threshold, memory_threshold)
+        return _report_regressions(regressions, args.threshold)
+
+    if argv and argv[0] == "run":
+        argv = argv[1:]
+    parser = argparse.ArgumentParser(description="分析流水线基准")
+    parser.add_argument("--records", type=str, default=",".join(str(n) for n in DEFAULT_SIZES), help="记录规模，逗号分隔")
+    parser.add_argument("--stages", type=str, default=",".join(STAGES), help=f"阶段，逗号分隔（{','.join(STAGES)}）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段计时次数，取最快")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL, help="内存中保存的合成记录条数上限")
+    parser.add_argument("--addresses", type=int, default=10_000, help="合成记录的地址空间大小")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="跳过峰值内存测量")
+    parser.add_argument("--e2e-duration", type=float, default=5.0, help="end_to_end 负载测试时长（秒）")
+    parser.add_argument("--e2e-workers", type=int, default=8, help="end_to_end 并发虚拟用户数")
+    parser.add_argument("--save", type=str, default="", help="结果保存为 JSON（可作为之后的基线）")
+    parser.add_argument("--baseline", type=str, default="", help="运行后与该基线比较，回归超过阈值时返回非零")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="吞吐下降比例阈值")
+    parser.add_argument("--memory-threshold", type=float, default=None, help="峰值内存增长比例阈值，默认同 --threshold")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {unknown}")
+    sizes = [int(float(n)) for n in args.records.split(",") if n.strip()]
+
+    print(f"{'stage':<24}{'records':>10}{'seconds':>10}{'records/s':>14}{'peak MB':>10}")
+    data = run_benchmarks(
+        sizes,
+        stages,
+        repeat=args.repeat,
+        pool_size=args.pool,
+        addresses=args.addresses,
+        seed=args.seed,
+        memory=not args.no_memory,
+        e2e_duration_s=args.e2e_duration,
+        e2e_workers=args.e2e_workers,
+    )
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {path}")
+    if args.baseline:
+        print()
+        memory_threshold = args.threshold if args.memory_threshold is None else args.memory_threshold
+        regressions = compare(_load(args.baseline), data, args.threshold, memory_threshold)
+        return _report_regressions(regressions, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+记录内存占用基准：逐条 dataclass 记录 vs CompactRecordStore
+
+用法: python benchmarks/bench_record_memory.py [--records 200000]
+
+按真实场景的分布合成记录（3 个钱包、各自的请求头、少量方法与地址），
+用 tracemalloc 测量保存全部记录所需的内存，输出每条记录的平均字节数。
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.record_store import CompactRecordStore  # noqa: E402
+from src.rpc_client import RPCRequestRecord, RPCResponseRecord  # noqa: E402
+
+WALLET_HEADERS = {
+    "metamask": {
+        "Content-Type": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0",
+        "Origin": "chrome-extension://nkbihfbeogaeaoehlefnkodbefgpgknn",
+    },
+    "trust_wallet": {
+        "Content-Type": "application/json",
+        "User-Agent": "TrustWallet/8.0 (iPhone; iOS 17.0)",
+        "X-Client": "trust-wallet-ios",
+    },
+    "coinbase_wallet": {
+        "Content-Type": "application/json",
+        "User-Agent": "CoinbaseWallet/28.0 (Android 14)",
+    },
+}
+ADDRESSES = [f"0x{i:040x}" for i in range(1, 9)]
+BALANCE_CALL = "0x70a08231000000000000000000000000" + ADDRESSES[0][2:]
+
+
+@dataclass
+class _LegacyRequest:
+    """改造前的 __dict__ 版记录，作为对照"""
+    method: str
+    params: list
+    wallet_id: str
+    provider_id: str
+    headers_sent: dict
+    timestamp: float
+    exposed_addresses: list[str] = field(default_factory=list)
+    exposed_params_summary: str = ""
+    batch_id: Optional[str] = None
+    batch_size: int = 1
+
+
+@dataclass
+class _LegacyResponse:
+    request: Any
+    result: Any
+    error: Optional[dict]
+    elapsed_ms: float
+    connection_reused: Optional[bool] = None
+    source: str = "upstream"
+    coalesced_with: Optional[str] = None
+
+
+def _make_record(rng: random.Random, request_cls, response_cls):
+    wallet = rng.choice(list(WALLET_HEADERS))
+    addr = rng.choice(ADDRESSES)
+    kind = rng.randrange(4)
+    if kind == 0:
+        method, params, exposed = "eth_getBalance", [addr, "latest"], [addr]
+    elif kind == 1:
+        method, params, exposed = "eth_call", [{"to": ADDRESSES[7], "data": BALANCE_CALL}, "latest"], [ADDRESSES[7]]
+    elif kind == 2:
+        method, params, exposed = "eth_blockNumber", [], []
+    else:
+        method, params, exposed = "eth_getBlockByNumber", ["latest", False], []
+    # 与 RPCClient 一致：每条记录各自复制请求头、构造新的 params 与地址列表
+    req = request_cls(
+        method=method,
+        params=[dict(p) if isinstance(p, dict) else p for p in params],
+        wallet_id=wallet,
+        provider_id=rng.choice(("infura", "alchemy", "chainstack")),
+        headers_sent=dict(WALLET_HEADERS[wallet]),
+        timestamp=time.time(),
+        exposed_addresses=list(exposed),
+        exposed_params_summary=str(params)[:200] if method == "eth_call" else "",
+    )
+    resp = response_cls(
+        request=req,
+        result=hex(rng.randrange(1 << 32)),
+        error=None,
+        elapsed_ms=rng.lognormvariate(3, 0.5),
+        connection_reused=True,
+    )
+    return req, resp
+
+
+def _measure(build) -> tuple[int, float, Any]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    holder = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed, holder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="记录内存占用基准")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    n = args.records
+
+    def legacy():
+        rng = random.Random(args.seed)
+        return [_make_record(rng, _LegacyRequest, _LegacyResponse) for _ in range(n)]
+
+    def slots():
+        rng = random.Random(args.seed)
+        return [_make_record(rng, RPCRequestRecord, RPCResponseRecord) for _ in range(n)]
+
+    def compact():
+        rng = random.Random(args.seed)
+        store = CompactRecordStore()
+        for _ in range(n):
+            store.append(*_make_record(rng, RPCRequestRecord, RPCResponseRecord))
+        return store
+
+    rows = []
+    for name, build in (("dataclass (__dict__)", legacy), ("dataclass (slots)", slots), ("CompactRecordStore", compact)):
+        nbytes, elapsed, holder = _measure(build)
+        rows.append((name, nbytes, elapsed))
+        del holder
+
+    baseline = rows[0][1]
+    print(f"records: {n}")
+    print(f"{'representation':<24}{'total MB':>10}{'bytes/record':>14}{'vs __dict__':>13}{'build s':>10}")
+    for name, nbytes, elapsed in rows:
+        print(f"{name:<24}{nbytes / 1e6:>10.1f}{nbytes / n:>14.0f}{nbytes / baseline:>12.0%}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
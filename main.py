@@ -2,16 +2,52 @@
 """
 RPC 隐私泄露分析 - 主入口
 用法: python main.py [--dry-run] [--providers infura,alchemy] [--output report.md]
+            [--concurrency thread --workers 8 --per-provider 2] [--capture capture.ndjson.gz]
+      python main.py --analyze-only capture.ndjson.gz [--output report.md]
+      python main.py --load --duration 30 [--rate 50 | --workers 16]
+      python main.py --cache [--cache-scope wallet] [--concurrency thread --coalesce] [--rate-limit]
+      python main.py --providers infura,alchemy --route address,random,latency [--hedge-ms 200]
+      python main.py --checkpoint output/ckpt [--resume]
+      python main.py --trace output/trace.json      # Chrome trace（chrome://tracing / Perfetto）
+      python main.py --transport ws                 # WebSocket 持久连接 + 新区块订阅场景
+      python main.py --population 10000 [--seed 7]  # 合成用户群体，评估群体规模下的关联风险
+      python main.py --shards 4                     # 本机 4 个进程分片执行并合并
+      python main.py --shard 1/4 ... ; python main.py merge output/shards/shard-*-of-4.ndjson.gz
+      python main.py --capture output/captures.db   # SQLite 抓包库，多次运行累积
+      python main.py query output/captures.db --address 0x... [--wallet metamask] | --runs | --report [--provider P]
+      python main.py --capture output/capture.ndjson.gz --html output/dashboard   # HTML 仪表盘 + 分页记录
 """
 import argparse
+import itertools
 import json
+import sys
+from datetime import datetime
 from pathlib import Path
 
-from src.collectors.runner import run_all
-from src.reporters.report_generator import generate_markdown_report, save_report
+from src.collectors.capture import iter_capture
+from src.collectors.capture_db import address_sightings, import_capture, is_db_path, iter_db, list_runs
+from src.collectors.checkpoint import JOURNAL_NAME
+from src.collectors.load import DEFAULT_LOAD_DURATION_S, DEFAULT_MAX_IN_FLIGHT, run_load
+from src.collectors.population import run_population
+from src.collectors.routing import run_routed
+from src.collectors.runner import DEFAULT_MAX_WORKERS, EXECUTION_MODES, analyze_capture, run_all
+from src.collectors.shard import DEFAULT_SHARD_DIR, merge_shards, parse_shard, run_shard, run_sharded, shard_path
+from src.router import ROUTING_POLICIES
+from src.rpc_client import TRANSPORTS
+from src.tracing import TraceRecorder
+from src.rpc_cache import CACHE_SCOPES
+from src.reporters.html_report import DEFAULT_PAGE_SIZE, save_html_report
+from src.reporters.report_generator import save_report
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        merge_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        query_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="RPC 隐私泄露分析")
     parser.add_argument("--dry-run", action="store_true", help="仅检查配置，不实际请求")
     parser.add_argument(
@@ -38,34 +74,474 @@ def main():
         default="",
         help="同时输出 JSON 数据路径",
     )
+    parser.add_argument(
+        "--html",
+        type=str,
+        default="",
+        metavar="DIR",
+        help="同时输出 HTML 仪表盘目录（index.html + 分页记录）；指定 --capture 时记录页包含全部记录",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help="HTML 记录页每页条数",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=str,
+        choices=EXECUTION_MODES,
+        default="sequential",
+        help="执行模式：sequential 顺序 / thread 线程池 / asyncio",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="并发模式下的全局并发数",
+    )
+    parser.add_argument(
+        "--per-provider",
+        type=int,
+        default=0,
+        help="并发模式下单个 RPC 提供商的最大并发数，0 表示不限制",
+    )
+    parser.add_argument(
+        "--transport",
+        type=str,
+        choices=TRANSPORTS,
+        default="http",
+        help="传输方式：http 共享 keep-alive 连接池 / ws 每个钱包会话一条 WebSocket 连接（追加订阅场景）",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="场景中可合并的调用以 JSON-RPC 批量请求发送",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="启用客户端响应缓存：按区块号/哈希的不可变读取永久缓存，latest 类读取按 TTL 缓存",
+    )
+    parser.add_argument(
+        "--cache-scope",
+        type=str,
+        choices=CACHE_SCOPES,
+        default=None,
+        help="缓存作用域：provider 钱包间共享 / wallet 每个钱包独立；默认取 config.yaml 中 cache.scope",
+    )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="合并各钱包会话中相同的在途请求（eth_blockNumber 等不含地址的读取），仅并发/负载模式下生效",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="按 provider 自适应限流（令牌桶，遇 429 / Retry-After 降速），幂等方法出错时退避重试",
+    )
+    parser.add_argument(
+        "--route",
+        type=str,
+        default="",
+        metavar="POLICIES",
+        help=f"多 RPC 路由：每个钱包的请求分散到 --providers 中的多个节点，按策略对比（逗号分隔：{','.join(ROUTING_POLICIES)}）",
+    )
+    parser.add_argument(
+        "--hedge-ms",
+        type=float,
+        default=0,
+        help="路由模式下的对冲请求：首选节点超过该毫秒数未返回时向另一节点重发，0 表示不对冲",
+    )
+    parser.add_argument(
+        "--population",
+        type=int,
+        default=0,
+        metavar="N",
+        help="合成用户群体模式：按 config.yaml 的 population 配置生成 N 个用户并发执行（0 表示使用网格模式）",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="合成用户群体的随机种子（覆盖 config.yaml 中的 population.seed）",
+    )
+    parser.add_argument(
+        "--capture",
+        type=str,
+        default="",
+        help="记录流式写入 NDJSON 抓包文件（.gz 后缀自动压缩）或 SQLite 抓包库（.db / .sqlite 后缀，追加为新的一次运行），分析阶段从中读取",
+    )
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="在本进程内启动本地替身 RPC 节点（provider ID: local_standin），用于离线压测",
+    )
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="负载测试模式：在固定时长内循环执行场景，统计各 provider x wallet x method 的延迟分位数",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=DEFAULT_LOAD_DURATION_S,
+        help="负载测试时长（秒）",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="负载测试开环目标速率（每秒场景次数）；为 0 时按 --workers 个并发虚拟用户闭环执行",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help="开环负载测试同时在途的场景执行上限",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default="",
+        metavar="DIR",
+        help="检查点目录：每个 钱包 x RPC x 场景 结束即持久化，报告从检查点构建",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从 --checkpoint 续跑：跳过已成功的单元格，只重跑失败或缺失的",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default="",
+        metavar="FILE",
+        help="导出 Chrome trace 事件文件：每个场景、每次调用及其各阶段一个 span",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help="本机以 N 个进程分片执行网格（钱包 x RPC x 场景）并合并结果",
+    )
+    parser.add_argument(
+        "--shard",
+        type=str,
+        default="",
+        metavar="I/N",
+        help="只执行第 I 个分片（共 N 个，I 从 1 开始），结果写入分片文件，之后用 merge 子命令合并",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        default=DEFAULT_SHARD_DIR,
+        help="分片文件目录",
+    )
+    parser.add_argument(
+        "--analyze-only",
+        type=str,
+        default="",
+        metavar="CAPTURE",
+        help="仅重新分析已有抓包文件，不发送任何请求",
+    )
     args = parser.parse_args()
+    if args.route and (args.shard or args.shards > 1):
+        parser.error("--route 不支持分片执行")
+    if args.population and (args.load or args.route or args.checkpoint or args.shard or args.shards > 1):
+        parser.error("--population 不支持 --load / --route / --checkpoint / 分片")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume 需要 --checkpoint")
+    if args.checkpoint and (args.load or args.route or args.shard or args.shards > 1):
+        parser.error("--checkpoint 仅用于网格执行（不支持 --load / --route / 分片）")
+    if args.checkpoint and not args.resume and (Path(args.checkpoint) / JOURNAL_NAME).exists():
+        parser.error(f"检查点 {args.checkpoint} 已存在：加 --resume 续跑，或先删除该目录")
+    if args.capture and is_db_path(Path(args.capture)) and (args.shard or args.shards > 1):
+        parser.error("分片文件须为 NDJSON，--capture 不支持 SQLite 抓包库与分片同时使用")
+    if args.trace and (args.shard or args.shards > 1):
+        parser.error("--trace 不支持分片执行")
+    if args.page_size < 1:
+        parser.error("--page-size 须为正整数")
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
 
     if args.dry_run:
-        from src.config_loader import load_config, get_rpc_url, get_wallet_headers
+        from src.config_loader import load_config, get_rpc_url, get_wallet_headers, get_ws_url
         config = load_config()
         providers = args.providers.split(",")
         for p in providers:
             try:
-                url = get_rpc_url(p.strip())
+                url = get_ws_url(p.strip()) if args.transport == "ws" else get_rpc_url(p.strip())
                 print(f"[OK] {p}: {url[:50]}...")
             except Exception as e:
                 print(f"[FAIL] {p}: {e}")
         return
 
+    if args.analyze_only:
+        print(f"重新分析抓包文件: {args.analyze_only}")
+        data = analyze_capture(Path(args.analyze_only))
+        _write_outputs(data, args, iter_capture(Path(args.analyze_only)))
+        return
+
     providers = [p.strip() for p in args.providers.split(",")]
     wallets = [w.strip() for w in args.wallets.split(",")]
 
+    standin = None
+    if args.standin:
+        from src.standin_server import StandinServer, get_standin_options
+        standin = StandinServer(get_standin_options()).start()
+        print(f"本地替身节点已启动: {standin.ws_url if args.transport == 'ws' else standin.url}")
+
     print("开始执行 RPC 隐私分析...")
     print(f"  Wallets: {wallets}")
     print(f"  Providers: {providers}")
+    if args.load:
+        print(f"  Load: {args.duration}s, " + (f"rate {args.rate}/s" if args.rate else f"{args.workers} workers"))
+    elif args.route:
+        print(f"  Routing: {args.route}" + (f", hedge {args.hedge_ms}ms" if args.hedge_ms else ""))
+    elif args.population:
+        print(f"  Population: {args.population} users, {args.workers} workers")
+    else:
+        print(f"  Concurrency: {args.concurrency}")
+    if args.transport != "http":
+        print(f"  Transport: {args.transport}")
+
+    # run_all / run_load 共用的参数
+    options = {
+        "batch": args.batch,
+        "cache": args.cache,
+        "cache_scope": args.cache_scope,
+        "coalesce": args.coalesce,
+        "rate_limit": args.rate_limit,
+        "transport": args.transport,
+    }
+    if args.load:
+        options.update(
+            duration_s=args.duration,
+            rate=args.rate or None,
+            concurrency=args.workers,
+            max_in_flight=args.max_in_flight,
+        )
+    else:
+        options.update(
+            mode=args.concurrency,
+            max_workers=args.workers,
+            per_provider_limit=args.per_provider or None,
+        )
+    capture_path = Path(args.capture) if args.capture else None
+    tracer = TraceRecorder() if args.trace else None
+    hooks = [tracer] if tracer is not None else None
+    if hooks is not None:
+        options["hooks"] = hooks
+
+    try:
+        if args.shard:
+            index, count = parse_shard(args.shard)
+            path = capture_path or shard_path(Path(args.shard_dir), index, count)
+            run_shard(index, count, path, args.load, wallets, providers, **options)
+            print(f"分片 {index}/{count} 已保存: {path}")
+            print("全部分片完成后使用 python main.py merge <分片文件...> 合并")
+            return
+        if args.shards > 1:
+            data = run_sharded(args.shards, Path(args.shard_dir), args.load, wallets, providers, **options)
+        elif args.load:
+            data = run_load(wallets=wallets, providers=providers, capture_path=capture_path, **options)
+        elif args.route:
+            data = run_routed(
+                wallets=wallets,
+                providers=providers,
+                policies=[p.strip() for p in args.route.split(",")],
+                hedge_after_ms=args.hedge_ms or None,
+                max_workers=args.workers if args.concurrency != "sequential" else 1,
+                batch=args.batch,
+                capture_path=capture_path,
+                rate_limit=args.rate_limit,
+                hooks=hooks,
+                transport=args.transport,
+            )
+        elif args.population:
+            data = run_population(
+                providers=providers,
+                users=args.population,
+                seed=args.seed,
+                max_workers=args.workers,
+                batch=args.batch,
+                capture_path=capture_path,
+                rate_limit=args.rate_limit,
+                hooks=hooks,
+                transport=args.transport,
+            )
+        elif args.checkpoint:
+            data = run_all(
+                wallets=wallets,
+                providers=providers,
+                capture_path=capture_path,
+                checkpoint_dir=Path(args.checkpoint),
+                resume=args.resume,
+                **options,
+            )
+        else:
+            data = run_all(wallets=wallets, providers=providers, capture_path=capture_path, **options)
+    finally:
+        if standin is not None:
+            standin.stop()
+    print(
+        f"  耗时 {data['summary']['wall_clock_s']}s，"
+        f"吞吐 {data['summary']['requests_per_sec']} req/s"
+    )
+
+    if data.get("cache"):
+        cache = data["cache"]
+        print(f"  缓存命中率 {cache['hit_rate'] * 100:.1f}%，节省往返 {cache['round_trips_saved']} 次")
+
+    if data.get("coalescing"):
+        print(f"  请求合并比例 {data['coalescing']['coalesce_rate'] * 100:.1f}%")
+
+    if data.get("population"):
+        population = data["population"]
+        risk = population["linkage_risk"]
+        print(f"  合成用户 {population['users']} 个，执行场景 {sum(population['actions'].values())} 次")
+        for provider_id, row in risk.items():
+            print(f"  {provider_id}: 多地址用户完整关联 {row['linked_rate'] * 100:.1f}%，簇内同一用户地址对 {row['pair_precision'] * 100:.1f}%")
+
+    if args.capture:
+        print(f"抓包已保存: {args.capture}")
+    if tracer is not None:
+        tracer.save(Path(args.trace))
+        print(f"Trace 已保存: {args.trace}（{len(tracer.events)} 个事件，丢弃 {tracer.dropped} 个）")
+    if args.shards > 1:
+        print(f"分片文件: {args.shard_dir}")
+    if data["summary"].get("checkpoint"):
+        checkpoint = data["summary"]["checkpoint"]
+        print(f"  检查点: 执行 {checkpoint['executed_cells']} 个单元格，跳过 {checkpoint['skipped_cells']} 个已完成的")
+    records = None
+    if args.html and args.shards > 1:
+        records = _shard_records([shard_path(Path(args.shard_dir), i, args.shards) for i in range(1, args.shards + 1)])
+    elif args.html and capture_path:
+        records = _capture_records(capture_path)
+    _write_outputs(data, args, records)
+    print("完成。")
+
+
+def merge_main(argv: list[str]) -> None:
+    """python main.py merge SHARD... ：合并分片文件，生成与单进程运行相同的报告"""
+    parser = argparse.ArgumentParser(prog="main.py merge", description="合并分片执行的结果文件")
+    parser.add_argument("shards", nargs="+", help="分片文件（--shard / --shards 的输出）")
+    parser.add_argument("--output", type=str, default="output/report.md", help="报告输出路径")
+    parser.add_argument("--json", type=str, default="", help="同时输出 JSON 数据路径")
+    parser.add_argument("--html", type=str, default="", metavar="DIR", help="同时输出 HTML 仪表盘目录")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="HTML 记录页每页条数")
+    args = parser.parse_args(argv)
+    if args.page_size < 1:
+        parser.error("--page-size 须为正整数")
+
+    print(f"合并 {len(args.shards)} 个分片文件...")
+    try:
+        data = merge_shards([Path(p) for p in args.shards])
+    except ValueError as e:
+        parser.error(str(e))
+    shards = data["config"]["shards"]
+    if len(shards["merged"]) < shards["count"]:
+        print(f"  注意：仅合并了 {len(shards['merged'])}/{shards['count']} 个分片，结果只覆盖这些分片")
+    _write_outputs(data, args, _shard_records([Path(p) for p in args.shards]))
+    print("完成。")
+
+
+def query_main(argv: list[str]) -> None:
+    """python main.py query DB ...：在 SQLite 抓包库上按索引查询，无需重新请求"""
+    parser = argparse.ArgumentParser(prog="main.py query", description="查询 SQLite 抓包库")
+    parser.add_argument("db", help="抓包库（--capture xxx.db 的输出）")
+    parser.add_argument("--runs", action="store_true", help="列出库中的各次运行")
+    parser.add_argument("--report", action="store_true", help="对满足条件的记录生成报告")
+    parser.add_argument("--import", dest="import_path", type=str, default="", metavar="CAPTURE",
+                        help="把 NDJSON 抓包文件导入库中（作为新的一次运行）")
+    parser.add_argument("--run", type=str, default="", help="只查询这些运行，逗号分隔的运行编号")
+    parser.add_argument("--provider", type=str, default="")
+    parser.add_argument("--wallet", type=str, default="")
+    parser.add_argument("--method", type=str, default="")
+    parser.add_argument("--address", type=str, default="", help="只查询暴露了该地址的请求；单独使用时列出看到该地址的 provider x 钱包")
+    parser.add_argument("--since", type=float, default=None, help="起始时间（Unix 秒）")
+    parser.add_argument("--until", type=float, default=None, help="截止时间（Unix 秒，不含）")
+    parser.add_argument("--output", type=str, default="output/report.md", help="--report 的报告输出路径")
+    parser.add_argument("--json", type=str, default="", help="--report 同时输出 JSON 数据路径")
+    parser.add_argument("--html", type=str, default="", metavar="DIR", help="--report 同时输出 HTML 仪表盘目录")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="HTML 记录页每页条数")
+    args = parser.parse_args(argv)
+    if args.page_size < 1:
+        parser.error("--page-size 须为正整数")
+    db = Path(args.db)
+    if not is_db_path(db):
+        parser.error("抓包库后缀须为 .db / .sqlite / .sqlite3")
+    if not args.import_path and not db.exists():
+        parser.error(f"抓包库不存在: {db}")
+
+    if args.import_path:
+        run_id = import_capture(Path(args.import_path), db)
+        print(f"已导入 {args.import_path} -> {db}（运行 {run_id}）")
+        return
+
+    filters = {
+        "run_ids": [int(r) for r in args.run.split(",") if r.strip()] or None,
+        "provider": args.provider or None,
+        "wallet": args.wallet or None,
+        "method": args.method or None,
+        "address": args.address or None,
+        "since": args.since,
+        "until": args.until,
+    }
+    if args.runs:
+        for run in list_runs(db):
+            config = run["config"] or {}
+            created = datetime.fromtimestamp(run["created"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(
+                f"  运行 {run['id']}  {created}  {run['requests']} 条请求  "
+                f"钱包 {','.join(config.get('wallets', []))}  RPC {','.join(config.get('providers', []))}"
+            )
+    elif args.report:
+        data = analyze_capture(db, **filters)
+        print(f"分析 {data['summary']['total_requests']} 条记录（{len(data['capture_db']['runs'])} 次运行）")
+        _write_outputs(data, args, iter_db(db, **filters))
+    elif args.address:
+        sightings = address_sightings(db, **filters)
+        if not sightings:
+            print(f"没有请求暴露地址 {args.address}")
+        for s in sightings:
+            first = datetime.fromtimestamp(s["first_seen"]).strftime("%Y-%m-%d %H:%M:%S")
+            last = datetime.fromtimestamp(s["last_seen"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(
+                f"  {s['provider']} / {s['wallet']}: {s['requests']} 次（{s['runs']} 次运行，{first} ~ {last}）"
+                f" 方法 {', '.join(s['methods'])}"
+            )
+    else:
+        parser.error("需要 --runs、--report、--address 或 --import 之一")
+
 
-    data = run_all(wallets=wallets, providers=providers)
+def _capture_records(path: Path):
+    """本次运行的记录流：NDJSON 抓包整个文件，SQLite 抓包库取最近一次运行（即本次写入的运行）"""
+    if is_db_path(path):
+        runs = list_runs(path)
+        return iter_db(path, run_ids=[runs[-1]["id"]]) if runs else None
+    return iter_capture(path)
 
-    # 输出报告
+
+def _shard_records(paths: list[Path]):
+    """各分片文件中的记录流（按分片顺序）"""
+    return itertools.chain.from_iterable(iter_capture(p) for p in paths if p.exists())
+
+
+def _write_outputs(data: dict, args: argparse.Namespace, records=None) -> None:
+    """输出 Markdown 报告、可选 JSON 与可选 HTML 仪表盘（records 为记录流时 HTML 记录页包含全部记录）"""
     out_path = Path(args.output)
     save_report(data, out_path)
     print(f"报告已保存: {out_path}")
 
+    if args.html:
+        html = save_html_report(data, Path(args.html), records=records, page_size=args.page_size)
+        print(f"HTML 仪表盘已保存: {html['index']}（{html['records']} 条记录，{html['pages']} 页）")
+
     if args.json:
         json_path = Path(args.json)
         json_path.parent.mkdir(parents=True, exist_ok=True)
@@ -74,13 +550,29 @@ def main():
             "config": data["config"],
             "summary": data["summary"],
             "privacy_analysis": data["privacy_analysis"],
+            "linkage": data.get("linkage", {}),
+            "timing": data.get("timing", []),
+            "calldata": data.get("calldata", {}),
+            "latency": data.get("latency", {}),
             "errors": data.get("errors", []),
         }
+        if data.get("cache"):
+            json_data["cache"] = data["cache"]
+        if data.get("coalescing"):
+            json_data["coalescing"] = data["coalescing"]
+        if data.get("rate_limit"):
+            json_data["rate_limit"] = data["rate_limit"]
+        if data.get("routing"):
+            json_data["routing"] = data["routing"]
+        if data.get("load"):
+            json_data["load"] = data["load"]
+        if data.get("population"):
+            json_data["population"] = data["population"]
+        if data.get("capture_db"):
+            json_data["capture_db"] = data["capture_db"]
         json_path.write_text(json.dumps(json_data, ensure_ascii=False, indent=2), encoding="utf-8")
         print(f"JSON 已保存: {json_path}")
 
-    print("完成。")
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,428 @@
+"""
+调用数据解码 - 解析 eth_call / eth_estimateGas 的 data，给出函数名与参数值
+
+- 选择器库：按 4 字节选择器排序的定长条目 + 签名字符串表，内存映射（mmap）后二分查找，
+  不需要把整个库载入为 Python 对象；可由 4byte 等导出的文本构建为文件
+- ABI 解码：address / bool / uintN / intN / bytesN / bytes / string / T[] / 元组
+- 选择器解析与整条 calldata 解码均有 LRU 缓存，场景中的重复调用只解码一次
+
+用法: python -m src.analyzers.calldata build --out selectors.idx [signatures.tsv ...]
+      文本每行 "0x选择器 签名"，签名可带参数名，如 "0xa9059cbb transfer(address to,uint256 amount)"
+"""
+import argparse
+import mmap
+import struct
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from ..config_loader import load_config
+
+# 内置选择器库：常用 ERC20 / WETH / Uniswap V2、V3 路由与 Multicall 函数，带参数名便于展示
+BUILTIN_SIGNATURES = {
+    "0xa9059cbb": "transfer(address to,uint256 amount)",
+    "0x095ea7b3": "approve(address spender,uint256 amount)",
+    "0x23b872dd": "transferFrom(address from,address to,uint256 amount)",
+    "0x70a08231": "balanceOf(address owner)",
+    "0xdd62ed3e": "allowance(address owner,address spender)",
+    "0x18160ddd": "totalSupply()",
+    "0x313ce567": "decimals()",
+    "0x95d89b41": "symbol()",
+    "0x06fdde03": "name()",
+    "0xd0e30db0": "deposit()",
+    "0x2e1a7d4d": "withdraw(uint256 amount)",
+    "0x0902f1ac": "getReserves()",
+    "0xd06ca61f": "getAmountsOut(uint256 amountIn,address[] path)",
+    "0x1f00ca74": "getAmountsIn(uint256 amountOut,address[] path)",
+    "0x38ed1739": "swapExactTokensForTokens(uint256 amountIn,uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0x8803dbee": "swapTokensForExactTokens(uint256 amountOut,uint256 amountInMax,address[] path,address to,uint256 deadline)",
+    "0x7ff36ab5": "swapExactETHForTokens(uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0x4a25d94a": "swapTokensForExactETH(uint256 amountOut,uint256 amountInMax,address[] path,address to,uint256 deadline)",
+    "0x18cbafe5": "swapExactTokensForETH(uint256 amountIn,uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0xfb3bdb41": "swapETHForExactTokens(uint256 amountOut,address[] path,address to,uint256 deadline)",
+    "0x5c11d795": "swapExactTokensForTokensSupportingFeeOnTransferTokens(uint256 amountIn,uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0xb6f9de95": "swapExactETHForTokensSupportingFeeOnTransferTokens(uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0x791ac947": "swapExactTokensForETHSupportingFeeOnTransferTokens(uint256 amountIn,uint256 amountOutMin,address[] path,address to,uint256 deadline)",
+    "0xe8e33700": "addLiquidity(address tokenA,address tokenB,uint256 amountADesired,uint256 amountBDesired,uint256 amountAMin,uint256 amountBMin,address to,uint256 deadline)",
+    "0xf305d719": "addLiquidityETH(address token,uint256 amountTokenDesired,uint256 amountTokenMin,uint256 amountETHMin,address to,uint256 deadline)",
+    "0xbaa2abde": "removeLiquidity(address tokenA,address tokenB,uint256 liquidity,uint256 amountAMin,uint256 amountBMin,address to,uint256 deadline)",
+    "0x02751cec": "removeLiquidityETH(address token,uint256 liquidity,uint256 amountTokenMin,uint256 amountETHMin,address to,uint256 deadline)",
+    "0x414bf389": "exactInputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160) params)",
+    "0xdb3e2198": "exactOutputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160) params)",
+    "0xc04b8d59": "exactInput((bytes,address,uint256,uint256,uint256) params)",
+    "0xf7729d43": "quoteExactInputSingle(address tokenIn,address tokenOut,uint24 fee,uint256 amountIn,uint160 sqrtPriceLimitX96)",
+    "0xac9650d8": "multicall(bytes[] data)",
+    "0x252dba42": "aggregate((address,bytes)[] calls)",
+}
+
+# 索引文件格式：头部 magic + 条目数 + 字符串表偏移；条目为 (选择器 4B, 字符串偏移 u32, 字符串长度 u16)
+_MAGIC = b"RPCSEL01"
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<4sIH")
+# 解码缓存容量
+SELECTOR_CACHE_SIZE = 4096
+CALLDATA_CACHE_SIZE = 65536
+
+
+def _split_top_level(s: str) -> list[str]:
+    """按顶层逗号切分（忽略括号内的逗号）"""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(s):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(s[start:i])
+            start = i + 1
+    if s[start:]:
+        parts.append(s[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _split_param(param: str) -> tuple[str, Optional[str]]:
+    """"address to" -> ("address", "to")；元组类型 "(a,b)[] calls" 同样适用"""
+    if param.startswith("("):
+        depth = 0
+        for i, ch in enumerate(param):
+            depth += ch == "("
+            depth -= ch == ")"
+            if depth == 0:
+                end = i + 1
+                while end < len(param) and param[end] != " ":
+                    end += 1
+                return param[:end], param[end:].strip() or None
+    typ, _, name = param.partition(" ")
+    return typ, name.strip() or None
+
+
+def parse_signature(signature: str) -> tuple[str, list[str], list[str]]:
+    """"transfer(address to,uint256 amount)" -> ("transfer", ["address", "uint256"], ["to", "amount"])"""
+    fn, _, rest = signature.partition("(")
+    params = [_split_param(p) for p in _split_top_level(rest[:-1])]
+    types = [t for t, _ in params]
+    names = [n or f"arg{i}" for i, (_, n) in enumerate(params)]
+    return fn, types, names
+
+
+def canonical_signature(signature: str) -> str:
+    """去掉参数名的规范签名，即计算选择器所用的文本"""
+    fn, types, _ = parse_signature(signature)
+    return f"{fn}({','.join(types)})"
+
+
+# ---------------------------------------------------------------- ABI 解码
+
+def _is_dynamic(typ: str) -> bool:
+    if typ in ("bytes", "string") or typ.endswith("[]"):
+        return True
+    if typ.startswith("("):
+        return any(_is_dynamic(t) for t in _split_top_level(typ[1:-1]))
+    return False
+
+
+def _head_size(typ: str) -> int:
+    if typ.startswith("(") and not _is_dynamic(typ):
+        return sum(_head_size(t) for t in _split_top_level(typ[1:-1]))
+    return 32
+
+
+def _word(data: bytes, offset: int) -> int:
+    if offset + 32 > len(data):
+        raise ValueError("calldata truncated")
+    return int.from_bytes(data[offset:offset + 32], "big")
+
+
+def _decode_static(typ: str, data: bytes, offset: int) -> Any:
+    if typ == "address":
+        return "0x" + _word(data, offset).to_bytes(32, "big")[12:].hex()
+    if typ == "bool":
+        return bool(_word(data, offset))
+    if typ.startswith("uint"):
+        return _word(data, offset)
+    if typ.startswith("int"):
+        bits = int(typ[3:] or 256)
+        value = _word(data, offset) & ((1 << bits) - 1)
+        return value - (1 << bits) if value >> (bits - 1) else value
+    if typ.startswith("bytes"):
+        return "0x" + _word(data, offset).to_bytes(32, "big")[: int(typ[5:])].hex()
+    raise ValueError(f"unsupported ABI type: {typ}")
+
+
+def _decode_tuple(types: list[str], data: bytes, base: int) -> list[Any]:
+    """解码以 base 为起点的一组值（函数参数、元组成员、数组元素）"""
+    values, head = [], base
+    for typ in types:
+        if _is_dynamic(typ):
+            values.append(_decode_value(typ, data, base + _word(data, head)))
+        else:
+            values.append(_decode_value(typ, data, head))
+        head += _head_size(typ)
+    return values
+
+
+def _decode_value(typ: str, data: bytes, offset: int) -> Any:
+    if typ.endswith("[]"):
+        length = _word(data, offset)
+        if length > len(data) // 32:
+            raise ValueError("array length out of range")
+        return _decode_tuple([typ[:-2]] * length, data, offset + 32)
+    if typ.startswith("("):
+        return _decode_tuple(_split_top_level(typ[1:-1]), data, offset)
+    if typ in ("bytes", "string"):
+        length = _word(data, offset)
+        raw = data[offset + 32:offset + 32 + length]
+        if len(raw) < length:
+            raise ValueError("calldata truncated")
+        return raw.decode("utf-8", "replace") if typ == "string" else "0x" + raw.hex()
+    return _decode_static(typ, data, offset)
+
+
+def decode_arguments(types: list[str], data: bytes) -> list[Any]:
+    """按类型列表解码参数区（不含 4 字节选择器）"""
+    return _decode_tuple(types, data, 0)
+
+
+# ---------------------------------------------------------------- 选择器索引
+
+def build_index_bytes(signatures: dict[str, list[str]]) -> bytes:
+    """{选择器: [签名, ...]} -> 索引文件内容；同一选择器可有多个签名（碰撞）"""
+    entries, strings = [], bytearray()
+    for selector in sorted(signatures, key=lambda s: bytes.fromhex(s[2:])):
+        for sig in dict.fromkeys(signatures[selector]):
+            raw = sig.encode("utf-8")
+            entries.append(_ENTRY.pack(bytes.fromhex(selector[2:]), len(strings), len(raw)))
+            strings += raw
+    strings_offset = _HEADER.size + _ENTRY.size * len(entries)
+    return _HEADER.pack(_MAGIC, len(entries), strings_offset) + b"".join(entries) + bytes(strings)
+
+
+def read_signature_file(path: Path) -> dict[str, list[str]]:
+    """读取 "0x选择器 签名" 文本（空格或制表符分隔，# 开头为注释）"""
+    out: dict[str, list[str]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            selector, _, sig = line.replace("\t", " ").partition(" ")
+            selector = selector.lower()
+            if len(selector) == 10 and selector.startswith("0x") and sig.strip():
+                out.setdefault(selector, []).append(sig.strip())
+    return out
+
+
+class SelectorIndex:
+    """内存映射的有序选择器索引，二分查找"""
+
+    def __init__(self, buffer: mmap.mmap, path: Optional[Path] = None):
+        self._buf = buffer
+        self.path = path
+        magic, self._count, self._strings = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"not a selector index: {path}")
+
+    @classmethod
+    def open(cls, path: Path) -> "SelectorIndex":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), Path(path))
+
+    @classmethod
+    def from_signatures(cls, signatures: dict[str, list[str]]) -> "SelectorIndex":
+        """在匿名内存映射中构建索引（不落盘）"""
+        data = build_index_bytes(signatures)
+        buf = mmap.mmap(-1, len(data))
+        buf.write(data)
+        return cls(buf)
+
+    def _selector_at(self, i: int) -> bytes:
+        return self._buf[_HEADER.size + i * _ENTRY.size:_HEADER.size + i * _ENTRY.size + 4]
+
+    def lookup(self, selector: bytes) -> list[str]:
+        """返回选择器对应的全部签名（按录入顺序），未知时为空列表"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._selector_at(mid) < selector:
+                lo = mid + 1
+            else:
+                hi = mid
+        out = []
+        while lo < self._count and self._selector_at(lo) == selector:
+            _, off, length = _ENTRY.unpack_from(self._buf, _HEADER.size + lo * _ENTRY.size)
+            start = self._strings + off
+            out.append(self._buf[start:start + length].decode("utf-8"))
+            lo += 1
+        return out
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._buf.close()
+
+
+_index: Optional[SelectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_selector_index() -> SelectorIndex:
+    """默认索引：config.yaml 中 calldata.selector_index 指定的文件，否则为内置库"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = (load_config().get("calldata") or {}).get("selector_index")
+                if path and Path(path).exists():
+                    _index = SelectorIndex.open(Path(path))
+                else:
+                    _index = SelectorIndex.from_signatures({k: [v] for k, v in BUILTIN_SIGNATURES.items()})
+    return _index
+
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def resolve_selector(selector: str) -> Optional[tuple[str, tuple[str, ...], tuple[str, ...]]]:
+    """选择器 -> (函数名, 参数类型, 参数名)；多个签名时取第一个"""
+    try:
+        sigs = get_selector_index().lookup(bytes.fromhex(selector[2:]))
+    except ValueError:
+        return None
+    if not sigs:
+        return None
+    fn, types, names = parse_signature(sigs[0])
+    return fn, tuple(types), tuple(names)
+
+
+@lru_cache(maxsize=CALLDATA_CACHE_SIZE)
+def decode_calldata(data: str) -> Optional[dict[str, Any]]:
+    """解码 0x 开头的 calldata；返回 {selector, function, signature, args, addresses, error}
+
+    未知选择器返回 function=None；参数解码失败时保留函数名并给出 error。不合法输入返回 None。
+    结果被缓存共享，调用方不应修改。
+    """
+    if not isinstance(data, str) or not data.startswith("0x") or len(data) < 10:
+        return None
+    selector = data[:10].lower()
+    out: dict[str, Any] = {
+        "selector": selector, "function": None, "signature": None, "args": {}, "addresses": [], "error": None,
+    }
+    resolved = resolve_selector(selector)
+    if resolved is None:
+        return out
+    fn, types, names = resolved
+    out["function"] = fn
+    out["signature"] = f"{fn}({','.join(types)})"
+    try:
+        values = decode_arguments(list(types), bytes.fromhex(data[10:]))
+    except ValueError as e:
+        out["error"] = str(e)
+        return out
+    out["args"] = dict(zip(names, values))
+    out["addresses"] = list(dict.fromkeys(_collect_addresses(types, values)))
+    return out
+
+
+def _collect_addresses(types: Iterable[str], values: Iterable[Any]) -> Iterable[str]:
+    for typ, value in zip(types, values):
+        if typ == "address":
+            yield value
+        elif typ.endswith("[]"):
+            yield from _collect_addresses([typ[:-2]] * len(value), value)
+        elif typ.startswith("("):
+            yield from _collect_addresses(_split_top_level(typ[1:-1]), value)
+
+
+class CalldataStats:
+    """按函数统计调用数据解码结果，附参数示例（非线程安全，由调用方加锁）"""
+
+    def __init__(self):
+        self.calls = 0
+        self.by_function: dict[str, dict[str, Any]] = {}
+        self.unknown_selectors: dict[str, int] = {}
+        self.decode_errors = 0
+        self._addresses: dict[str, None] = {}
+        self._example_ts: dict[str, float] = {}
+
+    def add(self, req, resp):
+        if resp.source != "upstream" or req.method not in ("eth_call", "eth_estimateGas"):
+            return
+        decoded = decode_calldata(call_data_of(req.params))
+        if decoded is None:
+            return
+        self.calls += 1
+        if decoded["function"] is None:
+            self.unknown_selectors[decoded["selector"]] = self.unknown_selectors.get(decoded["selector"], 0) + 1
+            return
+        if decoded["error"]:
+            self.decode_errors += 1
+        entry = self.by_function.get(decoded["signature"])
+        if entry is None:
+            entry = self.by_function[decoded["signature"]] = {
+                "calls": 0,
+                "methods": {},
+                "example": format_args(decoded["args"]),
+            }
+            self._example_ts[decoded["signature"]] = req.timestamp
+        elif req.timestamp < self._example_ts[decoded["signature"]]:
+            # 示例取最早的一次调用，与记录到达顺序无关
+            entry["example"] = format_args(decoded["args"])
+            self._example_ts[decoded["signature"]] = req.timestamp
+        entry["calls"] += 1
+        entry["methods"][req.method] = entry["methods"].get(req.method, 0) + 1
+        for addr in decoded["addresses"]:
+            self._addresses.setdefault(addr)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "decoded": sum(e["calls"] for e in self.by_function.values()),
+            "decode_errors": self.decode_errors,
+            "addresses_in_calldata": len(self._addresses),
+            "by_function": dict(sorted(self.by_function.items(), key=lambda kv: (-kv[1]["calls"], kv[0]))),
+            "unknown_selectors": dict(sorted(self.unknown_selectors.items(), key=lambda kv: (-kv[1], kv[0]))),
+        }
+
+
+def call_data_of(params: list) -> Optional[str]:
+    """从 eth_call / eth_estimateGas 参数中取出 data（或 input）字段"""
+    if params and isinstance(params[0], dict):
+        return params[0].get("data") or params[0].get("input")
+    return None
+
+
+def format_args(args: dict[str, Any], max_len: int = 200) -> str:
+    text = ", ".join(f"{k}={v}" for k, v in args.items())
+    return text if len(text) <= max_len else text[: max_len - 3] + "..."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建选择器索引文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="由内置库与签名文本构建索引")
+    build.add_argument("sources", nargs="*", help="签名文本文件，每行 \"0x选择器 签名\"")
+    build.add_argument("--out", required=True, help="输出索引文件路径")
+    build.add_argument("--no-builtin", action="store_true", help="不包含内置签名")
+    lookup = sub.add_parser("lookup", help="查询选择器")
+    lookup.add_argument("selector")
+    lookup.add_argument("--index", default="", help="索引文件，默认为配置中的索引或内置库")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        signatures: dict[str, list[str]] = {} if args.no_builtin else {k: [v] for k, v in BUILTIN_SIGNATURES.items()}
+        for source in args.sources:
+            for selector, sigs in read_signature_file(Path(source)).items():
+                signatures.setdefault(selector, []).extend(sigs)
+        data = build_index_bytes(signatures)
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(data)
+        print(f"{len(signatures)} 个选择器，{len(data)} 字节: {out}")
+    else:
+        index = SelectorIndex.open(Path(args.index)) if args.index else get_selector_index()
+        for sig in index.lookup(bytes.fromhex(args.selector.lower().removeprefix("0x"))):
+            print(sig)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+延迟统计 - HDR 风格的对数线性直方图
+按 provider x wallet x method 记录延迟，输出 p50/p90/p99/p99.9、吞吐与错误率
+"""
+import math
+import threading
+from typing import Any, Iterable, Optional
+
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+
+
+# 每个 2 的幂区间划分为 128 个子桶，相对误差 < 1%（约 2 位有效数字）
+SUB_BUCKET_BITS = 8
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """对数线性分桶的延迟直方图（单位：微秒取整，输入/输出为毫秒）
+
+    - 小于 2^SUB_BUCKET_BITS 微秒的值精确记录
+    - 更大的值按 2 的幂分段，每段等分为 2^(SUB_BUCKET_BITS-1) 个子桶
+    - 桶计数以稀疏 dict 保存，可合并、可序列化
+    """
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    @staticmethod
+    def _index(value_us: int) -> int:
+        full = 1 << SUB_BUCKET_BITS
+        if value_us < full:
+            return value_us
+        half = full >> 1
+        shift = value_us.bit_length() - SUB_BUCKET_BITS
+        return full + (shift - 1) * half + ((value_us >> shift) - half)
+
+    @staticmethod
+    def _bounds(index: int) -> tuple[int, int]:
+        """桶对应的 [下界, 上界) 微秒"""
+        full = 1 << SUB_BUCKET_BITS
+        if index < full:
+            return index, index + 1
+        half = full >> 1
+        shift = (index - full) // half + 1
+        sub = (index - full) % half + half
+        return sub << shift, (sub + 1) << shift
+
+    def record(self, value_ms: float):
+        value_us = max(0, int(round(value_ms * 1000)))
+        idx = self._index(value_us)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """第 q 百分位（毫秒），取所在桶的中点，并限定在 [min, max] 内"""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                lo, hi = self._bounds(idx)
+                mid = (lo + hi - 1) / 2
+                return min(max(mid, self.min_us), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def mean(self) -> Optional[float]:
+        return self.total_us / self.count / 1000 if self.count else None
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        return self
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "counts": sorted(self.counts.items()),
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "LatencyHistogram":
+        hist = cls()
+        hist.counts = {int(idx): n for idx, n in state["counts"]}
+        hist.count = state["count"]
+        hist.total_us = state["total_us"]
+        hist.min_us = state["min_us"]
+        hist.max_us = state["max_us"]
+        return hist
+
+    def buckets(self, max_buckets: int = 20) -> list[tuple[float, float, int]]:
+        """合并为最多 max_buckets 个区间 [(下界 ms, 上界 ms, 计数)]，用于展示"""
+        if not self.counts:
+            return []
+        items = sorted(self.counts.items())
+        per = max(1, -(-len(items) // max_buckets))
+        out = []
+        for i in range(0, len(items), per):
+            chunk = items[i:i + per]
+            lo = self._bounds(chunk[0][0])[0]
+            hi = self._bounds(chunk[-1][0])[1]
+            out.append((lo / 1000, hi / 1000, sum(n for _, n in chunk)))
+        return out
+
+
+class LatencyStats:
+    """按 provider x wallet x method 汇总延迟直方图、请求数与错误数（线程安全、可合并）"""
+
+    def __init__(self):
+        self._cells: dict[tuple[str, str, str], dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _cell(self, key: tuple[str, str, str]) -> dict[str, Any]:
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = {"hist": LatencyHistogram(), "errors": 0}
+        return cell
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        # 缓存应答未经网络，不计入节点延迟
+        if resp.source != "upstream":
+            return
+        with self._lock:
+            cell = self._cell((req.provider_id, req.wallet_id, req.method))
+            cell["hist"].record(resp.elapsed_ms)
+            if resp.error:
+                cell["errors"] += 1
+
+    def add_records(self, records: Iterable[tuple[RPCRequestRecord, RPCResponseRecord]]):
+        for req, resp in records:
+            self.add(req, resp)
+
+    def merge(self, other: "LatencyStats") -> "LatencyStats":
+        with self._lock:
+            for key, cell in other._cells.items():
+                mine = self._cell(key)
+                mine["hist"].merge(cell["hist"])
+                mine["errors"] += cell["errors"]
+        return self
+
+    def histograms(self) -> dict[tuple[str, str, str], LatencyHistogram]:
+        return {key: cell["hist"] for key, cell in self._cells.items()}
+
+    def by_provider(self) -> dict[str, LatencyHistogram]:
+        """每个 provider 合并全部钱包与方法后的直方图，按 provider 排序"""
+        merged: dict[str, LatencyHistogram] = {}
+        for (provider_id, _, _), cell in sorted(self._cells.items()):
+            merged.setdefault(provider_id, LatencyHistogram()).merge(cell["hist"])
+        return merged
+
+    def rows(self, duration_s: Optional[float] = None) -> list[dict[str, Any]]:
+        """每个 provider x wallet x method 一行，按键排序"""
+        rows = []
+        for (provider_id, wallet_id, method), cell in sorted(self._cells.items()):
+            hist: LatencyHistogram = cell["hist"]
+            row = {
+                "provider": provider_id,
+                "wallet": wallet_id,
+                "method": method,
+                "requests": hist.count,
+                "errors": cell["errors"],
+                "error_rate": round(cell["errors"] / hist.count, 4) if hist.count else 0.0,
+                "throughput_rps": round(hist.count / duration_s, 2) if duration_s else None,
+                "mean_ms": _round(hist.mean()),
+                "max_ms": _round(hist.max_us / 1000 if hist.max_us is not None else None),
+            }
+            for q in PERCENTILES:
+                row[f"p{q:g}_ms"] = _round(hist.percentile(q))
+            rows.append(row)
+        return rows
+
+    def to_state(self) -> list[dict[str, Any]]:
+        return [
+            {"key": list(key), "errors": cell["errors"], "hist": cell["hist"].to_state()}
+            for key, cell in sorted(self._cells.items())
+        ]
+
+    @classmethod
+    def from_state(cls, state: list[dict[str, Any]]) -> "LatencyStats":
+        stats = cls()
+        for item in state:
+            stats._cells[tuple(item["key"])] = {
+                "hist": LatencyHistogram.from_state(item["hist"]),
+                "errors": item["errors"],
+            }
+        return stats
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
@@ -0,0 +1,279 @@
+"""
+跨请求地址关联分析 - 各 RPC 节点能把哪些地址归为同一用户
+
+analyze_request 只逐条标记地址暴露；节点真正能做的是把同时出现的地址连起来：
+- call:    同一次调用的参数中同时出现（如多个 from / address 参数）
+- batch:   同一 JSON-RPC 批量数组内
+- connection: 同一 WebSocket 连接（session_id）上的请求，不论间隔多久
+- session: 同一 client 会话（client_id）的连续请求，间隔不超过 session_gap_s；
+           请求头指纹只区分钱包类型，同款钱包的所有用户相同，不能用来划分会话
+
+合约地址不是用户的地址，不参与合并（否则调用同一合约的所有用户会被并成一个簇）：
+构造时传入的已知合约（config.yaml 的 contracts），以及带 calldata 的调用对象中的 to（调用目标）。
+
+每个 provider 维护一个并查集（按大小合并 + 路径减半），单次遍历记录，近似线性时间。
+同时建立 地址 -> provider -> (次数, 首次/末次时间, 指纹) 的倒排索引。
+缓存应答、合并请求未到达节点，不参与关联。
+只要每个 client 的请求按时间先后到达，结果与记录的交错方式无关（分片合并按时间戳归并各分片即可）。
+"""
+from collections import Counter
+from typing import Any, Iterable, Iterator, Optional
+
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+
+DEFAULT_SESSION_GAP_S = 30.0
+LINK_RULES = ("call", "batch", "connection", "session")
+# 报告中每个 provider 展示的最大簇数，及每个簇展示的地址数
+TOP_CLUSTERS = 5
+CLUSTER_SAMPLE = 10
+
+
+class _UnionFind:
+    """整数 ID 并查集"""
+
+    __slots__ = ("parent", "size")
+
+    def __init__(self):
+        self.parent: list[int] = []
+        self.size: list[int] = []
+
+    def add(self) -> int:
+        idx = len(self.parent)
+        self.parent.append(idx)
+        self.size.append(1)
+        return idx
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """合并 a、b 所在集合；原本已在同一集合时返回 False"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return True
+
+
+class _ProviderGraph:
+    """单个 provider 视角下的地址关联"""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.addresses: list[str] = []
+        self.uf = _UnionFind()
+        self.links = Counter()
+        # 倒排索引：地址 ID -> [次数, 首次时间, 末次时间, 指纹 ID 集合]
+        self.sightings: list[list[Any]] = []
+        # 会话：client_id -> [末次时间, 锚点地址 ID 或 None]
+        self.sessions: dict[Any, list[Any]] = {}
+        # 未完成的批次：batch_id -> [已到子调用数, 锚点地址 ID 或 None]
+        self.batches: dict[str, list[Any]] = {}
+        # WebSocket 连接：session_id -> [请求数, 锚点地址 ID 或 None, 地址 ID 集合]
+        self.connections: dict[str, list[Any]] = {}
+
+    def _id(self, address: str, ts: float, fingerprint: int) -> int:
+        # 校验和大小写与全小写是同一地址
+        address = address.lower()
+        idx = self.ids.get(address)
+        if idx is None:
+            idx = self.ids[address] = self.uf.add()
+            self.addresses.append(address)
+            self.sightings.append([0, ts, ts, set()])
+        s = self.sightings[idx]
+        s[0] += 1
+        s[1] = min(s[1], ts)
+        s[2] = max(s[2], ts)
+        s[3].add(fingerprint)
+        return idx
+
+    def _link(self, anchor: Optional[int], ids: list[int], rule: str) -> Optional[int]:
+        """ids 逐个并入 anchor（None 时以首个为锚点），返回新的锚点"""
+        for idx in ids:
+            if anchor is None:
+                anchor = idx
+            elif self.uf.union(anchor, idx):
+                self.links[rule] += 1
+        return anchor
+
+    def add(self, req: RPCRequestRecord, fingerprint: int, session_gap_s: float, contracts: set[str]):
+        ts = req.timestamp
+        ids = []
+        for addr in req.exposed_addresses:
+            idx = self._id(addr, ts, fingerprint)
+            # 合约地址仍计入倒排索引，但不与其他地址合并
+            if addr.lower() not in contracts:
+                ids.append(idx)
+        self._link(None, ids, "call")
+
+        if req.batch_id:
+            batch = self.batches.setdefault(req.batch_id, [0, None])
+            batch[0] += 1
+            batch[1] = self._link(batch[1], ids, "batch")
+            if batch[0] >= req.batch_size:
+                del self.batches[req.batch_id]
+
+        if req.session_id:
+            conn = self.connections.get(req.session_id)
+            if conn is None:
+                conn = self.connections[req.session_id] = [0, None, set()]
+            conn[0] += 1
+            conn[1] = self._link(conn[1], ids, "connection")
+            conn[2].update(ids)
+
+        session = self.sessions.get(req.client_id)
+        if session is None or ts - session[0] > session_gap_s:
+            session = self.sessions[req.client_id] = [ts, None]
+        session[0] = max(session[0], ts)
+        session[1] = self._link(session[1], ids, "session")
+
+    def clusters(self) -> dict[int, list[int]]:
+        members: dict[int, list[int]] = {}
+        for idx in range(len(self.addresses)):
+            members.setdefault(self.uf.find(idx), []).append(idx)
+        return members
+
+    def summary(self, fingerprints: list[str]) -> dict[str, Any]:
+        # 簇内地址、簇间顺序均按地址文本排序，不依赖地址首次出现的先后
+        clusters = sorted(
+            (sorted(m, key=self.addresses.__getitem__) for m in self.clusters().values()),
+            key=lambda m: (-len(m), self.addresses[m[0]]),
+        )
+        sizes = Counter(len(m) for m in clusters)
+        linked = sum(len(m) for m in clusters if len(m) > 1)
+        top = []
+        for members in clusters[:TOP_CLUSTERS]:
+            if len(members) < 2:
+                break
+            fps = set().union(*(self.sightings[i][3] for i in members))
+            top.append({
+                "size": len(members),
+                "addresses": [self.addresses[i] for i in members[:CLUSTER_SAMPLE]],
+                "sightings": sum(self.sightings[i][0] for i in members),
+                "fingerprints": sorted(fingerprints[f] for f in fps),
+                "first_seen": min(self.sightings[i][1] for i in members),
+                "last_seen": max(self.sightings[i][2] for i in members),
+            })
+        return {
+            "addresses": len(self.addresses),
+            "clusters": len(clusters),
+            "linked_addresses": linked,
+            "largest_cluster": len(clusters[0]) if clusters else 0,
+            "cluster_sizes": dict(sorted(sizes.items())),
+            "links_by_rule": {rule: self.links.get(rule, 0) for rule in LINK_RULES},
+            "top_clusters": top,
+            "connections": self._connection_summary(),
+        }
+
+    def _connection_summary(self) -> Optional[dict[str, Any]]:
+        """WebSocket 会话统计：会话数，每个会话的请求数与暴露地址数；无 WebSocket 请求时为 None"""
+        if not self.connections:
+            return None
+        requests = [c[0] for c in self.connections.values()]
+        addresses = [len(c[2]) for c in self.connections.values()]
+        return {
+            "sessions": len(self.connections),
+            "avg_requests": round(sum(requests) / len(requests), 2),
+            "max_requests": max(requests),
+            "avg_addresses": round(sum(addresses) / len(addresses), 2),
+            "max_addresses": max(addresses),
+            "multi_address_sessions": sum(1 for n in addresses if n > 1),
+        }
+
+
+def _call_targets(params: list) -> Iterator[str]:
+    """带 calldata 的调用对象（eth_call / eth_estimateGas 等）的 to，即被调用的合约"""
+    for p in params:
+        if isinstance(p, dict) and p.get("data") and isinstance(p.get("to"), str):
+            yield p["to"].lower()
+
+
+class LinkageAnalyzer:
+    """增量构建各 provider 的地址关联图（非线程安全，由调用方加锁）
+
+    contracts 为已知合约地址，与请求中识别出的调用目标一样不参与合并。
+    """
+
+    def __init__(self, session_gap_s: float = DEFAULT_SESSION_GAP_S, contracts: Iterable[str] = ()):
+        self.session_gap_s = session_gap_s
+        self.contracts = frozenset(addr.lower() for addr in contracts)
+        self._graphs: dict[str, _ProviderGraph] = {}
+        # 请求头指纹：排序后的请求头 -> 指纹 ID；_fingerprint_wallets 为使用该指纹的钱包中 ID 最小者
+        self._fingerprints: dict[tuple, int] = {}
+        self._fingerprint_wallets: list[str] = []
+
+    def _fingerprint(self, req: RPCRequestRecord) -> int:
+        key = tuple(sorted(req.headers_sent.items()))
+        idx = self._fingerprints.get(key)
+        if idx is None:
+            idx = self._fingerprints[key] = len(self._fingerprint_wallets)
+            self._fingerprint_wallets.append(req.wallet_id)
+        elif req.wallet_id < self._fingerprint_wallets[idx]:
+            self._fingerprint_wallets[idx] = req.wallet_id
+        return idx
+
+    def _fingerprint_names(self) -> list[str]:
+        """指纹 ID -> 展示用标签 钱包#序号（序号为该钱包的各指纹按请求头排序的位置，与记录顺序无关）"""
+        names = [""] * len(self._fingerprint_wallets)
+        by_wallet: dict[str, list[tuple]] = {}
+        for key, idx in self._fingerprints.items():
+            by_wallet.setdefault(self._fingerprint_wallets[idx], []).append(key)
+        for wallet_id, keys in by_wallet.items():
+            for k, key in enumerate(sorted(keys)):
+                names[self._fingerprints[key]] = f"{wallet_id}#{k}"
+        return names
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        if resp.source != "upstream":
+            return
+        graph = self._graphs.get(req.provider_id)
+        if graph is None:
+            graph = self._graphs[req.provider_id] = _ProviderGraph()
+        contracts = self.contracts.union(_call_targets(req.params))
+        graph.add(req, self._fingerprint(req), self.session_gap_s, contracts)
+
+    def add_records(self, records: Iterable[tuple[RPCRequestRecord, RPCResponseRecord]]) -> "LinkageAnalyzer":
+        for req, resp in records:
+            self.add(req, resp)
+        return self
+
+    def address_index(self, address: str) -> dict[str, dict[str, Any]]:
+        """倒排索引查询：地址在各 provider 处的出现次数、首次/末次时间、指纹及所在簇大小"""
+        out = {}
+        names = self._fingerprint_names()
+        for provider_id, graph in self._graphs.items():
+            idx = graph.ids.get(address.lower())
+            if idx is None:
+                continue
+            count, first, last, fps = graph.sightings[idx]
+            out[provider_id] = {
+                "sightings": count,
+                "first_seen": first,
+                "last_seen": last,
+                "fingerprints": sorted(names[f] for f in fps),
+                "cluster_size": graph.uf.size[graph.uf.find(idx)],
+            }
+        return out
+
+    def providers(self) -> list[str]:
+        return sorted(self._graphs)
+
+    def clusters(self, provider_id: str) -> Iterator[list[str]]:
+        """逐个返回 provider 视角下的簇（含单地址簇）的地址列表"""
+        graph = self._graphs.get(provider_id)
+        if graph is None:
+            return
+        for members in graph.clusters().values():
+            yield [graph.addresses[i] for i in members]
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """每个 provider 的簇统计，按 provider 排序"""
+        names = self._fingerprint_names()
+        return {provider_id: graph.summary(names) for provider_id, graph in sorted(self._graphs.items())}
@@ -1,11 +1,14 @@
 """
 隐私泄露分析器
-维度：IP暴露、地址关联、交易溯源、调用参数泄露、请求头指纹
+维度：IP暴露、地址关联、交易溯源、调用参数泄露、请求头指纹、持久连接会话
 """
+import hashlib
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Iterable, Iterator, Optional
 
 from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+from .calldata import call_data_of, decode_calldata, format_args
 
 
 @dataclass
@@ -33,7 +36,14 @@ METHOD_PRIVACY_MAP = {
 
 
 def analyze_request(req: RPCRequestRecord, resp: RPCResponseRecord) -> list[DimensionResult]:
-    """分析单次请求的隐私泄露"""
+    """分析单次请求的隐私泄露；由本地缓存应答（未发送至节点）的请求不产生暴露"""
+    if resp.source != "upstream":
+        return []
+    return request_exposures(req)
+
+
+def request_exposures(req: RPCRequestRecord) -> list[DimensionResult]:
+    """请求发送至 RPC 节点时会产生的隐私暴露"""
     results = []
 
     # 1. IP 地址暴露 - 所有请求都有
@@ -65,15 +75,21 @@ def analyze_request(req: RPCRequestRecord, resp: RPCResponseRecord) -> list[Dime
 
     # 3. 调用参数敏感信息
     if req.exposed_params_summary and req.method in ("eth_call", "eth_estimateGas"):
+        evidence = [
+            f"Method: {req.method}",
+            f"Params summary: {req.exposed_params_summary}",
+        ]
+        decoded = decode_calldata(call_data_of(req.params))
+        if decoded and decoded["function"]:
+            evidence.append(f"Function: {decoded['signature']}")
+            if decoded["args"]:
+                evidence.append(f"Decoded args: {format_args(decoded['args'])}")
         results.append(DimensionResult(
             dimension_id="call_params_leak",
             dimension_name="调用参数敏感信息泄露",
             risk_level="high",
             description="data 字段包含完整 ABI 编码，可解析出函数名、参数值",
-            evidence=[
-                f"Method: {req.method}",
-                f"Params summary: {req.exposed_params_summary}",
-            ],
+            evidence=evidence,
             recommendation="敏感参数可考虑链下加密或零知识证明",
         ))
 
@@ -104,28 +120,386 @@ def analyze_request(req: RPCRequestRecord, resp: RPCResponseRecord) -> list[Dime
             recommendation="统一请求头或使用通用客户端减少指纹区分度",
         ))
 
+    # 6. 持久连接会话关联（WebSocket）
+    if req.session_id:
+        results.append(DimensionResult(
+            dimension_id="session_linkage",
+            dimension_name="持久连接会话关联",
+            risk_level="high" if req.exposed_addresses else "medium",
+            description="同一 WebSocket 连接上的全部请求与订阅属于同一会话，节点无需 IP 或时间窗即可确定地将其归为同一用户",
+            evidence=[
+                f"Provider: {req.provider_id}",
+                f"Wallet: {req.wallet_id}",
+                f"Method over persistent connection: {req.method}",
+            ],
+            recommendation="不同地址使用不同连接并定期重建连接，或查询类请求改用无状态 HTTP",
+        ))
+
     return results
 
 
+def _new_batch(req: RPCRequestRecord) -> dict[str, Any]:
+    return {"req": req, "methods": [], "addresses": []}
+
+
+def _add_to_batch(batch: dict[str, Any], req: RPCRequestRecord):
+    batch["methods"].append(req.method)
+    for addr in req.exposed_addresses:
+        if addr not in batch["addresses"]:
+            batch["addresses"].append(addr)
+
+
+def _batch_result(batch_id: str, batch: dict[str, Any]) -> DimensionResult:
+    req = batch["req"]
+    linked = len(batch["addresses"]) > 1
+    return DimensionResult(
+        dimension_id="batch_linkage",
+        dimension_name="批量请求地址关联",
+        risk_level="high" if linked else "medium",
+        description="JSON-RPC 批量请求将多个调用合并发送，RPC 节点可一次性关联批次内的全部地址与行为",
+        evidence=[
+            f"Provider: {req.provider_id}",
+            f"Batch {batch_id}: {len(batch['methods'])} calls {batch['methods']}",
+            f"Linked addresses: {batch['addresses']}",
+        ],
+        recommendation="涉及多个地址的查询避免合并为同一批量请求，或将不同地址分散到不同 RPC",
+    )
+
+
+def analyze_batches(
+    records: Iterable[tuple[RPCRequestRecord, RPCResponseRecord]],
+) -> list[DimensionResult]:
+    """分析批量请求：同一批量数组内的全部地址在一次请求中同时暴露给 RPC 节点"""
+    batches: dict[str, dict[str, Any]] = {}
+    for req, _ in records:
+        if not req.batch_id:
+            continue
+        _add_to_batch(batches.setdefault(req.batch_id, _new_batch(req)), req)
+    return [_batch_result(batch_id, batch) for batch_id, batch in batches.items()]
+
+
+def analyze_stream(
+    records: Iterable[tuple[RPCRequestRecord, RPCResponseRecord]],
+) -> Iterator[tuple[RPCRequestRecord, list[DimensionResult]]]:
+    """流式分析：逐条产出 (请求, analyze_request 结果)
+
+    批量请求在批次全部子调用到齐后追加 batch_linkage 结果，只缓存未完成的批次，内存占用不随记录数增长。
+    """
+    pending: dict[str, dict[str, Any]] = {}
+    for req, resp in records:
+        results = analyze_request(req, resp)
+        if req.batch_id:
+            batch = pending.setdefault(req.batch_id, _new_batch(req))
+            _add_to_batch(batch, req)
+            if len(batch["methods"]) >= req.batch_size:
+                results.append(_batch_result(req.batch_id, pending.pop(req.batch_id)))
+        yield req, results
+    # 抓包被截断时仍输出不完整的批次
+    for batch_id, batch in pending.items():
+        yield batch["req"], [_batch_result(batch_id, batch)]
+
+
+RISK_ORDER = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+# 报告中维度的固定顺序，未列出的维度按 ID 排在其后
+DIMENSION_ORDER = [
+    "ip_exposure",
+    "address_association",
+    "call_params_leak",
+    "transaction_tracing",
+    "request_header_fingerprint",
+    "batch_linkage",
+    "session_linkage",
+    "timing_correlation",
+]
+# 每个维度保留的证据样本条数
+EVIDENCE_SAMPLE_SIZE = 50
+# 证据去重计数草图保留的最小哈希数：去重数不超过该值时精确，超过时为估计值（相对标准误差约 1/sqrt(K)）
+DISTINCT_SKETCH_SIZE = 1024
+_HASH_SPACE = 2**64
+
+
+def _evidence_hash(evidence: str) -> int:
+    """跨进程稳定的 64 位证据哈希（内置 hash() 受随机化影响，不能用于合并）"""
+    return int.from_bytes(hashlib.blake2b(evidence.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class _DistinctSketch:
+    """KMV 去重计数草图：只保留最小的 k 个不同哈希，内存与状态大小有界
+
+    合并即对并集重新取最小的 k 个，与输入顺序及合并方式无关，等同于对全部输入直接构建。
+    """
+
+    def __init__(self, k: int = DISTINCT_SKETCH_SIZE):
+        self.k = k
+        self.hashes: set[int] = set()
+        self._threshold: Optional[int] = None  # 已淘汰哈希的最小值下界
+
+    def add(self, h: int):
+        if self._threshold is None or h < self._threshold:
+            self.hashes.add(h)
+            if len(self.hashes) > 2 * self.k:
+                self._prune()
+
+    def _prune(self):
+        keep = sorted(self.hashes)[: self.k]
+        self.hashes = set(keep)
+        self._threshold = keep[-1] + 1
+
+    def merge(self, other: "_DistinctSketch"):
+        for h in other.hashes:
+            self.add(h)
+        if other._threshold is not None:
+            self._threshold = other._threshold if self._threshold is None else min(self._threshold, other._threshold)
+            self.hashes = {h for h in self.hashes if h < self._threshold}
+
+    @property
+    def exact(self) -> bool:
+        return self._threshold is None and len(self.hashes) <= self.k
+
+    def count(self) -> int:
+        if self.exact:
+            return len(self.hashes)
+        kth = sorted(self.hashes)[self.k - 1]
+        return round((self.k - 1) * _HASH_SPACE / (kth + 1))
+
+    def to_state(self) -> list[int]:
+        # 多保留一个哈希：还原后仍可区分「恰好 k 个」与「超过 k 个」（估计值）
+        return sorted(self.hashes)[: self.k + 1]
+
+    @classmethod
+    def from_state(cls, hashes: list[int], k: int = DISTINCT_SKETCH_SIZE) -> "_DistinctSketch":
+        sketch = cls(k)
+        for h in hashes:
+            sketch.add(h)
+        if len(sketch.hashes) > k:
+            sketch._prune()
+        return sketch
+
+
+class _DimensionAccumulator:
+    """单维度的增量聚合状态
+
+    证据样本为哈希值最小的 K 条（bottom-K），保证样本与计数不受输入顺序和分片合并方式影响：
+    最终样本中的每条证据在所有出现过的分片中都未被淘汰，因此计数精确。
+    证据去重数由 _DistinctSketch 计算，不保存全部证据哈希。
+    """
+
+    def __init__(self, result: DimensionResult, sample_size: int):
+        self.dimension_id = result.dimension_id
+        self.dimension_name = result.dimension_name
+        self.description = result.description
+        self.recommendation = result.recommendation
+        self.risk_level = result.risk_level
+        self.sample_size = sample_size
+        self.occurrences = 0
+        self.evidence_total = 0
+        self.distinct = _DistinctSketch()
+        self.sample: dict[int, list] = {}  # hash -> [evidence, count]
+        self._threshold: Optional[int] = None  # 已淘汰证据的最小哈希下界
+        self.by_provider: Counter = Counter()
+        self.by_wallet: Counter = Counter()
+        self.by_method: Counter = Counter()
+        self.by_provider_wallet: Counter = Counter()
+
+    def _add_evidence(self, h: int, evidence: str, count: int):
+        entry = self.sample.get(h)
+        if entry is not None:
+            entry[1] += count
+        elif self._threshold is None or h < self._threshold:
+            self.sample[h] = [evidence, count]
+            if len(self.sample) > 2 * self.sample_size:
+                self._prune()
+
+    def _prune(self):
+        keep = sorted(self.sample)[: self.sample_size]
+        self.sample = {h: self.sample[h] for h in keep}
+        self._threshold = keep[-1] + 1 if keep else None
+
+    def add(self, result: DimensionResult, req: Optional[RPCRequestRecord]):
+        if RISK_ORDER.get(result.risk_level, 0) > RISK_ORDER.get(self.risk_level, 0):
+            self.risk_level = result.risk_level
+        self.occurrences += 1
+        for ev in result.evidence:
+            h = _evidence_hash(ev)
+            self.evidence_total += 1
+            self.distinct.add(h)
+            self._add_evidence(h, ev, 1)
+        if req is not None:
+            self.by_provider[req.provider_id] += 1
+            self.by_wallet[req.wallet_id] += 1
+            self.by_method[req.method] += 1
+            self.by_provider_wallet[(req.provider_id, req.wallet_id)] += 1
+
+    def merge(self, other: "_DimensionAccumulator"):
+        if RISK_ORDER.get(other.risk_level, 0) > RISK_ORDER.get(self.risk_level, 0):
+            self.risk_level = other.risk_level
+        self.occurrences += other.occurrences
+        self.evidence_total += other.evidence_total
+        self.distinct.merge(other.distinct)
+        if other._threshold is not None:
+            self._threshold = other._threshold if self._threshold is None else min(self._threshold, other._threshold)
+            # 本分片中哈希不小于新下界的证据可能在对方分片中被淘汰过，计数不再可靠
+            self.sample = {h: e for h, e in self.sample.items() if h < self._threshold}
+        for h, (ev, count) in other.sample.items():
+            if self._threshold is None or h < self._threshold:
+                entry = self.sample.setdefault(h, [ev, 0])
+                entry[1] += count
+        if len(self.sample) > 2 * self.sample_size:
+            self._prune()
+        self.by_provider.update(other.by_provider)
+        self.by_wallet.update(other.by_wallet)
+        self.by_method.update(other.by_method)
+        self.by_provider_wallet.update(other.by_provider_wallet)
+
+    def evidence_sample(self) -> list[tuple[str, int]]:
+        """样本证据，按出现次数降序、文本升序排列"""
+        keep = sorted(self.sample)[: self.sample_size]
+        items = [(self.sample[h][0], self.sample[h][1]) for h in keep]
+        return sorted(items, key=lambda item: (-item[1], item[0]))
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "dimension_id": self.dimension_id,
+            "dimension_name": self.dimension_name,
+            "description": self.description,
+            "recommendation": self.recommendation,
+            "risk_level": self.risk_level,
+            "occurrences": self.occurrences,
+            "evidence_total": self.evidence_total,
+            "distinct": self.distinct.to_state(),
+            "sample": sorted([h, ev, count] for h, (ev, count) in self.sample.items()),
+            "threshold": self._threshold,
+            "by_provider": dict(self.by_provider),
+            "by_wallet": dict(self.by_wallet),
+            "by_method": dict(self.by_method),
+            "by_provider_wallet": [[p, w, n] for (p, w), n in sorted(self.by_provider_wallet.items())],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any], sample_size: int) -> "_DimensionAccumulator":
+        acc = cls(
+            DimensionResult(
+                dimension_id=state["dimension_id"],
+                dimension_name=state["dimension_name"],
+                risk_level=state["risk_level"],
+                description=state["description"],
+                recommendation=state["recommendation"],
+            ),
+            sample_size,
+        )
+        acc.occurrences = state["occurrences"]
+        acc.evidence_total = state["evidence_total"]
+        acc.distinct = _DistinctSketch.from_state(state["distinct"])
+        acc.sample = {h: [ev, count] for h, ev, count in state["sample"]}
+        acc._threshold = state["threshold"]
+        acc.by_provider = Counter(state["by_provider"])
+        acc.by_wallet = Counter(state["by_wallet"])
+        acc.by_method = Counter(state["by_method"])
+        acc.by_provider_wallet = Counter({(p, w): n for p, w, n in state["by_provider_wallet"]})
+        return acc
+
+
+class DimensionAggregator:
+    """按维度增量聚合分析结果，线性时间、可合并
+
+    - 风险等级取最高
+    - 证据按稳定哈希去重，保留有界样本及其精确计数，另记录证据总数与去重数（超过草图容量时为估计值）
+    - 按 provider / wallet / method 及 provider x wallet 计数
+    - merge() 合并其他 worker / 分片的部分结果，结果与合并顺序无关
+    """
+
+    def __init__(self, sample_size: int = EVIDENCE_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._dims: dict[str, _DimensionAccumulator] = {}
+
+    def add(self, results: list[DimensionResult], req: Optional[RPCRequestRecord] = None):
+        for r in results:
+            acc = self._dims.get(r.dimension_id)
+            if acc is None:
+                acc = self._dims[r.dimension_id] = _DimensionAccumulator(r, self.sample_size)
+            acc.add(r, req)
+
+    def add_stream(self, stream: Iterable[tuple[RPCRequestRecord, list[DimensionResult]]]) -> "DimensionAggregator":
+        """消费 analyze_stream 的输出"""
+        for req, results in stream:
+            self.add(results, req)
+        return self
+
+    def merge(self, other: "DimensionAggregator") -> "DimensionAggregator":
+        for dim_id, acc in other._dims.items():
+            if dim_id in self._dims:
+                self._dims[dim_id].merge(acc)
+            else:
+                self._dims[dim_id] = _DimensionAccumulator.from_state(acc.to_state(), self.sample_size)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._dims)
+
+    def _ordered(self) -> list[_DimensionAccumulator]:
+        rank = {dim_id: i for i, dim_id in enumerate(DIMENSION_ORDER)}
+        return sorted(self._dims.values(), key=lambda a: (rank.get(a.dimension_id, len(rank)), a.dimension_id))
+
+    def results(self) -> dict[str, DimensionResult]:
+        """兼容 aggregate_by_dimension 的返回格式，evidence 为样本证据"""
+        return {
+            acc.dimension_id: DimensionResult(
+                dimension_id=acc.dimension_id,
+                dimension_name=acc.dimension_name,
+                risk_level=acc.risk_level,
+                description=acc.description,
+                evidence=[ev for ev, _ in acc.evidence_sample()],
+                recommendation=acc.recommendation,
+            )
+            for acc in self._ordered()
+        }
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """报告 / JSON 使用的聚合结果"""
+        out: dict[str, dict[str, Any]] = {}
+        for acc in self._ordered():
+            sample = acc.evidence_sample()
+            by_provider_wallet: dict[str, dict[str, int]] = {}
+            for (provider_id, wallet_id), n in sorted(acc.by_provider_wallet.items()):
+                by_provider_wallet.setdefault(provider_id, {})[wallet_id] = n
+            out[acc.dimension_id] = {
+                "name": acc.dimension_name,
+                "risk_level": acc.risk_level,
+                "description": acc.description,
+                "evidence": [ev for ev, _ in sample],
+                "evidence_counts": [[ev, n] for ev, n in sample],
+                "evidence_total": acc.evidence_total,
+                "evidence_distinct": acc.distinct.count(),
+                "evidence_distinct_exact": acc.distinct.exact,
+                "occurrences": acc.occurrences,
+                "by_provider": dict(sorted(acc.by_provider.items())),
+                "by_wallet": dict(sorted(acc.by_wallet.items())),
+                "by_method": dict(sorted(acc.by_method.items())),
+                "by_provider_wallet": by_provider_wallet,
+                "recommendation": acc.recommendation,
+            }
+        return out
+
+    def to_state(self) -> dict[str, Any]:
+        """可 JSON 序列化的完整状态，用于跨进程 / 分片合并"""
+        return {
+            "sample_size": self.sample_size,
+            "dimensions": [acc.to_state() for acc in self._ordered()],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "DimensionAggregator":
+        agg = cls(sample_size=state.get("sample_size", EVIDENCE_SAMPLE_SIZE))
+        for dim_state in state["dimensions"]:
+            agg._dims[dim_state["dimension_id"]] = _DimensionAccumulator.from_state(dim_state, agg.sample_size)
+        return agg
+
+
 def aggregate_by_dimension(
-    all_results: list[list[DimensionResult]],
+    all_results: Iterable[list[DimensionResult]],
 ) -> dict[str, DimensionResult]:
-    """按维度聚合，取最高风险"""
-    by_dim: dict[str, DimensionResult] = {}
-    risk_order = {"low": 0, "medium": 1, "high": 2, "critical": 3}
-
+    """按维度聚合，取最高风险（DimensionAggregator 的简化入口）"""
+    agg = DimensionAggregator()
     for results in all_results:
-        for r in results:
-            if r.dimension_id not in by_dim or risk_order.get(r.risk_level, 0) > risk_order.get(
-                by_dim[r.dimension_id].risk_level, 0
-            ):
-                by_dim[r.dimension_id] = r
-                # 合并证据
-                if r not in results:
-                    pass
-                existing = by_dim[r.dimension_id]
-                for ev in r.evidence:
-                    if ev not in existing.evidence:
-                        existing.evidence.append(ev)
-
-    return by_dim
+        agg.add(results)
+    return agg.results()
@@ -0,0 +1,177 @@
+"""
+时序关联分析 - 按时间先后把同一用户的连续请求串起来
+
+即使请求来自不同 IP 或不同 provider，节点仍可按时间接近程度关联一次操作的多个步骤，
+例如兑换时的 余额查询 -> estimateGas -> eth_call。本分析器：
+
+- 按时间戳排序全部（实际发送至节点的）请求
+- 对每个流程（方法序列）做滑动窗口匹配：从首个方法出发，在 window_s 内寻找下一步方法，逐步推进
+- 窗口内下一步的候选越多越难确定归属；可关联度 = 匹配链上各步候选数乘积的倒数的均值
+- 以 client_id（用户会话）为真实标签计算匹配准确率：钱包 ID 只区分钱包类型，大量用户共用时无法检验匹配；
+  并分别在单个 provider 与跨 provider（全部记录）范围内计算
+
+列式保存（array），计算以 NumPy 向量化（searchsorted），适用于大规模抓包。
+"""
+from array import array
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from ..config_loader import load_config
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+from .privacy_analyzer import DimensionResult
+
+# 可在 config.yaml 的 timing 段覆盖
+DEFAULT_TIMING_OPTIONS = {
+    "windows_s": [0.5, 2.0, 10.0],
+    # 流程名 -> 方法序列，对应场景中的典型操作
+    "flows": {
+        "swap": ["eth_getBalance", "eth_estimateGas", "eth_call"],
+        "transfer": ["eth_getBalance", "eth_getTransactionCount", "eth_estimateGas"],
+        "balance_check": ["eth_getBalance", "eth_getTransactionCount"],
+    },
+}
+# 跨 provider 范围的标识
+ALL_PROVIDERS = "*"
+# 可关联度达到该值视为高风险
+HIGH_RISK_LINKABILITY = 0.5
+
+
+def get_timing_options() -> dict[str, Any]:
+    """默认时序分析参数，叠加 config.yaml 中的 timing 段"""
+    return {**DEFAULT_TIMING_OPTIONS, **(load_config().get("timing") or {})}
+
+
+def _match_flow(
+    ts: np.ndarray,
+    methods: np.ndarray,
+    providers: np.ndarray,
+    clients: np.ndarray,
+    flow: list[int],
+    window_s: float,
+) -> dict[str, Any]:
+    """在按时间排序的记录上匹配一个流程，返回匹配统计
+
+    每条链从首步方法的一次出现开始，下一步取 (t, t + window_s] 内该方法最早的一次出现。
+    """
+    steps = [np.flatnonzero(methods == m) for m in flow]
+    cur = steps[0]
+    starts = len(cur)
+    ambiguity = np.ones(len(cur))
+    first_client = clients[cur]
+    first_provider = providers[cur]
+    same_client = np.ones(len(cur), dtype=bool)
+    cross_provider = np.zeros(len(cur), dtype=bool)
+    for nxt in steps[1:]:
+        nxt_ts = ts[nxt]
+        t = ts[cur]
+        lo = np.searchsorted(nxt_ts, t, side="right")
+        hi = np.searchsorted(nxt_ts, t + window_s, side="right")
+        ok = hi > lo
+        lo, hi = lo[ok], hi[ok]
+        ambiguity = ambiguity[ok] * (hi - lo)
+        first_client, first_provider = first_client[ok], first_provider[ok]
+        cur = nxt[lo]
+        same_client = same_client[ok] & (clients[cur] == first_client)
+        cross_provider = cross_provider[ok] | (providers[cur] != first_provider)
+    matches = len(cur)
+    return {
+        "starts": starts,
+        "matches": matches,
+        "match_rate": round(matches / starts, 4) if starts else 0.0,
+        "linkability": round(float(np.mean(1.0 / ambiguity)), 4) if matches else 0.0,
+        "precision": round(float(np.mean(same_client)), 4) if matches else 0.0,
+        "cross_provider": int(np.count_nonzero(cross_provider)),
+    }
+
+
+class TimingAnalyzer:
+    """增量收集 (时间, 方法, provider, client) 列，summary() 时统一计算"""
+
+    def __init__(self, windows_s: Optional[list[float]] = None, flows: Optional[dict[str, list[str]]] = None):
+        self.windows_s = list(windows_s or DEFAULT_TIMING_OPTIONS["windows_s"])
+        self.flows = dict(flows or DEFAULT_TIMING_OPTIONS["flows"])
+        self._codes: dict[str, int] = {}
+        self._names: list[str] = []
+        self._ts = array("d")
+        self._method = array("I")
+        self._provider = array("I")
+        self._client = array("I")
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._names)
+            self._names.append(value)
+        return code
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        if resp.source != "upstream":
+            return
+        self._ts.append(req.timestamp)
+        self._method.append(self._code(req.method))
+        self._provider.append(self._code(req.provider_id))
+        self._client.append(self._code(req.client_id))
+
+    def add_records(self, records: Iterable[tuple[RPCRequestRecord, RPCResponseRecord]]) -> "TimingAnalyzer":
+        for req, resp in records:
+            self.add(req, resp)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """每个 范围 x 流程 x 窗口 一行；范围为各 provider 及跨 provider（*）"""
+        if not self._ts:
+            return []
+        ts = np.frombuffer(self._ts, dtype=np.float64)
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        methods = np.frombuffer(self._method, dtype=np.uint32)[order]
+        providers = np.frombuffer(self._provider, dtype=np.uint32)[order]
+        clients = np.frombuffer(self._client, dtype=np.uint32)[order]
+
+        flows = {
+            name: [self._codes[m] for m in seq]
+            for name, seq in self.flows.items()
+            if all(m in self._codes for m in seq)
+        }
+        scopes = [(self._names[p], providers == p) for p in np.unique(providers).tolist()]
+        if len(scopes) > 1:
+            scopes.append((ALL_PROVIDERS, None))
+        scopes.sort(key=lambda s: s[0])
+
+        rows = []
+        for scope, mask in scopes:
+            cols = (ts, methods, providers, clients) if mask is None else (
+                ts[mask], methods[mask], providers[mask], clients[mask]
+            )
+            for name, flow in flows.items():
+                for window_s in self.windows_s:
+                    stats = _match_flow(*cols, flow, window_s)
+                    if stats["starts"]:
+                        rows.append({"scope": scope, "flow": name, "window_s": window_s, **stats})
+        return rows
+
+    @staticmethod
+    def dimension_result(rows: list[dict[str, Any]]) -> Optional[DimensionResult]:
+        """将匹配结果归纳为 timing_correlation 维度；没有任何匹配时返回 None"""
+        matched = [r for r in rows if r["matches"]]
+        if not matched:
+            return None
+        worst = max(r["linkability"] for r in matched)
+        evidence = [
+            f"{'跨 provider' if r['scope'] == ALL_PROVIDERS else 'Provider: ' + r['scope']} "
+            f"flow {r['flow']} window {r['window_s']}s: {r['matches']}/{r['starts']} 匹配, "
+            f"可关联度 {r['linkability']}, 准确率 {r['precision']}"
+            for r in matched
+        ]
+        return DimensionResult(
+            dimension_id="timing_correlation",
+            dimension_name="请求时序关联",
+            risk_level="high" if worst >= HIGH_RISK_LINKABILITY else "medium",
+            description="同一操作的多个请求在短时间内先后到达，节点可据时序将其关联到同一用户，跨 IP / 跨 provider 同样适用",
+            evidence=evidence,
+            recommendation="在操作步骤间加入随机延迟、与其他请求交错发送，或将步骤分散到不同时间段",
+        )
@@ -0,0 +1,96 @@
+"""
+请求合并（single-flight）- 同一 provider 上相同的在途请求只发送一次
+
+多个钱包会话几乎同时向同一 provider 查询相同的链上公共数据（eth_blockNumber、
+eth_getBlockByNumber 等）时，第一个请求（leader）实际发送，其余请求（follower）等待并共享其结果。
+follower 的请求头、IP 不会到达节点，记录标记 source="coalesced" 与 leader 钱包。
+
+只合并参数中不含地址的方法：含地址的请求合并后结果虽相同，但会让一个钱包替另一个钱包暴露地址。
+"""
+import json
+import threading
+from typing import Any, Callable, Optional
+
+# 结果与调用方无关、参数不含地址的方法
+COALESCABLE_METHODS = frozenset({
+    "eth_blockNumber",
+    "eth_getBlockByNumber",
+    "eth_getBlockByHash",
+    "eth_gasPrice",
+    "eth_feeHistory",
+    "eth_chainId",
+    "net_version",
+})
+
+
+class _Flight:
+    __slots__ = ("leader", "done", "value", "exc", "followers")
+
+    def __init__(self, leader: str):
+        self.leader = leader
+        self.done = threading.Event()
+        self.value: Any = None
+        self.exc: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """按 (provider, method, params) 合并在途请求，线程安全，可在多个 client 间共享"""
+
+    def __init__(self, methods: frozenset = COALESCABLE_METHODS):
+        self.methods = methods
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "followers": 0}
+
+    def applies(self, method: str) -> bool:
+        return method in self.methods
+
+    def do(
+        self,
+        provider_id: str,
+        method: str,
+        params: list,
+        wallet_id: str,
+        fn: Callable[[], Any],
+    ) -> tuple[Any, Optional[str]]:
+        """执行或加入在途请求，返回 (fn 的返回值, leader 钱包)
+
+        当前调用为 leader 时 leader 钱包为 None；leader 抛出的异常同样传递给 follower。
+        """
+        key = f"{provider_id}|{method}|{json.dumps(params, sort_keys=True, separators=(',', ':'))}"
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(wallet_id)
+                leader = True
+                self.stats["leaders"] += 1
+            else:
+                flight.followers += 1
+                leader = False
+                self.stats["followers"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.exc is not None:
+                raise flight.exc
+            return flight.value, flight.leader
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.exc = e
+            raise
+        finally:
+            # 先移除再唤醒：之后到达的相同请求发起新的一轮，不会读到旧结果
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, None
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["leaders"] + stats["followers"]
+        stats["coalesce_rate"] = round(stats["followers"] / total, 4) if total else 0.0
+        return stats
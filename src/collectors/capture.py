@@ -0,0 +1,169 @@
+"""
+抓包文件（capture）- 追加写入的 NDJSON，可选 gzip 压缩
+
+每行一个 JSON 对象，按 kind 区分：
+- meta:   运行配置（文件首行）
+- record: 一对请求/响应记录
+- cell:   单个 钱包 x RPC x 场景 的执行结果（场景结束时写入）
+- partial: 分片执行的部分聚合结果（分片结束时追加，见 collectors.shard）
+
+路径后缀为 .db / .sqlite / .sqlite3 时改用 SQLite 抓包库（collectors.capture_db），
+open_sink / iter_capture / read_capture_index 按后缀自动选择。
+"""
+import gzip
+import json
+import threading
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Iterator, Optional, Protocol
+
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+
+_REQUEST_FIELDS = [f.name for f in fields(RPCRequestRecord)]
+_RESPONSE_FIELDS = [f.name for f in fields(RPCResponseRecord) if f.name != "request"]
+# 记录行固定以此前缀开头，读取索引时无需解析
+_RECORD_PREFIX = '{"kind": "record"'
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def record_to_dict(req: RPCRequestRecord, resp: RPCResponseRecord) -> dict:
+    """记录序列化为可 JSON 化的 dict"""
+    return {
+        "request": {name: getattr(req, name) for name in _REQUEST_FIELDS},
+        "response": {name: getattr(resp, name) for name in _RESPONSE_FIELDS},
+    }
+
+
+def record_from_dict(data: dict) -> tuple[RPCRequestRecord, RPCResponseRecord]:
+    """从 dict 还原记录（忽略未知字段，兼容旧版本抓包文件）"""
+    req_data = data["request"]
+    req = RPCRequestRecord(**{k: req_data[k] for k in _REQUEST_FIELDS if k in req_data})
+    resp_data = data["response"]
+    resp = RPCResponseRecord(request=req, **{k: resp_data[k] for k in _RESPONSE_FIELDS if k in resp_data})
+    return req, resp
+
+
+class CaptureSink(Protocol):
+    """抓包 sink 接口（NDJSONSink / capture_db.SQLiteSink）"""
+
+    def write(self, req: RPCRequestRecord, resp: RPCResponseRecord): ...
+
+    def write_cell(self, key: str, result: dict, error: Optional[dict] = None): ...
+
+    def iter_records(self) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]: ...
+
+    def close(self): ...
+
+
+class NDJSONSink:
+    """线程安全的追加写入 sink，可作为 RPCClient 的 sink 参数
+
+    append=False 时覆盖已有文件；append=True 时在文件末尾追加（gzip 追加为新的压缩成员，读取时透明拼接）
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        meta: Optional[dict] = None,
+        flush_every: int = 1000,
+        append: bool = False,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.count = 0
+        self._lock = threading.Lock()
+        self._f = _open(self.path, "a" if append else "w")
+        if meta is not None:
+            self._write_line({"kind": "meta", **meta})
+
+    def _write_line(self, obj: dict):
+        with self._lock:
+            self._f.write(json.dumps(obj, ensure_ascii=False, default=str) + "\n")
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self._f.flush()
+
+    def write(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        self._write_line({"kind": "record", **record_to_dict(req, resp)})
+
+    def write_cell(self, key: str, result: dict, error: Optional[dict] = None):
+        self._write_line({"kind": "cell", "key": key, "result": result, "error": error})
+
+    def write_partial(self, partial: dict):
+        self._write_line({"kind": "partial", **partial})
+
+    def iter_records(self) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]:
+        """已写入的记录（须在 close 之后调用）"""
+        return iter_capture(self.path)
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+    def __enter__(self) -> "NDJSONSink":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sink(path: Path, meta: Optional[dict] = None):
+    """按后缀创建抓包 sink：SQLite 抓包库（新增一次运行）或 NDJSON 文件（覆盖）"""
+    from .capture_db import SQLiteSink, is_db_path
+
+    if is_db_path(path):
+        return SQLiteSink(path, meta=meta)
+    return NDJSONSink(path, meta=meta)
+
+
+def _iter_lines(path: Path) -> Iterator[dict]:
+    with _open(Path(path), "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_capture(path: Path) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]:
+    """逐条读取抓包文件中的记录（生成器，内存占用与文件大小无关）；抓包库读取全部运行"""
+    from .capture_db import is_db_path, iter_db
+
+    if is_db_path(path):
+        yield from iter_db(path)
+        return
+    for obj in _iter_lines(path):
+        if obj.get("kind", "record") == "record":
+            yield record_from_dict(obj)
+
+
+def read_capture_index(path: Path) -> dict[str, Any]:
+    """读取抓包文件的 meta、各场景执行结果与分片部分结果（跳过记录行的反序列化）"""
+    from .capture_db import is_db_path, read_db_index
+
+    if is_db_path(path):
+        return read_db_index(path)
+    meta: dict[str, Any] = {}
+    partial: Optional[dict[str, Any]] = None
+    cells: dict[str, Any] = {}
+    errors: list[dict] = []
+    with _open(Path(path), "r") as f:
+        for line in f:
+            if line.startswith(_RECORD_PREFIX) or not line.strip():
+                continue
+            obj = json.loads(line)
+            kind = obj.get("kind", "record")
+            if kind == "meta" and not meta:
+                meta = {k: v for k, v in obj.items() if k != "kind"}
+            elif kind == "cell":
+                cells[obj["key"]] = obj["result"]
+                if obj.get("error"):
+                    errors.append(obj["error"])
+            elif kind == "partial":
+                partial = {k: v for k, v in obj.items() if k != "kind"}
+    return {"meta": meta, "scenario_results": cells, "errors": errors, "partial": partial}
@@ -0,0 +1,368 @@
+"""
+SQLite 抓包库 - 可索引查询的抓包存储，一个库文件累积多次运行
+
+与 NDJSON 抓包（collectors.capture）互为替代：--capture 路径后缀为 .db / .sqlite / .sqlite3 时使用本模块。
+- runs:              每次运行一行（运行配置），之后的写入都属于该运行
+- requests:          一对请求/响应记录一行，按写入顺序编号；provider / wallet / method / timestamp 建索引
+- request_addresses: 请求暴露的地址（小写）-> 请求，按地址查询
+- header_sets:       请求头集合去重存储
+- cells:             单个 钱包 x RPC x 场景 的执行结果
+写入先缓冲在内存，每 batch_size 条以一个写事务批量提交（请求编号在事务内分配，多个进程可同时写入同一库）。
+读取按条件（运行、provider、钱包、方法、地址、时间范围）走索引过滤，结果仍为记录流，
+可直接交给 analyze_records 与报告生成。
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+
+DB_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+DEFAULT_BATCH_SIZE = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS header_sets (
+    id INTEGER PRIMARY KEY,
+    headers TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    timestamp REAL NOT NULL,
+    provider TEXT NOT NULL,
+    wallet TEXT NOT NULL,
+    method TEXT NOT NULL,
+    params TEXT,
+    header_set INTEGER REFERENCES header_sets(id),
+    exposed_addresses TEXT,
+    exposed_params_summary TEXT,
+    batch_id TEXT,
+    batch_size INTEGER,
+    session_id TEXT,
+    result TEXT,
+    error TEXT,
+    elapsed_ms REAL,
+    connection_reused INTEGER,
+    source TEXT,
+    coalesced_with TEXT,
+    retry INTEGER,
+    status_code INTEGER,
+    phases TEXT,
+    client_id TEXT
+);
+CREATE TABLE IF NOT EXISTS request_addresses (
+    request_id INTEGER NOT NULL REFERENCES requests(id),
+    address TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cells (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    key TEXT NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_requests_run ON requests(run_id);
+CREATE INDEX IF NOT EXISTS idx_requests_provider ON requests(provider, timestamp);
+CREATE INDEX IF NOT EXISTS idx_requests_wallet ON requests(wallet, timestamp);
+CREATE INDEX IF NOT EXISTS idx_requests_method ON requests(method);
+CREATE INDEX IF NOT EXISTS idx_requests_timestamp ON requests(timestamp);
+CREATE INDEX IF NOT EXISTS idx_request_addresses ON request_addresses(address, request_id);
+CREATE INDEX IF NOT EXISTS idx_cells_run ON cells(run_id);
+"""
+
+_REQUEST_COLUMNS = (
+    "id, run_id, timestamp, provider, wallet, method, params, header_set, exposed_addresses, "
+    "exposed_params_summary, batch_id, batch_size, session_id, result, error, elapsed_ms, "
+    "connection_reused, source, coalesced_with, retry, status_code, phases, client_id"
+)
+
+
+def is_db_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in DB_SUFFIXES
+
+
+# 复用编码器：json.dumps 带非默认参数时每次调用都会新建编码器
+_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else _ENCODER.encode(value)
+
+
+def _loads(value: Optional[str]) -> Any:
+    return None if value is None else json.loads(value)
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """打开（必要时创建）抓包库"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 自动提交模式，写事务由调用方显式 BEGIN IMMEDIATE
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class SQLiteSink:
+    """线程安全的抓包库写入 sink（接口同 NDJSONSink），每次创建新增一个运行"""
+
+    def __init__(self, path: Path, meta: Optional[dict] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.count = 0
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        # 请求头（按发送顺序的键值元组）-> header_sets.id
+        self._headers: dict[tuple, int] = {}
+        # 缓冲的请求行（不含编号）与 (缓冲内序号, 地址)
+        self._pending: list[tuple] = []
+        self._pending_addresses: list[tuple[int, str]] = []
+        self._pending_cells: list[tuple] = []
+        cur = self._conn.execute(
+            "INSERT INTO runs (created, config) VALUES (?, ?)",
+            (time.time(), _dumps((meta or {}).get("config"))),
+        )
+        self.run_id = cur.lastrowid
+
+    def _header_set(self, headers: dict) -> int:
+        key = tuple(headers.items())
+        idx = self._headers.get(key)
+        if idx is None:
+            text = json.dumps(headers, sort_keys=True, ensure_ascii=False)
+            self._conn.execute("INSERT OR IGNORE INTO header_sets (headers) VALUES (?)", (text,))
+            idx = self._headers[key] = self._conn.execute(
+                "SELECT id FROM header_sets WHERE headers = ?", (text,)
+            ).fetchone()[0]
+        return idx
+
+    def write(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        with self._lock:
+            n = len(self._pending)
+            self._pending.append((
+                self.run_id, req.timestamp, req.provider_id, req.wallet_id, req.method,
+                _dumps(req.params), self._header_set(req.headers_sent), _dumps(list(req.exposed_addresses)),
+                req.exposed_params_summary, req.batch_id, req.batch_size, req.session_id,
+                _dumps(resp.result), _dumps(resp.error), resp.elapsed_ms,
+                None if resp.connection_reused is None else int(resp.connection_reused),
+                resp.source, resp.coalesced_with, resp.retry, resp.status_code, _dumps(resp.phases),
+                req.client_id,
+            ))
+            self._pending_addresses.extend(
+                (n, addr.lower()) for addr in dict.fromkeys(req.exposed_addresses)
+            )
+            self.count += 1
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def write_cell(self, key: str, result: dict, error: Optional[dict] = None):
+        with self._lock:
+            self._pending_cells.append((self.run_id, key, _dumps(result), _dumps(error)))
+            self.count += 1
+
+    def _flush(self):
+        """在一个事务中提交缓冲的记录（调用方持有锁）"""
+        if not (self._pending or self._pending_cells):
+            return
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            base = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM requests").fetchone()[0]
+            conn.executemany(
+                f"INSERT INTO requests ({_REQUEST_COLUMNS}) VALUES ({', '.join('?' * (_REQUEST_COLUMNS.count(',') + 1))})",
+                ((base + i, *row) for i, row in enumerate(self._pending)),
+            )
+            conn.executemany(
+                "INSERT INTO request_addresses VALUES (?, ?)",
+                ((base + i, addr) for i, addr in self._pending_addresses),
+            )
+            conn.executemany("INSERT INTO cells VALUES (?, ?, ?, ?)", self._pending_cells)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._pending.clear()
+        self._pending_addresses.clear()
+        self._pending_cells.clear()
+
+    def iter_records(self) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]:
+        """本次运行写入的记录（须在 close 之后调用）"""
+        return iter_db(self.path, run_ids=[self.run_id])
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "SQLiteSink":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _where(
+    run_ids: Optional[list[int]] = None,
+    provider: Optional[str] = None,
+    wallet: Optional[str] = None,
+    method: Optional[str] = None,
+    address: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> tuple[str, list]:
+    """过滤条件 -> (WHERE 子句, 参数)；各条件均可由索引满足"""
+    clauses, args = [], []
+    if run_ids:
+        clauses.append(f"r.run_id IN ({', '.join('?' * len(run_ids))})")
+        args.extend(run_ids)
+    for column, value in (("provider", provider), ("wallet", wallet), ("method", method)):
+        if value:
+            clauses.append(f"r.{column} = ?")
+            args.append(value)
+    if address:
+        clauses.append("r.id IN (SELECT request_id FROM request_addresses WHERE address = ?)")
+        args.append(address.lower())
+    if since is not None:
+        clauses.append("r.timestamp >= ?")
+        args.append(since)
+    if until is not None:
+        clauses.append("r.timestamp < ?")
+        args.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+def iter_db(path: Path, **filters: Any) -> Iterator[tuple[RPCRequestRecord, RPCResponseRecord]]:
+    """按写入顺序逐条读取满足条件的记录（filters 见 _where）"""
+    conn = connect(path)
+    try:
+        headers = {idx: json.loads(h) for idx, h in conn.execute("SELECT id, headers FROM header_sets")}
+        where, args = _where(**filters)
+        cursor = conn.execute(f"SELECT {_REQUEST_COLUMNS} FROM requests r{where} ORDER BY r.id", args)
+        for row in cursor:
+            (_, _, ts, provider, wallet, method, params, header_set, exposed, summary, batch_id, batch_size,
+             session_id, result, error, elapsed_ms, reused, source, coalesced_with, retry, status_code, phases,
+             client_id) = row
+            req = RPCRequestRecord(
+                method=method,
+                params=_loads(params),
+                wallet_id=wallet,
+                provider_id=provider,
+                headers_sent=dict(headers.get(header_set) or {}),
+                timestamp=ts,
+                exposed_addresses=_loads(exposed) or [],
+                exposed_params_summary=summary or "",
+                batch_id=batch_id,
+                batch_size=batch_size or 1,
+                session_id=session_id,
+                client_id=client_id,
+            )
+            yield req, RPCResponseRecord(
+                request=req,
+                result=_loads(result),
+                error=_loads(error),
+                elapsed_ms=elapsed_ms,
+                connection_reused=None if reused is None else bool(reused),
+                source=source or "upstream",
+                coalesced_with=coalesced_with,
+                retry=retry or 0,
+                status_code=status_code,
+                phases=_loads(phases),
+            )
+    finally:
+        conn.close()
+
+
+def list_runs(path: Path) -> list[dict[str, Any]]:
+    """各次运行：编号、时间、请求数与时间范围、配置"""
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT runs.id, runs.created, runs.config, COUNT(r.id), MIN(r.timestamp), MAX(r.timestamp) "
+            "FROM runs LEFT JOIN requests r ON r.run_id = runs.id GROUP BY runs.id ORDER BY runs.id"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"id": i, "created": created, "requests": n, "first_seen": first, "last_seen": last, "config": _loads(config)}
+        for i, created, config, n, first, last in rows
+    ]
+
+
+def read_db_index(path: Path, run_ids: Optional[list[int]] = None) -> dict[str, Any]:
+    """与 read_capture_index 结构相同；多次运行时配置取各运行钱包 / RPC / 场景的并集"""
+    runs = [r for r in list_runs(path) if not run_ids or r["id"] in run_ids]
+    configs = [r["config"] for r in runs if r["config"]]
+    config: dict[str, Any] = {}
+    if len(configs) == 1:
+        config = configs[0]
+    elif configs:
+        config = {
+            key: list(dict.fromkeys(v for c in configs for v in c.get(key, [])))
+            for key in ("wallets", "providers", "scenarios")
+        }
+    conn = connect(path)
+    try:
+        where = f" WHERE run_id IN ({', '.join('?' * len(runs))})" if run_ids else ""
+        args = [r["id"] for r in runs] if run_ids else []
+        cells: dict[str, Any] = {}
+        errors: list[dict] = []
+        for key, result, error in conn.execute(f"SELECT key, result, error FROM cells{where} ORDER BY rowid", args):
+            cells[key] = _loads(result)
+            if error:
+                errors.append(_loads(error))
+    finally:
+        conn.close()
+    meta = {"config": config} if config else {}
+    return {"meta": meta, "scenario_results": cells, "errors": errors, "partial": None, "runs": [r["id"] for r in runs]}
+
+
+def address_sightings(path: Path, address: str, **filters: Any) -> list[dict[str, Any]]:
+    """某地址在各 provider x 钱包 处的出现次数、时间范围与方法（按地址索引查询）"""
+    where, args = _where(address=address, **filters)
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT r.provider, r.wallet, COUNT(*), MIN(r.timestamp), MAX(r.timestamp), "
+            "GROUP_CONCAT(DISTINCT r.method), COUNT(DISTINCT r.run_id) "
+            f"FROM requests r{where} GROUP BY r.provider, r.wallet ORDER BY COUNT(*) DESC, r.provider, r.wallet",
+            args,
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "provider": provider,
+            "wallet": wallet,
+            "requests": n,
+            "first_seen": first,
+            "last_seen": last,
+            "methods": sorted(methods.split(",")) if methods else [],
+            "runs": n_runs,
+        }
+        for provider, wallet, n, first, last, methods, n_runs in rows
+    ]
+
+
+def import_capture(capture_path: Path, db_path: Path) -> int:
+    """把 NDJSON 抓包文件导入抓包库（作为新的一次运行），返回运行编号"""
+    from .capture import iter_capture, read_capture_index
+
+    index = read_capture_index(capture_path)
+    errors = {e.get("key"): e for e in index["errors"]}
+    with SQLiteSink(db_path, meta=index["meta"]) as sink:
+        for req, resp in iter_capture(capture_path):
+            sink.write(req, resp)
+        for key, result in index["scenario_results"].items():
+            sink.write_cell(key, result, errors.get(key))
+    return sink.run_id
@@ -0,0 +1,130 @@
+"""
+断点续跑 - 以单元格（钱包 x RPC x 场景）为单位持久化执行结果
+
+检查点为目录下的 NDJSON 日志（journal.ndjson，抓包文件格式，不压缩以便安全追加）：
+- 每个场景结束时，把该单元格的全部记录与 cell 行一次写入并 fsync；记录行带 cell 键与第几次执行（attempt）
+- 进程中途退出时，已提交的单元格不受影响；末尾未提交完的单元格在下次打开时截掉
+- 续跑时跳过最近一次执行成功的单元格，只重跑失败或缺失的单元格
+- 报告从检查点构建：每个单元格只取最近一次执行的记录与结果；一次提交的记录在日志中连续存放，
+  按网格顺序逐个单元格定位后流式读取，不在内存中保留记录
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from ..rpc_client import RecordPair
+from .capture import _RECORD_PREFIX, record_from_dict, record_to_dict
+
+JOURNAL_NAME = "journal.ndjson"
+
+
+class CheckpointStore:
+    """单元格粒度的检查点日志（线程安全）
+
+    resume=False 且检查点已存在时报错，避免误覆盖已付费完成的结果。
+    """
+
+    def __init__(self, directory: Path, meta: Optional[dict[str, Any]] = None, resume: bool = False):
+        self.directory = Path(directory)
+        self.path = self.directory / JOURNAL_NAME
+        self._lock = threading.Lock()
+        # 单元格键 -> (最近一次 attempt, 结果, 错误)
+        self._cells: dict[str, tuple[int, dict, Optional[dict]]] = {}
+        if self.path.exists() and self.path.stat().st_size:
+            if not resume:
+                raise FileExistsError(f"Checkpoint {self.path} already exists; resume it or remove it first")
+            self._repair()
+            self._load_cells()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "a", encoding="utf-8")
+        if self.path.stat().st_size == 0:
+            self._append([{"kind": "meta", **(meta or {})}])
+
+    def _repair(self):
+        """截掉进程中途退出时未提交完的单元格（最后一个 cell / meta 行之后的内容）"""
+        prefix = _RECORD_PREFIX.encode()
+        committed = offset = 0
+        with open(self.path, "rb+") as f:
+            for line in f:
+                offset += len(line)
+                if line.endswith(b"\n") and not line.startswith(prefix):
+                    committed = offset
+            if committed != offset:
+                f.truncate(committed)
+
+    def _load_cells(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(_RECORD_PREFIX) or not line.strip():
+                    continue
+                obj = json.loads(line)
+                if obj.get("kind") == "cell":
+                    self._cells[obj["key"]] = (obj.get("attempt", 1), obj["result"], obj.get("error"))
+
+    def _append(self, objs: list[dict]):
+        text = "".join(json.dumps(obj, ensure_ascii=False, default=str) + "\n" for obj in objs)
+        self._f.write(text)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def completed(self) -> set[str]:
+        """最近一次执行成功的单元格"""
+        with self._lock:
+            return {key for key, (_, result, _) in self._cells.items() if result.get("status") == "ok"}
+
+    def commit(self, key: str, records: Iterable[RecordPair], result: dict, error: Optional[dict] = None):
+        """一次写入单元格的记录与结果"""
+        with self._lock:
+            attempt = self._cells[key][0] + 1 if key in self._cells else 1
+            lines = [{"kind": "record", "cell": key, "attempt": attempt, **record_to_dict(req, resp)}
+                     for req, resp in records]
+            lines.append({"kind": "cell", "key": key, "attempt": attempt, "result": result, "error": error})
+            self._append(lines)
+            self._cells[key] = (attempt, result, error)
+
+    def results(self, order: dict[str, int]) -> tuple[dict[str, Any], list[dict]]:
+        """网格中各单元格最近一次执行的结果与错误，按网格顺序"""
+        with self._lock:
+            cells = {key: cell for key, cell in self._cells.items() if key in order}
+        keys = sorted(cells, key=order.__getitem__)
+        return (
+            {key: cells[key][1] for key in keys},
+            [cells[key][2] for key in keys if cells[key][2]],
+        )
+
+    def _spans(self, latest: dict[str, int]) -> dict[str, tuple[int, int]]:
+        """各单元格最近一次执行的记录在日志中的字节区间 [起, 止)：即该 cell 行之前、上一个非记录行之后的内容"""
+        prefix = _RECORD_PREFIX.encode()
+        spans: dict[str, tuple[int, int]] = {}
+        start = offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                end = offset + len(line)
+                if not line.startswith(prefix) and line.strip():
+                    obj = json.loads(line)
+                    key = obj.get("key")
+                    if obj.get("kind") == "cell" and key in latest and obj.get("attempt", 1) == latest[key]:
+                        spans[key] = (start, offset)
+                    start = end
+                offset = end
+        return spans
+
+    def iter_records(self, order: dict[str, int]) -> Iterator[RecordPair]:
+        """按网格顺序逐个单元格返回最近一次执行的记录（与单进程顺序执行的记录顺序一致）"""
+        with self._lock:
+            latest = {key: cell[0] for key, cell in self._cells.items() if key in order}
+        spans = self._spans(latest)
+        with open(self.path, "rb") as f:
+            for key in sorted(spans, key=order.__getitem__):
+                start, end = spans[key]
+                f.seek(start)
+                while f.tell() < end:
+                    line = f.readline()
+                    if line.strip():
+                        yield record_from_dict(json.loads(line))
+
+    def close(self):
+        with self._lock:
+            self._f.close()
@@ -0,0 +1,291 @@
+"""
+负载测试 - 在固定时长内以目标速率或并发度循环执行场景，统计延迟分布
+
+- 闭环（concurrency）：N 个虚拟用户各自循环执行场景，结束一个立即开始下一个
+- 开环（rate）：按目标速率（每秒场景次数）定时发起，不受响应变慢影响；
+  实际开始时间晚于计划时间的部分计入 schedule_lag，避免协同遗漏（coordinated omission）掩盖排队延迟
+记录不在内存中累积：每次场景执行的记录即时计入直方图与隐私聚合，可选写入抓包文件
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from ..analyzers.latency import LatencyHistogram, LatencyStats
+from ..config_loader import load_config
+from ..coalescing import SingleFlight
+from ..hooks import RPCHook, scenario_hooks
+from ..rate_limit import get_limiter, limiter_stats, reset_limiters
+from ..rpc_cache import CachePool
+from ..rpc_client import RPCClient
+from .capture import CaptureSink, open_sink
+from .runner import (
+    default_scenarios,
+    RecordAnalysis,
+    RECORD_PREVIEW_LIMIT,
+    _make_cache_pool,
+    analysis_state,
+    build_result,
+)
+
+DEFAULT_LOAD_DURATION_S = 30.0
+# 开环模式下同时在途的场景执行上限
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class _LoadState:
+    """负载测试中各 worker 共享的统计状态"""
+
+    def __init__(
+        self,
+        sink: Optional[CaptureSink],
+        cache_pool: Optional[CachePool] = None,
+        coalescer: Optional[SingleFlight] = None,
+        rate_limit: bool = False,
+        hooks: Optional[list[RPCHook]] = None,
+        transport: str = "http",
+    ):
+        # 延迟分布由 analysis.latency 统计（逐条记录计入一次）
+        self.analysis = RecordAnalysis(preview_limit=RECORD_PREVIEW_LIMIT)
+        self.schedule_lag = LatencyHistogram()
+        self.iterations = 0
+        self.scenario_errors: dict[str, int] = {}
+        self.sink = sink
+        self.cache_pool = cache_pool
+        self.coalescer = coalescer
+        self.rate_limit = rate_limit
+        self.hooks = hooks
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._clients = threading.local()
+        # 全部线程创建的 client，结束时统一关闭（WebSocket 连接）
+        self._all_clients: list[RPCClient] = []
+
+    def client(self, wallet_id: str, provider_id: str) -> RPCClient:
+        """每个线程为每个 钱包 x RPC 组合复用一个 client"""
+        cache = getattr(self._clients, "cache", None)
+        if cache is None:
+            cache = self._clients.cache = {}
+        key = (wallet_id, provider_id)
+        if key not in cache:
+            response_cache = self.cache_pool.for_client(wallet_id, provider_id) if self.cache_pool else None
+            cache[key] = RPCClient(
+                provider_id=provider_id,
+                wallet_id=wallet_id,
+                max_records=0,
+                sink=self.sink,
+                cache=response_cache,
+                coalescer=self.coalescer,
+                limiter=get_limiter(provider_id) if self.rate_limit else None,
+                hooks=self.hooks,
+                transport=self.transport,
+            )
+            with self._lock:
+                self._all_clients.append(cache[key])
+        return cache[key]
+
+    def close(self):
+        with self._lock:
+            clients, self._all_clients = self._all_clients, []
+        for client in clients:
+            client.close()
+
+    def run_cell(self, cell: tuple[str, str, Any], batch: bool, lag_ms: Optional[float] = None):
+        wallet_id, provider_id, scenario = cell
+        client = self.client(wallet_id, provider_id)
+        error = None
+        with (
+            scenario_hooks(self.hooks, wallet_id, provider_id, scenario.id) as span,
+            client.capture() as captured,
+        ):
+            try:
+                scenario.run(client, batch=batch)
+            except Exception as e:
+                error = e
+                span.status = "error"
+            span.requests = captured.total
+        records = list(captured)
+        with self._lock:
+            self.iterations += 1
+            if lag_ms is not None:
+                self.schedule_lag.record(lag_ms)
+            if error is not None:
+                key = f"{wallet_id}_{provider_id}_{scenario.id}"
+                self.scenario_errors[key] = self.scenario_errors.get(key, 0) + 1
+            self.analysis.add_records(records)
+
+
+def _run_closed_loop(state: _LoadState, cells: list, workers: int, deadline: float, batch: bool):
+    cycle = itertools.cycle(cells)
+    cycle_lock = threading.Lock()
+
+    def _worker():
+        while time.perf_counter() < deadline:
+            with cycle_lock:
+                cell = next(cycle)
+            state.run_cell(cell, batch)
+
+    threads = [threading.Thread(target=_worker, name=f"load-{i}", daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def _run_open_loop(
+    state: _LoadState,
+    cells: list,
+    rate: float,
+    max_in_flight: int,
+    started: float,
+    deadline: float,
+    batch: bool,
+):
+    interval = 1.0 / rate
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def _task(cell, scheduled: float):
+        try:
+            lag_ms = (time.perf_counter() - scheduled) * 1000
+            state.run_cell(cell, batch, lag_ms=max(0.0, lag_ms))
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i, cell in enumerate(itertools.cycle(cells)):
+            scheduled = started + i * interval
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # 在途已满时阻塞，阻塞时长体现为后续任务的 schedule_lag
+            in_flight.acquire()
+            pool.submit(_task, cell, scheduled)
+
+
+def load_errors(scenario_errors: dict[str, int]) -> list[dict]:
+    return [{"key": key, "error": f"{n} 次场景执行失败"} for key, n in sorted(scenario_errors.items())]
+
+
+def load_section(
+    load_config_section: dict[str, Any],
+    latency: LatencyStats,
+    schedule_lag: LatencyHistogram,
+    iterations: int,
+    wall_clock: float,
+) -> dict[str, Any]:
+    """结果中的 load 段（开环模式附带 schedule_lag）"""
+    latency_rows = latency.rows(wall_clock)
+    total_errors = sum(row["errors"] for row in latency_rows)
+    upstream_requests = sum(row["requests"] for row in latency_rows)
+    return {
+        **load_config_section,
+        "wall_clock_s": round(wall_clock, 3),
+        "iterations": iterations,
+        "iterations_per_sec": round(iterations / wall_clock, 2) if wall_clock > 0 else 0.0,
+        "request_error_rate": round(total_errors / upstream_requests, 4) if upstream_requests else 0.0,
+        "schedule_lag_ms": {
+            "p50": schedule_lag.percentile(50),
+            "p99": schedule_lag.percentile(99),
+            "max": schedule_lag.max_us / 1000 if schedule_lag.max_us is not None else None,
+        } if load_config_section.get("rate") else None,
+        "cells": latency_rows,
+        "histograms": latency.to_state(),
+    }
+
+
+def run_load(
+    wallets: list[str] = None,
+    providers: list[str] = None,
+    scenarios: list = None,
+    duration_s: float = DEFAULT_LOAD_DURATION_S,
+    rate: Optional[float] = None,
+    concurrency: int = 8,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    batch: bool = False,
+    capture_path: Optional[Path] = None,
+    cache: bool = False,
+    cache_scope: Optional[str] = None,
+    coalesce: bool = False,
+    rate_limit: bool = False,
+    cells: Optional[list[tuple[str, str, list]]] = None,
+    shard: Optional[tuple[int, int]] = None,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
+) -> dict[str, Any]:
+    """负载测试：rate 指定时为开环（每秒场景次数），否则为 concurrency 个虚拟用户的闭环
+
+    返回与 run_all 相同结构的结果，另附 load 段：各 provider x wallet x method 的
+    p50/p90/p99/p99.9 延迟、吞吐与错误率。cells / shard / hooks / transport 含义同 run_all。
+    """
+    config = load_config()
+    wallets = wallets or list(config["wallets"].keys())
+    providers = providers or list(config["rpc_providers"].keys())
+    scenarios = scenarios or default_scenarios(transport)
+    if cells is None:
+        cells = [(w, p, scenarios) for w in wallets for p in providers]
+    cells = [(w, p, s) for w, p, cell_scenarios in cells for s in cell_scenarios]
+
+    load_config_section = {
+        "duration_s": duration_s,
+        "model": "open" if rate else "closed",
+        "rate": rate,
+        "concurrency": None if rate else concurrency,
+        "max_in_flight": max_in_flight if rate else None,
+    }
+    run_config = {
+        "wallets": wallets,
+        "providers": providers,
+        "scenarios": [s.id for s in scenarios],
+        "batch": batch,
+        "transport": transport,
+        "load": load_config_section,
+    }
+    cache_pool = _make_cache_pool(cache, cache_scope)
+    if cache_pool is not None:
+        run_config["cache"] = {"scope": cache_pool.scope}
+    coalescer = SingleFlight() if coalesce else None
+    run_config["coalesce"] = coalesce
+    run_config["rate_limit"] = rate_limit
+    if rate_limit:
+        reset_limiters()
+    if shard is not None:
+        run_config["shard"] = {"index": shard[0], "count": shard[1]}
+
+    sink = open_sink(capture_path, meta={"config": run_config}) if capture_path else None
+    state = _LoadState(sink, cache_pool, coalescer, rate_limit, hooks, transport)
+    started = time.perf_counter()
+    deadline = started + duration_s
+    try:
+        if rate:
+            _run_open_loop(state, cells, rate, max_in_flight, started, deadline, batch)
+        else:
+            _run_closed_loop(state, cells, concurrency, deadline, batch)
+    finally:
+        state.close()
+        if sink is not None:
+            sink.close()
+    wall_clock = time.perf_counter() - started
+
+    errors = load_errors(state.scenario_errors)
+    analysis = state.analysis.result()
+    data = build_result(run_config, analysis, {}, errors, wall_clock)
+    data["load"] = load_section(
+        load_config_section, state.analysis.latency, state.schedule_lag, state.iterations, wall_clock
+    )
+    if shard is not None:
+        data["partial"] = {
+            **analysis_state(analysis),
+            "scenario_errors": state.scenario_errors,
+            "schedule_lag": state.schedule_lag.to_state(),
+        }
+    if cache_pool is not None:
+        data["cache"] = cache_pool.stats()
+    if coalescer is not None:
+        data["coalescing"] = coalescer.snapshot()
+    if rate_limit:
+        data["rate_limit"] = limiter_stats()
+    return data
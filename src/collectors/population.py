@@ -0,0 +1,248 @@
+"""
+合成用户群体执行 - 按 population 配置生成大量用户，并发执行各自的场景序列
+
+- 用户由 Population 惰性生成，worker 线程从共享迭代器逐个领取，同时存活的用户数不超过 max_workers
+- 每个用户固定一个钱包（请求头指纹）、一个 provider 和一个 client 会话（client_id），
+  各次操作按活跃度模型的场景权重抽取，在自己的地址间轮换，转账接收方为群体中的另一个用户
+- 单个用户在场景之外失败（如 provider 无法创建 client）只计入错误，worker 继续执行其余用户
+- 记录不在内存中累积：每个用户执行完即计入共享分析状态，可选写入抓包文件
+- 关联风险：以地址的真实归属（Population.owner）为标签，评估各 provider 的地址簇把多少用户完整关联、
+  以及误把不同用户并入同一簇的程度
+相同 seed 与配置下，用户属性与操作序列完全可复现（请求时间与应答除外）
+"""
+import random
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+from ..analyzers.linkage import LinkageAnalyzer
+from ..config_loader import load_config
+from ..hooks import RPCHook, scenario_hooks
+from ..synthetic_users import Population, SyntheticUser, get_population_options
+from ..rate_limit import get_limiter, limiter_stats, reset_limiters
+from ..rpc_client import RPCClient
+from .capture import CaptureSink, open_sink
+from .load import load_errors
+from .runner import RecordAnalysis, RECORD_PREVIEW_LIMIT, build_result, default_scenarios
+
+
+class _PopulationState:
+    """各 worker 共享的分析状态与群体计数"""
+
+    def __init__(self, sink: Optional[CaptureSink]):
+        self.analysis = RecordAnalysis(preview_limit=RECORD_PREVIEW_LIMIT)
+        self.sink = sink
+        self.users = 0
+        self.failed_users = 0
+        self.actions: Counter = Counter()
+        self.by_wallet: Counter = Counter()
+        self.by_activity: Counter = Counter()
+        self.by_provider: Counter = Counter()
+        self.scenario_errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_user(self, user: SyntheticUser, provider_id: str, records: list, actions: Counter, errors: Counter):
+        with self._lock:
+            self.users += 1
+            self.actions.update(actions)
+            self.by_wallet[user.wallet_id] += 1
+            self.by_activity[user.activity] += 1
+            self.by_provider[provider_id] += 1
+            for key, n in errors.items():
+                self.scenario_errors[key] = self.scenario_errors.get(key, 0) + n
+            self.analysis.add_records(records)
+
+    def add_failure(self, user: SyntheticUser, exc: Exception):
+        with self._lock:
+            self.failed_users += 1
+            key = f"{user.wallet_id}_user_{type(exc).__name__}"
+            self.scenario_errors[key] = self.scenario_errors.get(key, 0) + 1
+
+
+def _run_user(
+    user: SyntheticUser,
+    population: Population,
+    providers: list[str],
+    scenarios: dict[str, Any],
+    state: _PopulationState,
+    batch: bool,
+    rate_limit: bool,
+    hooks: Optional[list[RPCHook]],
+    transport: str,
+):
+    rng = random.Random(user.seed)
+    provider_id = providers[rng.randrange(len(providers))]
+    model = population.activity[user.activity]
+    names = list(model["scenarios"])
+    weights = [model["scenarios"][name] for name in names]
+    think_time_ms = float(model.get("think_time_ms") or 0)
+    client = RPCClient(
+        provider_id=provider_id,
+        wallet_id=user.wallet_id,
+        max_records=0,
+        sink=state.sink,
+        limiter=get_limiter(provider_id) if rate_limit else None,
+        hooks=hooks,
+        transport=transport,
+        # 同款钱包的用户请求头相同，节点以各自的连接/会话区分用户
+        client_id=f"{user.wallet_id}#{user.index}@{provider_id}",
+    )
+    records = []
+    actions: Counter = Counter()
+    errors: Counter = Counter()
+    try:
+        for _ in range(user.actions):
+            scenario = scenarios[rng.choices(names, weights)[0]]
+            kwargs = {
+                "address": user.address(rng.randrange(user.address_count)),
+                "to_address": population.user(rng.randrange(len(population))).address(0),
+            }
+            with (
+                scenario_hooks(hooks, user.wallet_id, provider_id, scenario.id) as span,
+                client.capture() as captured,
+            ):
+                try:
+                    scenario.run(client, batch=batch, **kwargs)
+                except Exception:
+                    errors[f"{user.wallet_id}_{provider_id}_{scenario.id}"] += 1
+                    span.status = "error"
+                span.requests = captured.total
+            records.extend(captured)
+            actions[scenario.id] += 1
+            if think_time_ms > 0:
+                time.sleep(rng.expovariate(1000 / think_time_ms))
+    finally:
+        client.close()
+    state.add_user(user, provider_id, records, actions, errors)
+
+
+def population_linkage(linkage: LinkageAnalyzer, population: Population) -> dict[str, dict[str, Any]]:
+    """以真实归属评估各 provider 的地址簇
+
+    - users / multi_address_users: 该 provider 看到地址的用户数，及看到至少 2 个地址的用户数
+    - linked_users / linked_rate: 多地址用户中全部地址落在同一簇的用户数与比例（被完整关联）
+    - pair_recall: 同一用户的地址对中被归入同一簇的比例
+    - pair_precision: 簇内地址对中确属同一用户的比例（越低说明关联规则把不同用户混在一起）
+    - largest_cluster_users: 单个簇最多混入的用户数
+    非本群体的地址（合约、默认地址）不计入
+    """
+    out = {}
+    for provider_id in linkage.providers():
+        # 用户 -> [看到的地址数, 所在簇数]
+        seen: dict[int, list[int]] = {}
+        linked_pairs = same_pairs = 0
+        largest = 0
+        for addresses in linkage.clusters(provider_id):
+            owners = Counter(o for o in map(population.owner, addresses) if o is not None)
+            if not owners:
+                continue
+            n = sum(owners.values())
+            linked_pairs += n * (n - 1) // 2
+            largest = max(largest, len(owners))
+            for owner, count in owners.items():
+                same_pairs += count * (count - 1) // 2
+                entry = seen.setdefault(owner, [0, 0])
+                entry[0] += count
+                entry[1] += 1
+        multi = [clusters for count, clusters in seen.values() if count > 1]
+        true_pairs = sum(count * (count - 1) // 2 for count, _ in seen.values())
+        linked_users = sum(1 for clusters in multi if clusters == 1)
+        out[provider_id] = {
+            "users": len(seen),
+            "multi_address_users": len(multi),
+            "linked_users": linked_users,
+            "linked_rate": round(linked_users / len(multi), 4) if multi else 0.0,
+            "pair_recall": round(same_pairs / true_pairs, 4) if true_pairs else 0.0,
+            "pair_precision": round(same_pairs / linked_pairs, 4) if linked_pairs else 0.0,
+            "largest_cluster_users": largest,
+        }
+    return out
+
+
+def run_population(
+    providers: list[str] = None,
+    users: Optional[int] = None,
+    seed: Any = None,
+    max_workers: int = 8,
+    batch: bool = False,
+    capture_path: Optional[Path] = None,
+    rate_limit: bool = False,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
+) -> dict[str, Any]:
+    """按 config.yaml 的 population 配置（users / seed 可覆盖）执行合成用户群体
+
+    返回与 run_all 相同结构的结果，另附 population 段：群体构成、各场景执行次数与各 provider 的关联风险。
+    """
+    config = load_config()
+    options = get_population_options()
+    if users is not None:
+        options["users"] = users
+    if seed is not None:
+        options["seed"] = seed
+    population = Population(options, list(config["wallets"]))
+    providers = providers or list(config["rpc_providers"].keys())
+    scenarios = {s.id: s for s in default_scenarios(transport)}
+    unknown = sorted({
+        name for model in population.activity.values() for name in model["scenarios"] if name not in scenarios
+    })
+    if unknown:
+        raise ValueError(f"Unknown scenarios in population.activity (transport={transport}): {unknown}")
+
+    run_config = {
+        "wallets": list(population.wallet_mix),
+        "providers": providers,
+        "scenarios": sorted({name for model in population.activity.values() for name in model["scenarios"]}),
+        "batch": batch,
+        "transport": transport,
+        "population": population.describe(),
+        "execution": {"mode": "thread", "max_workers": max_workers},
+        "rate_limit": rate_limit,
+    }
+    if rate_limit:
+        reset_limiters()
+
+    sink = open_sink(capture_path, meta={"config": run_config}) if capture_path else None
+    state = _PopulationState(sink)
+    pending = iter(population)
+    pending_lock = threading.Lock()
+
+    def _worker():
+        while True:
+            with pending_lock:
+                user = next(pending, None)
+            if user is None:
+                return
+            try:
+                _run_user(user, population, providers, scenarios, state, batch, rate_limit, hooks, transport)
+            except Exception as exc:
+                state.add_failure(user, exc)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_worker, name=f"population-{i}", daemon=True) for i in range(max_workers)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if sink is not None:
+            sink.close()
+    wall_clock = time.perf_counter() - started
+
+    analysis = state.analysis.result()
+    data = build_result(run_config, analysis, {}, load_errors(state.scenario_errors), wall_clock)
+    data["population"] = {
+        "users": state.users,
+        "failed_users": state.failed_users,
+        "actions": dict(sorted(state.actions.items())),
+        "by_wallet": dict(sorted(state.by_wallet.items())),
+        "by_activity": dict(sorted(state.by_activity.items())),
+        "by_provider": dict(sorted(state.by_provider.items())),
+        "linkage_risk": population_linkage(state.analysis.linkage, population),
+    }
+    if rate_limit:
+        data["rate_limit"] = limiter_stats()
+    return data
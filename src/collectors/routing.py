@@ -0,0 +1,243 @@
+"""
+多 RPC 路由执行 - 每个 钱包 x 路由策略 以 RouterClient 执行全部场景，对比各策略的隐私与延迟代价
+
+- 隐私：每个 provider 看到该钱包暴露地址集合的比例（地址份额）与请求的比例（行为份额）
+- 延迟：调用方感受到的端到端 p50 / p99（含对冲）
+路由后的记录仍归属实际接收请求的 provider，照常进入隐私维度分析。
+"""
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from ..analyzers.latency import LatencyHistogram
+from ..config_loader import load_config
+from ..hooks import RPCHook, scenario_hooks
+from ..rate_limit import limiter_stats, reset_limiters
+from ..record_store import CompactRecordStore
+from ..router import ROUTING_POLICIES, RouterClient
+from ..rpc_client import RecordPair
+from .capture import CaptureSink, open_sink
+from .runner import RECORD_PREVIEW_LIMIT, analyze_records, build_result, default_scenarios
+
+
+class _RoutingExposure:
+    """单个 钱包 x 策略 下各 provider 看到的地址与请求"""
+
+    def __init__(self, providers: list[str]):
+        self.providers = providers
+        self.addresses: set[str] = set()
+        self.seen: dict[str, set[str]] = {p: set() for p in providers}
+        self.requests: Counter = Counter()
+
+    def add_records(self, records: Iterable[RecordPair]) -> "_RoutingExposure":
+        for req, resp in records:
+            if resp.source != "upstream":
+                continue
+            self.requests[req.provider_id] += 1
+            self.addresses.update(req.exposed_addresses)
+            self.seen.setdefault(req.provider_id, set()).update(req.exposed_addresses)
+        return self
+
+    def shares(self) -> dict[str, dict[str, float]]:
+        total = sum(self.requests.values())
+        return {
+            p: {
+                "address_share": len(self.seen[p]) / len(self.addresses) if self.addresses else 0.0,
+                "request_share": self.requests[p] / total if total else 0.0,
+                "requests": self.requests[p],
+            }
+            for p in self.providers
+        }
+
+
+def _run_router(
+    wallet_id: str,
+    policy: str,
+    providers: list[str],
+    scenarios: list,
+    batch: bool,
+    hedge_after_ms: Optional[float],
+    seed: Any,
+    sink: Optional[CaptureSink],
+    rate_limit: bool,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
+) -> dict[str, Any]:
+    """以一个 RouterClient 顺序执行该钱包的全部场景"""
+    router = RouterClient(
+        wallet_id,
+        providers,
+        policy=policy,
+        hedge_after_ms=hedge_after_ms,
+        seed=f"{seed}:{wallet_id}:{policy}",
+        sink=sink,
+        rate_limit=rate_limit,
+        hooks=hooks,
+        transport=transport,
+    )
+    records = CompactRecordStore()
+    exposure = _RoutingExposure(providers)
+    scenario_results: dict[str, Any] = {}
+    errors: list[dict] = []
+    try:
+        for scenario in scenarios:
+            key = f"{wallet_id}_{router.provider_id}_{scenario.id}"
+            error = None
+            with (
+                scenario_hooks(hooks, wallet_id, router.provider_id, scenario.id) as span,
+                router.capture() as captured,
+            ):
+                try:
+                    scenario.run(router, batch=batch)
+                except Exception as e:
+                    error = e
+                    span.status = "error"
+                span.requests = captured.total
+            exposure.add_records(captured)
+            if sink is None:
+                records.extend(captured)
+            result = {"status": "ok", "requests": captured.total}
+            if error is not None:
+                result = {"status": "error", "error": str(error), "requests": captured.total}
+                errors.append({"key": key, "error": str(error)})
+            scenario_results[key] = result
+    finally:
+        router.close()
+    return {
+        "wallet": wallet_id,
+        "policy": policy,
+        "records": records,
+        "exposure": exposure,
+        "router": router,
+        "scenario_results": scenario_results,
+        "errors": errors,
+    }
+
+
+def summarize_routing(job_results: list[dict[str, Any]], hedge_after_ms: Optional[float]) -> dict[str, Any]:
+    """按策略汇总：各 provider 的地址 / 请求份额（钱包间平均及最大），端到端延迟与对冲统计"""
+    routing: dict[str, Any] = {}
+    for policy in dict.fromkeys(jr["policy"] for jr in job_results):
+        jobs = [jr for jr in job_results if jr["policy"] == policy]
+        latency = LatencyHistogram()
+        hedged = hedge_wins = 0
+        per_provider: dict[str, dict[str, Any]] = {}
+        for jr in jobs:
+            router: RouterClient = jr["router"]
+            latency.merge(router.latency)
+            hedged += router.hedged
+            hedge_wins += router.hedge_wins
+            for p, share in jr["exposure"].shares().items():
+                acc = per_provider.setdefault(p, {"requests": 0, "address_shares": [], "request_shares": []})
+                acc["requests"] += share["requests"]
+                acc["address_shares"].append(share["address_share"])
+                acc["request_shares"].append(share["request_share"])
+        providers = {
+            p: {
+                "requests": acc["requests"],
+                "address_share": round(sum(acc["address_shares"]) / len(acc["address_shares"]), 4),
+                "max_address_share": round(max(acc["address_shares"]), 4),
+                "request_share": round(sum(acc["request_shares"]) / len(acc["request_shares"]), 4),
+            }
+            for p, acc in sorted(per_provider.items())
+        }
+        routing[policy] = {
+            "wallets": len(jobs),
+            "calls": latency.count,
+            "p50_ms": _round(latency.percentile(50)),
+            "p99_ms": _round(latency.percentile(99)),
+            "mean_ms": _round(latency.mean()),
+            "hedge_after_ms": hedge_after_ms,
+            "hedged": hedged,
+            "hedge_wins": hedge_wins,
+            # 单个 provider 最多看到的地址份额：越低说明分散越充分
+            "max_address_share": max((v["max_address_share"] for v in providers.values()), default=0.0),
+            "providers": providers,
+        }
+    return routing
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def run_routed(
+    wallets: list[str] = None,
+    providers: list[str] = None,
+    policies: list[str] = None,
+    scenarios: list = None,
+    hedge_after_ms: Optional[float] = None,
+    max_workers: int = 1,
+    batch: bool = False,
+    capture_path: Optional[Path] = None,
+    rate_limit: bool = False,
+    seed: Any = 0,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
+) -> dict[str, Any]:
+    """每个 钱包 x 策略 执行一遍全部场景，返回与 run_all 相同结构的结果，另附 routing 段
+
+    隐私维度汇总全部策略的请求；各策略的对比见 routing。max_workers > 1 时各 钱包 x 策略 并发执行。
+    """
+    config = load_config()
+    wallets = wallets or list(config["wallets"].keys())
+    providers = providers or list(config["rpc_providers"].keys())
+    policies = policies or list(ROUTING_POLICIES)
+    scenarios = scenarios or default_scenarios(transport)
+    for policy in policies:
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy: {policy}")
+    if len(providers) < 2:
+        raise ValueError("Routing requires at least two providers")
+
+    run_config = {
+        "wallets": wallets,
+        "providers": providers,
+        "scenarios": [s.id for s in scenarios],
+        "batch": batch,
+        "transport": transport,
+        "routing": {"policies": policies, "hedge_after_ms": hedge_after_ms, "seed": seed},
+        "rate_limit": rate_limit,
+    }
+    if rate_limit:
+        reset_limiters()
+
+    sink = open_sink(capture_path, meta={"config": run_config}) if capture_path else None
+    jobs = [(w, policy) for policy in policies for w in wallets]
+
+    def _job(wallet_id: str, policy: str) -> dict[str, Any]:
+        return _run_router(
+            wallet_id, policy, providers, scenarios, batch, hedge_after_ms, seed, sink, rate_limit, hooks, transport
+        )
+
+    started = time.perf_counter()
+    try:
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_job, w, policy) for w, policy in jobs]
+                job_results = [f.result() for f in futures]
+        else:
+            job_results = [_job(w, policy) for w, policy in jobs]
+    finally:
+        if sink is not None:
+            sink.close()
+    wall_clock = time.perf_counter() - started
+
+    scenario_results: dict[str, Any] = {}
+    errors: list[dict] = []
+    for jr in job_results:
+        scenario_results.update(jr["scenario_results"])
+        errors.extend(jr["errors"])
+
+    if sink is not None:
+        analysis = analyze_records(sink.iter_records(), preview_limit=RECORD_PREVIEW_LIMIT)
+    else:
+        analysis = analyze_records(r for jr in job_results for r in jr["records"])
+
+    data = build_result(run_config, analysis, scenario_results, errors, wall_clock)
+    data["routing"] = summarize_routing(job_results, hedge_after_ms)
+    if rate_limit:
+        data["rate_limit"] = limiter_stats()
+    return data
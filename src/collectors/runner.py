@@ -1,15 +1,38 @@
 """
 场景执行器 - 遍历钱包 x RPC x 场景，收集数据
+支持顺序执行与并发执行（线程池 / asyncio），并发模式结果与顺序模式一致；
+请求时序关联（timing）除外，它依赖请求的实际发送时间，不在一致性保证之内
+指定 capture_path 时记录流式写入 NDJSON 抓包文件，分析阶段从文件逐条读取，内存占用不随请求数增长
 """
-from typing import Any
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from ..config_loader import load_config
+from ..coalescing import SingleFlight
+from ..hooks import CLIENT_PHASES, REQUEST_PHASES, RPCHook, scenario_hooks
+from ..rate_limit import get_limiter, is_throttle_error, limiter_stats, reset_limiters
+from ..rpc_cache import CachePool, get_cache_options
+from ..record_store import CompactRecordStore
 from ..rpc_client import RPCClient, RPCRequestRecord, RPCResponseRecord
 from ..scenarios.balance_query import BalanceQueryScenario
 from ..scenarios.block_query import BlockQueryScenario
 from ..scenarios.token_transfer import TokenTransferScenario
 from ..scenarios.uniswap_swap import UniswapSwapScenario
-from ..analyzers.privacy_analyzer import analyze_request, aggregate_by_dimension, DimensionResult
+from ..scenarios.subscription import SubscriptionScenario
+from ..analyzers.calldata import CalldataStats
+from ..analyzers.latency import LatencyStats
+from ..analyzers.linkage import LinkageAnalyzer
+from ..analyzers.timing import TimingAnalyzer, get_timing_options
+from ..analyzers.privacy_analyzer import DimensionAggregator, analyze_stream, request_exposures
+from .capture import CaptureSink, iter_capture, open_sink, read_capture_index
+from .capture_db import is_db_path, iter_db, list_runs, read_db_index
+from .checkpoint import CheckpointStore
 
 
 SCENARIOS = [
@@ -18,74 +41,674 @@ SCENARIOS = [
     UniswapSwapScenario(),
     BlockQueryScenario(),
 ]
+# WebSocket 传输额外执行订阅场景（HTTP 无法接收推送）
+WS_SCENARIOS = SCENARIOS + [SubscriptionScenario()]
 
 
-def run_all(
-    wallets: list[str] = None,
-    providers: list[str] = None,
-    scenarios: list = None,
+def default_scenarios(transport: str = "http") -> list:
+    """未指定场景时执行的场景列表"""
+    return WS_SCENARIOS if transport == "ws" else SCENARIOS
+
+# 执行模式：sequential 顺序 / thread 线程池 / asyncio 事件循环 + 线程执行阻塞请求
+EXECUTION_MODES = ("sequential", "thread", "asyncio")
+DEFAULT_MAX_WORKERS = 8
+# 流式模式下结果中保留的记录示例条数（与报告展示条数一致）
+RECORD_PREVIEW_LIMIT = 20
+
+RecordPair = tuple[RPCRequestRecord, RPCResponseRecord]
+PairRunner = Callable[[str, str], dict[str, Any]]
+
+
+def _run_pair(
+    wallet_id: str,
+    provider_id: str,
+    scenarios: list,
+    batch: bool = False,
+    sink: Optional[CaptureSink] = None,
+    cache_pool: Optional[CachePool] = None,
+    coalescer: Optional[SingleFlight] = None,
+    rate_limit: bool = False,
+    checkpoint: Optional[CheckpointStore] = None,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
 ) -> dict[str, Any]:
-    """执行全部组合，返回收集的数据与分析结果"""
-    config = load_config()
-    wallets = wallets or list(config["wallets"].keys())
-    providers = providers or list(config["rpc_providers"].keys())
-    scenarios = scenarios or SCENARIOS
+    """执行单个 钱包 x RPC 组合下的全部场景（同一 client 顺序执行）
 
-    all_records: list[tuple[RPCRequestRecord, RPCResponseRecord]] = []
+    每个场景在独立的记录作用域内执行，只取回该场景自己的记录；失败场景已发出的请求同样计入。
+    有 sink 时记录直接写入抓包文件，有 checkpoint 时每个场景结束即提交至检查点，均不在内存中保留。
+    """
+    cache = cache_pool.for_client(wallet_id, provider_id) if cache_pool is not None else None
+    # 未写入抓包时记录保留在内存中，以列式紧凑存储保存
+    pair_records = CompactRecordStore()
     scenario_results: dict[str, Any] = {}
     errors: list[dict] = []
 
-    for wallet_id in wallets:
-        for provider_id in providers:
-            client = RPCClient(provider_id=provider_id, wallet_id=wallet_id)
-            for scenario in scenarios:
-                key = f"{wallet_id}_{provider_id}_{scenario.id}"
+    # client 本身不保留记录，避免随场景数增长
+    client = RPCClient(
+        provider_id=provider_id,
+        wallet_id=wallet_id,
+        max_records=0,
+        sink=sink,
+        cache=cache,
+        coalescer=coalescer,
+        limiter=get_limiter(provider_id) if rate_limit else None,
+        hooks=hooks,
+        transport=transport,
+        client_id=f"{wallet_id}@{provider_id}",
+    )
+    try:
+        for scenario in scenarios:
+            key = f"{wallet_id}_{provider_id}_{scenario.id}"
+            error = None
+            with (
+                scenario_hooks(hooks, wallet_id, provider_id, scenario.id) as span,
+                client.capture(max_records=0 if sink and checkpoint is None else None) as captured,
+            ):
                 try:
-                    scenario.run(client)
-                    records = client.get_records()
-                    all_records.extend(records)
-                    scenario_results[key] = {"status": "ok", "requests": len(records)}
+                    scenario.run(client, batch=batch)
                 except Exception as e:
-                    errors.append({"key": key, "error": str(e)})
-                    scenario_results[key] = {"status": "error", "error": str(e)}
+                    error = e
+                    span.status = "error"
+                span.requests = captured.total
+            if checkpoint is None:
+                pair_records.extend(captured)
+            if error is None:
+                result = {"status": "ok", "requests": captured.total}
+                error_entry = None
+            else:
+                result = {"status": "error", "error": str(error), "requests": captured.total}
+                error_entry = {"key": key, "error": str(error)}
+                errors.append(error_entry)
+            scenario_results[key] = result
+            if sink is not None:
+                sink.write_cell(key, result, error_entry)
+            if checkpoint is not None:
+                checkpoint.commit(key, captured, result, error_entry)
+    finally:
+        client.close()
 
-    # 隐私分析
-    dimension_results: list[list[DimensionResult]] = []
-    for req, resp in all_records:
-        dimension_results.append(analyze_request(req, resp))
+    return {"records": pair_records, "scenario_results": scenario_results, "errors": errors}
 
-    aggregated = aggregate_by_dimension(dimension_results)
 
-    return {
-        "config": {
-            "wallets": wallets,
-            "providers": providers,
-            "scenarios": [s.id for s in scenarios],
-        },
-        "summary": {
-            "total_requests": len(all_records),
-            "errors": len(errors),
-            "dimensions_affected": len(aggregated),
-        },
-        "records": [
-            {
-                "method": req.method,
-                "wallet": req.wallet_id,
-                "provider": req.provider_id,
-                "exposed_addresses": req.exposed_addresses,
+def _submit_per_provider(
+    pool: ThreadPoolExecutor,
+    jobs: list[tuple[str, str]],
+    run_pair: PairRunner,
+    per_provider_limit: int,
+) -> list[Future]:
+    """按 provider 排队提交：每个 provider 在途任务不超过 per_provider_limit，结束一个再提交下一个
+
+    排队在提交侧完成，池中线程从不等待 provider 名额；慢 provider 的任务不会占满线程池而阻塞其他 provider。
+    返回与 jobs 一一对应的 Future。
+    """
+    futures: list[Future] = [Future() for _ in jobs]
+    queues: dict[str, deque] = {}
+    for i, (_, provider_id) in enumerate(jobs):
+        queues.setdefault(provider_id, deque()).append(i)
+    lock = threading.Lock()
+
+    def _start(i: int):
+        inner = pool.submit(run_pair, *jobs[i])
+        inner.add_done_callback(lambda f: _finish(i, f))
+
+    def _finish(i: int, inner: Future):
+        with lock:
+            queue = queues[jobs[i][1]]
+            nxt = queue.popleft() if queue else None
+        if nxt is not None:
+            _start(nxt)
+        exc = inner.exception()
+        if exc is None:
+            futures[i].set_result(inner.result())
+        else:
+            futures[i].set_exception(exc)
+
+    with lock:
+        initial = sorted(q.popleft() for q in queues.values() for _ in range(min(per_provider_limit, len(q))))
+    for i in initial:
+        _start(i)
+    return futures
+
+
+def _run_threaded(
+    jobs: list[tuple[str, str]],
+    run_pair: PairRunner,
+    max_workers: int,
+    per_provider_limit: Optional[int],
+) -> list[dict[str, Any]]:
+    """线程池执行，全局并发 max_workers，单个 provider 并发不超过 per_provider_limit"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if per_provider_limit:
+            futures = _submit_per_provider(pool, jobs, run_pair, per_provider_limit)
+        else:
+            futures = [pool.submit(run_pair, w, p) for w, p in jobs]
+        # 按提交顺序收集，保证与顺序模式相同的结果顺序
+        return [f.result() for f in futures]
+
+
+def _run_asyncio(
+    jobs: list[tuple[str, str]],
+    run_pair: PairRunner,
+    max_workers: int,
+    per_provider_limit: Optional[int],
+) -> list[dict[str, Any]]:
+    """asyncio 调度，阻塞的 HTTP 请求在线程池中执行"""
+
+    async def _main() -> list[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        global_sem = asyncio.Semaphore(max_workers)
+        limits = (
+            {p: asyncio.Semaphore(per_provider_limit) for _, p in jobs}
+            if per_provider_limit
+            else {}
+        )
+
+        async def _job(wallet_id: str, provider_id: str) -> dict[str, Any]:
+            provider_sem = limits.get(provider_id)
+            if provider_sem is None:
+                async with global_sem:
+                    return await loop.run_in_executor(pool, run_pair, wallet_id, provider_id)
+            # 先取 provider 名额再取全局名额：等待 provider 名额的任务不占用全局并发
+            async with provider_sem, global_sem:
+                return await loop.run_in_executor(pool, run_pair, wallet_id, provider_id)
+
+        return await asyncio.gather(*(_job(w, p) for w, p in jobs))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return asyncio.run(_main())
+
+
+class _ConnectionStats:
+    """按 provider 增量统计新建/复用连接的请求数与平均耗时，区分握手开销与服务端延迟"""
+
+    def __init__(self):
+        self._acc: dict[str, dict[str, list[float]]] = {}
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        if resp.connection_reused is None:
+            return
+        acc = self._acc.setdefault(req.provider_id, {"new": [0, 0.0], "reused": [0, 0.0]})
+        bucket = acc["reused" if resp.connection_reused else "new"]
+        bucket[0] += 1
+        bucket[1] += resp.elapsed_ms
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        stats: dict[str, dict[str, Any]] = {}
+        for provider_id, acc in self._acc.items():
+            (n_new, ms_new), (n_reused, ms_reused) = acc["new"], acc["reused"]
+            stats[provider_id] = {
+                "new": n_new,
+                "reused": n_reused,
+                "avg_ms_new": round(ms_new / n_new, 2) if n_new else None,
+                "avg_ms_reused": round(ms_reused / n_reused, 2) if n_reused else None,
+            }
+        return stats
+
+
+class _PhaseStats:
+    """按 provider 统计实际发送请求的各阶段平均耗时，区分网络 / 服务端耗时与客户端自身开销"""
+
+    def __init__(self):
+        self._acc: dict[str, list] = {}
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        phases = resp.phases
+        if not phases or resp.source != "upstream":
+            return
+        acc = self._acc.get(req.provider_id)
+        if acc is None:
+            acc = self._acc[req.provider_id] = [0, 0.0, dict.fromkeys(REQUEST_PHASES, 0.0)]
+        acc[0] += 1
+        acc[1] += resp.elapsed_ms
+        sums = acc[2]
+        for name, value in phases.items():
+            if name in sums:
+                sums[name] += value
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        stats: dict[str, dict[str, Any]] = {}
+        for provider_id, (n, elapsed, sums) in sorted(self._acc.items()):
+            client = sum(sums[name] for name in CLIENT_PHASES)
+            network = sum(v for name, v in sums.items() if name not in CLIENT_PHASES and name != "queue")
+            stats[provider_id] = {
+                "requests": n,
+                "avg_elapsed_ms": round(elapsed / n, 3),
+                "avg_phase_ms": {name: round(v / n, 3) for name, v in sums.items()},
+                "avg_client_ms": round(client / n, 3),
+                "avg_network_ms": round(network / n, 3),
+                # 客户端开销占 客户端 + 网络 耗时的比例（不含限流排队）
+                "client_share": round(client / (client + network), 4) if client + network > 0 else 0.0,
+            }
+        return stats
+
+
+class _ThrottleStats:
+    """按 provider 统计限流与重试，以及有效持续吞吐（成功请求数 / 首个请求至最后一个响应的时长）"""
+
+    def __init__(self):
+        self._acc: dict[str, dict[str, Any]] = {}
+
+    def add(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        if resp.source != "upstream":
+            return
+        acc = self._acc.get(req.provider_id)
+        if acc is None:
+            acc = self._acc[req.provider_id] = {
+                "requests": 0, "throttled": 0, "retries": 0, "errors": 0, "succeeded": 0,
+                "first": req.timestamp, "last": req.timestamp,
             }
-            for req, _ in all_records
-        ],
-        "privacy_analysis": {
-            dim_id: {
-                "name": r.dimension_name,
-                "risk_level": r.risk_level,
-                "description": r.description,
-                "evidence": r.evidence,
-                "recommendation": r.recommendation,
+        acc["requests"] += 1
+        if resp.status_code == 429 or is_throttle_error(resp.error):
+            acc["throttled"] += 1
+        if resp.retry:
+            acc["retries"] += 1
+        if resp.error:
+            acc["errors"] += 1
+        else:
+            acc["succeeded"] += 1
+        acc["first"] = min(acc["first"], req.timestamp)
+        acc["last"] = max(acc["last"], req.timestamp + resp.elapsed_ms / 1000)
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        stats: dict[str, dict[str, Any]] = {}
+        for provider_id, acc in sorted(self._acc.items()):
+            span = acc["last"] - acc["first"]
+            stats[provider_id] = {
+                "requests": acc["requests"],
+                "throttled": acc["throttled"],
+                "throttle_rate": round(acc["throttled"] / acc["requests"], 4),
+                "retries": acc["retries"],
+                "errors": acc["errors"],
+                "succeeded": acc["succeeded"],
+                "span_s": round(span, 3),
+                "effective_rps": round(acc["succeeded"] / span, 2) if span > 0 else None,
             }
-            for dim_id, r in aggregated.items()
+        return stats
+
+
+def latency_summary(latency: LatencyStats) -> dict[str, Any]:
+    """各 provider x wallet x method 的延迟分位数，及每个 provider 的延迟分布（[下界 ms, 上界 ms, 计数]）"""
+    return {
+        "cells": latency.rows(),
+        "histograms": {
+            provider_id: [list(bucket) for bucket in hist.buckets()]
+            for provider_id, hist in latency.by_provider().items()
         },
+    }
+
+
+def _record_summary(req: RPCRequestRecord) -> dict[str, Any]:
+    return {
+        "method": req.method,
+        "wallet": req.wallet_id,
+        "provider": req.provider_id,
+        "exposed_addresses": req.exposed_addresses,
+        "batch_id": req.batch_id,
+    }
+
+
+class RecordAnalysis:
+    """增量隐私分析与统计，可分多次 add_records（每次传入的记录须包含完整的批量请求）"""
+
+    def __init__(self, preview_limit: Optional[int] = None):
+        self.preview_limit = preview_limit
+        self.total = 0
+        self.connections = _ConnectionStats()
+        self.phases = _PhaseStats()
+        self.throttling = _ThrottleStats()
+        self.latency = LatencyStats()
+        self.preview: list[dict[str, Any]] = []
+        self.aggregator = DimensionAggregator()
+        # 已知合约地址不参与地址关联
+        self.linkage = LinkageAnalyzer(contracts=(load_config().get("contracts") or {}).values())
+        self.calldata = CalldataStats()
+        timing_options = get_timing_options()
+        self.timing = TimingAnalyzer(timing_options["windows_s"], timing_options["flows"])
+        self._wallets: dict[str, None] = {}
+        self._providers: dict[str, None] = {}
+        # 记录来源（upstream / cache / coalesced）计数，及未发送至节点而避免的各维度暴露次数（按来源）
+        self.sources: Counter = Counter()
+        self.exposures_avoided: dict[str, Counter] = {}
+        self.fingerprint_avoided_by_wallet: Counter = Counter()
+
+    def _tap(self, stream: Iterable[RecordPair], privacy: bool = True) -> Iterator[RecordPair]:
+        for req, resp in stream:
+            self.total += 1
+            self.sources[resp.source] += 1
+            self.linkage.add(req, resp)
+            self.timing.add(req, resp)
+            self.calldata.add(req, resp)
+            if privacy and resp.source != "upstream":
+                avoided = [r.dimension_id for r in request_exposures(req)]
+                self.exposures_avoided.setdefault(resp.source, Counter()).update(avoided)
+                if "request_header_fingerprint" in avoided:
+                    self.fingerprint_avoided_by_wallet[req.wallet_id] += 1
+            self.connections.add(req, resp)
+            self.phases.add(req, resp)
+            self.throttling.add(req, resp)
+            self.latency.add(req, resp)
+            self._wallets.setdefault(req.wallet_id)
+            self._providers.setdefault(req.provider_id)
+            if self.preview_limit is None or len(self.preview) < self.preview_limit:
+                self.preview.append(_record_summary(req))
+            yield req, resp
+
+    def add_records(self, records: Iterable[RecordPair], privacy: bool = True) -> "RecordAnalysis":
+        """privacy=False 时跳过逐条隐私分析，仅统计其余指标（隐私部分由 merge_state 合并分片结果）"""
+        if privacy:
+            # 隐私分析：增量聚合，证据样本有界
+            self.aggregator.add_stream(analyze_stream(self._tap(records)))
+        else:
+            for _ in self._tap(records, privacy=False):
+                pass
+        return self
+
+    def merge_state(self, state: dict[str, Any]) -> "RecordAnalysis":
+        """合并 analysis_state() 导出的部分隐私分析结果"""
+        self.aggregator.merge(DimensionAggregator.from_state(state["aggregator"]))
+        for source, counts in state["exposures_avoided"].items():
+            self.exposures_avoided.setdefault(source, Counter()).update(counts)
+        self.fingerprint_avoided_by_wallet.update(state["fingerprint_avoided_by_wallet"])
+        return self
+
+    def result(self) -> dict[str, Any]:
+        # 时序关联需要全部记录排序后计算，不经过逐条聚合；单独汇总后追加到隐私维度中
+        timing = self.timing.summary()
+        privacy_analysis = self.aggregator.summary()
+        timing_result = TimingAnalyzer.dimension_result(timing)
+        if timing_result is not None:
+            timing_aggregator = DimensionAggregator(self.aggregator.sample_size)
+            timing_aggregator.add([timing_result])
+            privacy_analysis.update(timing_aggregator.summary())
+        return {
+            "total_requests": self.total,
+            "connections": self.connections.to_dict(),
+            "phases": self.phases.to_dict(),
+            "throttling": self.throttling.to_dict(),
+            "latency": latency_summary(self.latency),
+            "records": self.preview,
+            "wallets": list(self._wallets),
+            "providers": list(self._providers),
+            "aggregator": self.aggregator,
+            "privacy_analysis": privacy_analysis,
+            "timing": timing,
+            "calldata": self.calldata.summary(),
+            "sources": dict(self.sources),
+            "exposures_avoided": {source: dict(c) for source, c in self.exposures_avoided.items()},
+            "fingerprint_avoided_by_wallet": dict(self.fingerprint_avoided_by_wallet),
+            "linkage": self.linkage.summary(),
+        }
+
+
+def analyze_records(
+    records: Iterable[RecordPair],
+    preview_limit: Optional[int] = None,
+) -> dict[str, Any]:
+    """单次遍历记录流，完成隐私分析与统计
+
+    records 可以是列表或生成器（如 iter_capture）；preview_limit=None 时保留全部记录摘要。
+    """
+    return RecordAnalysis(preview_limit).add_records(records).result()
+
+
+def analysis_state(analysis: dict[str, Any]) -> dict[str, Any]:
+    """analyze_records 结果中逐条隐私分析部分的可序列化状态（与合并顺序无关），用于分片合并"""
+    return {
+        "aggregator": analysis["aggregator"].to_state(),
+        "exposures_avoided": analysis["exposures_avoided"],
+        "fingerprint_avoided_by_wallet": analysis["fingerprint_avoided_by_wallet"],
+    }
+
+
+def grid_order(run_config: dict[str, Any]) -> dict[str, int]:
+    """场景结果键 -> 网格（钱包 x RPC x 场景）中的序号"""
+    return {
+        f"{w}_{p}_{sid}": i
+        for i, (w, p, sid) in enumerate(
+            (w, p, sid)
+            for w in run_config.get("wallets", [])
+            for p in run_config.get("providers", [])
+            for sid in run_config.get("scenarios", [])
+        )
+    }
+
+
+def build_result(
+    config: dict[str, Any],
+    analysis: dict[str, Any],
+    scenario_results: dict[str, Any],
+    errors: list[dict],
+    wall_clock: Optional[float] = None,
+    executed_requests: Optional[int] = None,
+) -> dict[str, Any]:
+    """汇总分析结果与执行信息
+
+    executed_requests 为本次运行实际执行的请求数，缺省即 total_requests；断点续跑时 total_requests
+    含从检查点重放的记录，吞吐只按本次执行的请求计算，重放的记录数另记为 resumed_requests。
+    """
+    total = analysis["total_requests"]
+    executed = total if executed_requests is None else executed_requests
+    summary: dict[str, Any] = {
+        "total_requests": total,
+        "errors": len(errors),
+        "dimensions_affected": len(analysis["privacy_analysis"]),
+    }
+    if executed_requests is not None:
+        summary["resumed_requests"] = total - executed
+    if wall_clock is not None:
+        summary["wall_clock_s"] = round(wall_clock, 3)
+        summary["requests_per_sec"] = round(executed / wall_clock, 2) if wall_clock > 0 else 0.0
+    summary["connections"] = analysis["connections"]
+    summary["phases"] = analysis.get("phases") or {}
+    summary["throttling"] = analysis.get("throttling") or {}
+    # total_requests 含缓存应答；upstream_requests 为实际发送至节点的请求数
+    sources = analysis.get("sources") or {}
+    summary["upstream_requests"] = sources.get("upstream", total) if sources else total
+    summary["sources"] = sources
+    summary["exposures_avoided"] = analysis.get("exposures_avoided") or {}
+    summary["fingerprint_avoided_by_wallet"] = analysis.get("fingerprint_avoided_by_wallet") or {}
+    return {
+        "config": config,
+        "summary": summary,
+        "records": analysis["records"],
+        "privacy_analysis": analysis["privacy_analysis"],
+        "linkage": analysis.get("linkage") or {},
+        "timing": analysis.get("timing") or [],
+        "calldata": analysis.get("calldata") or {},
+        "latency": analysis.get("latency") or {},
         "scenario_results": scenario_results,
         "errors": errors,
     }
+
+
+def run_all(
+    wallets: list[str] = None,
+    providers: list[str] = None,
+    scenarios: list = None,
+    mode: str = "sequential",
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_provider_limit: Optional[int] = None,
+    batch: bool = False,
+    capture_path: Optional[Path] = None,
+    cache: bool = False,
+    cache_scope: Optional[str] = None,
+    coalesce: bool = False,
+    rate_limit: bool = False,
+    cells: Optional[list[tuple[str, str, list]]] = None,
+    shard: Optional[tuple[int, int]] = None,
+    checkpoint_dir: Optional[Path] = None,
+    resume: bool = False,
+    hooks: Optional[list[RPCHook]] = None,
+    transport: str = "http",
+) -> dict[str, Any]:
+    """执行全部组合，返回收集的数据与分析结果
+
+    batch=True 时场景以 JSON-RPC 批量请求发送可合并的调用。
+    cache=True 时启用客户端响应缓存，cache_scope 缺省取 config.yaml 中 cache.scope。
+    coalesce=True 时各钱包会话共享一个 SingleFlight，合并相同的在途请求（仅并发模式下生效）。
+    rate_limit=True 时按 provider 自适应限流，幂等方法的 429 / 5xx / 网络错误按退避重试。
+    capture_path 指定时记录流式写入抓包文件（.gz 后缀自动压缩），结果中的 records 仅保留前若干条示例。
+    cells 为 [(钱包, RPC, 场景列表)] 时只执行这些组合（分片执行），shard=(序号, 总数) 时结果附带
+    可合并的 partial 段（见 collectors.shard）。
+    checkpoint_dir 指定时每个单元格结束即持久化，结果从检查点构建；resume=True 时跳过检查点中已成功的单元格。
+    hooks 为 RPCHook 列表，传给每个 client，并在每个场景前后回调（如 tracing.TraceRecorder）。
+    transport="ws" 时每个 钱包 x RPC 组合使用一条独占的 WebSocket 连接，默认场景追加订阅场景。
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {mode}")
+
+    config = load_config()
+    wallets = wallets or list(config["wallets"].keys())
+    providers = providers or list(config["rpc_providers"].keys())
+    scenarios = scenarios or default_scenarios(transport)
+
+    run_config = {
+        "wallets": wallets,
+        "providers": providers,
+        "scenarios": [s.id for s in scenarios],
+        "batch": batch,
+        "transport": transport,
+        "execution": {
+            "mode": mode,
+            "max_workers": max_workers if mode != "sequential" else 1,
+            "per_provider_limit": per_provider_limit,
+        },
+    }
+    cache_pool = _make_cache_pool(cache, cache_scope)
+    if cache_pool is not None:
+        run_config["cache"] = {"scope": cache_pool.scope}
+    coalescer = SingleFlight() if coalesce else None
+    run_config["coalesce"] = coalesce
+    run_config["rate_limit"] = rate_limit
+    if rate_limit:
+        reset_limiters()
+    if shard is not None:
+        run_config["shard"] = {"index": shard[0], "count": shard[1]}
+
+    if cells is None:
+        cells = [(w, p, scenarios) for w in wallets for p in providers]
+    checkpoint = None
+    skipped = 0
+    if checkpoint_dir is not None:
+        checkpoint = CheckpointStore(checkpoint_dir, meta={"config": run_config}, resume=resume)
+        done = checkpoint.completed()
+        remaining = [(w, p, [s for s in ss if f"{w}_{p}_{s.id}" not in done]) for w, p, ss in cells]
+        skipped = sum(len(ss) for _, _, ss in cells) - sum(len(ss) for _, _, ss in remaining)
+        cells = [(w, p, ss) for w, p, ss in remaining if ss]
+    job_scenarios = {(w, p): cell_scenarios for w, p, cell_scenarios in cells}
+    jobs = list(job_scenarios)
+
+    sink = open_sink(capture_path, meta={"config": run_config}) if capture_path else None
+
+    def run_pair(wallet_id: str, provider_id: str) -> dict[str, Any]:
+        return _run_pair(
+            wallet_id,
+            provider_id,
+            job_scenarios[(wallet_id, provider_id)],
+            batch=batch,
+            sink=sink,
+            cache_pool=cache_pool,
+            coalescer=coalescer,
+            rate_limit=rate_limit,
+            checkpoint=checkpoint,
+            hooks=hooks,
+            transport=transport,
+        )
+
+    started = time.perf_counter()
+    try:
+        if mode == "thread":
+            job_results = _run_threaded(jobs, run_pair, max_workers, per_provider_limit)
+        elif mode == "asyncio":
+            job_results = _run_asyncio(jobs, run_pair, max_workers, per_provider_limit)
+        else:
+            job_results = [run_pair(w, p) for w, p in jobs]
+    finally:
+        if sink is not None:
+            sink.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    wall_clock = time.perf_counter() - started
+
+    scenario_results: dict[str, Any] = {}
+    errors: list[dict] = []
+    for jr in job_results:
+        scenario_results.update(jr["scenario_results"])
+        errors.extend(jr["errors"])
+    executed_requests = None
+
+    if checkpoint is not None:
+        executed_requests = sum(r["requests"] for r in scenario_results.values())
+        # 报告覆盖检查点中的全部单元格（含此前运行已完成的），每个单元格取最近一次执行
+        order = grid_order(run_config)
+        scenario_results, errors = checkpoint.results(order)
+        analysis = analyze_records(checkpoint.iter_records(order), preview_limit=RECORD_PREVIEW_LIMIT)
+    elif sink is not None:
+        analysis = analyze_records(sink.iter_records(), preview_limit=RECORD_PREVIEW_LIMIT)
+    else:
+        analysis = analyze_records(itertools.chain.from_iterable(jr["records"] for jr in job_results))
+
+    data = build_result(run_config, analysis, scenario_results, errors, wall_clock, executed_requests)
+    if checkpoint is not None:
+        data["summary"]["checkpoint"] = {
+            "path": str(checkpoint.path),
+            "skipped_cells": skipped,
+            "executed_cells": sum(len(ss) for _, _, ss in cells),
+        }
+    if cache_pool is not None:
+        data["cache"] = cache_pool.stats()
+    if coalescer is not None:
+        data["coalescing"] = coalescer.snapshot()
+    if rate_limit:
+        data["rate_limit"] = limiter_stats()
+    if shard is not None:
+        data["partial"] = analysis_state(analysis)
+    return data
+
+
+def _make_cache_pool(cache: bool, cache_scope: Optional[str]) -> Optional[CachePool]:
+    if not cache:
+        return None
+    options = get_cache_options()
+    return CachePool(cache_scope or options["scope"], options)
+
+
+def analyze_capture(capture_path: Path, **filters: Any) -> dict[str, Any]:
+    """重新分析已有抓包文件，不发送任何请求
+
+    SQLite 抓包库可按 filters（run_ids / provider / wallet / method / address / since / until，见 capture_db）
+    以索引查询只分析部分记录，默认分析库中全部运行。
+    """
+    filters = {k: v for k, v in filters.items() if v not in (None, "", [])}
+    db = is_db_path(capture_path)
+    if filters and not db:
+        raise ValueError("Record filters require a SQLite capture (.db / .sqlite / .sqlite3)")
+    if db:
+        index = read_db_index(capture_path, filters.get("run_ids"))
+        records = iter_db(capture_path, **filters)
+    else:
+        index = read_capture_index(capture_path)
+        records = iter_capture(capture_path)
+    analysis = analyze_records(records, preview_limit=RECORD_PREVIEW_LIMIT)
+    run_config = index["meta"].get("config") or {
+        "wallets": analysis["wallets"],
+        "providers": analysis["providers"],
+        "scenarios": [],
+    }
+    run_config = {**run_config, "capture": str(capture_path)}
+    # 并发写入的抓包中场景结果是交错的，按网格顺序重排
+    cells = index["scenario_results"]
+    order = grid_order(run_config)
+    scenario_results = dict(sorted(cells.items(), key=lambda kv: order.get(kv[0], len(order))))
+    errors = sorted(index["errors"], key=lambda e: order.get(e.get("key"), len(order)))
+    data = build_result(run_config, analysis, scenario_results, errors)
+    if db:
+        data["capture_db"] = {
+            "path": str(capture_path),
+            "runs": [
+                {k: r[k] for k in ("id", "created", "requests", "first_seen", "last_seen")}
+                for r in list_runs(capture_path) if r["id"] in index["runs"]
+            ],
+            "filters": filters,
+        }
+    return data
@@ -0,0 +1,313 @@
+"""
+分片执行 - 将 钱包 x RPC x 场景 网格拆分到多个进程 / 多台机器
+
+- 分片单位为 钱包 x RPC 组合（同一 client 的会话留在同一分片，与单进程运行一致）；
+  组合数少于分片数时按单元格（钱包 x RPC x 场景）拆分
+- 每个分片把记录写入自包含的抓包文件，结束时追加 partial 行：场景结果、逐条隐私分析的聚合器状态、
+  负载直方图及缓存 / 合并 / 限流统计
+- merge_shards 合并任意一组分片文件：隐私维度直接合并聚合器状态（与合并顺序无关，无需重新逐条分析），
+  地址关联、时序、连接等轻量统计按时间戳归并各分片的记录流，逐条重放计算，不在内存中保留记录
+"""
+import heapq
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from ..analyzers.latency import LatencyHistogram
+from ..config_loader import load_config
+from ..rpc_cache import DEFAULT_CACHE_OPTIONS
+from ..rpc_client import RecordPair
+from .capture import NDJSONSink, iter_capture, read_capture_index
+from .load import load_errors, load_section, run_load
+from .runner import (
+    RECORD_PREVIEW_LIMIT,
+    RecordAnalysis,
+    _record_summary,
+    build_result,
+    default_scenarios,
+    grid_order,
+    run_all,
+)
+
+DEFAULT_SHARD_DIR = "output/shards"
+# 合并限流统计时求和的字段（其余字段取第一个分片的值）
+_LIMITER_COUNTERS = ("acquired", "throttled", "waited_s")
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """'i/N'（i 从 1 开始）-> (i, N)"""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected i/N") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected 1 <= i <= N")
+    return index, count
+
+
+def shard_cells(
+    wallets: list[str],
+    providers: list[str],
+    scenarios: list,
+    index: int,
+    count: int,
+) -> list[tuple[str, str, list]]:
+    """第 index 个分片（从 1 开始）负责的 [(钱包, RPC, 场景列表)]，按网格顺序轮流分配"""
+    pairs = [(w, p) for w in wallets for p in providers]
+    if len(pairs) >= count:
+        return [(w, p, list(scenarios)) for k, (w, p) in enumerate(pairs) if k % count == index - 1]
+    cells: dict[tuple[str, str], list] = {}
+    grid = ((w, p, s) for w, p in pairs for s in scenarios)
+    for k, (w, p, s) in enumerate(grid):
+        if k % count == index - 1:
+            cells.setdefault((w, p), []).append(s)
+    return [(w, p, cell_scenarios) for (w, p), cell_scenarios in cells.items()]
+
+
+def shard_path(shard_dir: Path, index: int, count: int) -> Path:
+    return Path(shard_dir) / f"shard-{index}-of-{count}.ndjson.gz"
+
+
+def run_shard(
+    index: int,
+    count: int,
+    output_path: Path,
+    load: bool = False,
+    wallets: list[str] = None,
+    providers: list[str] = None,
+    **options: Any,
+) -> Path:
+    """执行一个分片，记录与 partial 写入 output_path
+
+    options 传给 run_all（load=True 时传给 run_load）；负载测试的 rate / concurrency 为全部分片的总量，
+    各分片均分。
+    """
+    config = load_config()
+    wallets = wallets or list(config["wallets"].keys())
+    providers = providers or list(config["rpc_providers"].keys())
+    scenarios = default_scenarios(options.get("transport", "http"))
+    cells = shard_cells(wallets, providers, scenarios, index, count)
+    if not cells:
+        raise ValueError(f"Shard {index}/{count} is empty: the grid has fewer cells than shards")
+    if load:
+        if options.get("rate"):
+            options["rate"] = options["rate"] / count
+        if options.get("concurrency"):
+            options["concurrency"] = max(1, -(-options["concurrency"] // count))
+    runner = run_load if load else run_all
+    data = runner(
+        wallets=wallets,
+        providers=providers,
+        capture_path=Path(output_path),
+        cells=cells,
+        shard=(index, count),
+        **options,
+    )
+    partial = {
+        "wall_clock_s": data["summary"]["wall_clock_s"],
+        "scenario_results": data["scenario_results"],
+        "errors": data["errors"],
+        "state": data["partial"],
+    }
+    for key in ("load", "cache", "coalescing", "rate_limit"):
+        if data.get(key):
+            partial[key] = data[key]
+    with NDJSONSink(output_path, append=True) as sink:
+        sink.write_partial(partial)
+    return Path(output_path)
+
+
+def run_sharded(
+    count: int,
+    shard_dir: Path = Path(DEFAULT_SHARD_DIR),
+    load: bool = False,
+    wallets: list[str] = None,
+    providers: list[str] = None,
+    **options: Any,
+) -> dict[str, Any]:
+    """本机以 count 个进程分片执行并合并，返回与单进程 run_all / run_load 相同结构的结果"""
+    config = load_config()
+    wallets = wallets or list(config["wallets"].keys())
+    providers = providers or list(config["rpc_providers"].keys())
+    scenarios = default_scenarios(options.get("transport", "http"))
+    count = max(1, min(count, len(wallets) * len(providers) * len(scenarios)))
+    paths = [shard_path(shard_dir, i, count) for i in range(1, count + 1)]
+    started = time.perf_counter()
+    # spawn：子进程不继承父进程已建立的 keep-alive 连接池
+    with ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(run_shard, i, count, path, load, wallets, providers, **options)
+            for i, path in enumerate(paths, start=1)
+        ]
+        for f in futures:
+            f.result()
+    data = merge_shards(paths)
+    wall_clock = time.perf_counter() - started
+    summary = data["summary"]
+    summary["wall_clock_s"] = round(wall_clock, 3)
+    summary["requests_per_sec"] = round(summary["total_requests"] / wall_clock, 2) if wall_clock > 0 else 0.0
+    return data
+
+
+def _replay(paths: list[Path]) -> Iterator[RecordPair]:
+    """按时间戳归并全部分片的记录流（每个分片内保持写入顺序），同一时刻只持有每个分片的一条记录
+
+    同一 client 的请求在分片内按发送顺序写入，归并后仍按时间先后到达，地址关联的会话划分与单进程运行一致；
+    其余重放统计与记录顺序无关。
+    """
+    return heapq.merge(*(iter_capture(path) for path in paths), key=_timestamp)
+
+
+def _timestamp(pair: RecordPair) -> float:
+    return pair[0].timestamp
+
+
+class _GridPreview:
+    """记录摘要预览：按单进程运行的网格顺序（钱包 x RPC，组合内按时间）保留最前面的 limit 条，内存有界"""
+
+    def __init__(self, run_config: dict[str, Any], limit: int):
+        self.limit = limit
+        self._rank = {
+            (w, p): i
+            for i, (w, p) in enumerate(
+                (w, p) for w in run_config.get("wallets", []) for p in run_config.get("providers", [])
+            )
+        }
+        # 以取反的排序键建最小堆，堆顶为当前保留的最靠后的一条
+        self._heap: list[tuple[tuple, dict[str, Any]]] = []
+        self._seq = itertools.count()
+
+    def tap(self, stream: Iterable[RecordPair]) -> Iterator[RecordPair]:
+        for req, resp in stream:
+            rank = self._rank.get((req.wallet_id, req.provider_id), len(self._rank))
+            key = (-rank, -req.timestamp, -next(self._seq))
+            if len(self._heap) < self.limit:
+                heapq.heappush(self._heap, (key, _record_summary(req)))
+            elif self.limit and key > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (key, _record_summary(req)))
+            yield req, resp
+
+    def records(self) -> list[dict[str, Any]]:
+        return [summary for _, summary in sorted(self._heap, key=lambda entry: entry[0], reverse=True)]
+
+
+def _sum_fields(items: list[dict[str, Any]], fields: tuple[str, ...]) -> dict[str, Any]:
+    """fields 中的字段求和，其余字段取第一个的值"""
+    out = dict(items[0])
+    for key in fields:
+        out[key] = sum(item.get(key, 0) for item in items)
+    return out
+
+
+def _merge_extras(partials: list[dict[str, Any]]) -> dict[str, Any]:
+    """合并各分片的缓存、请求合并与限流统计"""
+    extras: dict[str, Any] = {}
+    caches = [p["cache"] for p in partials if p.get("cache")]
+    if caches:
+        counters = tuple(
+            k for k, v in caches[0].items()
+            if k != "hit_rate" and k not in DEFAULT_CACHE_OPTIONS and isinstance(v, int) and not isinstance(v, bool)
+        )
+        cache = _sum_fields(caches, counters)
+        cache["hit_rate"] = round(cache.get("hits", 0) / cache["lookups"], 4) if cache.get("lookups") else 0.0
+        extras["cache"] = cache
+    coalescing = [p["coalescing"] for p in partials if p.get("coalescing")]
+    if coalescing:
+        merged = _sum_fields(coalescing, ("leaders", "followers"))
+        total = merged["leaders"] + merged["followers"]
+        merged["coalesce_rate"] = round(merged["followers"] / total, 4) if total else 0.0
+        extras["coalescing"] = merged
+    limiters: dict[str, list[dict[str, Any]]] = {}
+    for p in partials:
+        for provider_id, stats in (p.get("rate_limit") or {}).items():
+            limiters.setdefault(provider_id, []).append(stats)
+    if limiters:
+        # 每个分片进程各有一个令牌桶：计数求和，当前速率取最低
+        extras["rate_limit"] = {}
+        for provider_id, stats in sorted(limiters.items()):
+            merged = _sum_fields(stats, _LIMITER_COUNTERS)
+            merged["waited_s"] = round(merged["waited_s"], 3)
+            merged["current_rate"] = min(s["current_rate"] for s in stats)
+            extras["rate_limit"][provider_id] = merged
+    return extras
+
+
+def merge_shards(paths: list[Path]) -> dict[str, Any]:
+    """合并一组分片文件，生成与单进程运行相同的报告数据
+
+    可只合并部分分片（结果仅覆盖这些分片），config.shards 记录实际合并的分片编号。
+    """
+    paths = [Path(p) for p in paths]
+    if not paths:
+        raise ValueError("No shard files to merge")
+    indexes = [read_capture_index(p) for p in paths]
+    seen: dict[int, Path] = {}
+    counts: set[int] = set()
+    configs = []
+    for path, index in zip(paths, indexes):
+        config = index["meta"].get("config") or {}
+        shard = config.get("shard")
+        if shard is None or index["partial"] is None:
+            raise ValueError(f"{path} is not a completed shard file")
+        if shard["index"] in seen:
+            raise ValueError(f"Shard {shard['index']} appears twice: {seen[shard['index']]}, {path}")
+        seen[shard["index"]] = path
+        counts.add(shard["count"])
+        configs.append({k: v for k, v in config.items() if k != "shard"})
+    if len(counts) != 1:
+        raise ValueError(f"Shard files come from runs with different shard counts: {sorted(counts)}")
+    base = {k: v for k, v in configs[0].items() if k != "load"}
+    for path, config in zip(paths, configs):
+        if {k: v for k, v in config.items() if k != "load"} != base:
+            raise ValueError(f"{path} was produced with a different run configuration")
+
+    partials = [index["partial"] for index in indexes]
+    run_config = dict(configs[0])
+    run_config["shards"] = {"count": counts.pop(), "merged": sorted(seen)}
+    if "load" in run_config:
+        # 各分片按 1/N 的速率 / 并发执行，合并后为总量
+        load_config_section = dict(run_config["load"])
+        for key in ("rate", "concurrency"):
+            if load_config_section.get(key):
+                load_config_section[key] = sum(c["load"][key] for c in configs)
+        run_config["load"] = load_config_section
+
+    # 记录摘要预览单独按网格顺序保留，与单进程运行一致
+    analysis = RecordAnalysis(preview_limit=0)
+    preview = _GridPreview(run_config, RECORD_PREVIEW_LIMIT)
+    for partial in partials:
+        analysis.merge_state(partial["state"])
+    analysis.add_records(preview.tap(_replay(paths)), privacy=False)
+    result = analysis.result()
+    result["records"] = preview.records()
+
+    order = grid_order(run_config)
+    scenario_results: dict[str, Any] = {}
+    for partial in partials:
+        scenario_results.update(partial["scenario_results"])
+    scenario_results = dict(sorted(scenario_results.items(), key=lambda kv: order.get(kv[0], len(order))))
+    # 分片并行执行，总耗时取最慢的分片
+    wall_clock = max(p["wall_clock_s"] for p in partials)
+
+    if "load" in run_config:
+        scenario_errors: dict[str, int] = {}
+        for partial in partials:
+            for key, n in partial["state"]["scenario_errors"].items():
+                scenario_errors[key] = scenario_errors.get(key, 0) + n
+        data = build_result(run_config, result, {}, load_errors(scenario_errors), wall_clock)
+        # 延迟分布已在重放记录时计入 analysis.latency，无需再合并各分片的直方图
+        schedule_lag = LatencyHistogram()
+        for partial in partials:
+            schedule_lag.merge(LatencyHistogram.from_state(partial["state"]["schedule_lag"]))
+        iterations = sum(p["load"]["iterations"] for p in partials)
+        data["load"] = load_section(run_config["load"], analysis.latency, schedule_lag, iterations, wall_clock)
+    else:
+        errors = sorted(
+            (e for p in partials for e in p["errors"]), key=lambda e: order.get(e.get("key"), len(order))
+        )
+        data = build_result(run_config, result, scenario_results, errors, wall_clock)
+    data.update(_merge_extras(partials))
+    return data
@@ -1,6 +1,13 @@
-"""配置加载模块"""
+"""配置加载模块
+
+config.yaml 只解析一次并缓存，文件 mtime 或 API Key 环境变量变化时自动重新加载。
+provider URL 与各钱包请求头在加载时预先计算，供并发 worker 共享只读使用。
+"""
 import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 import yaml
 from dotenv import load_dotenv
@@ -8,39 +15,47 @@ from dotenv import load_dotenv
 # 加载 .env
 load_dotenv(Path(__file__).parent.parent / ".env")
 
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
 
-def load_config():
-    """加载 config.yaml"""
-    config_path = Path(__file__).parent.parent / "config" / "config.yaml"
-    with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+# 内置本地替身节点（src/standin_server.py）；config.yaml 未定义同名 provider 时自动可用，
+# 地址取 config.yaml 的 standin.host / standin.port（WebSocket 为 standin.ws_port，默认 port + 1）
+STANDIN_PROVIDER_ID = "local_standin"
+STANDIN_DEFAULT_HOST = "127.0.0.1"
+STANDIN_DEFAULT_PORT = 8545
 
+ENV_KEY_MAP = {
+    "infura": "INFURA_API_KEY",
+    "alchemy": "ALCHEMY_API_KEY",
+    "chainstack": "CHAINSTACK_API_KEY",
+}
 
-def get_rpc_url(provider_id: str) -> str:
-    """根据 provider 和 env 中的 API Key 构建 RPC URL"""
-    config = load_config()
-    providers = config["rpc_providers"]
-    if provider_id not in providers:
-        raise ValueError(f"Unknown provider: {provider_id}")
 
-    prov = providers[provider_id]
+def _env_keys() -> tuple:
+    """API Key 环境变量的当前值；URL 在加载时代入，因此与 mtime 一起作为缓存键"""
+    return tuple(os.getenv(name, "") for name in ENV_KEY_MAP.values())
+
+
+def _build_rpc_url(provider_id: str, prov: dict) -> str:
     if prov.get("no_api_key"):
         return prov["base_url"]
-
-    env_key_map = {
-        "infura": "INFURA_API_KEY",
-        "alchemy": "ALCHEMY_API_KEY",
-        "chainstack": "CHAINSTACK_API_KEY",
-    }
-    key = os.getenv(env_key_map.get(provider_id, ""), "")
+    key = os.getenv(ENV_KEY_MAP.get(provider_id, ""), "")
     base = prov["base_url"]
     return base.replace("{api_key}", key)
 
 
-def get_wallet_headers(wallet_id: str) -> dict:
-    """获取模拟某款钱包的请求头"""
-    config = load_config()
-    w = config["wallets"][wallet_id]
+def _build_ws_url(provider_id: str, prov: dict, rpc_url: str) -> str:
+    """provider 配置了 ws_url 时使用之（同样替换 {api_key}），否则由 RPC URL 换为 ws(s):// 协议"""
+    if prov.get("ws_url"):
+        key = "" if prov.get("no_api_key") else os.getenv(ENV_KEY_MAP.get(provider_id, ""), "")
+        return prov["ws_url"].replace("{api_key}", key)
+    if rpc_url.startswith("https://"):
+        return "wss://" + rpc_url[len("https://"):]
+    if rpc_url.startswith("http://"):
+        return "ws://" + rpc_url[len("http://"):]
+    return rpc_url
+
+
+def _build_wallet_headers(w: dict) -> dict:
     headers = {
         "Content-Type": "application/json",
         "User-Agent": w["user_agent"],
@@ -48,3 +63,106 @@ def get_wallet_headers(wallet_id: str) -> dict:
         **(w.get("headers") or {}),
     }
     return {k: v for k, v in headers.items() if v}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """某一时刻的配置快照，创建后不再修改，可在线程间共享"""
+    raw: dict
+    provider_urls: dict
+    provider_ws_urls: dict
+    wallet_headers: dict
+    mtime_ns: int
+    env_keys: tuple
+
+    @classmethod
+    def parse(cls, path: Path, mtime_ns: int, env_keys: tuple) -> "ConfigSnapshot":
+        with open(path, "r", encoding="utf-8") as f:
+            raw = yaml.safe_load(f)
+        provider_urls = {pid: _build_rpc_url(pid, prov) for pid, prov in raw["rpc_providers"].items()}
+        provider_ws_urls = {
+            pid: _build_ws_url(pid, prov, provider_urls[pid]) for pid, prov in raw["rpc_providers"].items()
+        }
+        if STANDIN_PROVIDER_ID not in provider_urls:
+            standin = raw.get("standin") or {}
+            host = standin.get("host", STANDIN_DEFAULT_HOST)
+            port = standin.get("port", STANDIN_DEFAULT_PORT)
+            ws_port = standin.get("ws_port", int(port) + 1)
+            provider_urls[STANDIN_PROVIDER_ID] = f"http://{host}:{port}"
+            provider_ws_urls[STANDIN_PROVIDER_ID] = f"ws://{host}:{ws_port}"
+        return cls(
+            raw=raw,
+            provider_urls=provider_urls,
+            provider_ws_urls=provider_ws_urls,
+            wallet_headers={wid: _build_wallet_headers(w) for wid, w in raw["wallets"].items()},
+            mtime_ns=mtime_ns,
+            env_keys=env_keys,
+        )
+
+
+class ConfigCache:
+    """config.yaml 缓存，线程安全；每次访问只做一次 stat，mtime 或 API Key 环境变量变化才重新解析"""
+
+    def __init__(self, path: Path = CONFIG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+
+    @staticmethod
+    def _fresh(snapshot: Optional[ConfigSnapshot], mtime_ns: int, env_keys: tuple) -> bool:
+        return snapshot is not None and snapshot.mtime_ns == mtime_ns and snapshot.env_keys == env_keys
+
+    def get(self) -> ConfigSnapshot:
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        env_keys = _env_keys()
+        snapshot = self._snapshot
+        if self._fresh(snapshot, mtime_ns, env_keys):
+            return snapshot
+        with self._lock:
+            # 双重检查：其他线程可能已完成重新加载
+            if not self._fresh(self._snapshot, mtime_ns, env_keys):
+                self._snapshot = ConfigSnapshot.parse(self.path, mtime_ns, env_keys)
+            return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+
+_CACHE = ConfigCache()
+
+
+def get_config() -> ConfigSnapshot:
+    """获取当前配置快照"""
+    return _CACHE.get()
+
+
+def load_config():
+    """加载 config.yaml（缓存结果，调用方请勿修改返回的 dict）"""
+    return get_config().raw
+
+
+def get_rpc_url(provider_id: str) -> str:
+    """根据 provider 和 env 中的 API Key 构建 RPC URL"""
+    urls = get_config().provider_urls
+    if provider_id not in urls:
+        raise ValueError(f"Unknown provider: {provider_id}")
+    return urls[provider_id]
+
+
+def get_ws_url(provider_id: str) -> str:
+    """provider 的 WebSocket 端点（--transport ws 时使用）"""
+    urls = get_config().provider_ws_urls
+    if provider_id not in urls:
+        raise ValueError(f"Unknown provider: {provider_id}")
+    return urls[provider_id]
+
+
+def get_wallet_headers(wallet_id: str) -> dict:
+    """获取模拟某款钱包的请求头"""
+    return dict(get_config().wallet_headers[wallet_id])
+
+
+def get_contracts() -> dict:
+    """获取合约地址表"""
+    return get_config().raw["contracts"]
@@ -0,0 +1,95 @@
+"""
+RPC 客户端钩子 - 在请求前后、记录产生时与场景前后回调，用于挂接 profiler 或导出器
+
+RPCHook 的方法默认均为空操作，子类只需覆盖关心的事件。钩子在发起请求的线程中同步调用，
+应尽量轻量；钩子抛出的异常不做捕获，与 sink 相同。
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+
+# 单次 HTTP 发送的阶段（毫秒），顺序即时间先后：
+# queue    限流令牌等待（客户端排队，不计入 elapsed_ms）
+# encode   请求体 JSON 编码
+# connect  DNS 解析 + TCP 建连（仅新建连接）
+# tls      TLS 握手（仅新建 https 连接）
+# wait     发送请求至收到响应头（网络往返 + 服务端处理）
+# download 读取响应体
+# decode   响应体 JSON 解析
+# record   构建请求记录（地址提取、参数摘要、请求头副本），批量请求按子调用分摊
+REQUEST_PHASES = ("queue", "encode", "connect", "tls", "wait", "download", "decode", "record")
+# 客户端自身开销的阶段（其余为网络与服务端耗时）
+CLIENT_PHASES = ("encode", "decode", "record")
+
+
+@dataclass(slots=True)
+class RequestContext:
+    """单次 HTTP 发送（含每次重试）；after_request 时 elapsed_ms / phases / status_code / error 已填写"""
+    provider_id: str
+    wallet_id: str
+    methods: list[str]
+    batch: bool = False
+    retry: int = 0
+    timestamp: float = 0.0
+    elapsed_ms: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    status_code: Optional[int] = None
+    connection_reused: Optional[bool] = None
+    # 网络 / HTTP 异常或 JSON-RPC 错误，格式同记录的 error
+    error: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class ScenarioContext:
+    """单次场景执行；after_scenario 时 elapsed_ms / status 已填写"""
+    wallet_id: str
+    provider_id: str
+    scenario_id: str
+    timestamp: float = 0.0
+    elapsed_ms: float = 0.0
+    status: str = "ok"
+    requests: int = 0
+
+
+class RPCHook:
+    """钩子基类"""
+
+    def before_request(self, ctx: RequestContext):
+        pass
+
+    def after_request(self, ctx: RequestContext):
+        pass
+
+    def on_record(self, req: Any, resp: Any):
+        pass
+
+    def before_scenario(self, ctx: ScenarioContext):
+        pass
+
+    def after_scenario(self, ctx: ScenarioContext):
+        pass
+
+
+@contextmanager
+def scenario_hooks(
+    hooks: Iterable[RPCHook],
+    wallet_id: str,
+    provider_id: str,
+    scenario_id: str,
+) -> Iterator[ScenarioContext]:
+    """在场景前后调用钩子；调用方在 with 块内设置 ctx.status / ctx.requests"""
+    hooks = list(hooks or ())
+    ctx = ScenarioContext(wallet_id, provider_id, scenario_id, timestamp=time.time())
+    if not hooks:
+        yield ctx
+        return
+    for hook in hooks:
+        hook.before_scenario(ctx)
+    start = time.perf_counter()
+    try:
+        yield ctx
+    finally:
+        ctx.elapsed_ms = (time.perf_counter() - start) * 1000
+        for hook in hooks:
+            hook.after_scenario(ctx)
@@ -0,0 +1,206 @@
+"""
+按 provider 的自适应限流与重试
+
+- 令牌桶：每个 provider 一个，所有 client 共享；收到 429 / Retry-After 时降速（乘性减小）并暂停发送，
+  之后每次成功请求逐步恢复（加性增加），直至配置的速率上限
+- 重试：幂等方法在 429、5xx、连接错误、超时时按带抖动的指数退避重试；有 Retry-After 时至少等待该时长
+- 每次重试都是又一次发往节点的请求，由 RPCClient 各自记录
+"""
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+
+from .config_loader import load_config
+
+# 可在 config.yaml 的 rate_limit 段覆盖；rate_limit.providers.<id> 可按 provider 单独设置
+DEFAULT_RATE_LIMIT_OPTIONS = {
+    "rate": 10.0,  # 每秒请求数上限（免费档 key 通常在 10~25 之间）
+    "burst": 10,  # 桶容量，允许的瞬时突发
+    "min_rate": 0.5,  # 连续限流时的最低速率
+    "decrease_factor": 0.5,  # 每次 429 速率乘以该系数
+    "increase_step": 0.1,  # 每次成功请求恢复的速率（req/s）
+    "max_retries": 3,
+    "backoff_base_s": 0.25,
+    "backoff_max_s": 8.0,
+}
+
+# 非幂等方法不重试：重复发送可能导致重复交易
+# eth_subscribe 重发会在节点上留下重复的订阅
+NON_IDEMPOTENT_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction", "eth_subscribe"})
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# 部分节点以 HTTP 200 + JSON-RPC 错误码表示限流（如 Infura 的 -32005）
+THROTTLE_ERROR_CODES = frozenset({-32005, 429})
+
+
+def get_rate_limit_options(provider_id: Optional[str] = None) -> dict[str, Any]:
+    section = dict(load_config().get("rate_limit") or {})
+    per_provider = section.pop("providers", None) or {}
+    return {**DEFAULT_RATE_LIMIT_OPTIONS, **section, **(per_provider.get(provider_id) or {})}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 可为秒数或 HTTP 日期"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc: Exception) -> tuple[Optional[int], Optional[float], bool]:
+    """网络/HTTP 异常 -> (HTTP 状态码, Retry-After 秒数, 是否可重试)"""
+    response = getattr(exc, "response", None)
+    if response is not None:
+        status = response.status_code
+        return status, parse_retry_after(response.headers.get("Retry-After")), status in RETRYABLE_STATUS
+    retryable = isinstance(exc, (requests.ConnectionError, requests.Timeout))
+    return None, None, retryable
+
+
+def is_throttle_error(error: Any) -> bool:
+    """JSON-RPC 层的限流错误"""
+    return isinstance(error, dict) and error.get("code") in THROTTLE_ERROR_CODES
+
+
+class AdaptiveTokenBucket:
+    """线程安全的 AIMD 令牌桶"""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_LIMIT_OPTIONS["rate"],
+        burst: float = DEFAULT_RATE_LIMIT_OPTIONS["burst"],
+        min_rate: float = DEFAULT_RATE_LIMIT_OPTIONS["min_rate"],
+        decrease_factor: float = DEFAULT_RATE_LIMIT_OPTIONS["decrease_factor"],
+        increase_step: float = DEFAULT_RATE_LIMIT_OPTIONS["increase_step"],
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited_s": 0.0, "throttled": 0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """取一个令牌，必要时阻塞；返回等待秒数"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.stats["acquired"] += 1
+                        self.stats["waited_s"] += waited
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self.stats["throttled"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_rate": self.max_rate,
+                "current_rate": round(self.rate, 3),
+                "acquired": self.stats["acquired"],
+                "throttled": self.stats["throttled"],
+                "waited_s": round(self.stats["waited_s"], 3),
+            }
+
+
+class RetryPolicy:
+    """带完全抖动（full jitter）的指数退避"""
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_RATE_LIMIT_OPTIONS["max_retries"],
+        backoff_base_s: float = DEFAULT_RATE_LIMIT_OPTIONS["backoff_base_s"],
+        backoff_max_s: float = DEFAULT_RATE_LIMIT_OPTIONS["backoff_max_s"],
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._rng = rng or random.Random()
+
+    def retryable(self, method: str) -> bool:
+        return method not in NON_IDEMPOTENT_METHODS
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """第 retry 次重试（从 0 开始）前的等待秒数"""
+        backoff = self._rng.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** retry)))
+        return max(backoff, retry_after or 0.0)
+
+
+class ProviderLimiter:
+    """单个 provider 的令牌桶与重试策略"""
+
+    def __init__(self, provider_id: str, options: Optional[dict[str, Any]] = None):
+        options = {**DEFAULT_RATE_LIMIT_OPTIONS, **(options or {})}
+        self.provider_id = provider_id
+        self.bucket = AdaptiveTokenBucket(
+            rate=options["rate"],
+            burst=options["burst"],
+            min_rate=options["min_rate"],
+            decrease_factor=options["decrease_factor"],
+            increase_step=options["increase_step"],
+        )
+        self.retry = RetryPolicy(options["max_retries"], options["backoff_base_s"], options["backoff_max_s"])
+
+
+_LIMITERS: dict[str, ProviderLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider_id: str) -> ProviderLimiter:
+    """获取 provider 共享的限流器，不存在则按配置创建"""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider_id)
+        if limiter is None:
+            limiter = _LIMITERS[provider_id] = ProviderLimiter(provider_id, get_rate_limit_options(provider_id))
+        return limiter
+
+
+def limiter_stats() -> dict[str, dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {provider_id: limiter.bucket.snapshot() for provider_id, limiter in sorted(limiters.items())}
+
+
+def reset_limiters():
+    """清空全部限流器（每次运行开始时调用，避免沿用上次运行降低后的速率）"""
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
@@ -0,0 +1,308 @@
+"""
+紧凑记录存储 - 百万级请求记录的内存表示
+
+RPCRequestRecord / RPCResponseRecord 每条记录各自持有请求头副本、params 列表与地址列表，
+而这些数据在同一钱包、同一场景的记录间大量重复。CompactRecordStore 按列存储：
+
+- 方法名、钱包、provider、地址、批次 ID、会话 ID、client ID 等字符串驻留为整数 ID
+- 请求头按 header-set 驻留：同一组请求头只保存一份（只读映射）
+- params 按 JSON 文本驻留，相同参数的记录共享同一个列表
+- 时间戳、耗时等数值列使用 array，地址列表以 CSR（偏移 + 扁平 ID）存储
+- 请求阶段耗时按 REQUEST_PHASES 顺序展平为 float32 列，缺失的阶段为 NaN
+
+读取时返回 __slots__ 视图对象，属性与 RPCRequestRecord / RPCResponseRecord 一致，
+可直接交给隐私分析、延迟统计与抓包序列化使用。
+"""
+import json
+import math
+from array import array
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from .hooks import REQUEST_PHASES
+from .rpc_client import RecordPair, RPCRequestRecord, RPCResponseRecord
+
+_NONE_ID = 0
+_NAN = float("nan")
+_NO_PHASES = (_NAN,) * len(REQUEST_PHASES)
+
+
+class _Interner:
+    """值 <-> 整数 ID 双向表；ID 0 保留给 None"""
+
+    __slots__ = ("_ids", "values")
+
+    def __init__(self):
+        self._ids: dict[Any, int] = {}
+        self.values: list[Any] = [None]
+
+    def intern(self, key: Any, value: Any = None) -> int:
+        if key is None:
+            return _NONE_ID
+        idx = self._ids.get(key)
+        if idx is None:
+            idx = self._ids[key] = len(self.values)
+            self.values.append(key if value is None else value)
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.values) - 1
+
+
+def _params_key(params: list) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class CompactRecordStore:
+    """列式存储的请求/响应记录（非线程安全，由调用方加锁，如 RecordBuffer）"""
+
+    def __init__(self):
+        self._strings = _Interner()  # 方法、钱包、provider、地址、批次、会话、来源等
+        self._header_sets = _Interner()
+        self._params = _Interner()
+        self._errors = _Interner()
+        self.method = array("I")
+        self.wallet = array("I")
+        self.provider = array("I")
+        self.header_set = array("I")
+        self.params = array("I")
+        self.summary = array("I")
+        self.batch = array("I")
+        self.batch_size = array("I")
+        self.session = array("I")
+        self.client = array("I")
+        self.timestamp = array("d")
+        self.elapsed_ms = array("d")
+        self.error = array("I")
+        self.reused = array("b")  # -1 未知 / 0 新建 / 1 复用
+        self.source = array("I")
+        self.coalesced_with = array("I")
+        self.retry = array("H")
+        self.status_code = array("H")  # 0 表示无状态码
+        # 第 i 条记录的阶段耗时为 phases[i * len(REQUEST_PHASES):(i + 1) * len(REQUEST_PHASES)]
+        self.phases = array("f")
+        # 第 i 条记录的地址为 address_ids[address_offsets[i]:address_offsets[i + 1]]
+        self.address_ids = array("I")
+        self.address_offsets = array("Q", [0])
+        # 响应结果各不相同（区块、余额），按引用保存
+        self.results: list[Any] = []
+
+    def append(self, req: RPCRequestRecord, resp: RPCResponseRecord):
+        s = self._strings.intern
+        self.method.append(s(req.method))
+        self.wallet.append(s(req.wallet_id))
+        self.provider.append(s(req.provider_id))
+        headers = tuple(sorted(req.headers_sent.items()))
+        self.header_set.append(self._header_sets.intern(headers, MappingProxyType(dict(headers))))
+        self.params.append(self._params.intern(_params_key(req.params), req.params))
+        self.summary.append(s(req.exposed_params_summary))
+        self.batch.append(s(req.batch_id))
+        self.batch_size.append(req.batch_size)
+        self.session.append(s(req.session_id))
+        self.client.append(s(req.client_id))
+        self.timestamp.append(req.timestamp)
+        self.address_ids.extend(s(addr) for addr in req.exposed_addresses)
+        self.address_offsets.append(len(self.address_ids))
+
+        self.elapsed_ms.append(resp.elapsed_ms)
+        self.error.append(self._errors.intern(_params_key(resp.error), resp.error) if resp.error else _NONE_ID)
+        self.reused.append(-1 if resp.connection_reused is None else int(resp.connection_reused))
+        self.source.append(s(resp.source))
+        self.coalesced_with.append(s(resp.coalesced_with))
+        self.retry.append(resp.retry)
+        self.status_code.append(resp.status_code or 0)
+        phases = resp.phases
+        self.phases.extend(_NO_PHASES if not phases else (phases.get(name, _NAN) for name in REQUEST_PHASES))
+        self.results.append(resp.result)
+
+    def extend(self, pairs: Iterable[RecordPair]) -> "CompactRecordStore":
+        for req, resp in pairs:
+            self.append(req, resp)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.method)
+
+    def __getitem__(self, i: int) -> RecordPair:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        req = RequestView(self, i)
+        return req, ResponseView(req)
+
+    def __iter__(self) -> Iterator[RecordPair]:
+        for i in range(len(self)):
+            req = RequestView(self, i)
+            yield req, ResponseView(req)
+
+    def string(self, idx: int) -> Optional[str]:
+        return self._strings.values[idx]
+
+    def clear(self):
+        self.__init__()
+
+    def memory_usage(self) -> dict[str, int]:
+        """列与驻留表的近似字节数（不含 results 中的对象）"""
+        columns = sum(
+            col.itemsize * len(col)
+            for col in (
+                self.method, self.wallet, self.provider, self.header_set, self.params, self.summary,
+                self.batch, self.batch_size, self.session, self.client, self.timestamp, self.elapsed_ms, self.error, self.reused,
+                self.source, self.coalesced_with, self.retry, self.status_code, self.phases,
+                self.address_ids, self.address_offsets,
+            )
+        )
+        return {
+            "records": len(self),
+            "column_bytes": columns,
+            "strings": len(self._strings),
+            "header_sets": len(self._header_sets),
+            "distinct_params": len(self._params),
+        }
+
+
+class RequestView:
+    """CompactRecordStore 中一条请求的只读视图，属性同 RPCRequestRecord"""
+
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store: CompactRecordStore, i: int):
+        self._store = store
+        self._i = i
+
+    @property
+    def method(self) -> str:
+        return self._store.string(self._store.method[self._i])
+
+    @property
+    def params(self) -> list:
+        return self._store._params.values[self._store.params[self._i]]
+
+    @property
+    def wallet_id(self) -> str:
+        return self._store.string(self._store.wallet[self._i])
+
+    @property
+    def provider_id(self) -> str:
+        return self._store.string(self._store.provider[self._i])
+
+    @property
+    def headers_sent(self) -> Mapping[str, str]:
+        return self._store._header_sets.values[self._store.header_set[self._i]]
+
+    @property
+    def timestamp(self) -> float:
+        return self._store.timestamp[self._i]
+
+    @property
+    def exposed_addresses(self) -> list[str]:
+        store = self._store
+        lo, hi = store.address_offsets[self._i], store.address_offsets[self._i + 1]
+        return [store.string(idx) for idx in store.address_ids[lo:hi]]
+
+    @property
+    def exposed_params_summary(self) -> str:
+        return self._store.string(self._store.summary[self._i]) or ""
+
+    @property
+    def batch_id(self) -> Optional[str]:
+        return self._store.string(self._store.batch[self._i])
+
+    @property
+    def batch_size(self) -> int:
+        return self._store.batch_size[self._i]
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self._store.string(self._store.session[self._i])
+
+    @property
+    def client_id(self) -> str:
+        return self._store.string(self._store.client[self._i])
+
+    def to_record(self) -> RPCRequestRecord:
+        return RPCRequestRecord(
+            method=self.method,
+            params=self.params,
+            wallet_id=self.wallet_id,
+            provider_id=self.provider_id,
+            headers_sent=dict(self.headers_sent),
+            timestamp=self.timestamp,
+            exposed_addresses=self.exposed_addresses,
+            exposed_params_summary=self.exposed_params_summary,
+            batch_id=self.batch_id,
+            batch_size=self.batch_size,
+            session_id=self.session_id,
+            client_id=self.client_id,
+        )
+
+    def __repr__(self) -> str:
+        return f"RequestView({self.wallet_id}@{self.provider_id} {self.method})"
+
+
+class ResponseView:
+    """CompactRecordStore 中一条响应的只读视图，属性同 RPCResponseRecord"""
+
+    __slots__ = ("request",)
+
+    def __init__(self, request: RequestView):
+        self.request = request
+
+    @property
+    def result(self) -> Any:
+        return self.request._store.results[self.request._i]
+
+    @property
+    def error(self) -> Optional[dict]:
+        store = self.request._store
+        return store._errors.values[store.error[self.request._i]]
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.request._store.elapsed_ms[self.request._i]
+
+    @property
+    def connection_reused(self) -> Optional[bool]:
+        flag = self.request._store.reused[self.request._i]
+        return None if flag < 0 else bool(flag)
+
+    @property
+    def source(self) -> str:
+        store = self.request._store
+        return store.string(store.source[self.request._i])
+
+    @property
+    def coalesced_with(self) -> Optional[str]:
+        store = self.request._store
+        return store.string(store.coalesced_with[self.request._i])
+
+    @property
+    def retry(self) -> int:
+        return self.request._store.retry[self.request._i]
+
+    @property
+    def status_code(self) -> Optional[int]:
+        return self.request._store.status_code[self.request._i] or None
+
+    @property
+    def phases(self) -> Optional[dict[str, float]]:
+        n = len(REQUEST_PHASES)
+        i = self.request._i * n
+        values = self.request._store.phases[i:i + n]
+        phases = {name: v for name, v in zip(REQUEST_PHASES, values) if not math.isnan(v)}
+        return phases or None
+
+    def to_record(self) -> RPCResponseRecord:
+        return RPCResponseRecord(
+            request=self.request.to_record(),
+            result=self.result,
+            error=self.error,
+            elapsed_ms=self.elapsed_ms,
+            connection_reused=self.connection_reused,
+            source=self.source,
+            coalesced_with=self.coalesced_with,
+            retry=self.retry,
+            status_code=self.status_code,
+            phases=self.phases,
+        )
@@ -0,0 +1,324 @@
+"""
+HTML 仪表盘 - 由聚合结果流式渲染的静态页面，记录分页输出
+
+- index.html 只依赖聚合结果（隐私维度、关联簇、延迟直方图等），与请求数无关；
+  以 jinja2 模板 stream() 分块写入文件，不在内存中拼出整页
+- 请求记录按 page_size 条一页写入 records/page-NNNNN.html，从记录流逐页读取、渲染后即丢弃，
+  内存占用只与页大小有关；records/index.html 列出各页的时间范围
+- 没有记录流（未指定抓包文件）时，记录页只包含结果中的示例记录
+- 热力图与直方图用内联样式着色，页面不依赖脚本与外部资源，可直接用浏览器打开
+"""
+import html
+import shutil
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from ..analyzers.privacy_analyzer import RISK_ORDER
+from ..rpc_client import RPCRequestRecord, RPCResponseRecord
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+DEFAULT_PAGE_SIZE = 1000
+RECORDS_DIR = "records"
+# 各风险等级的热力图底色（RGB），格子透明度按暴露次数缩放
+RISK_COLORS = {
+    "low": (46, 125, 50),
+    "medium": (249, 168, 37),
+    "high": (239, 108, 0),
+    "critical": (198, 40, 40),
+}
+# 每个 provider 展示的延迟直方图区间数
+HISTOGRAM_BUCKETS = 20
+# 仪表盘中展示的执行错误条数
+ERROR_LIMIT = 100
+# 记录表格的列，与 _record_cells / _preview_cells 的输出一一对应
+RECORD_COLUMNS = ("#", "时间", "Provider", "钱包", "方法", "暴露地址", "参数摘要", "批次", "来源", "耗时 (ms)", "状态")
+# 一行的各列以分隔符拼接后整体转义一次，再把分隔符换成单元格边界（逐列转义是记录页渲染的主要开销）
+_CELL_SEP = "\x1f"
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+def _cell_style(risk: str, share: float) -> str:
+    r, g, b = RISK_COLORS.get(risk, RISK_COLORS["low"])
+    return f"background: rgba({r}, {g}, {b}, {0.15 + 0.85 * share:.2f})"
+
+
+def _risk_heatmap(data: dict[str, Any]) -> dict[str, Any]:
+    """provider x wallet 热力图：各组合触发的维度数、暴露次数与最高风险等级
+
+    暴露次数来自各维度的 by_provider_wallet；请求数取节点实际收到的请求（延迟统计），用于计算每请求暴露次数。
+    """
+    cells: dict[tuple[str, str], dict[str, Any]] = {}
+    for info in (data.get("privacy_analysis") or {}).values():
+        for provider_id, wallets in (info.get("by_provider_wallet") or {}).items():
+            for wallet_id, n in wallets.items():
+                cell = cells.setdefault((provider_id, wallet_id), {"exposures": 0, "dimensions": 0, "risk": "low"})
+                cell["exposures"] += n
+                cell["dimensions"] += 1
+                if RISK_ORDER.get(info["risk_level"], 0) > RISK_ORDER.get(cell["risk"], 0):
+                    cell["risk"] = info["risk_level"]
+    requests: dict[tuple[str, str], int] = {}
+    for row in (data.get("latency") or {}).get("cells", []):
+        key = (row["provider"], row["wallet"])
+        requests[key] = requests.get(key, 0) + row["requests"]
+
+    providers = sorted({p for p, _ in cells})
+    wallets = sorted({w for _, w in cells})
+    peak = max((c["exposures"] for c in cells.values()), default=0)
+    rows = []
+    for provider_id in providers:
+        row = []
+        for wallet_id in wallets:
+            cell = cells.get((provider_id, wallet_id))
+            if cell is None:
+                row.append(None)
+                continue
+            n = requests.get((provider_id, wallet_id))
+            row.append({
+                **cell,
+                "requests": n,
+                "per_request": round(cell["exposures"] / n, 2) if n else None,
+                "style": _cell_style(cell["risk"], cell["exposures"] / peak if peak else 0),
+            })
+        rows.append({"provider": provider_id, "cells": row})
+    return {"wallets": wallets, "rows": rows}
+
+
+def _dimension_heatmap(data: dict[str, Any]) -> dict[str, Any]:
+    """维度 x (provider / wallet) 热力图：每行按该维度的最大次数着色，跳过没有逐组合计数的维度"""
+    analysis = data.get("privacy_analysis") or {}
+    columns = sorted({
+        (provider_id, wallet_id)
+        for info in analysis.values()
+        for provider_id, wallets in (info.get("by_provider_wallet") or {}).items()
+        for wallet_id in wallets
+    })
+    rows = []
+    for dim_id, info in analysis.items():
+        by_pw = info.get("by_provider_wallet") or {}
+        counts = [by_pw.get(p, {}).get(w, 0) for p, w in columns]
+        peak = max(counts, default=0)
+        # 时序关联等按全部记录整体计算的维度没有逐组合计数
+        if not peak:
+            continue
+        rows.append({
+            "id": dim_id,
+            "name": info["name"],
+            "risk": info["risk_level"],
+            "cells": [
+                {"count": n, "style": _cell_style(info["risk_level"], n / peak) if n else ""}
+                for n in counts
+            ],
+        })
+    return {"columns": [f"{p} / {w}" for p, w in columns], "rows": rows}
+
+
+def _latency_view(data: dict[str, Any]) -> list[dict[str, Any]]:
+    """每个 provider 的延迟分布条形图（宽度按区间最大计数归一）与分位数表"""
+    latency = data.get("latency") or {}
+    cells: dict[str, list[dict]] = {}
+    for row in latency.get("cells", []):
+        cells.setdefault(row["provider"], []).append(row)
+    out = []
+    for provider_id, buckets in (latency.get("histograms") or {}).items():
+        buckets = buckets[:HISTOGRAM_BUCKETS]
+        peak = max((n for _, _, n in buckets), default=0)
+        out.append({
+            "provider": provider_id,
+            "total": sum(n for _, _, n in buckets),
+            "bars": [
+                {"label": f"{lo:g} – {hi:g}", "count": n, "width": round(n / peak * 100, 1) if peak else 0}
+                for lo, hi, n in buckets
+            ],
+            "cells": cells.get(provider_id, []),
+        })
+    return out
+
+
+def _summary_cards(data: dict[str, Any]) -> list[tuple[str, Any]]:
+    summary = data["summary"]
+    config = data.get("config") or {}
+    linkage = data.get("linkage") or {}
+    cards = [
+        ("总请求数", summary.get("total_requests", 0)),
+        ("发送至节点", summary.get("upstream_requests", summary.get("total_requests", 0))),
+        ("隐私维度", summary.get("dimensions_affected", 0)),
+        ("执行错误", summary.get("errors", 0)),
+        ("钱包", len(config.get("wallets", []))),
+        ("RPC", len(config.get("providers", []))),
+        ("被关联地址", sum(s["linked_addresses"] for s in linkage.values())),
+    ]
+    if summary.get("wall_clock_s") is not None:
+        cards.append(("耗时 (s)", summary["wall_clock_s"]))
+        cards.append(("吞吐 (req/s)", summary.get("requests_per_sec")))
+    return cards
+
+
+@lru_cache(maxsize=4096)
+def _format_second(second: int) -> str:
+    return datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _format_time(ts: Optional[float]) -> str:
+    if ts is None:
+        return "-"
+    second = int(ts)
+    return f"{_format_second(second)}.{int((ts - second) * 1000):03d}"
+
+
+_env.filters["format_time"] = _format_time
+
+
+def _error_text(resp: RPCResponseRecord) -> str:
+    error = resp.error
+    if not error:
+        return str(resp.status_code) if resp.status_code and resp.status_code >= 400 else "ok"
+    if isinstance(error, dict):
+        return f"{error.get('code', '')} {error.get('message', '')}".strip()
+    return str(error)
+
+
+def _record_cells(n: int, req: RPCRequestRecord, resp: RPCResponseRecord) -> tuple:
+    return (
+        n,
+        _format_time(req.timestamp),
+        req.provider_id,
+        req.wallet_id,
+        req.method,
+        ", ".join(req.exposed_addresses),
+        req.exposed_params_summary,
+        req.batch_id or "",
+        resp.source,
+        f"{resp.elapsed_ms:.1f}",
+        _error_text(resp),
+    ), req.timestamp
+
+
+def _preview_cells(n: int, item: dict[str, Any]) -> tuple:
+    return (
+        n, "-", item["provider"], item["wallet"], item["method"],
+        ", ".join(item.get("exposed_addresses") or []), "", item.get("batch_id") or "", "-", "-", "-",
+    ), None
+
+
+def _rows(records: Optional[Iterable[tuple[RPCRequestRecord, RPCResponseRecord]]], preview: list) -> Iterator[tuple]:
+    """(转义后的表格行, 时间戳) 流"""
+    if records is None:
+        cells = (_preview_cells(n, item) for n, item in enumerate(preview, start=1))
+    else:
+        cells = (_record_cells(n, req, resp) for n, (req, resp) in enumerate(records, start=1))
+    escape = html.escape
+    for values, ts in cells:
+        text = escape(_CELL_SEP.join(map(str, values)))
+        yield "<tr><td>" + text.replace(_CELL_SEP, "</td><td>") + "</td></tr>", ts
+
+
+def _page_name(page: int) -> str:
+    return f"page-{page:05d}.html"
+
+
+def _write_record_pages(out_dir: Path, rows: Iterator[tuple], page_size: int) -> list[dict[str, Any]]:
+    """逐页读取行流并写出，同时最多持有两页（当前页与用于判断是否有下一页的预读页）"""
+    template = _env.get_template("records.html")
+    pages = []
+    chunk = list(islice(rows, page_size))
+    first = 1
+    while chunk:
+        page = len(pages) + 1
+        following = list(islice(rows, page_size))
+        times = [ts for _, ts in (chunk[0], chunk[-1]) if ts is not None]
+        info = {
+            "page": page,
+            "file": _page_name(page),
+            "first": first,
+            "last": first + len(chunk) - 1,
+            "since": _format_time(times[0]) if times else "-",
+            "until": _format_time(times[-1]) if times else "-",
+        }
+        stream = template.stream(
+            info=info,
+            columns=RECORD_COLUMNS,
+            rows=Markup("\n".join(row for row, _ in chunk)),
+            prev=_page_name(page - 1) if page > 1 else None,
+            next=_page_name(page + 1) if following else None,
+        )
+        stream.dump(str(out_dir / info["file"]), encoding="utf-8")
+        pages.append(info)
+        first = info["last"] + 1
+        chunk = following
+    return pages
+
+
+def _dump(template_name: str, path: Path, **context: Any) -> None:
+    stream = _env.get_template(template_name).stream(**context)
+    stream.enable_buffering(64)
+    stream.dump(str(path), encoding="utf-8")
+
+
+def save_html_report(
+    data: dict[str, Any],
+    output_dir: Path,
+    records: Optional[Iterable[tuple[RPCRequestRecord, RPCResponseRecord]]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> dict[str, Any]:
+    """写出 HTML 仪表盘 output_dir/index.html 与记录分页 output_dir/records/
+
+    records 为记录流（如 iter_capture / iter_db）时按页写出全部记录，为 None 时只写出 data["records"] 中的示例。
+    返回 {"index": 仪表盘路径, "pages": 页数, "records": 记录数}。
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    output_dir = Path(output_dir)
+    records_dir = output_dir / RECORDS_DIR
+    # 上次生成的记录页可能多于本次，先清空
+    if records_dir.exists():
+        shutil.rmtree(records_dir)
+    records_dir.mkdir(parents=True)
+
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    pages = _write_record_pages(records_dir, _rows(records, data.get("records") or []), page_size)
+    total = pages[-1]["last"] if pages else 0
+    preview_only = records is None
+    _dump(
+        "records_index.html",
+        records_dir / "index.html",
+        pages=pages,
+        total=total,
+        preview_only=preview_only,
+        generated=generated,
+    )
+    errors = data.get("errors") or []
+    index = output_dir / "index.html"
+    _dump(
+        "dashboard.html",
+        index,
+        data=data,
+        config=data.get("config") or {},
+        generated=generated,
+        cards=_summary_cards(data),
+        risk_heatmap=_risk_heatmap(data),
+        dimension_heatmap=_dimension_heatmap(data),
+        latency=_latency_view(data),
+        linkage=data.get("linkage") or {},
+        population=(data.get("population") or {}).get("linkage_risk") or {},
+        timing=data.get("timing") or [],
+        dimensions=data.get("privacy_analysis") or {},
+        errors=errors[:ERROR_LIMIT],
+        errors_total=len(errors),
+        records_total=total,
+        pages=len(pages),
+        preview_only=preview_only,
+        risk_colors={level: f"rgb{rgb}" for level, rgb in RISK_COLORS.items()},
+    )
+    return {"index": index, "pages": len(pages), "records": total}
@@ -1,11 +1,351 @@
-"""报告生成器 - Markdown / HTML"""
+"""报告生成器 - Markdown（HTML 仪表盘见 html_report）"""
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 
+def _format_counts(counts: dict[str, int]) -> str:
+    return "、".join(f"{k} {v}" for k, v in counts.items()) or "-"
+
+
+def _format_ms(value: Any) -> str:
+    return f"{value:.2f}" if isinstance(value, (int, float)) else "-"
+
+
+def _throttling_section(data: dict[str, Any]) -> list[str]:
+    """限流与重试：各 provider 的限流比例、重试次数与有效持续吞吐"""
+    throttling = data["summary"].get("throttling") or {}
+    limiters = data.get("rate_limit") or {}
+    if not limiters and not any(t["throttled"] for t in throttling.values()):
+        return []
+    lines = [
+        "",
+        "### 限流与重试",
+        "",
+        "| Provider | 请求数（含重试） | 被限流 | 限流比例 | 重试 | 成功 | 有效吞吐 (req/s) | 限速 (当前/上限) | 排队等待 (s) |",
+        "|----------|---------------|-------|--------|-----|-----|----------------|---------------|------------|",
+    ]
+    for provider_id, t in throttling.items():
+        limiter = limiters.get(provider_id)
+        rate = f"{limiter['current_rate']}/{limiter['max_rate']}" if limiter else "-"
+        waited = limiter["waited_s"] if limiter else "-"
+        lines.append(
+            f"| {provider_id} | {t['requests']} | {t['throttled']} | {t['throttle_rate'] * 100:.1f}% | "
+            f"{t['retries']} | {t['succeeded']} | {t['effective_rps'] if t['effective_rps'] is not None else '-'} | "
+            f"{rate} | {waited} |"
+        )
+    return lines
+
+
+# 报告列顺序同 hooks.REQUEST_PHASES
+_PHASE_LABELS = {
+    "queue": "排队",
+    "encode": "编码",
+    "connect": "建连",
+    "tls": "TLS",
+    "wait": "等待响应",
+    "download": "下载",
+    "decode": "解码",
+    "record": "记录",
+}
+
+
+def _phases_section(data: dict[str, Any]) -> list[str]:
+    """请求阶段耗时：各 provider 实际发送请求的平均阶段耗时与客户端开销占比"""
+    phases = data["summary"].get("phases") or {}
+    if not phases:
+        return []
+    labels = " | ".join(f"{label} (ms)" for label in _PHASE_LABELS.values())
+    lines = [
+        "",
+        "### 请求阶段耗时",
+        "",
+        f"| Provider | 请求数 | 平均耗时 (ms) | {labels} | 客户端开销占比 |",
+        "|----------|-------|-------------|" + "---|" * len(_PHASE_LABELS) + "-------------|",
+    ]
+    for provider_id, p in phases.items():
+        values = " | ".join(_format_ms(p["avg_phase_ms"].get(name)) for name in _PHASE_LABELS)
+        lines.append(
+            f"| {provider_id} | {p['requests']} | {_format_ms(p['avg_elapsed_ms'])} | {values} | "
+            f"{p['client_share'] * 100:.1f}% |"
+        )
+    lines.extend([
+        "",
+        "建连、TLS 仅新建连接时发生，表中为摊到每个请求的平均值；等待响应含网络往返与服务端处理。"
+        "客户端开销为编码、解码与记录之和，占比不含限流排队。",
+    ])
+    return lines
+
+
+def _load_section(load: Any) -> list[str]:
+    """负载测试：各 provider x wallet x method 的延迟分位数、吞吐与错误率"""
+    if not load:
+        return []
+    if load["model"] == "open":
+        model = f"开环，目标 {load['rate']} 场景/s，在途上限 {load['max_in_flight']}"
+    else:
+        model = f"闭环，{load['concurrency']} 个并发虚拟用户"
+    lines = [
+        "",
+        "### 负载测试",
+        "",
+        f"- 模式: {model}，时长 {load['duration_s']} s",
+        f"- 场景执行: {load['iterations']} 次（{load['iterations_per_sec']} 次/s）",
+        f"- 请求错误率: {load['request_error_rate'] * 100:.2f}%",
+    ]
+    lag = load.get("schedule_lag_ms")
+    if lag:
+        lines.append(
+            f"- 调度滞后: p50 {_format_ms(lag['p50'])} ms，p99 {_format_ms(lag['p99'])} ms，"
+            f"max {_format_ms(lag['max'])} ms"
+        )
+    lines.extend([
+        "",
+        "| Provider | 钱包 | 方法 | 请求数 | 吞吐 (req/s) | 错误率 | p50 (ms) | p90 (ms) | p99 (ms) | p99.9 (ms) |",
+        "|----------|------|------|-------|-------------|-------|---------|---------|---------|-----------|",
+    ])
+    for row in load.get("cells", []):
+        lines.append(
+            f"| {row['provider']} | {row['wallet']} | {row['method']} | {row['requests']} | "
+            f"{row['throughput_rps']} | {row['error_rate'] * 100:.2f}% | {_format_ms(row['p50_ms'])} | "
+            f"{_format_ms(row['p90_ms'])} | {_format_ms(row['p99_ms'])} | {_format_ms(row['p99.9_ms'])} |"
+        )
+    return lines
+
+
+def _cache_section(data: dict[str, Any]) -> list[str]:
+    """响应缓存：命中率、节省的往返次数与因此避免的隐私暴露"""
+    cache = data.get("cache")
+    if not cache:
+        return []
+    summary = data["summary"]
+    lines = [
+        "",
+        "### 响应缓存",
+        "",
+        f"- 作用域: {cache['scope']}（TTL {cache['ttl_s']} s，上限 {cache['max_entries']} 条）",
+        f"- 命中率: {cache['hit_rate'] * 100:.1f}%（{cache['hits']}/{cache['lookups']}）",
+        f"- 节省往返: {cache['round_trips_saved']} 次；实际发送至节点的请求: {summary.get('upstream_requests', '-')}",
+        f"- 避免的暴露: {_format_counts((summary.get('exposures_avoided') or {}).get('cache') or {})}",
+    ]
+    return lines
+
+
+def _coalescing_section(data: dict[str, Any]) -> list[str]:
+    """请求合并：合并比例，以及各钱包请求头指纹暴露的变化"""
+    coalescing = data.get("coalescing")
+    if not coalescing:
+        return []
+    summary = data["summary"]
+    avoided = (summary.get("exposures_avoided") or {}).get("coalesced") or {}
+    lines = [
+        "",
+        "### 请求合并",
+        "",
+        f"- 合并比例: {coalescing['coalesce_rate'] * 100:.1f}%"
+        f"（{coalescing['followers']} 个请求共享了 {coalescing['leaders']} 次上游调用中的结果）",
+        f"- 避免的暴露: {_format_counts(avoided)}",
+    ]
+    fingerprint = data.get("privacy_analysis", {}).get("request_header_fingerprint") or {}
+    exposed = fingerprint.get("by_wallet") or {}
+    saved = summary.get("fingerprint_avoided_by_wallet") or {}
+    if exposed or saved:
+        lines.extend([
+            "",
+            "| 钱包 | 请求头指纹暴露 | 合并/缓存避免 | 减少比例 |",
+            "|------|--------------|-------------|---------|",
+        ])
+        for wallet in dict.fromkeys([*exposed, *saved]):
+            n_exposed, n_saved = exposed.get(wallet, 0), saved.get(wallet, 0)
+            total = n_exposed + n_saved
+            lines.append(
+                f"| {wallet} | {n_exposed} | {n_saved} | {n_saved / total * 100 if total else 0:.1f}% |"
+            )
+    return lines
+
+
+def _routing_section(routing: Any) -> list[str]:
+    """多 RPC 路由：各策略下每个 provider 看到的地址 / 请求份额，与端到端延迟的权衡"""
+    if not routing:
+        return []
+    lines = [
+        "",
+        "### 多 RPC 路由策略对比",
+        "",
+        "| 策略 | 调用数 | p50 (ms) | p99 (ms) | 对冲 (胜出) | 单节点最大地址份额 |",
+        "|------|-------|---------|---------|-----------|-----------------|",
+    ]
+    for policy, r in routing.items():
+        hedge = f"{r['hedged']} ({r['hedge_wins']})" if r.get("hedge_after_ms") else "-"
+        lines.append(
+            f"| {policy} | {r['calls']} | {_format_ms(r['p50_ms'])} | {_format_ms(r['p99_ms'])} | "
+            f"{hedge} | {r['max_address_share'] * 100:.1f}% |"
+        )
+    lines.extend([
+        "",
+        "| 策略 | Provider | 请求数 | 地址份额（平均 / 最大） | 请求份额 |",
+        "|------|----------|-------|---------------------|---------|",
+    ])
+    for policy, r in routing.items():
+        for provider_id, v in r["providers"].items():
+            lines.append(
+                f"| {policy} | {provider_id} | {v['requests']} | "
+                f"{v['address_share'] * 100:.1f}% / {v['max_address_share'] * 100:.1f}% | "
+                f"{v['request_share'] * 100:.1f}% |"
+            )
+    return lines
+
+
+def _linkage_section(linkage: Any) -> list[str]:
+    """地址关联图：各 provider 可归并的地址簇"""
+    if not linkage:
+        return []
+    lines = [
+        "",
+        "### 地址关联图",
+        "",
+        "RPC 节点可将同一调用、同一批量请求或同一请求头指纹会话中出现的地址归为同一用户。",
+    ]
+    # 有 WebSocket 请求时增加 connection（同一持久连接）关联来源
+    rule_names = ("call", "batch", "session")
+    if any(g.get("connections") for g in linkage.values()):
+        rule_names = ("call", "batch", "connection", "session")
+    lines += [
+        "",
+        f"| Provider | 地址数 | 簇数 | 被关联地址 | 最大簇 | 簇大小分布 | 关联来源 ({'/'.join(rule_names)}) |",
+        "|----------|-------|-----|----------|-------|----------|---------------------------|",
+    ]
+    for provider_id, g in linkage.items():
+        sizes = "、".join(f"{size}×{n}" for size, n in g["cluster_sizes"].items()) or "-"
+        rules = "/".join(str(g["links_by_rule"].get(r, 0)) for r in rule_names)
+        lines.append(
+            f"| {provider_id} | {g['addresses']} | {g['clusters']} | {g['linked_addresses']} | "
+            f"{g['largest_cluster']} | {sizes} | {rules} |"
+        )
+    for provider_id, g in linkage.items():
+        for cluster in g["top_clusters"]:
+            lines.append(
+                f"- {provider_id} 簇（{cluster['size']} 个地址，{cluster['sightings']} 次出现，"
+                f"指纹 {', '.join(cluster['fingerprints'])}）: {', '.join(cluster['addresses'])}"
+            )
+    sessions = {p: g["connections"] for p, g in linkage.items() if g.get("connections")}
+    if sessions:
+        lines += [
+            "",
+            "WebSocket 会话（同一连接上的请求对节点而言确定属于同一用户）：",
+            "",
+            "| Provider | 会话数 | 平均请求数 | 最大请求数 | 平均地址数 | 最大地址数 | 多地址会话 |",
+            "|----------|-------|----------|----------|----------|----------|----------|",
+        ]
+        for provider_id, c in sessions.items():
+            lines.append(
+                f"| {provider_id} | {c['sessions']} | {c['avg_requests']} | {c['max_requests']} | "
+                f"{c['avg_addresses']} | {c['max_addresses']} | {c['multi_address_sessions']} |"
+            )
+    return lines
+
+
+def _population_section(population: Any) -> list[str]:
+    """合成用户群体：群体构成与以真实归属评估的各 provider 关联风险"""
+    if not population:
+        return []
+    lines = [
+        "",
+        "### 合成用户群体",
+        "",
+        f"- 用户数: **{population['users']}**"
+        + (f"（另有 {population['failed_users']} 个用户执行失败）" if population.get("failed_users") else "")
+        + f"，场景执行次数: {_format_counts(population['actions'])}",
+        f"- 钱包: {_format_counts(population['by_wallet'])}",
+        f"- 活跃度模型: {_format_counts(population['by_activity'])}",
+        "",
+        "以地址的真实归属为标签：完整关联率为多地址用户中全部地址落入同一簇的比例；"
+        "簇内精确率为簇内地址对确属同一用户的比例，偏低说明关联规则把不同用户混为一簇。",
+        "",
+        "| Provider | 用户数 | 多地址用户 | 完整关联 | 地址对召回率 | 簇内精确率 | 单簇最多用户 |",
+        "|----------|-------|----------|---------|------------|----------|------------|",
+    ]
+    for provider_id, r in population["linkage_risk"].items():
+        lines.append(
+            f"| {provider_id} | {r['users']} | {r['multi_address_users']} | "
+            f"{r['linked_users']} ({r['linked_rate'] * 100:.1f}%) | {r['pair_recall'] * 100:.1f}% | "
+            f"{r['pair_precision'] * 100:.1f}% | {r['largest_cluster_users']} |"
+        )
+    return lines
+
+
+def _capture_db_section(capture_db: Any) -> list[str]:
+    """SQLite 抓包库：本报告覆盖的运行与查询条件"""
+    if not capture_db:
+        return []
+    filters = "，".join(f"{k}={v}" for k, v in capture_db["filters"].items()) or "无（全部记录）"
+    lines = [
+        "",
+        "### 抓包库",
+        "",
+        f"- 库文件: `{capture_db['path']}`",
+        f"- 查询条件: {filters}",
+        "",
+        "| 运行 | 创建时间 | 请求数 | 首条请求 | 末条请求 |",
+        "|-----|---------|-------|---------|---------|",
+    ]
+    for run in capture_db["runs"]:
+        times = [
+            datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") if t is not None else "-"
+            for t in (run["created"], run["first_seen"], run["last_seen"])
+        ]
+        lines.append(f"| {run['id']} | {times[0]} | {run['requests']} | {times[1]} | {times[2]} |")
+    return lines
+
+
+def _timing_section(timing: Any) -> list[str]:
+    """请求时序关联：各流程在不同窗口下的匹配率、可关联度与准确率"""
+    rows = [r for r in timing or [] if r["matches"]]
+    if not rows:
+        return []
+    lines = [
+        "",
+        "### 请求时序关联",
+        "",
+        "| 范围 | 流程 | 窗口 (s) | 匹配 / 起点 | 可关联度 | 准确率 | 跨 provider 链 |",
+        "|------|------|---------|-----------|---------|-------|--------------|",
+    ]
+    for r in rows:
+        scope = "跨 provider" if r["scope"] == "*" else r["scope"]
+        lines.append(
+            f"| {scope} | {r['flow']} | {r['window_s']} | {r['matches']} / {r['starts']} | "
+            f"{r['linkability']} | {r['precision']} | {r['cross_provider']} |"
+        )
+    return lines
+
+
+def _calldata_section(calldata: Any) -> list[str]:
+    """调用数据解码：各函数的调用次数与参数示例"""
+    if not calldata or not calldata.get("calls"):
+        return []
+    lines = [
+        "",
+        "### 调用数据解码",
+        "",
+        f"- eth_call / eth_estimateGas 调用: {calldata['calls']}，已解码 {calldata['decoded']}，"
+        f"参数解码失败 {calldata['decode_errors']}，calldata 中出现的地址 {calldata['addresses_in_calldata']} 个",
+        "",
+        "| 函数 | 调用次数 | 方法 | 参数示例 |",
+        "|------|--------|------|---------|",
+    ]
+    for signature, entry in calldata["by_function"].items():
+        lines.append(
+            f"| `{signature}` | {entry['calls']} | {_format_counts(entry['methods'])} | {entry['example'] or '-'} |"
+        )
+    unknown = calldata.get("unknown_selectors") or {}
+    if unknown:
+        lines.append(f"- 未知选择器: {_format_counts(unknown)}")
+    return lines
+
+
 def generate_markdown_report(data: dict[str, Any]) -> str:
     """生成 Markdown 格式报告"""
+    websocket = data.get("config", {}).get("transport") == "ws"
     lines = [
         "# RPC 隐私泄露分析报告",
         "",
@@ -20,6 +360,7 @@ def generate_markdown_report(data: dict[str, Any]) -> str:
         "- 代币转账（estimateGas）",
         "- Uniswap 小额兑换（eth_call）",
         "- 区块信息查询",
+        *(["- 新区块订阅（eth_subscribe，WebSocket）"] if websocket else []),
         "",
         "### 隐私泄露维度",
         "- IP 地址暴露",
@@ -27,6 +368,9 @@ def generate_markdown_report(data: dict[str, Any]) -> str:
         "- 交易行为溯源",
         "- 调用参数敏感信息泄露",
         "- 请求头唯一标识泄露",
+        "- 批量请求地址关联（启用 --batch 时）",
+        *(["- 持久连接会话关联（WebSocket）"] if websocket else []),
+        "- 请求时序关联",
         "",
         "---",
         "",
@@ -35,12 +379,58 @@ def generate_markdown_report(data: dict[str, Any]) -> str:
         f"- 总请求数: **{data['summary']['total_requests']}**",
         f"- 错误数: **{data['summary']['errors']}**",
         f"- 涉及的隐私维度: **{data['summary']['dimensions_affected']}**",
+    ]
+    if "wall_clock_s" in data["summary"]:
+        execution = data.get("config", {}).get("execution", {})
+        lines.extend([
+            f"- 执行模式: **{execution.get('mode', 'sequential')}**"
+            + (" / WebSocket 传输" if websocket else ""),
+            f"- 总耗时: **{data['summary']['wall_clock_s']} s**",
+            f"- 吞吐: **{data['summary']['requests_per_sec']} req/s**",
+        ])
+    checkpoint = data["summary"].get("checkpoint")
+    if checkpoint:
+        lines.append(
+            f"- 断点续跑: 本次执行 **{checkpoint['executed_cells']}** 个单元格，"
+            f"跳过检查点中已完成的 **{checkpoint['skipped_cells']}** 个（`{checkpoint['path']}`），"
+            f"重放其中的 **{data['summary'].get('resumed_requests', 0)}** 条请求（不计入吞吐）"
+        )
+    shards = data.get("config", {}).get("shards")
+    if shards:
+        lines.append(f"- 分片: 合并了 **{len(shards['merged'])}/{shards['count']}** 个分片的结果")
+    connections = data["summary"].get("connections") or {}
+    if connections:
+        lines.extend([
+            "",
+            "### 连接复用",
+            "",
+            "| Provider | 新建连接请求 | 复用连接请求 | 新建平均耗时 (ms) | 复用平均耗时 (ms) |",
+            "|----------|------------|------------|-----------------|-----------------|",
+        ])
+        for provider_id, c in connections.items():
+            lines.append(
+                f"| {provider_id} | {c['new']} | {c['reused']} | "
+                f"{c['avg_ms_new'] if c['avg_ms_new'] is not None else '-'} | "
+                f"{c['avg_ms_reused'] if c['avg_ms_reused'] is not None else '-'} |"
+            )
+    lines.extend(_capture_db_section(data.get("capture_db")))
+    lines.extend(_phases_section(data))
+    lines.extend(_throttling_section(data))
+    lines.extend(_cache_section(data))
+    lines.extend(_coalescing_section(data))
+    lines.extend(_routing_section(data.get("routing")))
+    lines.extend(_linkage_section(data.get("linkage")))
+    lines.extend(_population_section(data.get("population")))
+    lines.extend(_timing_section(data.get("timing")))
+    lines.extend(_calldata_section(data.get("calldata")))
+    lines.extend(_load_section(data.get("load")))
+    lines.extend([
         "",
         "---",
         "",
         "## 3. 隐私分析详情",
         "",
-    ]
+    ])
 
     for dim_id, info in data.get("privacy_analysis", {}).items():
         lines.extend([
@@ -48,12 +438,28 @@ def generate_markdown_report(data: dict[str, Any]) -> str:
             "",
             f"- **风险等级**: {info['risk_level']}",
             f"- **描述**: {info['description']}",
+        ])
+        if "occurrences" in info:
+            lines.extend([
+                f"- **触发次数**: {info['occurrences']}",
+                f"- **证据**: 共 {info['evidence_total']} 条，"
+                f"去重后{'' if info.get('evidence_distinct_exact', True) else '约'} {info['evidence_distinct']} 条"
+                f"（以下为样本 {len(info.get('evidence', []))} 条）",
+                f"- **按 Provider**: {_format_counts(info.get('by_provider', {}))}",
+                f"- **按钱包**: {_format_counts(info.get('by_wallet', {}))}",
+                f"- **按方法**: {_format_counts(info.get('by_method', {}))}",
+            ])
+        lines.extend([
             "",
             "**证据**:",
             "",
         ])
-        for ev in info.get("evidence", []):
-            lines.append(f"- {ev}")
+        if "evidence_counts" in info:
+            for ev, n in info["evidence_counts"]:
+                lines.append(f"- {ev} (×{n})")
+        else:
+            for ev in info.get("evidence", []):
+                lines.append(f"- {ev}")
         lines.extend([
             "",
             f"**建议**: {info.get('recommendation', '-')}",
@@ -68,8 +474,9 @@ def generate_markdown_report(data: dict[str, Any]) -> str:
     ])
     for r in data.get("records", [])[:20]:
         lines.append(f"- `{r['method']}` | {r['wallet']} → {r['provider']} | 暴露地址: {r.get('exposed_addresses', [])}")
-    if len(data.get("records", [])) > 20:
-        lines.append(f"- ... 共 {len(data['records'])} 条")
+    total_records = data["summary"].get("total_requests", len(data.get("records", [])))
+    if total_records > 20:
+        lines.append(f"- ... 共 {total_records} 条")
 
     if data.get("errors"):
         lines.extend([
@@ -0,0 +1,227 @@
+"""
+多 RPC 路由 - 将同一钱包的请求分散到多个 provider
+
+RouterClient 与 RPCClient 接口一致（call / call_batch / capture），内部为每个 provider 持有一个 RPCClient，
+每条记录仍归属实际接收请求的 provider。路由策略：
+
+- address: 按请求中首个地址哈希固定到一个 provider，同一地址始终只发往同一节点；不含地址的请求随机分配
+- random:  每个请求随机选择 provider
+- latency: 按各 provider 端到端耗时的 EWMA 加权随机选择（权重为耗时的倒数），偏向更快的节点
+
+hedge_after_ms 指定时启用对冲请求：首选 provider 超过该时长未返回（或已失败）时，向另一个 provider
+重发同一请求，取先成功的结果。被对冲的请求仍会到达两个节点，并各自记录。写操作不对冲。
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from .analyzers.latency import LatencyHistogram
+from .rate_limit import NON_IDEMPOTENT_METHODS, get_limiter
+from .rpc_client import RecordBuffer, RPCClient, _extract_addresses_from_params
+
+ROUTING_POLICIES = ("address", "random", "latency")
+# latency 策略：EWMA 平滑系数，及失败请求的耗时惩罚倍数
+EWMA_ALPHA = 0.2
+ERROR_PENALTY = 2.0
+
+
+def _address_slot(address: str, n: int) -> int:
+    digest = hashlib.sha256(address.lower().encode()).digest()
+    return int.from_bytes(digest[:8], "big") % n
+
+
+class RouterClient:
+    """按策略把请求分发到多个 provider 的 RPC 客户端
+
+    sink、rate_limit、hooks、transport 传给各 provider 的 RPCClient；seed 固定时随机选择可复现。
+    """
+
+    def __init__(
+        self,
+        wallet_id: str,
+        provider_ids: list[str],
+        policy: str = "address",
+        hedge_after_ms: Optional[float] = None,
+        seed: Any = None,
+        sink: Any = None,
+        rate_limit: bool = False,
+        hooks: Optional[list] = None,
+        transport: str = "http",
+    ):
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy: {policy}")
+        if not provider_ids:
+            raise ValueError("RouterClient requires at least one provider")
+        self.wallet_id = wallet_id
+        self.policy = policy
+        self.provider_id = f"router:{policy}"
+        self.provider_ids = list(provider_ids)
+        self.hedge_after_ms = hedge_after_ms if len(self.provider_ids) > 1 else None
+        self.clients = {
+            p: RPCClient(
+                provider_id=p,
+                wallet_id=wallet_id,
+                max_records=0,
+                sink=sink,
+                limiter=get_limiter(p) if rate_limit else None,
+                hooks=hooks,
+                transport=transport,
+            )
+            for p in self.provider_ids
+        }
+        self._rng = random.Random(seed)
+        self._ewma: dict[str, Optional[float]] = {p: None for p in self.provider_ids}
+        # 端到端耗时（含对冲），即调用方感受到的延迟
+        self.latency = LatencyHistogram()
+        self.routed: Counter = Counter()
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2 * len(self.provider_ids)) if self.hedge_after_ms else None
+        self._in_flight: set[Future] = set()
+
+    # ---- 路由 ----
+
+    def _choose(self, params_list: list[list], exclude: tuple[str, ...] = ()) -> str:
+        candidates = [p for p in self.provider_ids if p not in exclude]
+        if self.policy == "address":
+            for params in params_list:
+                addresses = _extract_addresses_from_params(params)
+                if addresses:
+                    # 首选节点被排除（对冲）时顺延到环上的下一个，同一地址最多到达两个固定节点
+                    start = _address_slot(addresses[0], len(self.provider_ids))
+                    ring = self.provider_ids[start:] + self.provider_ids[:start]
+                    return next(p for p in ring if p not in exclude)
+        with self._lock:
+            if self.policy == "latency":
+                known = [v for v in self._ewma.values() if v is not None]
+                # 尚无样本的 provider 按已知最快者估计，保证每个节点都会被探测到
+                default = min(known) if known else 1.0
+                weights = [1.0 / max(self._ewma[p] or default, 1e-3) for p in candidates]
+                return self._rng.choices(candidates, weights)[0]
+            return self._rng.choice(candidates)
+
+    def _observe(self, provider_id: str, elapsed_ms: float, ok: bool):
+        sample = elapsed_ms if ok else elapsed_ms * ERROR_PENALTY
+        with self._lock:
+            prev = self._ewma[provider_id]
+            self._ewma[provider_id] = sample if prev is None else prev + EWMA_ALPHA * (sample - prev)
+
+    def _run_on(self, provider_id: str, fn: Callable[[RPCClient], Any]) -> Any:
+        with self._lock:
+            self.routed[provider_id] += 1
+        start = time.perf_counter()
+        try:
+            result = fn(self.clients[provider_id])
+        except Exception:
+            self._observe(provider_id, (time.perf_counter() - start) * 1000, ok=False)
+            raise
+        self._observe(provider_id, (time.perf_counter() - start) * 1000, ok=True)
+        return result
+
+    def _submit(self, provider_id: str, fn: Callable[[RPCClient], Any]) -> Future:
+        future = self._pool.submit(self._run_on, provider_id, fn)
+        with self._lock:
+            self._in_flight.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._in_flight.discard(future)
+
+    def _hedged(self, primary: str, params_list: list[list], fn: Callable[[RPCClient], Any]) -> Any:
+        first = self._submit(primary, fn)
+        done, _ = wait([first], timeout=self.hedge_after_ms / 1000)
+        if done and first.exception() is None:
+            return first.result()
+        secondary = self._choose(params_list, exclude=(primary,))
+        second = self._submit(secondary, fn)
+        with self._lock:
+            self.hedged += 1
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _dispatch(self, methods: list[str], params_list: list[list], fn: Callable[[RPCClient], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            primary = self._choose(params_list)
+            if self._pool is None or any(m in NON_IDEMPOTENT_METHODS for m in methods):
+                return self._run_on(primary, fn)
+            return self._hedged(primary, params_list, fn)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.latency.record(elapsed)
+
+    # ---- RPCClient 接口 ----
+
+    def call(self, method: str, params: list, record: bool = True) -> Any:
+        return self._dispatch([method], [params], lambda c: c.call(method, params, record=record))
+
+    def call_batch(self, calls: list[tuple[str, list]], record: bool = True) -> list[Any]:
+        """整个批量数组发往同一 provider（按首个含地址的子调用路由）"""
+        if not calls:
+            return []
+        return self._dispatch(
+            [m for m, _ in calls], [p for _, p in calls], lambda c: c.call_batch(calls, record=record)
+        )
+
+    def subscribe(self, kind: str, params: Optional[list] = None) -> Any:
+        """订阅路由到一个 provider，推送与退订都在该 provider 的连接上；不对冲，否则两个节点上各留一个订阅"""
+        return self._run_on(self._choose([params or []]), lambda c: c.subscribe(kind, params))
+
+    @contextmanager
+    def capture(
+        self,
+        max_records: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        compact: bool = False,
+    ) -> Iterator[RecordBuffer]:
+        """收集 with 块内全部 provider 的记录；退出前等待落后的对冲请求完成，使其记录同样计入"""
+        scope = RecordBuffer(max_records, spill_dir, compact=compact)
+        with ExitStack() as stack:
+            for client in self.clients.values():
+                stack.enter_context(client.record_into(scope))
+            try:
+                yield scope
+            finally:
+                self.drain()
+
+    def drain(self):
+        """等待仍在途的对冲请求"""
+        with self._lock:
+            in_flight = list(self._in_flight)
+        wait(in_flight)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        for client in self.clients.values():
+            client.close()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "calls": self.latency.count,
+                "routed": dict(self.routed),
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "ewma_ms": {p: round(v, 3) if v is not None else None for p, v in self._ewma.items()},
+            }
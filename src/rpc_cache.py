@@ -0,0 +1,194 @@
+"""
+客户端响应缓存 - 减少重复读请求，也减少暴露给 RPC 节点的请求
+
+- 不可变结果（按区块号/哈希查询的区块、交易、固定区块高度的读取、chainId）永久缓存；
+  其中的空结果（区块尚未产生、交易未上链）稍后可能变化，不缓存
+- latest/pending 等随链头变化的读取按 TTL 缓存
+- 按条目数与字节数做 LRU 淘汰；错误响应与写操作不缓存
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# 可在 config.yaml 的 cache 段覆盖
+DEFAULT_CACHE_OPTIONS = {
+    "max_entries": 10_000,
+    "max_bytes": 16 * 1024 * 1024,
+    "ttl_s": 2.0,  # latest 类读取的有效期，建议不超过出块间隔
+    "scope": "provider",  # provider: 同一 provider 的所有钱包共享；wallet: 每个 钱包 x provider 独立
+}
+
+CACHE_SCOPES = ("provider", "wallet")
+
+IMMUTABLE = "immutable"
+TTL = "ttl"
+
+# 结果与区块无关、永不变化的方法
+_CONSTANT_METHODS = {"eth_chainId", "net_version"}
+# 按哈希查询，结果非空即不可变
+_BY_HASH_METHODS = {"eth_getBlockByHash", "eth_getTransactionByHash", "eth_getTransactionReceipt"}
+# 仅随链头变化的方法
+_HEAD_METHODS = {"eth_blockNumber", "eth_gasPrice"}
+# 方法 -> 区块参数位置；区块参数为具体高度时不可变，为标签时按 TTL 缓存
+_BLOCK_PARAM_INDEX = {
+    "eth_getBlockByNumber": 0,
+    "eth_getBalance": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getCode": 1,
+    "eth_getStorageAt": 2,
+    "eth_call": 1,
+}
+
+
+def _is_block_number(tag: Any) -> bool:
+    return isinstance(tag, str) and tag.startswith("0x")
+
+
+def cache_policy(method: str, params: list) -> Optional[str]:
+    """返回 IMMUTABLE / TTL；不可缓存（写操作、estimateGas 等）返回 None"""
+    if method in _CONSTANT_METHODS or method in _BY_HASH_METHODS:
+        return IMMUTABLE
+    if method in _HEAD_METHODS:
+        return TTL
+    idx = _BLOCK_PARAM_INDEX.get(method)
+    if idx is None:
+        return None
+    tag = params[idx] if len(params) > idx else "latest"
+    return IMMUTABLE if _is_block_number(tag) else TTL
+
+
+def cache_key(provider_id: str, method: str, params: list) -> str:
+    return f"{provider_id}|{method}|{json.dumps(params, sort_keys=True, separators=(',', ':'))}"
+
+
+class ResponseCache:
+    """线程安全的 LRU 响应缓存"""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_OPTIONS["max_entries"],
+        max_bytes: int = DEFAULT_CACHE_OPTIONS["max_bytes"],
+        ttl_s: float = DEFAULT_CACHE_OPTIONS["ttl_s"],
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, tuple[Any, Optional[float], int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "round_trips_saved": 0,
+        }
+
+    def get(self, provider_id: str, method: str, params: list) -> tuple[bool, Any]:
+        """返回 (是否命中, 结果)；不可缓存的方法不计入统计"""
+        if cache_policy(method, params) is None:
+            return False, None
+        key = cache_key(provider_id, method, params)
+        with self._lock:
+            self.stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._bytes -= size
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return False, None
+
+    def put(self, provider_id: str, method: str, params: list, result: Any):
+        policy = cache_policy(method, params)
+        if policy is None:
+            return
+        # 不可变查询的空结果（未来区块、未上链的交易等）稍后可能变化，不缓存
+        if result is None and policy == IMMUTABLE:
+            return
+        key = cache_key(provider_id, method, params)
+        size = len(key) + len(json.dumps(result, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        expires_at = None if policy == IMMUTABLE else time.monotonic() + self.ttl_s
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (result, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def note_round_trip_saved(self):
+        with self._lock:
+            self.stats["round_trips_saved"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        return stats
+
+
+def merge_cache_stats(caches: list[ResponseCache]) -> dict[str, Any]:
+    """合并多个缓存实例的统计"""
+    total: dict[str, Any] = {}
+    for cache in caches:
+        for k, v in cache.snapshot().items():
+            if k != "hit_rate":
+                total[k] = total.get(k, 0) + v
+    lookups = total.get("lookups", 0)
+    total["hit_rate"] = round(total.get("hits", 0) / lookups, 4) if lookups else 0.0
+    return total
+
+
+def get_cache_options() -> dict[str, Any]:
+    """默认缓存参数，叠加 config.yaml 中的 cache 段"""
+    from .config_loader import load_config
+    return {**DEFAULT_CACHE_OPTIONS, **(load_config().get("cache") or {})}
+
+
+class CachePool:
+    """按作用域为各 client 分配缓存实例
+
+    scope=provider：同一进程内所有钱包共享一个缓存（键已包含 provider）；
+    scope=wallet：每个 钱包 x provider 组合独立缓存，不在钱包间共享结果。
+    """
+
+    def __init__(self, scope: str = "provider", options: Optional[dict[str, Any]] = None):
+        if scope not in CACHE_SCOPES:
+            raise ValueError(f"Unknown cache scope: {scope}")
+        options = {**DEFAULT_CACHE_OPTIONS, **(options or {})}
+        self.scope = scope
+        self._options = {k: options[k] for k in ("max_entries", "max_bytes", "ttl_s")}
+        self._caches: dict[str, ResponseCache] = {}
+        self._lock = threading.Lock()
+
+    def for_client(self, wallet_id: str, provider_id: str) -> ResponseCache:
+        key = "*" if self.scope == "provider" else f"{wallet_id}@{provider_id}"
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = ResponseCache(**self._options)
+            return cache
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            caches = list(self._caches.values())
+        return {"scope": self.scope, **self._options, **merge_cache_stats(caches)}
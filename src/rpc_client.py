@@ -2,17 +2,30 @@
 RPC 客户端 - 模拟不同钱包向不同 RPC 节点发起请求
 支持记录请求/响应，供隐私分析使用
 """
+import itertools
 import json
+import os
+import pickle
+import tempfile
+import threading
 import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
 import requests
 
-from .config_loader import get_rpc_url, get_wallet_headers, load_config
+from .config_loader import get_rpc_url, get_wallet_headers, get_ws_url, load_config
+from .coalescing import SingleFlight
+from .hooks import RequestContext, RPCHook
+from .rate_limit import ProviderLimiter, classify_error, is_throttle_error
+from .rpc_cache import ResponseCache
+from .transport import get_transport, get_transport_options
 
 
-@dataclass
+@dataclass(slots=True)
 class RPCRequestRecord:
     """单次 RPC 请求记录，用于隐私分析"""
     method: str
@@ -21,18 +34,36 @@ class RPCRequestRecord:
     provider_id: str
     headers_sent: dict
     timestamp: float
+    # 发送该请求的 client（一个用户设备上的一次钱包会话）；同一钱包类型的不同用户请求头相同，以此区分
+    client_id: str
     # 隐私相关：请求中暴露的数据
     exposed_addresses: list[str] = field(default_factory=list)
     exposed_params_summary: str = ""
+    # 批量请求：同一 JSON-RPC 批量数组内的子调用共享 batch_id
+    batch_id: Optional[str] = None
+    batch_size: int = 1
+    # WebSocket 传输：发送该请求的连接会话（同一会话内的请求对节点而言必然来自同一钱包）
+    session_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class RPCResponseRecord:
     """RPC 响应记录"""
     request: RPCRequestRecord
     result: Any
     error: Optional[dict]
     elapsed_ms: float
+    # True: 复用已有 keep-alive 连接；False: 新建连接（含 TCP/TLS 握手）；None: 未知
+    connection_reused: Optional[bool] = None
+    # upstream: 实际发送至 RPC 节点；cache: 由客户端缓存应答，未产生网络请求；
+    # coalesced: 与其他钱包的相同在途请求合并，由 coalesced_with 钱包的请求代为发送
+    source: str = "upstream"
+    coalesced_with: Optional[str] = None
+    # 启用限流重试时：第几次重试（0 为首次发送），及 HTTP 状态码（网络错误时为 None）
+    retry: int = 0
+    status_code: Optional[int] = None
+    # 实际发送的请求：各阶段耗时（毫秒，键见 hooks.REQUEST_PHASES）；缓存 / 合并应答为 None
+    phases: Optional[dict[str, float]] = None
 
 
 def _extract_addresses_from_params(params: list) -> list[str]:
@@ -45,7 +76,8 @@ def _extract_addresses_from_params(params: list) -> list[str]:
                     addresses.append(p[k])
         elif isinstance(p, str) and p.startswith("0x") and len(p) == 42:
             addresses.append(p)
-    return list(set(addresses))
+    # 保持出现顺序去重，使证据文本在不同进程间稳定（set 的顺序受哈希随机化影响）
+    return list(dict.fromkeys(addresses))
 
 
 def _summarize_call_data(data: str) -> str:
@@ -58,82 +90,534 @@ def _summarize_call_data(data: str) -> str:
     return f"selector={data[:10]}..., len={len(data)}"
 
 
+RecordPair = tuple[RPCRequestRecord, RPCResponseRecord]
+
+# http: 共享 keep-alive 连接池；ws: 每个 client 独占一条 WebSocket 连接
+TRANSPORTS = ("http", "ws")
+
+
+@dataclass(slots=True)
+class _Attempt:
+    """单次 HTTP 发送的结果"""
+    data: Any = None
+    reused: Optional[bool] = None
+    exc: Optional[Exception] = None
+    status_code: Optional[int] = None
+    retry: int = 0
+    timestamp: float = 0.0
+    elapsed_ms: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    session_id: Optional[str] = None
+
+    def error(self) -> Optional[dict]:
+        if self.exc is not None:
+            return {"message": str(self.exc)}
+        return self.data.get("error") if isinstance(self.data, dict) else None
+
+
+class RecordBuffer:
+    """请求记录缓冲区（线程安全）
+
+    - max_records=None: 不限容量
+    - max_records=N: 环形缓冲，仅保留最近 N 条，更早的记录计入 dropped
+    - max_records=N 且指定 spill_dir: 内存中最多 N 条，满后整批写入磁盘临时文件，迭代时按顺序读回
+    - compact=True（仅不限容量时生效）: 存入 CompactRecordStore，迭代返回只读视图
+    """
+
+    def __init__(self, max_records: Optional[int] = None, spill_dir: Optional[str] = None, compact: bool = False):
+        self.max_records = max_records
+        self.spill_dir = spill_dir if max_records else None
+        ring = max_records if max_records is not None and not self.spill_dir else None
+        self._memory: deque = deque(maxlen=ring)
+        self._compact = None
+        if compact and max_records is None:
+            from .record_store import CompactRecordStore
+            self._compact = CompactRecordStore()
+        self._spill_path: Optional[str] = None
+        self._spilled = 0
+        self.total = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, pair: RecordPair):
+        with self._lock:
+            self.total += 1
+            if self._compact is not None:
+                self._compact.append(*pair)
+                return
+            if self._memory.maxlen is not None and len(self._memory) == self._memory.maxlen:
+                self.dropped += 1
+            self._memory.append(pair)
+            if self.spill_dir and len(self._memory) >= self.max_records:
+                self._spill()
+
+    def _spill(self):
+        if self._spill_path is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self._spill_path = tempfile.mkstemp(prefix="rpc_records_", suffix=".pkl", dir=self.spill_dir)
+            os.close(fd)
+        with open(self._spill_path, "ab") as f:
+            pickle.dump(list(self._memory), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spilled += len(self._memory)
+        self._memory.clear()
+
+    def __iter__(self) -> Iterator[RecordPair]:
+        with self._lock:
+            spill_path = self._spill_path
+            memory = list(self._compact if self._compact is not None else self._memory)
+        if spill_path:
+            with open(spill_path, "rb") as f:
+                while True:
+                    try:
+                        chunk = pickle.load(f)
+                    except EOFError:
+                        break
+                    yield from chunk
+        yield from memory
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._memory) + (len(self._compact) if self._compact is not None else 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._compact is not None:
+                self._compact.clear()
+            self._spilled = 0
+            if self._spill_path:
+                os.remove(self._spill_path)
+                self._spill_path = None
+
+    def close(self):
+        """释放磁盘溢出文件"""
+        self.clear()
+
+
 class RPCClient:
-    """RPC 客户端，支持钱包模拟与请求记录"""
+    """RPC 客户端，支持钱包模拟与请求记录
+
+    max_records / spill_dir 限制 client 级记录缓冲（见 RecordBuffer）：默认不限容量，get_records() 返回全部记录；
+    需要限制内存的调用方显式传入上限，max_records=0 表示不在 client 上保留记录，仅通过 capture() 作用域获取。
+    sink 为任意带 write(req, resp) 方法的对象（如 NDJSONSink），每条记录产生时即写入。
+    cache 为可选的 ResponseCache，命中时不发送请求，记录标记 source="cache"。
+    coalescer 为可选的 SingleFlight（多个 client 共享），相同的在途请求只发送一次，记录标记 source="coalesced"。
+    limiter 为可选的 ProviderLimiter（同一 provider 共享），发送前按令牌桶节流，可重试错误按退避重试，
+    每次重试单独记录。
+    hooks 为 RPCHook 列表，每次 HTTP 发送前后及每条记录产生时回调（见 hooks）。
+    transport="ws" 时改用该 client 独占的 WebSocket 连接（见 ws_transport），请求记录带 session_id，
+    并可通过 subscribe() 订阅推送；用完应调用 close()。
+    client_id 标识该 client 所代表的用户会话，写入每条请求记录（关联分析据此划分会话）；
+    未指定时为 钱包@provider/随机后缀，在进程内唯一。
+    """
 
-    def __init__(self, provider_id: str, wallet_id: str, timeout: int = 30):
+    def __init__(
+        self,
+        provider_id: str,
+        wallet_id: str,
+        timeout: Optional[float] = None,
+        max_records: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        sink: Any = None,
+        cache: Optional[ResponseCache] = None,
+        coalescer: Optional[SingleFlight] = None,
+        limiter: Optional[ProviderLimiter] = None,
+        hooks: Optional[list[RPCHook]] = None,
+        transport: str = "http",
+        client_id: Optional[str] = None,
+    ):
         self.provider_id = provider_id
         self.wallet_id = wallet_id
-        self.timeout = timeout
-        self._url = get_rpc_url(provider_id)
+        self.client_id = client_id or f"{wallet_id}@{provider_id}/{uuid.uuid4().hex[:12]}"
         self._headers = get_wallet_headers(wallet_id)
-        self._records: list[tuple[RPCRequestRecord, RPCResponseRecord]] = []
+        if transport == "ws":
+            from .ws_transport import WSTransport
+
+            options = get_transport_options()
+            self._url = get_ws_url(provider_id)
+            # WebSocket 连接属于单个钱包会话，不在 client 间共享
+            self._transport = WSTransport(
+                self._url,
+                self._headers,
+                label=f"{wallet_id}@{provider_id}",
+                connect_timeout=options["connect_timeout"],
+                read_timeout=options["read_timeout"],
+            )
+        elif transport == "http":
+            self._url = get_rpc_url(provider_id)
+            # 同一 provider URL 的所有 client 共享连接池
+            self._transport = get_transport(self._url)
+        else:
+            raise ValueError(f"Unknown transport: {transport}")
+        self.transport = transport
+        self.timeout = timeout or self._transport.read_timeout
+        self._records = RecordBuffer(max_records, spill_dir)
+        self._sink = sink
+        self._cache = cache
+        self._coalescer = coalescer
+        self._limiter = limiter
+        self._hooks = list(hooks or ())
+        # 当前打开的记录作用域，每条记录同时写入全部作用域
+        self._scopes: list[RecordBuffer] = []
+        self._scopes_lock = threading.Lock()
+        # JSON-RPC id 与批量请求编号，client 内单调递增
+        self._next_id = itertools.count(1)
+        self._next_batch = itertools.count(1)
+
+    def _build_request_record(
+        self,
+        method: str,
+        params: list,
+        batch_id: Optional[str] = None,
+        batch_size: int = 1,
+        timestamp: Optional[float] = None,
+        session_id: Optional[str] = None,
+    ) -> RPCRequestRecord:
+        exposed = _extract_addresses_from_params(params)
+        call_summary = ""
+        for p in params:
+            if isinstance(p, dict) and "data" in p:
+                call_summary = _summarize_call_data(p.get("data", ""))
+                break
+
+        return RPCRequestRecord(
+            method=method,
+            params=params,
+            wallet_id=self.wallet_id,
+            provider_id=self.provider_id,
+            headers_sent=dict(self._headers),
+            timestamp=timestamp if timestamp is not None else time.time(),
+            exposed_addresses=exposed,
+            exposed_params_summary=call_summary,
+            batch_id=batch_id,
+            batch_size=batch_size,
+            session_id=session_id,
+            client_id=self.client_id,
+        )
+
+    def _record_cache_hit(self, method: str, params: list, result: Any, started: float):
+        req_record = self._build_request_record(method, params)
+        self._add_record(
+            req_record,
+            RPCResponseRecord(
+                request=req_record,
+                result=result,
+                error=None,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+                source="cache",
+            ),
+        )
 
     def call(self, method: str, params: list, record: bool = True) -> Any:
         """发起 JSON-RPC 调用"""
-        payload = {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+        if self._cache is not None:
+            started = time.perf_counter()
+            hit, cached = self._cache.get(self.provider_id, method, params)
+            if hit:
+                self._cache.note_round_trip_saved()
+                if record:
+                    self._record_cache_hit(method, params, cached, started)
+                return cached
+
+        payload = {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._next_id)}
+        retryable = self._limiter is not None and self._limiter.retry.retryable(method)
+
+        def on_retry(attempt: _Attempt):
+            self._add_record(*self._attempt_records(method, params, attempt))
+
+        def send() -> _Attempt:
+            return self._post(payload, retryable, on_retry if record else None)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        leader_wallet = None
+        if self._coalescer is not None and self._coalescer.applies(method):
+            attempt, leader_wallet = self._coalescer.do(self.provider_id, method, params, self.wallet_id, send)
+        else:
+            attempt = send()
 
-        req_record = None
         if record:
-            exposed = _extract_addresses_from_params(params)
-            call_summary = ""
-            for p in params:
-                if isinstance(p, dict) and "data" in p:
-                    call_summary = _summarize_call_data(p.get("data", ""))
-                    break
-
-            req_record = RPCRequestRecord(
-                method=method,
-                params=params,
-                wallet_id=self.wallet_id,
-                provider_id=self.provider_id,
-                headers_sent=dict(self._headers),
-                timestamp=time.time(),
-                exposed_addresses=exposed,
-                exposed_params_summary=call_summary,
-            )
+            if leader_wallet is None:
+                req_record, resp_record = self._attempt_records(method, params, attempt)
+            else:
+                # follower 未自行发送请求：时间与耗时为自身的等待，连接复用信息属于 leader
+                req_record = self._build_request_record(method, params, timestamp=started_at)
+                resp_record = RPCResponseRecord(
+                    request=req_record,
+                    result=attempt.data.get("result") if attempt.exc is None else None,
+                    error=attempt.error(),
+                    elapsed_ms=(time.perf_counter() - start) * 1000,
+                    source="coalesced",
+                    coalesced_with=leader_wallet,
+                    status_code=attempt.status_code,
+                )
+            self._add_record(req_record, resp_record)
 
+        if attempt.exc is not None:
+            raise attempt.exc
+        result = attempt.data.get("result")
+        error = attempt.data.get("error")
+        if error:
+            raise RuntimeError(f"RPC error: {error}")
+        if self._cache is not None:
+            self._cache.put(self.provider_id, method, params, result)
+        return result
+
+    def _attempt_records(self, method: str, params: list, attempt: _Attempt) -> RecordPair:
         start = time.perf_counter()
-        try:
-            resp = requests.post(
-                self._url,
-                headers=self._headers,
-                json=payload,
-                timeout=self.timeout,
+        req_record = self._build_request_record(
+            method, params, timestamp=attempt.timestamp, session_id=attempt.session_id
+        )
+        return req_record, self._attempt_record(req_record, attempt, (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _attempt_record(req_record: RPCRequestRecord, attempt: _Attempt, record_ms: float = 0.0) -> RPCResponseRecord:
+        return RPCResponseRecord(
+            request=req_record,
+            result=attempt.data.get("result") if isinstance(attempt.data, dict) else None,
+            error=attempt.error(),
+            elapsed_ms=attempt.elapsed_ms,
+            connection_reused=attempt.reused,
+            retry=attempt.retry,
+            status_code=attempt.status_code,
+            phases={**attempt.phases, "record": record_ms},
+        )
+
+    def _post(
+        self,
+        payload: Any,
+        retryable: bool = False,
+        on_retry: Optional[Callable[[_Attempt], None]] = None,
+    ) -> _Attempt:
+        """发送请求，网络/HTTP 异常记入返回值而不抛出
+
+        有 limiter 时发送前取令牌；429（或 JSON-RPC 限流错误码）使令牌桶降速并遵守 Retry-After；
+        retryable 时对可重试错误退避重试，每次放弃的尝试交给 on_retry 记录。
+        """
+        limiter = self._limiter
+        retry = 0
+        while True:
+            queued = time.perf_counter()
+            if limiter is not None:
+                limiter.bucket.acquire()
+            attempt = _Attempt(retry=retry, timestamp=time.time())
+            attempt.phases["queue"] = (time.perf_counter() - queued) * 1000 if limiter is not None else 0.0
+            ctx = self._before_request(payload, attempt) if self._hooks else None
+            start = time.perf_counter()
+            retry_after, can_retry = None, False
+            try:
+                attempt.data, attempt.reused = self._transport.post_json(
+                    self._headers, payload, timeout=self.timeout, phases=attempt.phases
+                )
+                attempt.status_code = 200
+            except requests.RequestException as e:
+                attempt.exc = e
+                attempt.status_code, retry_after, can_retry = classify_error(e)
+            attempt.session_id = self._transport.session_id
+            attempt.elapsed_ms = (time.perf_counter() - start) * 1000
+            if ctx is not None:
+                self._after_request(ctx, attempt)
+            if limiter is None:
+                return attempt
+
+            throttled = attempt.status_code == 429 or (
+                attempt.exc is None and isinstance(attempt.data, dict) and is_throttle_error(attempt.data.get("error"))
             )
-            resp.raise_for_status()
-            data = resp.json()
-            elapsed = (time.perf_counter() - start) * 1000
+            if throttled:
+                limiter.bucket.on_throttle(retry_after)
+                can_retry = True
+            elif attempt.exc is None:
+                limiter.bucket.on_success()
+            if not (can_retry and retryable and retry < limiter.retry.max_retries):
+                return attempt
+            if on_retry is not None:
+                on_retry(attempt)
+            time.sleep(limiter.retry.delay(retry, retry_after))
+            retry += 1
 
-            result = data.get("result")
-            error = data.get("error")
+    def _before_request(self, payload: Any, attempt: _Attempt) -> RequestContext:
+        calls = payload if isinstance(payload, list) else [payload]
+        ctx = RequestContext(
+            provider_id=self.provider_id,
+            wallet_id=self.wallet_id,
+            methods=[c["method"] for c in calls],
+            batch=isinstance(payload, list),
+            retry=attempt.retry,
+            timestamp=attempt.timestamp,
+            phases=attempt.phases,
+        )
+        for hook in self._hooks:
+            hook.before_request(ctx)
+        return ctx
 
-            if req_record:
-                resp_record = RPCResponseRecord(
-                    request=req_record,
-                    result=result,
-                    error=error,
-                    elapsed_ms=elapsed,
+    def _after_request(self, ctx: RequestContext, attempt: _Attempt):
+        ctx.elapsed_ms = attempt.elapsed_ms
+        ctx.status_code = attempt.status_code
+        ctx.connection_reused = attempt.reused
+        ctx.error = attempt.error()
+        for hook in self._hooks:
+            hook.after_request(ctx)
+
+    def call_batch(self, calls: list[tuple[str, list]], record: bool = True) -> list[Any]:
+        """以 JSON-RPC 批量数组发起多个调用，按 id 匹配乱序返回的响应
+
+        每个子调用仍生成一对请求/响应记录，并标记相同的 batch_id。
+        启用缓存时命中的子调用不进入批量数组；全部命中则不发送请求。
+        任一子调用出错时抛出 RuntimeError（记录已全部写入）。
+        """
+        if not calls:
+            return []
+        results: list[Any] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        if self._cache is not None:
+            started = time.perf_counter()
+            pending = []
+            for i, (method, params) in enumerate(calls):
+                hit, cached = self._cache.get(self.provider_id, method, params)
+                if hit:
+                    results[i] = cached
+                    if record:
+                        self._record_cache_hit(method, params, cached, started)
+                else:
+                    pending.append(i)
+            if not pending:
+                self._cache.note_round_trip_saved()
+                return results
+
+        ids = [next(self._next_id) for _ in pending]
+        payload = [
+            {"jsonrpc": "2.0", "method": calls[i][0], "params": calls[i][1], "id": rpc_id}
+            for rpc_id, i in zip(ids, pending)
+        ]
+
+        def batch_records(attempt: _Attempt) -> tuple[list[RPCRequestRecord], float]:
+            # 每次发送（含重试）是一个独立的批量请求；返回记录及每条记录分摊的构建耗时
+            start = time.perf_counter()
+            batch_id = f"{self.client_id}#{next(self._next_batch)}"
+            records = [
+                self._build_request_record(
+                    calls[i][0],
+                    calls[i][1],
+                    batch_id=batch_id,
+                    batch_size=len(pending),
+                    timestamp=attempt.timestamp,
+                    session_id=attempt.session_id,
                 )
-                self._records.append((req_record, resp_record))
+                for i in pending
+            ]
+            return records, (time.perf_counter() - start) * 1000 / len(records)
 
-            if error:
-                raise RuntimeError(f"RPC error: {error}")
-            return result
+        def on_retry(attempt: _Attempt):
+            req_records, record_ms = batch_records(attempt)
+            for req_record in req_records:
+                self._add_record(req_record, self._attempt_record(req_record, attempt, record_ms))
 
-        except requests.RequestException as e:
-            if req_record:
-                resp_record = RPCResponseRecord(
-                    request=req_record,
-                    result=None,
-                    error={"message": str(e)},
-                    elapsed_ms=(time.perf_counter() - start) * 1000,
+        retryable = self._limiter is not None and all(self._limiter.retry.retryable(calls[i][0]) for i in pending)
+        attempt = self._post(payload, retryable, on_retry if record else None)
+        req_records, record_ms = batch_records(attempt) if record else ([], 0.0)
+        elapsed = attempt.elapsed_ms
+
+        if attempt.exc is not None:
+            for req_record in req_records:
+                self._add_record(req_record, self._attempt_record(req_record, attempt, record_ms))
+            raise attempt.exc
+        data, reused = attempt.data, attempt.reused
+
+        # 节点对整个批量报错时返回单个对象而非数组
+        if isinstance(data, list):
+            by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        else:
+            batch_error = (data or {}).get("error") or {"message": "invalid batch response"}
+            by_id = {rpc_id: {"error": batch_error} for rpc_id in ids}
+
+        errors: list[dict] = []
+        phases = {**attempt.phases, "record": record_ms}
+        for n, (rpc_id, i) in enumerate(zip(ids, pending)):
+            item = by_id.get(rpc_id) or {"error": {"message": f"missing response for id {rpc_id}"}}
+            result = item.get("result")
+            error = item.get("error")
+            results[i] = result
+            if error:
+                errors.append(error)
+            elif self._cache is not None:
+                self._cache.put(self.provider_id, calls[i][0], calls[i][1], result)
+            if req_records:
+                self._add_record(
+                    req_records[n],
+                    RPCResponseRecord(
+                        request=req_records[n],
+                        result=result,
+                        error=error,
+                        elapsed_ms=elapsed,
+                        connection_reused=reused,
+                        retry=attempt.retry,
+                        status_code=attempt.status_code,
+                        phases=phases,
+                    ),
                 )
-                self._records.append((req_record, resp_record))
-            raise
+
+        if errors:
+            raise RuntimeError(f"RPC batch error: {errors[0]}")
+        return results
+
+    def _add_record(self, req_record: RPCRequestRecord, resp_record: RPCResponseRecord):
+        pair = (req_record, resp_record)
+        if self._sink is not None:
+            self._sink.write(req_record, resp_record)
+        self._records.append(pair)
+        with self._scopes_lock:
+            scopes = list(self._scopes)
+        for scope in scopes:
+            scope.append(pair)
+        for hook in self._hooks:
+            hook.on_record(req_record, resp_record)
+
+    @contextmanager
+    def capture(
+        self,
+        max_records: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        compact: bool = False,
+    ) -> Iterator[RecordBuffer]:
+        """记录作用域：收集 with 块内产生的全部记录
+
+        with client.capture() as captured:
+            scenario.run(client)
+        records = list(captured)
+
+        compact=True 时记录以列式紧凑存储保存，迭代得到只读视图（见 record_store）。
+        """
+        scope = RecordBuffer(max_records, spill_dir, compact=compact)
+        with self.record_into(scope):
+            yield scope
+
+    @contextmanager
+    def record_into(self, scope: RecordBuffer) -> Iterator[RecordBuffer]:
+        """将 with 块内产生的记录写入已有的 scope（多个 client 可共用一个 scope，如 RouterClient）"""
+        with self._scopes_lock:
+            self._scopes.append(scope)
+        try:
+            yield scope
+        finally:
+            with self._scopes_lock:
+                self._scopes.remove(scope)
+
+    def subscribe(self, kind: str, params: Optional[list] = None) -> Any:
+        """eth_subscribe 订阅（仅 WebSocket 传输，HTTP 传输抛出 RuntimeError），返回 Subscription；
+        订阅请求与退订请求照常记录"""
+        if not self._transport.supports_subscriptions:
+            raise RuntimeError(f"{self.transport} transport does not support eth_subscribe")
+        from .ws_transport import Subscription
+
+        subscription_id = self.call("eth_subscribe", [kind, *(params or [])])
+        return Subscription(self, self._transport, subscription_id)
+
+    def close(self):
+        """关闭 client 独占的 WebSocket 连接；HTTP 连接池为共享，不在此关闭"""
+        if self.transport == "ws":
+            self._transport.close()
 
     def get_records(self) -> list[tuple[RPCRequestRecord, RPCResponseRecord]]:
-        return self._records
+        return list(self._records)
 
     def clear_records(self):
         self._records.clear()
@@ -13,11 +13,21 @@ class BalanceQueryScenario(BaseScenario):
     def get_privacy_impact(self) -> list[str]:
         return ["ip_exposure", "address_association", "request_header_fingerprint"]
 
-    def run(self, client: RPCClient, address: str = None, **kwargs) -> dict:
+    def run(self, client: RPCClient, address: str = None, batch: bool = False, **kwargs) -> dict:
         # 使用 Sepolia 上的常见测试地址（公开水龙头地址）
         addr = address or "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
         result = {}
 
+        if batch:
+            # 批量模式：两个查询合并为一次 JSON-RPC 批量请求
+            balance_hex, nonce = client.call_batch([
+                ("eth_getBalance", [addr, "latest"]),
+                ("eth_getTransactionCount", [addr, "latest"]),
+            ])
+            result["eth_balance"] = balance_hex
+            result["nonce"] = nonce
+            return result
+
         # eth_getBalance - 暴露 from 地址
         balance_hex = client.call("eth_getBalance", [addr, "latest"])
         result["eth_balance"] = balance_hex
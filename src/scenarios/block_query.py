@@ -14,14 +14,22 @@ class BlockQueryScenario(BaseScenario):
         # 区块查询一般不直接暴露钱包地址，但仍会暴露 IP 和请求头
         return ["ip_exposure", "request_header_fingerprint"]
 
-    def run(self, client: RPCClient, **kwargs) -> dict:
-        block_hex = client.call("eth_blockNumber", [])
-        block_num = int(block_hex, 16)
-        # 获取最近区块详情（含交易列表）
-        block = client.call(
-            "eth_getBlockByNumber",
-            [hex(block_num), False],  # false = 不返回完整交易
-        )
+    def run(self, client: RPCClient, batch: bool = False, **kwargs) -> dict:
+        if batch:
+            # 批量模式：区块详情不能依赖同批次的区块号，改用 "latest" 标签
+            block_hex, block = client.call_batch([
+                ("eth_blockNumber", []),
+                ("eth_getBlockByNumber", ["latest", False]),
+            ])
+            block_num = int(block_hex, 16)
+        else:
+            block_hex = client.call("eth_blockNumber", [])
+            block_num = int(block_hex, 16)
+            # 获取最近区块详情（含交易列表）
+            block = client.call(
+                "eth_getBlockByNumber",
+                [hex(block_num), False],  # false = 不返回完整交易
+            )
         return {
             "block_number": block_num,
             "block_hash": block.get("hash") if block else None,
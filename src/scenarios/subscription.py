@@ -0,0 +1,44 @@
+"""场景5：新区块订阅（仅 WebSocket 传输）"""
+from ..rpc_client import RPCClient
+from .base import BaseScenario
+
+
+class SubscriptionScenario(BaseScenario):
+    """新区块订阅 - eth_subscribe(newHeads)，每个新区块刷新余额"""
+
+    id = "subscription"
+    name = "新区块订阅"
+    description = "通过 WebSocket 订阅新区块头，每收到一个区块刷新钱包余额"
+
+    # 等待的区块数，及单个区块的等待上限（秒，需大于出块间隔）
+    heads = 2
+    head_timeout_s = 30.0
+
+    def get_privacy_impact(self) -> list[str]:
+        # 订阅与随后的余额查询在同一持久连接上，节点可确定地把两者归为同一会话
+        return ["ip_exposure", "address_association", "request_header_fingerprint", "session_linkage"]
+
+    def run(self, client: RPCClient, address: str = None, batch: bool = False, **kwargs) -> dict:
+        addr = address or "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
+        result = {"heads_received": 0}
+
+        with client.subscribe("newHeads") as subscription:
+            result["subscription_id"] = subscription.id
+            for _ in range(self.heads):
+                head = subscription.next(timeout=self.head_timeout_s)
+                if head is None:
+                    raise TimeoutError(f"No newHeads notification within {self.head_timeout_s}s")
+                block_tag = head["number"]
+                result["heads_received"] += 1
+                result["block_number"] = int(block_tag, 16)
+                if batch:
+                    # 批量模式：余额与 nonce 合并为一次批量请求
+                    result["eth_balance"], result["nonce"] = client.call_batch([
+                        ("eth_getBalance", [addr, block_tag]),
+                        ("eth_getTransactionCount", [addr, block_tag]),
+                    ])
+                else:
+                    # eth_getBalance - 在同一连接上暴露地址
+                    result["eth_balance"] = client.call("eth_getBalance", [addr, block_tag])
+
+        return result
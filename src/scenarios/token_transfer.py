@@ -1,4 +1,5 @@
 """场景2：代币转账（模拟 eth_call estimateGas，不实际发送）"""
+from ..config_loader import get_contracts
 from ..rpc_client import RPCClient
 from .base import BaseScenario
 
@@ -42,11 +43,13 @@ class TokenTransferScenario(BaseScenario):
         from_address: str = None,
         to_address: str = None,
         amount: int = 1000000,
+        address: str = None,
         **kwargs,
     ) -> dict:
-        config = __import__("..config_loader", fromlist=["load_config"]).load_config()
-        token = token_address or config["contracts"]["test_erc20"]
-        from_addr = from_address or "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
+        contracts = get_contracts()
+        token = token_address or contracts["test_erc20"]
+        # address 为钱包自身地址（与其他场景一致），from_address 优先
+        from_addr = from_address or address or "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
         to_addr = to_address or "0x0000000000000000000000000000000000000001"
 
         data = build_transfer_data(to_addr, amount)
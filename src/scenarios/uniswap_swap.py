@@ -1,11 +1,12 @@
 """场景3：Uniswap 小额兑换（eth_call 模拟报价）"""
+from ..config_loader import get_contracts
 from ..rpc_client import RPCClient
 from .base import BaseScenario
 
 
 # Uniswap V2 swapExactTokensForTokens 等函数会暴露 path、amountIn、amountOutMin 等
 # 这里用 getAmountsOut 作为只读调用示例
-SWAP_AMOUNTS_OUT_SELECTOR = "0x5c11d795"  # getAmountsOut(uint,address[])
+SWAP_AMOUNTS_OUT_SELECTOR = "0xd06ca61f"  # getAmountsOut(uint256,address[])
 
 
 def _encode_address(addr: str) -> str:
@@ -17,11 +18,11 @@ def _encode_uint256(value: int) -> str:
 
 
 def build_get_amounts_out_data(amount_in: int, path: list[str]) -> str:
-    """构建 getAmountsOut 的 ABI 编码（简化）"""
-    # 简化：仅示意结构，完整 ABI 编码需 eth_abi
-    head = SWAP_AMOUNTS_OUT_SELECTOR + _encode_uint256(amount_in)
-    # 动态类型 offset 等略，此处用占位
-    return head
+    """构建 getAmountsOut 的 ABI 编码"""
+    # 参数头：amountIn、path 的偏移（2 个参数头共 0x40 字节）；尾部：path 长度与各地址
+    head = SWAP_AMOUNTS_OUT_SELECTOR + _encode_uint256(amount_in) + _encode_uint256(0x40)
+    tail = _encode_uint256(len(path)) + "".join(_encode_address(addr) for addr in path)
+    return head + tail
 
 
 class UniswapSwapScenario(BaseScenario):
@@ -45,18 +46,19 @@ class UniswapSwapScenario(BaseScenario):
         client: RPCClient,
         router_address: str = None,
         amount_in: int = 10**18,
+        address: str = None,
         **kwargs,
     ) -> dict:
-        config = __import__("..config_loader", fromlist=["load_config"]).load_config()
-        router = router_address or config["contracts"]["uniswap_v2_router"]
-        weth = config["contracts"]["weth_sepolia"]
+        contracts = get_contracts()
+        router = router_address or contracts["uniswap_v2_router"]
+        weth = contracts["weth_sepolia"]
         # 简化 path: WETH -> 某 ERC20
-        path = [weth, config["contracts"]["test_erc20"]]
+        path = [weth, contracts["test_erc20"]]
 
         # 使用静态 ABI 编码简化版（实际项目可用 web3 的 encode_abi）
         data = build_get_amounts_out_data(amount_in, path)
         call_params = {
-            "from": "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1",
+            "from": address or "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1",
             "to": router,
             "data": data,
             "gas": "0x100000",
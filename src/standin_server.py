@@ -0,0 +1,509 @@
+"""
+本地 Sepolia 替身 JSON-RPC 节点 - 离线、可复现的压测目标
+
+- 应答各场景用到的方法（eth_getBalance、eth_getTransactionCount、eth_estimateGas、eth_call、
+  eth_blockNumber、eth_getBlockByNumber 等）及 JSON-RPC 批量请求
+- 同时监听 WebSocket（ws_port，默认 port + 1）：同一连接上的请求并发处理，
+  支持 eth_subscribe（newHeads / newPendingTransactions，每 ws_push_interval_s 推送一次）与 eth_unsubscribe
+- 可配置延迟分布、JSON-RPC 错误率与 HTTP 429 限流率
+- 记录收到的请求头与来源 IP/端口，便于核对 RPC 节点实际可见的信息
+
+用法: python -m src.standin_server [--host 127.0.0.1] [--port 8545]
+配置: config.yaml 的 standin 段（见 DEFAULT_STANDIN_OPTIONS），对应 provider ID 为 local_standin
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import ServerConnection, serve
+
+from .config_loader import STANDIN_DEFAULT_HOST, STANDIN_DEFAULT_PORT, load_config
+
+
+DEFAULT_STANDIN_OPTIONS = {
+    "host": STANDIN_DEFAULT_HOST,
+    "port": STANDIN_DEFAULT_PORT,
+    "ws_port": None,  # None 表示 port + 1
+    "ws_push_interval_s": 1.0,  # 订阅推送间隔（替身节点不等待真实出块）
+    "seed": 42,
+    # 延迟分布：fixed / uniform / normal / lognormal / exponential
+    "latency": {"distribution": "fixed", "mean_ms": 0},
+    # 按方法覆盖延迟分布，如 {"eth_call": {"distribution": "lognormal", "mean_ms": 80, "stddev_ms": 40}}
+    "method_latency": {},
+    "error_rate": 0.0,  # 单个调用返回 JSON-RPC 错误的概率
+    "rate_limit_rate": 0.0,  # 整个 HTTP 请求返回 429（WebSocket 为 JSON-RPC 错误码 429）的概率
+    "retry_after_s": 1,
+    "block_time_s": 12,
+    "genesis_block": 5_000_000,
+    "log_max_entries": 10_000,  # 内存中保留的请求日志条数
+    "log_path": "",  # 非空时请求日志同时追加写入该 NDJSON 文件
+}
+
+SEPOLIA_CHAIN_ID = "0xaa36a7"
+SUBSCRIPTION_KINDS = ("newHeads", "newPendingTransactions")
+
+
+def _h(*parts: Any) -> bytes:
+    return hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=32).digest()
+
+
+def _hex32(*parts: Any) -> str:
+    return "0x" + _h(*parts).hex()
+
+
+class LatencyModel:
+    """按配置的分布采样延迟（毫秒）"""
+
+    def __init__(self, spec: Optional[dict], rng: random.Random):
+        spec = spec or {}
+        self.distribution = spec.get("distribution", "fixed")
+        self.mean_ms = float(spec.get("mean_ms", 0))
+        self.stddev_ms = float(spec.get("stddev_ms", 0))
+        self.min_ms = float(spec.get("min_ms", 0))
+        self.max_ms = float(spec.get("max_ms", self.mean_ms * 2))
+        self._rng = rng
+        if self.distribution not in ("fixed", "uniform", "normal", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def sample(self) -> float:
+        d = self.distribution
+        if d == "uniform":
+            value = self._rng.uniform(self.min_ms, self.max_ms)
+        elif d == "normal":
+            value = self._rng.gauss(self.mean_ms, self.stddev_ms)
+        elif d == "lognormal":
+            # 由目标均值/标准差换算 lognormal 参数
+            if self.mean_ms <= 0:
+                return 0.0
+            sigma2 = math.log(1 + (self.stddev_ms / self.mean_ms) ** 2)
+            mu = math.log(self.mean_ms) - sigma2 / 2
+            value = self._rng.lognormvariate(mu, math.sqrt(sigma2))
+        elif d == "exponential":
+            value = self._rng.expovariate(1 / self.mean_ms) if self.mean_ms > 0 else 0.0
+        else:
+            value = self.mean_ms
+        return max(self.min_ms, value)
+
+
+class StandinChain:
+    """确定性的模拟链状态：区块号随时间增长，余额/nonce/区块内容由输入哈希得出"""
+
+    def __init__(self, genesis_block: int, block_time_s: float, started: Optional[float] = None):
+        self.genesis_block = genesis_block
+        self.block_time_s = block_time_s
+        self.started = started if started is not None else time.time()
+
+    def head(self) -> int:
+        return self.genesis_block + int((time.time() - self.started) / self.block_time_s)
+
+    def _block_number(self, tag: Any) -> Optional[int]:
+        if tag in (None, "latest", "pending", "safe", "finalized"):
+            return self.head()
+        if tag == "earliest":
+            return 0
+        number = int(tag, 16)
+        return number if number <= self.head() else None
+
+    def block(self, number: int, full_transactions: bool = False) -> dict:
+        tx_count = _h("txcount", number)[0] % 16
+        tx_hashes = [_hex32("tx", number, i) for i in range(tx_count)]
+        transactions: list[Any] = tx_hashes
+        if full_transactions:
+            transactions = [
+                {"hash": tx, "blockNumber": hex(number), "transactionIndex": hex(i)}
+                for i, tx in enumerate(tx_hashes)
+            ]
+        return {
+            "number": hex(number),
+            "hash": _hex32("block", number),
+            "parentHash": _hex32("block", number - 1),
+            "timestamp": hex(int(self.started + (number - self.genesis_block) * self.block_time_s)),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(21_000 * tx_count),
+            "miner": "0x" + _h("miner", number)[:20].hex(),
+            "transactions": transactions,
+        }
+
+    def answer(self, method: str, params: list) -> Any:
+        """返回 result；不支持的方法抛出 KeyError"""
+        if method == "eth_blockNumber":
+            return hex(self.head())
+        if method == "eth_chainId":
+            return SEPOLIA_CHAIN_ID
+        if method == "net_version":
+            return str(int(SEPOLIA_CHAIN_ID, 16))
+        if method == "eth_gasPrice":
+            return hex(1_000_000_000 + _h("gas", self.head())[0] * 10_000_000)
+        if method == "eth_getBalance":
+            return hex(int.from_bytes(_h("balance", str(params[0]).lower())[:8], "big"))
+        if method == "eth_getTransactionCount":
+            return hex(_h("nonce", str(params[0]).lower())[0])
+        if method == "eth_getCode":
+            return "0x" if _h("code", str(params[0]).lower())[0] % 2 else "0x6080604052"
+        if method == "eth_estimateGas":
+            tx = params[0] if params else {}
+            return hex(21_000 if not tx.get("data") else 46_000 + len(tx["data"]) * 16)
+        if method == "eth_call":
+            tx = params[0] if params else {}
+            return "0x" + _h("call", tx.get("to"), tx.get("data")).hex()
+        if method == "eth_getBlockByNumber":
+            number = self._block_number(params[0] if params else "latest")
+            return self.block(number, bool(params[1]) if len(params) > 1 else False) if number is not None else None
+        if method == "eth_getBlockByHash":
+            return None
+        raise KeyError(method)
+
+
+class RequestLog:
+    """请求日志：来源 IP/端口、请求头、方法，内存中有界保存，可选写入 NDJSON 文件"""
+
+    def __init__(self, max_entries: int, path: str = ""):
+        self.entries: deque = deque(maxlen=max_entries)
+        self.total = 0
+        self._lock = threading.Lock()
+        self._f = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(path, "a", encoding="utf-8")
+
+    def add(self, entry: dict):
+        with self._lock:
+            self.total += 1
+            self.entries.append(entry)
+            if self._f is not None:
+                self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(self.entries)
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_StandinHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # 响应一次性写出并关闭 Nagle，避免 keep-alive 连接上的延迟确认等待
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, status: int, body: Any, extra_headers: Optional[dict] = None):
+        data = json.dumps(body).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {self.responses.get(status, ('',))[0]}"]
+        head.append("Content-Type: application/json")
+        head.append(f"Content-Length: {len(data)}")
+        for k, v in (extra_headers or {}).items():
+            head.append(f"{k}: {v}")
+        if self.close_connection:
+            head.append("Connection: close")
+        self.wfile.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+
+    def do_GET(self):
+        if self.path.startswith("/log"):
+            log = self.server.standin.log
+            self._send(200, {"total": log.total, "entries": log.snapshot()})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        standin: "StandinServer" = self.server.standin
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            self._send(200, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+
+        calls = body if isinstance(body, list) else [body]
+        methods = [c.get("method") for c in calls if isinstance(c, dict)]
+        limited = standin.roll(standin.options["rate_limit_rate"])
+        standin.log.add({
+            "ts": time.time(),
+            "transport": "http",
+            "client_ip": self.client_address[0],
+            "client_port": self.client_address[1],
+            "headers": dict(self.headers.items()),
+            "methods": methods,
+            "batch": isinstance(body, list),
+            "status": 429 if limited else 200,
+        })
+
+        delay_ms = max((standin.sample_latency(m) for m in methods), default=0.0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        if limited:
+            self._send(
+                429,
+                {"jsonrpc": "2.0", "id": None, "error": {"code": 429, "message": "Too Many Requests"}},
+                {"Retry-After": standin.options["retry_after_s"]},
+            )
+            return
+
+        replies = [standin.handle_call(c) for c in calls]
+        self._send(200, replies if isinstance(body, list) else replies[0])
+
+
+class _StandinWSSession:
+    """一条 WebSocket 连接：每条消息在独立线程中处理（同一连接上的请求可并发），应答与推送共用发送锁"""
+
+    def __init__(self, standin: "StandinServer", conn: ServerConnection):
+        self.standin = standin
+        self.conn = conn
+        self.client = conn.remote_address[:2]
+        self.headers = dict(conn.request.headers.raw_items())
+        self._send_lock = threading.Lock()
+        self._subscriptions: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._next_subscription = 0
+
+    def serve(self):
+        try:
+            for message in self.conn:
+                threading.Thread(target=self._handle, args=(message,), daemon=True).start()
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                for stop in self._subscriptions.values():
+                    stop.set()
+                self._subscriptions.clear()
+
+    def _send(self, body: Any) -> bool:
+        try:
+            with self._send_lock:
+                self.conn.send(json.dumps(body))
+            return True
+        except (OSError, ConnectionClosed):
+            return False
+
+    def _handle(self, message: Any):
+        standin = self.standin
+        try:
+            body = json.loads(message)
+        except ValueError:
+            self._send({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+
+        calls = body if isinstance(body, list) else [body]
+        methods = [c.get("method") for c in calls if isinstance(c, dict)]
+        limited = standin.roll(standin.options["rate_limit_rate"])
+        standin.log.add({
+            "ts": time.time(),
+            "transport": "ws",
+            "client_ip": self.client[0],
+            "client_port": self.client[1],
+            "headers": self.headers,
+            "methods": methods,
+            "batch": isinstance(body, list),
+            "status": 429 if limited else 200,
+        })
+
+        delay_ms = max((standin.sample_latency(m) for m in methods), default=0.0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        if limited:
+            # WebSocket 没有 HTTP 状态码，以 JSON-RPC 限流错误逐个应答
+            error = {"code": 429, "message": "Too Many Requests"}
+            replies = [
+                {"jsonrpc": "2.0", "id": c.get("id") if isinstance(c, dict) else None, "error": error}
+                for c in calls
+            ]
+        else:
+            replies = [self._call(c) for c in calls]
+        self._send(replies if isinstance(body, list) else replies[0])
+
+    def _call(self, call: Any) -> dict:
+        if not isinstance(call, dict):
+            return self.standin.handle_call(call)
+        rpc_id = call.get("id")
+        params = call.get("params") or []
+        if call.get("method") == "eth_subscribe":
+            kind = params[0] if params else None
+            if kind not in SUBSCRIPTION_KINDS:
+                error = {"code": -32602, "message": f"Unsupported subscription: {kind}"}
+                return {"jsonrpc": "2.0", "id": rpc_id, "error": error}
+            return {"jsonrpc": "2.0", "id": rpc_id, "result": self._subscribe(kind)}
+        if call.get("method") == "eth_unsubscribe":
+            with self._lock:
+                stop = self._subscriptions.pop(params[0] if params else None, None)
+            if stop is not None:
+                stop.set()
+            return {"jsonrpc": "2.0", "id": rpc_id, "result": stop is not None}
+        return self.standin.handle_call(call)
+
+    def _subscribe(self, kind: str) -> str:
+        stop = threading.Event()
+        with self._lock:
+            self._next_subscription += 1
+            subscription_id = "0x" + _h("subscription", self.client, self._next_subscription)[:16].hex()
+            self._subscriptions[subscription_id] = stop
+        threading.Thread(target=self._push, args=(subscription_id, kind, stop), daemon=True).start()
+        return subscription_id
+
+    def _push(self, subscription_id: str, kind: str, stop: threading.Event):
+        """首条推送在一个间隔之后，保证订阅 ID 的应答先到达"""
+        chain = self.standin.chain
+        n = 0
+        while not stop.wait(self.standin.options["ws_push_interval_s"]):
+            n += 1
+            if kind == "newHeads":
+                result = chain.block(chain.head())
+                del result["transactions"]
+            else:
+                result = _hex32("pending", subscription_id, n)
+            notification = {
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {"subscription": subscription_id, "result": result},
+            }
+            if not self._send(notification):
+                return
+
+
+class _StandinHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    standin: "StandinServer"
+
+
+class StandinServer:
+    """本地替身节点，可在后台线程中启动（with StandinServer() as srv: ...）"""
+
+    def __init__(self, options: Optional[dict] = None):
+        self.options = {**DEFAULT_STANDIN_OPTIONS, **(options or {})}
+        self._rng = random.Random(self.options["seed"])
+        self._rng_lock = threading.Lock()
+        self.chain = StandinChain(self.options["genesis_block"], self.options["block_time_s"])
+        self._latency = LatencyModel(self.options["latency"], self._rng)
+        self._method_latency = {
+            m: LatencyModel(spec, self._rng) for m, spec in (self.options.get("method_latency") or {}).items()
+        }
+        self.log = RequestLog(self.options["log_max_entries"], self.options["log_path"])
+        self._httpd: Optional[_StandinHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wsd = None
+        self._ws_thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2] if self._httpd else (self.options["host"], self.options["port"])
+        return f"http://{host}:{port}"
+
+    @property
+    def ws_url(self) -> str:
+        if self._wsd is not None:
+            host, port = self._wsd.socket.getsockname()[:2]
+        else:
+            host = self.options["host"]
+            port = self.options["ws_port"] or int(self.options["port"]) + 1
+        return f"ws://{host}:{port}"
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < probability
+
+    def sample_latency(self, method: Optional[str]) -> float:
+        model = self._method_latency.get(method, self._latency)
+        with self._rng_lock:
+            return model.sample()
+
+    def handle_call(self, call: Any) -> dict:
+        if not isinstance(call, dict) or "method" not in call:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+        rpc_id = call.get("id")
+        method = call["method"]
+        if self.roll(self.options["error_rate"]):
+            return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32000, "message": "injected error"}}
+        try:
+            result = self.chain.answer(method, call.get("params") or [])
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        except (ValueError, TypeError, IndexError, AttributeError) as e:
+            return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32602, "message": f"Invalid params: {e}"}}
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": result}
+
+    def start(self) -> "StandinServer":
+        self._httpd = _StandinHTTPServer((self.options["host"], int(self.options["port"])), _StandinHandler)
+        self._httpd.standin = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        ws_port = self.options["ws_port"] or int(self.options["port"]) + 1
+        self._wsd = serve(lambda conn: _StandinWSSession(self, conn).serve(), self.options["host"], int(ws_port))
+        self._ws_thread = threading.Thread(target=self._wsd.serve_forever, name="standin-ws-server", daemon=True)
+        self._ws_thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._wsd is not None:
+            self._wsd.shutdown()
+            self._wsd = None
+        self.log.close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def get_standin_options() -> dict:
+    """合并默认值与 config.yaml 中的 standin 配置"""
+    return {**DEFAULT_STANDIN_OPTIONS, **(load_config().get("standin") or {})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 Sepolia 替身 JSON-RPC 节点")
+    parser.add_argument("--host", type=str, default="", help="监听地址，默认取 config.yaml standin.host")
+    parser.add_argument("--port", type=int, default=0, help="监听端口，默认取 config.yaml standin.port")
+    args = parser.parse_args()
+
+    try:
+        options = get_standin_options()
+    except FileNotFoundError:
+        options = dict(DEFAULT_STANDIN_OPTIONS)
+    if args.host:
+        options["host"] = args.host
+    if args.port:
+        options["port"] = args.port
+
+    server = StandinServer(options).start()
+    print(f"替身节点已启动: {server.url}，WebSocket: {server.ws_url} (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+合成用户群体 - 大规模钱包用户的可复现模拟
+
+每个合成用户有钱包类型（决定请求头指纹）、活跃度模型（操作次数与场景偏好）和若干地址。
+用户与地址均按需生成，不预先构建列表：
+
+- 用户 i 的属性只由 (seed, i) 决定，user(i) 为 O(1)，迭代整个群体不占用额外内存
+- 地址 = 哈希前缀（12 字节）+ 用户序号（4 字节）+ 地址序号（4 字节），owner() 可由地址反查所属用户，
+  无需保存 地址 -> 用户 映射即可作为关联分析的真实标签
+
+配置: config.yaml 的 population 段（见 DEFAULT_POPULATION_OPTIONS）
+"""
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from .config_loader import load_config
+
+DEFAULT_POPULATION_OPTIONS = {
+    "users": 1000,
+    "seed": 0,
+    # 每个用户的地址数：1 + 几何分布，均值 mean，上限 max
+    "addresses": {"mean": 2.0, "max": 20},
+    # 钱包类型占比（钱包 ID -> 权重）；为空时在 config.yaml 的全部钱包间均分
+    "wallet_mix": {},
+    # 活跃度模型：占比、每个用户的平均操作次数（1 + 泊松）、操作间平均思考时间、场景权重
+    "activity": {
+        "casual": {
+            "weight": 0.7,
+            "actions": 3,
+            "think_time_ms": 0,
+            "scenarios": {"balance_query": 3, "block_query": 1, "token_transfer": 1},
+        },
+        "trader": {
+            "weight": 0.25,
+            "actions": 8,
+            "think_time_ms": 0,
+            "scenarios": {"balance_query": 2, "token_transfer": 2, "uniswap_swap": 4, "block_query": 1},
+        },
+        "bot": {
+            "weight": 0.05,
+            "actions": 20,
+            "think_time_ms": 0,
+            "scenarios": {"block_query": 3, "uniswap_swap": 2},
+        },
+    },
+}
+
+# 地址中用户序号、地址序号各占 4 字节
+_PREFIX_BYTES = 12
+_MAX_INDEX = 2**32 - 1
+
+
+def get_population_options() -> dict:
+    """合并默认值与 config.yaml 中的 population 配置"""
+    return {**DEFAULT_POPULATION_OPTIONS, **(load_config().get("population") or {})}
+
+
+def _prefix(seed: Any, user: int, k: int) -> bytes:
+    return hashlib.blake2b(f"{seed}|{user}|{k}".encode("utf-8"), digest_size=_PREFIX_BYTES).digest()
+
+
+def synthetic_address(seed: Any, user: int, k: int) -> str:
+    """第 user 个用户的第 k 个地址（小写 0x 十六进制，20 字节）"""
+    return "0x" + (_prefix(seed, user, k) + user.to_bytes(4, "big") + k.to_bytes(4, "big")).hex()
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Knuth 算法；均值较大时以正态近似"""
+    if mean <= 0:
+        return 0
+    if mean > 50:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticUser:
+    """一个合成用户；地址按需计算"""
+    index: int
+    wallet_id: str
+    activity: str
+    address_count: int
+    actions: int
+    # 该用户行为（provider 选择、场景顺序、思考时间）的随机数种子
+    seed: str
+    population_seed: Any
+
+    def address(self, k: int) -> str:
+        return synthetic_address(self.population_seed, self.index, k)
+
+    @property
+    def addresses(self) -> list[str]:
+        return [self.address(k) for k in range(self.address_count)]
+
+
+class Population:
+    """按 options 生成的合成用户群体，可按序号随机访问或惰性迭代"""
+
+    def __init__(self, options: Optional[dict] = None, wallets: Optional[list[str]] = None):
+        options = {**DEFAULT_POPULATION_OPTIONS, **(options or {})}
+        self.size = int(options["users"])
+        if not 0 < self.size <= _MAX_INDEX:
+            raise ValueError(f"Population size must be between 1 and {_MAX_INDEX}")
+        self.seed = options["seed"]
+        addresses = {**DEFAULT_POPULATION_OPTIONS["addresses"], **(options.get("addresses") or {})}
+        self.address_mean = float(addresses["mean"])
+        self.address_max = min(int(addresses["max"]), _MAX_INDEX)
+        if self.address_mean < 1 or self.address_max < 1:
+            raise ValueError("Population addresses.mean and addresses.max must be at least 1")
+
+        mix = options.get("wallet_mix") or dict.fromkeys(wallets or [], 1)
+        if not mix:
+            raise ValueError("Population requires wallet_mix or a list of wallets")
+        unknown = [w for w in mix if wallets is not None and w not in wallets]
+        if unknown:
+            raise ValueError(f"Unknown wallets in population.wallet_mix: {unknown}")
+        self.wallet_mix = {w: float(weight) for w, weight in mix.items() if weight > 0}
+
+        self.activity = {name: dict(model) for name, model in options["activity"].items() if model.get("weight", 0) > 0}
+        if not self.activity:
+            raise ValueError("Population requires at least one activity model with positive weight")
+        self._wallet_ids = list(self.wallet_mix)
+        self._wallet_cum = list(_cumulative(self.wallet_mix.values()))
+        self._activity_names = list(self.activity)
+        self._activity_cum = list(_cumulative(m["weight"] for m in self.activity.values()))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def user(self, index: int) -> SyntheticUser:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        rng = random.Random(f"{self.seed}:user:{index}")
+        wallet_id = rng.choices(self._wallet_ids, cum_weights=self._wallet_cum)[0]
+        activity = rng.choices(self._activity_names, cum_weights=self._activity_cum)[0]
+        # 1 + 几何分布（成功概率 1 / mean）
+        p = 1 / self.address_mean
+        extra = 0 if p >= 1 else int(math.log(1 - rng.random()) / math.log(1 - p))
+        address_count = min(1 + extra, self.address_max)
+        actions = 1 + _poisson(rng, float(self.activity[activity].get("actions", 1)) - 1)
+        return SyntheticUser(
+            index=index,
+            wallet_id=wallet_id,
+            activity=activity,
+            address_count=address_count,
+            actions=actions,
+            seed=f"{self.seed}:actions:{index}",
+            population_seed=self.seed,
+        )
+
+    def __iter__(self) -> Iterator[SyntheticUser]:
+        for i in range(self.size):
+            yield self.user(i)
+
+    def owner(self, address: str) -> Optional[int]:
+        """合成地址所属用户序号；非本群体生成的地址（如合约地址）返回 None"""
+        if not isinstance(address, str) or len(address) != 42:
+            return None
+        try:
+            raw = bytes.fromhex(address[2:])
+        except ValueError:
+            return None
+        user = int.from_bytes(raw[_PREFIX_BYTES:_PREFIX_BYTES + 4], "big")
+        k = int.from_bytes(raw[_PREFIX_BYTES + 4:], "big")
+        if user >= self.size or raw[:_PREFIX_BYTES] != _prefix(self.seed, user, k):
+            return None
+        return user
+
+    def describe(self) -> dict[str, Any]:
+        """写入运行配置的群体参数"""
+        return {
+            "users": self.size,
+            "seed": self.seed,
+            "addresses": {"mean": self.address_mean, "max": self.address_max},
+            "wallet_mix": self.wallet_mix,
+            "activity": self.activity,
+        }
+
+
+def _cumulative(weights: Any) -> Iterator[float]:
+    total = 0.0
+    for w in weights:
+        total += float(w)
+        yield total
@@ -0,0 +1,124 @@
+"""
+请求追踪导出 - 以 Chrome trace 事件格式（chrome://tracing / Perfetto 可直接打开）记录每个场景与每次调用
+
+TraceRecorder 是一个 RPCHook：
+- 每个场景一个 span（cat=scenario），每次 HTTP 发送（含重试、批量请求）一个 span（cat=rpc）
+- 调用 span 下按时间顺序排列各阶段的子 span（cat=phase，见 hooks.REQUEST_PHASES；
+  record 阶段发生在发送结束之后，只计入报告，不在 trace 中）
+- 进程（pid）对应 provider，线程（tid）对应实际执行请求的线程，钱包写在 args 中
+事件数超过 max_events 后不再记录，丢弃数写入导出文件的 metadata。
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .hooks import REQUEST_PHASES, RequestContext, RPCHook, ScenarioContext
+
+DEFAULT_MAX_EVENTS = 1_000_000
+# 零耗时的阶段不生成子 span
+_MIN_PHASE_MS = 0.001
+
+
+class TraceRecorder(RPCHook):
+    """收集 Chrome trace 事件（线程安全），save() 写出 JSON"""
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self.max_events = max_events
+        self.events: list[dict[str, Any]] = []
+        self.dropped = 0
+        self._pids: dict[str, int] = {}
+        self._tids: dict[int, int] = {}
+        self._named: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    def _ids(self, provider_id: str) -> tuple[int, int]:
+        """调用方已持有锁"""
+        pid = self._pids.get(provider_id)
+        if pid is None:
+            pid = self._pids[provider_id] = len(self._pids) + 1
+            self.events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": provider_id}})
+        thread = threading.get_ident()
+        tid = self._tids.get(thread)
+        if tid is None:
+            tid = self._tids[thread] = len(self._tids) + 1
+        if (pid, tid) not in self._named:
+            self._named.add((pid, tid))
+            name = threading.current_thread().name
+            self.events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return pid, tid
+
+    def _emit(self, provider_id: str, events: list[dict[str, Any]], timestamps: list[float]):
+        with self._lock:
+            if len(self.events) + len(events) > self.max_events:
+                self.dropped += len(events)
+                return
+            pid, tid = self._ids(provider_id)
+            for event, timestamp in zip(events, timestamps):
+                # 先保存 Unix 时间（秒），导出时换算为相对最早事件的微秒
+                event["ts"] = timestamp
+                event["pid"] = pid
+                event["tid"] = tid
+                self.events.append(event)
+
+    def after_request(self, ctx: RequestContext):
+        name = ctx.methods[0] if len(ctx.methods) == 1 else f"batch[{len(ctx.methods)}]"
+        args: dict[str, Any] = {
+            "wallet": ctx.wallet_id,
+            "methods": ctx.methods,
+            "retry": ctx.retry,
+            "status": ctx.status_code,
+            "reused": ctx.connection_reused,
+            "phases_ms": {k: round(v, 3) for k, v in ctx.phases.items()},
+        }
+        if ctx.error:
+            args["error"] = ctx.error.get("message")
+        events = [{"name": name, "cat": "rpc", "ph": "X", "dur": round(ctx.elapsed_ms * 1000, 3), "args": args}]
+        timestamps = [ctx.timestamp]
+        # 限流排队发生在发送之前，其余阶段自发送时刻起依次排列
+        queue_ms = ctx.phases.get("queue", 0.0)
+        if queue_ms >= _MIN_PHASE_MS:
+            events.append({"name": "queue", "cat": "phase", "ph": "X", "dur": round(queue_ms * 1000, 3)})
+            timestamps.append(ctx.timestamp - queue_ms / 1000)
+        offset = 0.0
+        for phase in REQUEST_PHASES:
+            value = ctx.phases.get(phase)
+            if phase == "queue" or value is None:
+                continue
+            if value >= _MIN_PHASE_MS:
+                events.append({"name": phase, "cat": "phase", "ph": "X", "dur": round(value * 1000, 3)})
+                timestamps.append(ctx.timestamp + offset / 1000)
+            offset += value
+        self._emit(ctx.provider_id, events, timestamps)
+
+    def after_scenario(self, ctx: ScenarioContext):
+        event = {
+            "name": ctx.scenario_id,
+            "cat": "scenario",
+            "ph": "X",
+            "dur": round(ctx.elapsed_ms * 1000, 3),
+            "args": {"wallet": ctx.wallet_id, "status": ctx.status, "requests": ctx.requests},
+        }
+        self._emit(ctx.provider_id, [event], [ctx.timestamp])
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            origin = min((e["ts"] for e in self.events if "ts" in e), default=0.0)
+            events = [
+                {**e, "ts": round((e["ts"] - origin) * 1e6, 3)} if "ts" in e else e
+                for e in self.events
+            ]
+            trace = {
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "metadata": {
+                    "origin_unix_s": origin,
+                    "dropped_events": self.dropped,
+                    "exported_at": time.time(),
+                },
+            }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, ensure_ascii=False)
@@ -0,0 +1,197 @@
+"""
+HTTP 传输层 - 每个 RPC URL 共享一个 keep-alive 连接池
+同一 provider 的所有 RPCClient 复用连接，避免每次请求重新握手 TCP/TLS
+连接类记录建连（DNS + TCP）与 TLS 握手耗时，post_json 可按阶段返回耗时（见 hooks.REQUEST_PHASES）
+"""
+import json
+import threading
+import time
+import weakref
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config_loader import load_config
+
+
+# 可在 config.yaml 的 transport 段覆盖
+DEFAULT_TRANSPORT_OPTIONS = {
+    "pool_maxsize": 10,  # 单个 provider 连接池最大连接数
+    "keep_alive": True,  # False 时每次请求后关闭连接（用于对比握手开销）
+    "connect_timeout": 10,
+    "read_timeout": 30,
+}
+
+
+def get_transport_options() -> dict:
+    """合并默认值与 config.yaml 中的 transport 配置"""
+    config = load_config()
+    return {**DEFAULT_TRANSPORT_OPTIONS, **(config.get("transport") or {})}
+
+
+class _TimedConnectionMixin:
+    """记录最近一次建连的 DNS + TCP 与 TLS 耗时（毫秒），由 post_json 读取后清零"""
+
+    connect_ms: float = 0.0
+    tls_ms: float = 0.0
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self.connect_ms = (time.perf_counter() - start) * 1000
+
+    def take_timings(self) -> tuple[float, float]:
+        timings = (self.connect_ms, self.tls_ms)
+        self.connect_ms = self.tls_ms = 0.0
+        return timings
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        # TLS 握手在 _new_conn 建立 TCP 连接之后完成
+        self.tls_ms = max(0.0, (time.perf_counter() - start) * 1000 - self.connect_ms)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class HTTPTransport:
+    """单个 RPC URL 的连接池，线程安全"""
+
+    # 连接池在钱包间共享，请求不归属任何会话；HTTP 无法接收 eth_subscribe 推送
+    session_id = None
+    supports_subscriptions = False
+
+    def __init__(
+        self,
+        url: str,
+        pool_maxsize: int = DEFAULT_TRANSPORT_OPTIONS["pool_maxsize"],
+        keep_alive: bool = DEFAULT_TRANSPORT_OPTIONS["keep_alive"],
+        connect_timeout: float = DEFAULT_TRANSPORT_OPTIONS["connect_timeout"],
+        read_timeout: float = DEFAULT_TRANSPORT_OPTIONS["read_timeout"],
+    ):
+        self.url = url
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # 已使用过的 socket，用于判断本次请求是新建连接还是复用连接
+        self._seen_sockets: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _mark_connection(self, resp: requests.Response, phases: Optional[dict]) -> Optional[bool]:
+        conn = getattr(resp.raw, "connection", None)
+        if phases is not None:
+            connect_ms, tls_ms = conn.take_timings() if isinstance(conn, _TimedConnectionMixin) else (0.0, 0.0)
+            phases["connect"] = connect_ms
+            phases["tls"] = tls_ms
+        sock = getattr(conn, "sock", None)
+        if sock is None:
+            return None
+        with self._lock:
+            reused = sock in self._seen_sockets
+            self._seen_sockets.add(sock)
+        return reused
+
+    def post_json(
+        self,
+        headers: dict,
+        payload: Any,
+        timeout: Optional[float] = None,
+        phases: Optional[dict] = None,
+    ) -> tuple[Any, Optional[bool]]:
+        """发送 JSON 请求，返回 (响应 JSON, 是否复用连接)
+
+        headers 原样发送（钱包指纹头不做修改），仅在关闭 keep-alive 时追加 Connection: close。
+        phases 为 dict 时逐个填入 encode / connect / tls / wait / download / decode 阶段耗时（毫秒），
+        出错时保留已完成的阶段。
+        """
+        if not self.keep_alive:
+            headers = {**headers, "Connection": "close"}
+        start = time.perf_counter()
+        # 与 requests 的 json= 参数相同的编码与 Content-Type，单独计时
+        body = json.dumps(payload, allow_nan=False).encode("utf-8")
+        if not any(k.lower() == "content-type" for k in headers):
+            headers = {**headers, "Content-Type": "application/json"}
+        encoded = time.perf_counter()
+        resp = self._session.post(
+            self.url,
+            headers=headers,
+            data=body,
+            timeout=(self.connect_timeout, timeout or self.read_timeout),
+            stream=True,
+        )
+        responded = time.perf_counter()
+        try:
+            # 必须在读取 body 之前判断，读取完成后连接即归还连接池
+            reused = self._mark_connection(resp, phases)
+            if phases is not None:
+                phases["encode"] = (encoded - start) * 1000
+                phases["wait"] = max(0.0, (responded - encoded) * 1000 - phases["connect"] - phases["tls"])
+            resp.raise_for_status()
+            content = resp.content
+            downloaded = time.perf_counter()
+            try:
+                data = json.loads(content)
+            except ValueError as e:
+                # 与 resp.json() 一致，按 requests 异常处理（计入错误，可分类重试）
+                raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+            if phases is not None:
+                phases["download"] = (downloaded - responded) * 1000
+                phases["decode"] = (time.perf_counter() - downloaded) * 1000
+            return data, reused
+        finally:
+            resp.close()
+
+    def close(self):
+        self._session.close()
+
+
+_TRANSPORTS: dict[str, HTTPTransport] = {}
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def get_transport(url: str) -> HTTPTransport:
+    """获取 URL 对应的共享传输层，不存在则按配置创建"""
+    with _TRANSPORTS_LOCK:
+        transport = _TRANSPORTS.get(url)
+        if transport is None:
+            transport = HTTPTransport(url, **get_transport_options())
+            _TRANSPORTS[url] = transport
+        return transport
+
+
+def close_all_transports():
+    """关闭全部连接池（进程退出或切换配置时调用）"""
+    with _TRANSPORTS_LOCK:
+        for transport in _TRANSPORTS.values():
+            transport.close()
+        _TRANSPORTS.clear()
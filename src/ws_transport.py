@@ -0,0 +1,247 @@
+"""
+WebSocket 传输层 - 钱包与 provider 之间的持久连接
+
+与 HTTPTransport 不同，WSTransport 属于单个钱包会话（一个 RPCClient），不在钱包间共享：
+握手时发送该钱包的请求头，此后这条连接上的全部请求都被节点归为同一会话（session_id）。
+
+- 同一 socket 上多路复用并发请求，按 JSON-RPC id 匹配响应（批量请求按数组内任一 id）
+- eth_subscription 推送按订阅 ID 放入各自的队列（见 Subscription）
+- 连接断开后下一次请求自动重连，得到新的 session_id
+- 错误以 requests 异常抛出（ConnectionError / Timeout），与 HTTP 传输层共用重试与错误分类
+"""
+import json
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+import requests
+from websockets.exceptions import WebSocketException
+from websockets.sync.client import connect
+
+from .transport import DEFAULT_TRANSPORT_OPTIONS
+
+# 仅用于 HTTP POST 的请求头，握手时不发送
+_HTTP_ONLY_HEADERS = frozenset({"content-type", "content-length"})
+# 单条消息上限（完整交易列表的区块可能超过 websockets 默认的 1 MiB）
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class _Waiter:
+    """一次发送（单个或批量请求）的等待状态，由读线程填写"""
+
+    __slots__ = ("event", "data", "received", "decode_ms", "exc")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.data: Any = None
+        self.received = 0.0
+        self.decode_ms = 0.0
+        self.exc: Optional[Exception] = None
+
+
+class Subscription:
+    """eth_subscribe 订阅：next() 取下一条推送，close() 发送 eth_unsubscribe"""
+
+    def __init__(self, client: Any, transport: "WSTransport", subscription_id: str):
+        self.client = client
+        self.id = subscription_id
+        self.received = 0
+        self._transport = transport
+        self._queue = transport.notifications(subscription_id)
+
+    def next(self, timeout: Optional[float] = None) -> Any:
+        """下一条推送的 result；超时返回 None"""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.received += 1
+        return item
+
+    def close(self):
+        try:
+            self.client.call("eth_unsubscribe", [self.id])
+        finally:
+            self._transport.forget(self.id)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WSTransport:
+    """单个钱包会话的 WebSocket 连接，线程安全；首次请求时建立连接"""
+
+    supports_subscriptions = True
+
+    def __init__(
+        self,
+        url: str,
+        headers: dict,
+        label: str = "",
+        connect_timeout: float = DEFAULT_TRANSPORT_OPTIONS["connect_timeout"],
+        read_timeout: float = DEFAULT_TRANSPORT_OPTIONS["read_timeout"],
+    ):
+        self.url = url
+        self.label = label
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._headers = {k: v for k, v in headers.items() if k.lower() not in _HTTP_ONLY_HEADERS}
+        # 当前连接的会话 ID，及建立过的连接数（含重连）
+        self.session_id: Optional[str] = None
+        self.sessions = 0
+        self._ws = None
+        self._pending: dict[Any, _Waiter] = {}
+        self._subscriptions: dict[str, queue.SimpleQueue] = {}
+        self._forgotten: set[str] = set()
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    # ---- 连接 ----
+
+    def _ensure_connected(self, phases: Optional[dict]) -> bool:
+        """返回是否复用已有连接；新建连接时握手耗时（DNS + TCP + TLS + HTTP Upgrade）计入 connect 阶段"""
+        with self._connect_lock:
+            if self._ws is not None:
+                return True
+            headers = dict(self._headers)
+            user_agent = headers.pop("User-Agent", None)
+            start = time.perf_counter()
+            try:
+                ws = connect(
+                    self.url,
+                    additional_headers=headers,
+                    user_agent_header=user_agent,
+                    open_timeout=self.connect_timeout,
+                    max_size=MAX_MESSAGE_BYTES,
+                )
+            except (OSError, TimeoutError, WebSocketException) as e:
+                raise requests.ConnectionError(f"WebSocket connect to {self.url} failed: {e}") from e
+            if phases is not None:
+                phases["connect"] = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._ws = ws
+                self.sessions += 1
+                self.session_id = f"{self.label}/{uuid.uuid4().hex[:12]}"
+            reader = threading.Thread(target=self._read_loop, args=(ws,), name=f"ws-{self.session_id}", daemon=True)
+            reader.start()
+            return False
+
+    def _read_loop(self, ws):
+        try:
+            for message in ws:
+                received = time.perf_counter()
+                try:
+                    data = json.loads(message)
+                except ValueError:
+                    continue
+                self._dispatch(data, received, (time.perf_counter() - received) * 1000)
+        except (OSError, WebSocketException):
+            pass
+        finally:
+            with self._lock:
+                if self._ws is ws:
+                    self._ws = None
+                waiters = set(self._pending.values())
+                self._pending.clear()
+            for waiter in waiters:
+                waiter.exc = requests.ConnectionError("WebSocket connection closed")
+                waiter.event.set()
+
+    def _dispatch(self, data: Any, received: float, decode_ms: float):
+        if isinstance(data, dict) and data.get("method") == "eth_subscription":
+            params = data.get("params") or {}
+            subscription_id = params.get("subscription")
+            with self._lock:
+                if subscription_id in self._forgotten:
+                    return
+                # 推送可能先于 eth_subscribe 的调用方注册队列到达，先行缓存
+                notifications = self._subscriptions.setdefault(subscription_id, queue.SimpleQueue())
+            notifications.put(params.get("result"))
+            return
+        items = data if isinstance(data, list) else [data]
+        key = next((item["id"] for item in items if isinstance(item, dict) and item.get("id") is not None), None)
+        with self._lock:
+            waiter = self._pending.get(key)
+        if waiter is None:
+            # 超时后才到达的响应
+            return
+        waiter.data = data
+        waiter.received = received
+        waiter.decode_ms = decode_ms
+        waiter.event.set()
+
+    # ---- 请求 ----
+
+    def post_json(
+        self,
+        headers: dict,
+        payload: Any,
+        timeout: Optional[float] = None,
+        phases: Optional[dict] = None,
+    ) -> tuple[Any, Optional[bool]]:
+        """发送 JSON-RPC 请求并等待响应，返回 (响应 JSON, 是否复用连接)；接口同 HTTPTransport.post_json
+
+        headers 已在握手时发送，此处忽略。phases 中 tls、download 为 0（握手计入 connect，读取由读线程完成）。
+        """
+        if phases is not None:
+            phases.update(connect=0.0, tls=0.0, download=0.0)
+        reused = self._ensure_connected(phases)
+        start = time.perf_counter()
+        text = json.dumps(payload, allow_nan=False)
+        calls = payload if isinstance(payload, list) else [payload]
+        ids = [call.get("id") for call in calls]
+        waiter = _Waiter()
+        with self._lock:
+            ws = self._ws
+            for rpc_id in ids:
+                self._pending[rpc_id] = waiter
+        encoded = time.perf_counter()
+        try:
+            if ws is None:
+                raise requests.ConnectionError("WebSocket connection closed")
+            try:
+                with self._send_lock:
+                    ws.send(text)
+            except (OSError, WebSocketException) as e:
+                raise requests.ConnectionError(f"WebSocket send failed: {e}") from e
+            if not waiter.event.wait(timeout or self.read_timeout):
+                raise requests.Timeout(f"No WebSocket response within {timeout or self.read_timeout}s")
+        finally:
+            with self._lock:
+                for rpc_id in ids:
+                    if self._pending.get(rpc_id) is waiter:
+                        del self._pending[rpc_id]
+        if waiter.exc is not None:
+            raise waiter.exc
+        if phases is not None:
+            phases["encode"] = (encoded - start) * 1000
+            phases["wait"] = (waiter.received - encoded) * 1000
+            phases["decode"] = waiter.decode_ms
+        return waiter.data, reused
+
+    # ---- 订阅 ----
+
+    def notifications(self, subscription_id: str) -> queue.SimpleQueue:
+        """订阅的推送队列（含注册前已到达的推送）"""
+        with self._lock:
+            self._forgotten.discard(subscription_id)
+            return self._subscriptions.setdefault(subscription_id, queue.SimpleQueue())
+
+    def forget(self, subscription_id: str):
+        """丢弃订阅队列，之后到达的推送直接忽略"""
+        with self._lock:
+            self._subscriptions.pop(subscription_id, None)
+            self._forgotten.add(subscription_id)
+
+    def close(self):
+        with self._connect_lock:
+            with self._lock:
+                ws, self._ws = self._ws, None
+            if ws is not None:
+                ws.close()
@@ -0,0 +1,90 @@
+import socket
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.rpc_client import RPCRequestRecord, RPCResponseRecord, _extract_addresses_from_params  # noqa: E402
+
+HEADERS = {
+    "metamask": {"User-Agent": "MetaMask/11.0", "Origin": "chrome-extension://metamask"},
+    "trust_wallet": {"User-Agent": "TrustWallet/8.0 (iOS)"},
+}
+
+
+def make_record(
+    method: str,
+    params: list,
+    wallet_id: str = "metamask",
+    provider_id: str = "p",
+    timestamp: float = 0.0,
+    client_id: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    batch_size: int = 1,
+    source: str = "upstream",
+) -> tuple[RPCRequestRecord, RPCResponseRecord]:
+    """构造一对请求/响应记录，exposed_addresses 与 RPCClient 的提取规则一致
+
+    未指定 client_id 时按 runner 的约定取 "钱包@provider"。
+    """
+    req = RPCRequestRecord(
+        method=method,
+        params=params,
+        wallet_id=wallet_id,
+        provider_id=provider_id,
+        headers_sent=dict(HEADERS[wallet_id]),
+        timestamp=timestamp,
+        client_id=client_id or f"{wallet_id}@{provider_id}",
+        exposed_addresses=_extract_addresses_from_params(params),
+        batch_id=batch_id,
+        batch_size=batch_size,
+    )
+    return req, RPCResponseRecord(request=req, result="0x0", error=None, elapsed_ms=1.0, source=source)
+
+
+@pytest.fixture
+def record():
+    return make_record
+
+
+CONTRACTS = {
+    "test_erc20": "0x779877A7B0D9E8603169DdbD7836e478b4624789",
+    "uniswap_v2_router": "0xC532a74256D3Db42D0Bf7a0400fEFDbad7694008",
+    "weth_sepolia": "0x7b79995e5f793A07Bc00c21412e50Ecae098E7f9",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def standin(tmp_path_factory):
+    """临时 config.yaml + 本地替身节点，无错误注入、零延迟、区块高度不变
+
+    provider local_standin 与 standin_b 指向同一个替身节点。
+    """
+    from src import config_loader
+    from src.standin_server import StandinServer, get_standin_options
+
+    path = tmp_path_factory.mktemp("config") / "config.yaml"
+    port = _free_port()
+    path.write_text(yaml.safe_dump({
+        "wallets": {
+            "metamask": {"user_agent": HEADERS["metamask"]["User-Agent"], "origin": HEADERS["metamask"]["Origin"]},
+            "trust_wallet": {"user_agent": HEADERS["trust_wallet"]["User-Agent"]},
+        },
+        "rpc_providers": {"standin_b": {"base_url": f"http://127.0.0.1:{port}", "no_api_key": True}},
+        "contracts": CONTRACTS,
+        "standin": {"host": "127.0.0.1", "port": port, "ws_port": _free_port(), "block_time_s": 10**9},
+    }), encoding="utf-8")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config_loader, "_CACHE", config_loader.ConfigCache(path))
+        with StandinServer(get_standin_options()) as server:
+            yield server
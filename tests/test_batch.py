@@ -0,0 +1,38 @@
+import pytest
+
+from src.rpc_client import RPCClient
+from src.scenarios.balance_query import BalanceQueryScenario
+
+ADDRESS = "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
+
+
+def test_call_batch_sends_one_request_and_records_each_call(standin):
+    client = RPCClient("local_standin", "metamask", client_id="user-1")
+    start = standin.log.total
+    calls = [("eth_getBalance", [ADDRESS, "latest"]), ("eth_chainId", []), ("eth_getTransactionCount", [ADDRESS, "latest"])]
+    results = client.call_batch(calls)
+
+    assert standin.log.total - start == 1
+    entry = standin.log.snapshot()[-1]
+    assert entry["batch"] and entry["methods"] == [m for m, _ in calls]
+    assert results == [client.call(method, params, record=False) for method, params in calls]
+    records = client.get_records()
+    assert [req.method for req, _ in records] == [m for m, _ in calls]
+    assert {(req.batch_id, req.batch_size) for req, _ in records} == {("user-1#1", 3)}
+    assert [resp.result for _, resp in records] == results
+
+
+def test_failed_sub_call_raises_after_recording_every_call(standin):
+    client = RPCClient("local_standin", "metamask")
+    with pytest.raises(RuntimeError):
+        client.call_batch([("eth_blockNumber", []), ("eth_noSuchMethod", [])])
+    (_, ok), (_, failed) = client.get_records()
+    assert ok.error is None and failed.error["code"] == -32601
+
+
+def test_batched_scenario_matches_sequential_calls_in_fewer_requests(standin):
+    sequential, batched = RPCClient("local_standin", "metamask"), RPCClient("local_standin", "metamask")
+    start = standin.log.total
+    assert BalanceQueryScenario().run(sequential) == BalanceQueryScenario().run(batched, batch=True)
+    assert standin.log.total - start == 3
+    assert [r.method for r, _ in sequential.get_records()] == [r.method for r, _ in batched.get_records()]
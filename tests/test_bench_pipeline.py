@@ -0,0 +1,46 @@
+import json
+
+from benchmarks.bench_pipeline import TIME_FLOOR_S, compare, main, run_benchmarks, synthetic_records
+
+
+def _result(records_per_s: float, seconds: float = 1.0, peak_bytes: int = 0) -> dict:
+    return {"stage": "s", "records": 1, "seconds": seconds, "records_per_s": records_per_s, "peak_bytes": peak_bytes}
+
+
+def test_synthetic_records_are_seeded_and_keep_batches_whole():
+    first = [(r.method, r.params, r.batch_id) for r, _ in synthetic_records(500, addresses=50, seed=7)]
+    again = [(r.method, r.params, r.batch_id) for r, _ in synthetic_records(500, addresses=50, seed=7)]
+    assert first == again and len(first) >= 500
+    batches = {}
+    for _, _, batch_id in first:
+        if batch_id:
+            batches[batch_id] = batches.get(batch_id, 0) + 1
+    assert batches and set(batches.values()) == {2}
+
+
+def test_compare_flags_throughput_and_memory_regressions():
+    baseline = {"results": {
+        "slow@1": _result(1000), "noise@1": _result(1000), "mem@1": _result(1000, peak_bytes=10 << 20),
+    }}
+    current = {"results": {
+        "slow@1": _result(700),
+        "noise@1": _result(100, seconds=TIME_FLOOR_S / 2),
+        "mem@1": _result(1000, peak_bytes=20 << 20),
+        "new@1": _result(5),
+    }}
+    regressions = compare(baseline, current, threshold=0.2, memory_threshold=0.5)
+    assert [r.split(":")[0] for r in regressions] == ["slow@1", "mem@1"]
+
+
+def test_compare_command_exit_code(tmp_path):
+    base, cur = tmp_path / "base.json", tmp_path / "cur.json"
+    base.write_text(json.dumps({"results": {"a@1": _result(1000)}}), encoding="utf-8")
+    cur.write_text(json.dumps({"results": {"a@1": _result(900)}}), encoding="utf-8")
+    assert main(["compare", str(base), str(cur), "--threshold", "0.2"]) == 0
+    assert main(["compare", str(base), str(cur), "--threshold", "0.05"]) == 1
+
+
+def test_run_benchmarks_rows():
+    data = run_benchmarks([200], ["analyze_request", "linkage"], repeat=1, pool_size=200, addresses=50, memory=False)
+    assert set(data["results"]) == {"analyze_request@200", "linkage@200"}
+    assert all(row["records"] == 200 and row["records_per_s"] > 0 for row in data["results"].values())
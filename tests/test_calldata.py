@@ -0,0 +1,45 @@
+from src.analyzers.calldata import call_data_of, decode_calldata
+
+ROUTER = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+WETH = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+
+
+def _word(value: int) -> str:
+    return f"{value:064x}"
+
+
+def _addr(address: str) -> str:
+    return address[2:].rjust(64, "0")
+
+
+def test_decode_get_amounts_out():
+    data = "0xd06ca61f" + _word(10**18) + _word(0x40) + _word(2) + _addr(WETH) + _addr(USDC)
+    decoded = decode_calldata(data)
+    assert decoded["selector"] == "0xd06ca61f"
+    assert decoded["signature"] == "getAmountsOut(uint256,address[])"
+    assert decoded["args"] == {"amountIn": 10**18, "path": [WETH, USDC]}
+    assert decoded["addresses"] == [WETH, USDC]
+    assert decoded["error"] is None
+
+
+def test_decode_transfer_and_unknown_selector():
+    decoded = decode_calldata("0xa9059cbb" + _addr(ROUTER) + _word(5))
+    assert decoded["function"] == "transfer"
+    assert decoded["args"] == {"to": ROUTER, "amount": 5}
+    assert decoded["addresses"] == [ROUTER]
+
+    unknown = decode_calldata("0xdeadbeef" + _word(1))
+    assert unknown["function"] is None and unknown["args"] == {}
+    assert decode_calldata("0x12") is None
+
+
+def test_truncated_arguments_keep_function_name():
+    decoded = decode_calldata("0xd06ca61f" + _word(1))
+    assert decoded["function"] == "getAmountsOut"
+    assert decoded["error"]
+
+
+def test_call_data_of():
+    assert call_data_of([{"to": ROUTER, "data": "0xa9059cbb"}, "latest"]) == "0xa9059cbb"
+    assert call_data_of(["latest"]) is None
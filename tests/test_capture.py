@@ -0,0 +1,52 @@
+import pytest
+
+from src.collectors.capture import NDJSONSink, iter_capture, read_capture_index
+from src.collectors.runner import analyze_capture, run_all
+
+ALICE = "0x1111111111111111111111111111111111111111"
+
+
+def _records(record):
+    return [
+        record("eth_getBalance", [ALICE, "latest"], timestamp=1.0),
+        record("eth_getBalance", [ALICE, "latest"], wallet_id="trust_wallet", timestamp=2.0, batch_id="t#1", batch_size=2),
+        record("eth_getTransactionCount", [ALICE, "latest"], wallet_id="trust_wallet", timestamp=2.0, batch_id="t#1", batch_size=2),
+    ]
+
+
+@pytest.mark.parametrize("name", ["capture.ndjson", "capture.ndjson.gz"])
+def test_sink_and_reader_round_trip(tmp_path, record, name):
+    path = tmp_path / name
+    pairs = _records(record)
+    with NDJSONSink(path, meta={"config": {"wallets": ["metamask"]}}, flush_every=1) as sink:
+        for req, resp in pairs:
+            sink.write(req, resp)
+        sink.write_cell("metamask_p_balance_query", {"status": "ok", "requests": 1})
+        sink.write_cell("trust_wallet_p_balance_query", {"status": "error", "requests": 2}, {"key": "t", "error": "x"})
+
+    assert list(iter_capture(path)) == pairs
+    index = read_capture_index(path)
+    assert index["meta"] == {"config": {"wallets": ["metamask"]}}
+    assert list(index["scenario_results"]) == ["metamask_p_balance_query", "trust_wallet_p_balance_query"]
+    assert index["errors"] == [{"key": "t", "error": "x"}]
+
+
+def test_gzip_append_adds_a_readable_member(tmp_path, record):
+    path = tmp_path / "capture.ndjson.gz"
+    first, *rest = _records(record)
+    with NDJSONSink(path) as sink:
+        sink.write(*first)
+    with NDJSONSink(path, append=True) as sink:
+        for pair in rest:
+            sink.write(*pair)
+    assert [req.timestamp for req, _ in iter_capture(path)] == [1.0, 2.0, 2.0]
+
+
+def test_analyzing_a_capture_matches_the_live_run(standin, tmp_path):
+    path = tmp_path / "run.ndjson"
+    live = run_all(providers=["local_standin", "standin_b"], capture_path=path)
+    replay = analyze_capture(path)
+    assert replay["summary"]["total_requests"] == live["summary"]["total_requests"]
+    assert replay["scenario_results"] == live["scenario_results"]
+    assert replay["privacy_analysis"] == live["privacy_analysis"]
+    assert replay["records"] == live["records"]
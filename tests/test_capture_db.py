@@ -0,0 +1,25 @@
+from src.collectors.capture_db import SQLiteSink, address_sightings, iter_db, list_runs
+
+ALICE = "0x1111111111111111111111111111111111111111"
+BOB = "0x2222222222222222222222222222222222222222"
+
+
+def test_round_trip_keeps_records_and_client_id(tmp_path, record):
+    path = tmp_path / "capture.db"
+    pairs = [
+        record("eth_getBalance", [ALICE, "latest"], timestamp=1.0, client_id="metamask@p"),
+        record("eth_getBalance", [BOB, "latest"], wallet_id="trust_wallet", timestamp=2.0, client_id="trust_wallet@p"),
+    ]
+    with SQLiteSink(path, meta={"mode": "test"}) as sink:
+        for req, resp in pairs:
+            sink.write(req, resp)
+
+    loaded = list(iter_db(path))
+    assert [(r.method, r.params, r.wallet_id, r.headers_sent, r.client_id) for r, _ in loaded] == [
+        (r.method, r.params, r.wallet_id, r.headers_sent, r.client_id) for r, _ in pairs
+    ]
+    assert [resp.result for _, resp in loaded] == ["0x0", "0x0"]
+    assert [r.wallet_id for r, _ in iter_db(path, address=BOB)] == ["trust_wallet"]
+    assert len(address_sightings(path, ALICE)) == 1
+    assert len(list_runs(path)) == 1
+
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from src.collectors.checkpoint import JOURNAL_NAME, CheckpointStore
+from src.collectors.runner import RECORD_PREVIEW_LIMIT, build_result, run_all
+
+PROVIDERS = ["local_standin", "standin_b"]
+TIMING_DEPENDENT_DIMENSIONS = {"timing_correlation"}
+
+
+def _comparable(data: dict) -> dict:
+    return {
+        "scenario_results": data["scenario_results"],
+        "errors": data["errors"],
+        # 不写抓包 / 检查点的运行保留全部记录摘要，其余情况只保留前 RECORD_PREVIEW_LIMIT 条
+        "records": data["records"][:RECORD_PREVIEW_LIMIT],
+        "calldata": data["calldata"],
+        "privacy_analysis": {
+            k: v for k, v in data["privacy_analysis"].items() if k not in TIMING_DEPENDENT_DIMENSIONS
+        },
+        "total_requests": data["summary"]["total_requests"],
+    }
+
+
+def _methods(records) -> list[str]:
+    return [req.method for req, _ in records]
+
+
+def test_checkpoint_run_and_resume_match_sequential_run(standin, tmp_path):
+    sequential = run_all(providers=PROVIDERS)
+    first = run_all(providers=PROVIDERS, mode="thread", max_workers=4, checkpoint_dir=tmp_path)
+    assert _comparable(first) == _comparable(sequential)
+
+    with pytest.raises(FileExistsError):
+        run_all(providers=PROVIDERS, checkpoint_dir=tmp_path)
+    resumed = run_all(providers=PROVIDERS, checkpoint_dir=tmp_path, resume=True)
+    assert resumed["summary"]["checkpoint"]["executed_cells"] == 0
+    assert _comparable(resumed) == _comparable(sequential)
+
+
+def test_iter_records_streams_latest_attempt_per_cell_in_grid_order(tmp_path, record):
+    order = {"a": 0, "b": 1}
+    store = CheckpointStore(tmp_path)
+    store.commit("b", [record("eth_chainId", [])], {"status": "ok"})
+    store.commit("a", [record("eth_getBalance", ["0x" + "11" * 20, "latest"])], {"status": "error"}, {"key": "a"})
+    store.commit("a", [record("eth_blockNumber", []), record("eth_gasPrice", [])], {"status": "ok"})
+    store.close()
+
+    assert _methods(store.iter_records(order)) == ["eth_blockNumber", "eth_gasPrice", "eth_chainId"]
+    assert _methods(store.iter_records({"b": 0})) == ["eth_chainId"]
+
+
+def test_resume_discards_uncommitted_tail(tmp_path, record):
+    store = CheckpointStore(tmp_path)
+    store.commit("a", [record("eth_blockNumber", [])], {"status": "ok"})
+    store.close()
+    # 进程在写入单元格 b 的记录后、cell 行之前退出
+    with open(store.path, "a", encoding="utf-8") as f:
+        f.write('{"kind": "record", "cell": "b", "attempt": 1, "request": {')
+
+    resumed = CheckpointStore(tmp_path, resume=True)
+    assert resumed.completed() == {"a"}
+    resumed.commit("b", [record("eth_chainId", [])], {"status": "ok"})
+    resumed.close()
+    assert _methods(resumed.iter_records({"a": 0, "b": 1})) == ["eth_blockNumber", "eth_chainId"]
+
+
+def test_resume_throughput_counts_only_executed_requests(standin, tmp_path):
+    first = run_all(providers=PROVIDERS, checkpoint_dir=tmp_path)
+    total = first["summary"]["total_requests"]
+    assert first["summary"]["resumed_requests"] == 0
+
+    # 去掉最后一个单元格的 cell 行：续跑时只重新执行该单元格
+    journal = tmp_path / JOURNAL_NAME
+    lines = journal.read_text(encoding="utf-8").splitlines(keepends=True)
+    rerun_key = json.loads(lines[-1])["key"]
+    journal.write_text("".join(lines[:-1]), encoding="utf-8")
+
+    resumed = run_all(providers=PROVIDERS, checkpoint_dir=tmp_path, resume=True)
+    executed = resumed["scenario_results"][rerun_key]["requests"]
+    assert resumed["summary"]["checkpoint"]["executed_cells"] == 1
+    assert resumed["summary"]["total_requests"] == total
+    assert resumed["summary"]["resumed_requests"] == total - executed
+
+    analysis = {"total_requests": 100, "privacy_analysis": {}, "connections": {}, "records": []}
+    summary = build_result({}, analysis, {}, [], wall_clock=2.0, executed_requests=10)["summary"]
+    assert (summary["requests_per_sec"], summary["resumed_requests"]) == (5.0, 90)
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from src.coalescing import SingleFlight
+
+
+def test_concurrent_identical_requests_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "0x10"
+
+    results = {}
+
+    def run(wallet):
+        results[wallet] = flight.do("p", "eth_blockNumber", [], wallet, fetch)
+
+    leader = threading.Thread(target=run, args=("metamask",))
+    leader.start()
+    while not flight._flights:
+        pass
+    followers = [threading.Thread(target=run, args=(f"w{n}",)) for n in range(3)]
+    for t in followers:
+        t.start()
+    while flight.stats["followers"] < 3:
+        pass
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results["metamask"] == ("0x10", None)
+    assert all(results[f"w{n}"] == ("0x10", "metamask") for n in range(3))
+    assert flight.snapshot() == {"leaders": 1, "followers": 3, "coalesce_rate": 0.75}
+
+
+def test_finished_flight_is_not_reused_and_errors_propagate():
+    flight = SingleFlight()
+    assert flight.do("p", "eth_chainId", [], "metamask", lambda: "0x1") == ("0x1", None)
+    assert flight.do("p", "eth_chainId", [], "metamask", lambda: "0x2") == ("0x2", None)
+    assert not flight.applies("eth_getBalance")
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("p", "eth_chainId", [], "metamask", fail)
+    assert not flight._flights
@@ -0,0 +1,36 @@
+import os
+
+import yaml
+
+from src.config_loader import ConfigCache
+
+
+def _write(path, user_agent: str):
+    path.write_text(yaml.safe_dump({
+        "wallets": {"metamask": {"user_agent": user_agent}},
+        "rpc_providers": {"infura": {"base_url": "https://sepolia.infura.io/v3/{api_key}"}},
+    }), encoding="utf-8")
+
+
+def test_reloads_when_mtime_changes(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "MetaMask/11.0")
+    cache = ConfigCache(path)
+    first = cache.get()
+    assert cache.get() is first
+
+    _write(path, "MetaMask/12.0")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, first.mtime_ns + 1_000_000))
+    assert cache.get().wallet_headers["metamask"]["User-Agent"] == "MetaMask/12.0"
+
+
+def test_reloads_when_api_key_environment_changes(tmp_path, monkeypatch):
+    path = tmp_path / "config.yaml"
+    _write(path, "MetaMask/11.0")
+    cache = ConfigCache(path)
+    monkeypatch.setenv("INFURA_API_KEY", "old")
+    assert cache.get().provider_urls["infura"] == "https://sepolia.infura.io/v3/old"
+
+    monkeypatch.setenv("INFURA_API_KEY", "new")
+    assert cache.get().provider_urls["infura"] == "https://sepolia.infura.io/v3/new"
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from src.collectors.runner import run_all
+from src.hooks import REQUEST_PHASES, RPCHook, scenario_hooks
+from src.rpc_client import RPCClient
+from src.tracing import TraceRecorder
+
+
+class _Recorder(RPCHook):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, ctx):
+        self.events.append(("before", list(ctx.methods)))
+
+    def after_request(self, ctx):
+        self.events.append(("after", ctx))
+
+    def on_record(self, req, resp):
+        self.events.append(("record", req.method))
+
+    def before_scenario(self, ctx):
+        self.events.append(("scenario", ctx.scenario_id))
+
+    def after_scenario(self, ctx):
+        self.events.append(("scenario_done", ctx.status, ctx.requests))
+
+
+def test_request_hooks_see_every_send_with_phases(standin):
+    hook = _Recorder()
+    client = RPCClient("local_standin", "metamask", hooks=[hook])
+    client.call("eth_blockNumber", [])
+    client.call_batch([("eth_chainId", []), ("eth_gasPrice", [])])
+    with pytest.raises(RuntimeError):
+        client.call("eth_noSuchMethod", [])
+
+    kinds = [e[0] for e in hook.events]
+    assert kinds == ["before", "after", "record", "before", "after", "record", "record", "before", "after", "record"]
+    sends = [e[1] for e in hook.events if e[0] == "after"]
+    assert [(ctx.methods, ctx.batch) for ctx in sends] == [
+        (["eth_blockNumber"], False), (["eth_chainId", "eth_gasPrice"], True), (["eth_noSuchMethod"], False),
+    ]
+    assert all(ctx.status_code == 200 and ctx.elapsed_ms > 0 for ctx in sends)
+    assert {"encode", "wait", "download", "decode"} <= set(sends[0].phases) <= set(REQUEST_PHASES)
+    assert sends[2].error["code"] == -32601 and sends[0].error is None
+    (_, resp), *_ = client.get_records()
+    assert set(resp.phases) >= {"wait", "record"}
+
+
+def test_scenario_hooks_report_failures():
+    hook = _Recorder()
+    with pytest.raises(ValueError):
+        with scenario_hooks([hook], "metamask", "p", "balance_query") as ctx:
+            ctx.requests = 2
+            ctx.status = "error"
+            raise ValueError
+    assert hook.events == [("scenario", "balance_query"), ("scenario_done", "error", 2)]
+
+
+def test_trace_export_nests_phases_inside_calls(standin, tmp_path):
+    recorder = TraceRecorder()
+    data = run_all(wallets=["metamask"], providers=["local_standin"], hooks=[recorder])
+    recorder.save(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))
+
+    events = trace["traceEvents"]
+    scenarios = [e for e in events if e.get("cat") == "scenario"]
+    calls = [e for e in events if e.get("cat") == "rpc"]
+    phases = [e for e in events if e.get("cat") == "phase"]
+    assert [e["name"] for e in scenarios] == list(data["config"]["scenarios"])
+    assert sum(e["args"]["requests"] for e in scenarios) == data["summary"]["total_requests"]
+    assert calls and phases and trace["metadata"]["dropped_events"] == 0
+    assert min(e["ts"] for e in events if "ts" in e) == 0
+    for phase in phases:
+        assert any(c["ts"] <= phase["ts"] and phase["ts"] + phase["dur"] <= c["ts"] + c["dur"] + 1 for c in calls)
+
+
+def test_trace_recorder_drops_events_beyond_the_limit(standin):
+    recorder = TraceRecorder(max_events=3)
+    RPCClient("local_standin", "metamask", hooks=[recorder]).call("eth_blockNumber", [])
+    assert recorder.dropped > 0 and len(recorder.events) <= 3
@@ -0,0 +1,60 @@
+import pytest
+
+from src.collectors.runner import analyze_records, build_result
+from src.reporters.html_report import RECORDS_DIR, _page_name, save_html_report
+
+ALICE = "0x1111111111111111111111111111111111111111"
+
+
+def _records(record, count):
+    return [record("eth_getBalance", [ALICE, "latest"], timestamp=1000.0 + n) for n in range(count)]
+
+
+def _data(pairs, preview_limit=None):
+    config = {"wallets": ["metamask"], "providers": ["local_standin"], "scenarios": []}
+    return build_result(config, analyze_records(pairs, preview_limit=preview_limit), {}, [])
+
+
+def test_records_are_split_into_linked_pages(tmp_path, record):
+    pairs = _records(record, 5)
+    result = save_html_report(_data(pairs), tmp_path, records=iter(pairs), page_size=2)
+    assert result == {"index": tmp_path / "index.html", "pages": 3, "records": 5}
+    assert result["index"].exists()
+    pages_dir = tmp_path / RECORDS_DIR
+    assert sorted(p.name for p in pages_dir.iterdir()) == ["index.html"] + [_page_name(n) for n in (1, 2, 3)]
+
+    bodies = [(pages_dir / _page_name(n)).read_text(encoding="utf-8") for n in (1, 2, 3)]
+    assert [body.count("<tr><td>") for body in bodies] == [2, 2, 1]
+    assert "第 5 – 5 条" in bodies[2]
+    assert f'href="{_page_name(2)}"' in bodies[0] and f'href="{_page_name(1)}"' not in bodies[0]
+    assert f'href="{_page_name(2)}"' in bodies[2] and f'href="{_page_name(4)}"' not in bodies[2]
+    listing = (pages_dir / "index.html").read_text(encoding="utf-8")
+    assert all(_page_name(n) in listing for n in (1, 2, 3))
+
+
+def test_rerun_with_fewer_records_removes_stale_pages(tmp_path, record):
+    pairs = _records(record, 5)
+    save_html_report(_data(pairs), tmp_path, records=pairs, page_size=1)
+    result = save_html_report(_data(pairs[:2]), tmp_path, records=pairs[:2], page_size=1)
+    assert result["pages"] == 2
+    assert not (tmp_path / RECORDS_DIR / _page_name(3)).exists()
+
+
+def test_cells_are_escaped(tmp_path, record):
+    req, resp = record("eth_call", [{"to": ALICE, "data": "0x"}, "latest"])
+    req.exposed_params_summary = "<script>x</script>"
+    save_html_report(_data([(req, resp)]), tmp_path, records=[(req, resp)], page_size=10)
+    body = (tmp_path / RECORDS_DIR / _page_name(1)).read_text(encoding="utf-8")
+    assert "<script>x</script>" not in body
+    assert "&lt;script&gt;x&lt;/script&gt;" in body
+
+
+def test_preview_rows_are_written_without_a_record_stream(tmp_path, record):
+    data = _data(_records(record, 5), preview_limit=3)
+    result = save_html_report(data, tmp_path, page_size=2)
+    assert (result["pages"], result["records"]) == (2, 3)
+
+
+def test_page_size_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        save_html_report(_data([]), tmp_path, page_size=0)
@@ -0,0 +1,89 @@
+from src.analyzers.linkage import LinkageAnalyzer
+
+TOKEN = "0x779877A7B0D9E8603169DdbD7836e478b4624789"
+TRANSFER = "0xa9059cbb" + "00" * 64
+
+
+def _addr(n: int) -> str:
+    return "0x" + f"{n:040x}"
+
+
+def _clusters(linkage: LinkageAnalyzer, provider_id: str = "p") -> set[frozenset]:
+    return {frozenset(c) for c in linkage.clusters(provider_id) if len(c) > 1}
+
+
+def _user_session(record, client_id: str, addresses: list[str], start: float):
+    """同一用户：查询各地址余额后，用首个地址调用代币合约"""
+    out = [record("eth_getBalance", [a, "latest"], client_id=client_id, timestamp=start + i)
+           for i, a in enumerate(addresses)]
+    out.append(record(
+        "eth_estimateGas",
+        [{"from": addresses[0], "to": TOKEN, "data": TRANSFER}],
+        client_id=client_id,
+        timestamp=start + len(addresses),
+    ))
+    return out
+
+
+def test_same_wallet_users_calling_same_contract_stay_separate(record):
+    alice, bob = [_addr(1), _addr(2)], [_addr(3), _addr(4)]
+    records = _user_session(record, "metamask/alice", alice, 0.0) + _user_session(record, "metamask/bob", bob, 0.5)
+    linkage = LinkageAnalyzer().add_records(sorted(records, key=lambda r: r[0].timestamp))
+
+    assert _clusters(linkage) == {frozenset(alice), frozenset(bob)}
+    # 合约地址计入倒排索引，但自成一簇
+    assert linkage.address_index(TOKEN)["p"]["cluster_size"] == 1
+    assert linkage.summary()["p"]["links_by_rule"]["call"] == 0
+
+
+def test_configured_contracts_are_not_linked(record):
+    linkage = LinkageAnalyzer(contracts=[TOKEN.lower()])
+    linkage.add_records([
+        record("eth_getBalance", [_addr(1), "latest"], client_id="c1", timestamp=0.0),
+        # 不带 calldata 的裸地址参数，只能依靠配置识别为合约
+        record("eth_getCode", [TOKEN, "latest"], client_id="c1", timestamp=1.0),
+        record("eth_getBalance", [_addr(2), "latest"], client_id="c2", timestamp=1.5),
+        record("eth_getCode", [TOKEN, "latest"], client_id="c2", timestamp=2.0),
+    ])
+    assert _clusters(linkage) == set()
+
+
+def test_session_rule_respects_gap(record):
+    linkage = LinkageAnalyzer(session_gap_s=10.0).add_records([
+        record("eth_getBalance", [_addr(1), "latest"], client_id="c", timestamp=0.0),
+        record("eth_getBalance", [_addr(2), "latest"], client_id="c", timestamp=5.0),
+        record("eth_getBalance", [_addr(3), "latest"], client_id="c", timestamp=30.0),
+    ])
+    assert _clusters(linkage) == {frozenset([_addr(1), _addr(2)])}
+    assert linkage.summary()["p"]["links_by_rule"]["session"] == 1
+
+
+def test_call_and_batch_rules(record):
+    linkage = LinkageAnalyzer(session_gap_s=0.0).add_records([
+        record("eth_call", [{"from": _addr(1), "to": _addr(2)}, "latest"], client_id="a", timestamp=0.0),
+        record("eth_getBalance", [_addr(3), "latest"], client_id="b", timestamp=10.0, batch_id="b#1", batch_size=2),
+        record("eth_getBalance", [_addr(4), "latest"], client_id="c", timestamp=20.0, batch_id="b#1", batch_size=2),
+    ])
+    assert _clusters(linkage) == {frozenset([_addr(1), _addr(2)]), frozenset([_addr(3), _addr(4)])}
+    links = linkage.summary()["p"]["links_by_rule"]
+    assert (links["call"], links["batch"]) == (1, 1)
+
+
+def test_non_upstream_records_are_ignored(record):
+    linkage = LinkageAnalyzer().add_records([
+        record("eth_getBalance", [_addr(1), "latest"], client_id="c", source="cache"),
+        record("eth_getBalance", [_addr(2), "latest"], client_id="c", source="coalesced"),
+    ])
+    assert linkage.providers() == []
+
+
+def test_checksummed_and_lowercase_forms_are_one_address(record):
+    shared = "0xAbCdEf0000000000000000000000000000000001"
+    linkage = LinkageAnalyzer().add_records([
+        record("eth_getBalance", [shared, "latest"], client_id="a", timestamp=0.0),
+        record("eth_getBalance", [_addr(1), "latest"], client_id="a", timestamp=1.0),
+        record("eth_getBalance", [shared.lower(), "latest"], client_id="b", timestamp=2.0),
+        record("eth_getBalance", [_addr(2), "latest"], client_id="b", timestamp=3.0),
+    ])
+    assert _clusters(linkage) == {frozenset([shared.lower(), _addr(1), _addr(2)])}
+    assert linkage.address_index(shared)["p"]["sightings"] == 2
@@ -0,0 +1,28 @@
+from src.collectors.load import run_load
+from src.collectors.shard import merge_shards, run_shard, shard_path
+
+PROVIDERS = ["local_standin", "standin_b"]
+
+
+def _requests(rows: list[dict]) -> int:
+    return sum(row["requests"] for row in rows)
+
+
+def test_load_latency_counts_each_upstream_request_once(standin):
+    data = run_load(providers=PROVIDERS, duration_s=0.3, concurrency=2)
+    upstream = data["summary"]["upstream_requests"]
+    assert data["load"]["iterations"] > 0 and upstream > 0
+    assert _requests(data["load"]["cells"]) == upstream
+    assert _requests(data["latency"]["cells"]) == upstream
+
+
+def test_merged_load_shards_count_each_request_once(standin, tmp_path):
+    paths = [
+        run_shard(i, 2, shard_path(tmp_path, i, 2), load=True, providers=PROVIDERS, duration_s=0.2, concurrency=2)
+        for i in (1, 2)
+    ]
+    merged = merge_shards(paths)
+    upstream = merged["summary"]["upstream_requests"]
+    assert upstream > 0
+    assert _requests(merged["load"]["cells"]) == upstream
+    assert _requests(merged["latency"]["cells"]) == upstream
@@ -0,0 +1,51 @@
+from src.analyzers.linkage import LinkageAnalyzer
+from src.collectors.population import population_linkage, run_population
+from src.synthetic_users import Population
+
+from conftest import CONTRACTS
+
+OPTIONS = {"users": 50, "seed": 3, "wallet_mix": {"metamask": 1}}
+
+
+def test_population_is_reproducible_and_owner_resolves():
+    a, b = Population(OPTIONS), Population(OPTIONS)
+    assert [u.addresses for u in a] == [u.addresses for u in b]
+    user = a.user(7)
+    assert all(a.owner(addr) == 7 for addr in user.addresses)
+    assert a.owner(CONTRACTS["test_erc20"]) is None
+    assert Population({**OPTIONS, "seed": 4}).user(7).address(0) != user.address(0)
+
+
+def test_population_linkage_separates_same_wallet_users(record):
+    population = Population(OPTIONS)
+    users = [u for u in population if u.address_count > 1][:2]
+    records = []
+    for n, user in enumerate(users):
+        for k, addr in enumerate(user.addresses):
+            records.append(record("eth_getBalance", [addr, "latest"], client_id=f"u{n}", timestamp=n + k * 0.1))
+        records.append(record(
+            "eth_estimateGas",
+            [{"from": user.address(0), "to": CONTRACTS["test_erc20"], "data": "0xa9059cbb"}],
+            client_id=f"u{n}",
+            timestamp=n + 0.5,
+        ))
+    risk = population_linkage(LinkageAnalyzer().add_records(records), population)["p"]
+    assert risk["linked_rate"] == 1.0
+    assert risk["pair_precision"] == 1.0
+    assert risk["largest_cluster_users"] == 1
+
+
+def test_run_population_precision(standin):
+    data = run_population(providers=["local_standin"], users=60, seed=1, max_workers=4)
+    assert data["population"]["users"] == 60
+    risk = data["population"]["linkage_risk"]["local_standin"]
+    assert risk["pair_precision"] >= 0.99
+    assert risk["largest_cluster_users"] == 1
+
+
+def test_run_population_records_user_failures(standin):
+    # 未知 provider：创建 client 即失败，worker 记录错误后继续，不会丢失其余用户
+    data = run_population(providers=["no_such_provider"], users=5, seed=1, max_workers=2)
+    assert data["population"]["users"] == 0
+    assert data["population"]["failed_users"] == 5
+    assert sum(int(e["error"].split()[0]) for e in data["errors"]) == 5
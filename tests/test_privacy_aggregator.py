@@ -0,0 +1,72 @@
+import json
+import random
+
+from src.analyzers.privacy_analyzer import (
+    DISTINCT_SKETCH_SIZE,
+    DimensionAggregator,
+    DimensionResult,
+    _DistinctSketch,
+    _evidence_hash,
+)
+
+
+def _result(evidence: str) -> DimensionResult:
+    return DimensionResult("address_association", "钱包地址关联", "medium", "", evidence=[evidence])
+
+
+def _aggregate(evidence: list[str], sample_size: int = 5) -> DimensionAggregator:
+    agg = DimensionAggregator(sample_size)
+    for ev in evidence:
+        agg.add([_result(ev)])
+    return agg
+
+
+def _merged(parts: list[list[str]], sample_size: int = 5) -> DimensionAggregator:
+    """经 JSON 往返的分片状态合并，与 shard 合并流程一致"""
+    agg = DimensionAggregator(sample_size)
+    for part in parts:
+        state = json.loads(json.dumps(_aggregate(part, sample_size).to_state()))
+        agg.merge(DimensionAggregator.from_state(state))
+    return agg
+
+
+def test_bottom_k_sample_is_independent_of_order_and_sharding():
+    rng = random.Random(0)
+    evidence = [f"Address: 0x{rng.randrange(300):040x}" for _ in range(5000)]
+    single = _aggregate(evidence).summary()
+    shuffled = evidence[:]
+    rng.shuffle(shuffled)
+    sharded = _merged([shuffled[i::7] for i in range(7)]).summary()
+    assert sharded == single
+    dim = single["address_association"]
+    # 样本计数精确
+    for ev, n in dim["evidence_counts"]:
+        assert n == evidence.count(ev)
+    assert dim["evidence_distinct"] == len(set(evidence))
+    assert dim["evidence_distinct_exact"] is True
+
+
+def test_distinct_sketch_is_bounded_and_estimates_large_counts():
+    n = 20 * DISTINCT_SKETCH_SIZE
+    evidence = [f"Address: 0x{i:040x}" for i in range(n)]
+    dim = _merged([evidence[i::3] for i in range(3)]).summary()["address_association"]
+    assert dim["evidence_distinct_exact"] is False
+    assert abs(dim["evidence_distinct"] - n) / n < 0.1
+    state = _aggregate(evidence).to_state()["dimensions"][0]
+    assert len(state["distinct"]) == DISTINCT_SKETCH_SIZE + 1
+
+
+def test_distinct_sketch_merge_equals_direct_build():
+    hashes = [_evidence_hash(str(i)) for i in range(5000)]
+    direct = _DistinctSketch(64)
+    for h in hashes:
+        direct.add(h)
+    merged = _DistinctSketch(64)
+    for i in range(4):
+        part = _DistinctSketch(64)
+        for h in hashes[i::4]:
+            part.add(h)
+        merged.merge(_DistinctSketch.from_state(part.to_state(), 64))
+    assert not merged.exact
+    assert merged.count() == direct.count()
+    assert merged.to_state() == direct.to_state()
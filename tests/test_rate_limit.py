@@ -0,0 +1,47 @@
+import random
+
+import requests
+
+from src.rate_limit import AdaptiveTokenBucket, RetryPolicy, classify_error, is_throttle_error, parse_retry_after
+
+
+def test_throttle_backs_off_and_success_recovers():
+    bucket = AdaptiveTokenBucket(rate=10.0, burst=2, min_rate=1.0, decrease_factor=0.5, increase_step=1.0)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+
+    bucket.on_throttle()
+    bucket.on_throttle()
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 1.0
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 10.0
+    assert bucket.snapshot()["throttled"] == 4
+
+
+def test_retry_after_pauses_the_bucket():
+    bucket = AdaptiveTokenBucket(rate=1000.0, burst=5)
+    bucket.on_throttle(retry_after=0.05)
+    assert bucket.acquire() >= 0.04
+
+
+def test_retry_policy_and_error_classification():
+    policy = RetryPolicy(backoff_base_s=0.25, backoff_max_s=1.0, rng=random.Random(0))
+    assert not policy.retryable("eth_sendRawTransaction")
+    assert policy.retryable("eth_getBalance")
+    assert all(0 <= policy.delay(n) <= 1.0 for n in range(10))
+    assert policy.delay(0, retry_after=3.0) == 3.0
+
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("soon") is None
+
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = "1.5"
+    assert classify_error(requests.HTTPError(response=response)) == (429, 1.5, True)
+    assert classify_error(requests.ConnectionError()) == (None, None, True)
+    assert classify_error(ValueError()) == (None, None, False)
+    assert is_throttle_error({"code": -32005, "message": "rate limited"})
+    assert not is_throttle_error({"code": -32000})
@@ -0,0 +1,52 @@
+import pytest
+
+from src.collectors.runner import analyze_records
+from src.record_store import CompactRecordStore
+
+ALICE = "0x1111111111111111111111111111111111111111"
+BOB = "0x2222222222222222222222222222222222222222"
+
+
+def _pairs(record):
+    pairs = [
+        record("eth_getBalance", [ALICE, "latest"], timestamp=1.0),
+        record("eth_getBalance", [ALICE, "latest"], timestamp=2.0, batch_id="m#1", batch_size=2),
+        record("eth_getTransactionCount", [BOB, "latest"], timestamp=2.0, batch_id="m#1", batch_size=2),
+        record("eth_blockNumber", [], wallet_id="trust_wallet", timestamp=3.0, source="coalesced"),
+    ]
+    _, ok = pairs[0]
+    ok.connection_reused, ok.status_code, ok.phases = False, 200, {"connect": 1.5, "wait": 0.25}
+    _, failed = pairs[2]
+    failed.result, failed.error, failed.connection_reused, failed.retry = None, {"code": -32000, "message": "x"}, True, 2
+    pairs[3][1].coalesced_with = "metamask"
+    return pairs
+
+
+def test_views_round_trip_to_the_original_records(record):
+    pairs = _pairs(record)
+    store = CompactRecordStore().extend(pairs)
+    assert len(store) == len(pairs)
+    assert [(req.to_record(), resp.to_record()) for req, resp in store] == pairs
+    assert store[-1][0].to_record() == pairs[-1][0]
+    with pytest.raises(IndexError):
+        store[len(pairs)]
+
+
+def test_repeated_headers_and_params_are_stored_once(record):
+    store = CompactRecordStore().extend(_pairs(record))
+    (first, _), (second, _), *_ = store
+    assert first.headers_sent is second.headers_sent
+    assert first.params is second.params
+    with pytest.raises(TypeError):
+        first.headers_sent["User-Agent"] = "x"
+    usage = store.memory_usage()
+    assert (usage["records"], usage["header_sets"], usage["distinct_params"]) == (4, 2, 3)
+
+
+def test_analysis_of_views_matches_analysis_of_records(record):
+    pairs = _pairs(record)
+    from_views = analyze_records(CompactRecordStore().extend(pairs))
+    from_records = analyze_records(pairs)
+    assert from_views["privacy_analysis"] == from_records["privacy_analysis"]
+    assert from_views["linkage"] == from_records["linkage"]
+    assert from_views["total_requests"] == from_records["total_requests"] == 4
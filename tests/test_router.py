@@ -0,0 +1,105 @@
+import time
+
+import pytest
+import yaml
+
+from src.router import RouterClient, _address_slot
+
+from conftest import HEADERS, _free_port
+
+SLOW_MS = 300
+
+
+@pytest.fixture(scope="module")
+def providers(tmp_path_factory):
+    """三个替身节点：fast 即时应答，slow 每个请求延迟 SLOW_MS，failing（及 failing_b）每个调用返回 JSON-RPC 错误"""
+    from src import config_loader
+    from src.standin_server import DEFAULT_STANDIN_OPTIONS, StandinServer
+
+    options = {
+        "fast": {},
+        "slow": {"latency": {"distribution": "fixed", "mean_ms": SLOW_MS}},
+        "failing": {"error_rate": 1.0},
+    }
+    servers = {
+        name: StandinServer({
+            **DEFAULT_STANDIN_OPTIONS, **extra, "host": "127.0.0.1", "port": _free_port(), "ws_port": _free_port(),
+        }).start()
+        for name, extra in options.items()
+    }
+    path = tmp_path_factory.mktemp("router") / "config.yaml"
+    path.write_text(yaml.safe_dump({
+        "wallets": {"metamask": {"user_agent": HEADERS["metamask"]["User-Agent"]}},
+        "rpc_providers": {
+            **{name: {"base_url": s.url, "no_api_key": True} for name, s in servers.items()},
+            "failing_b": {"base_url": servers["failing"].url, "no_api_key": True},
+        },
+    }), encoding="utf-8")
+    try:
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(config_loader, "_CACHE", config_loader.ConfigCache(path))
+            yield servers
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+def _address_for_slot(slot: int, n: int) -> str:
+    """地址哈希落在环上第 slot 个 provider 的地址"""
+    return next(a for a in (f"0x{i:040x}" for i in range(1, 1000)) if _address_slot(a, n) == slot)
+
+
+def test_slow_primary_is_hedged_and_late_reply_is_captured(providers):
+    address = _address_for_slot(0, 2)
+    router = RouterClient("metamask", ["slow", "fast"], hedge_after_ms=50)
+    try:
+        with router.capture() as captured:
+            start = time.perf_counter()
+            assert router.call("eth_getBalance", [address, "latest"]) is not None
+            assert (time.perf_counter() - start) * 1000 < SLOW_MS
+        # capture() 退出前等待落后的首选请求，两个节点的记录都在作用域内
+        assert sorted(req.provider_id for req, _ in captured) == ["fast", "slow"]
+        assert all(resp.error is None for _, resp in captured)
+        snapshot = router.snapshot()
+        assert (snapshot["hedged"], snapshot["hedge_wins"]) == (1, 1)
+        assert snapshot["routed"] == {"slow": 1, "fast": 1}
+    finally:
+        router.close()
+
+
+def test_failing_primary_falls_through_without_waiting(providers):
+    address = _address_for_slot(0, 2)
+    router = RouterClient("metamask", ["failing", "fast"], hedge_after_ms=5000)
+    try:
+        with router.capture() as captured:
+            start = time.perf_counter()
+            assert router.call("eth_getBalance", [address, "latest"]) is not None
+            assert time.perf_counter() - start < 2.0
+        records = list(captured)
+        assert [req.provider_id for req, _ in records] == ["failing", "fast"]
+        assert records[0][1].error is not None and records[1][1].error is None
+        assert router.snapshot()["hedge_wins"] == 1
+    finally:
+        router.close()
+
+
+def test_all_providers_failing_raises(providers):
+    router = RouterClient("metamask", ["failing", "failing_b"], hedge_after_ms=10)
+    try:
+        with pytest.raises(RuntimeError):
+            router.call("eth_blockNumber", [])
+    finally:
+        router.close()
+
+
+def test_address_policy_falls_back_along_the_ring(providers):
+    names = ["fast", "slow", "failing"]
+    router = RouterClient("metamask", names, seed=1)
+    try:
+        for slot in range(3):
+            address = _address_for_slot(slot, 3)
+            assert router._choose([[address, "latest"]]) == names[slot]
+            assert router._choose([[address, "latest"]], exclude=(names[slot],)) == names[(slot + 1) % 3]
+        assert router._choose([[]], exclude=("fast", "slow")) == "failing"
+    finally:
+        router.close()
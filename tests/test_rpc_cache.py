@@ -0,0 +1,62 @@
+import pytest
+
+from src.rpc_cache import IMMUTABLE, TTL, ResponseCache, cache_policy
+
+ADDRESS = "0x" + "11" * 20
+
+
+@pytest.mark.parametrize("method, params, policy", [
+    ("eth_chainId", [], IMMUTABLE),
+    ("eth_getBlockByHash", ["0xabc", False], IMMUTABLE),
+    ("eth_getBlockByNumber", ["0x10", False], IMMUTABLE),
+    ("eth_getBlockByNumber", ["latest", False], TTL),
+    ("eth_getBalance", [ADDRESS, "0x10"], IMMUTABLE),
+    ("eth_getBalance", [ADDRESS, "latest"], TTL),
+    ("eth_getBalance", [ADDRESS], TTL),
+    ("eth_blockNumber", [], TTL),
+    ("eth_estimateGas", [{"from": ADDRESS}], None),
+    ("eth_sendRawTransaction", ["0x00"], None),
+])
+def test_cache_policy(method, params, policy):
+    assert cache_policy(method, params) == policy
+
+
+def test_immutable_results_are_cached_per_provider():
+    cache = ResponseCache()
+    cache.put("a", "eth_getBlockByNumber", ["0x10", False], {"number": "0x10"})
+    assert cache.get("a", "eth_getBlockByNumber", ["0x10", False]) == (True, {"number": "0x10"})
+    assert cache.get("b", "eth_getBlockByNumber", ["0x10", False]) == (False, None)
+
+
+@pytest.mark.parametrize("method, params", [
+    ("eth_getBlockByNumber", ["0x99999999", False]),
+    ("eth_getTransactionReceipt", ["0xabc"]),
+    ("eth_getBlockByHash", ["0xabc", False]),
+])
+def test_null_immutable_results_are_not_cached(method, params):
+    cache = ResponseCache()
+    cache.put("a", method, params, None)
+    assert len(cache) == 0
+    assert cache.get("a", method, params) == (False, None)
+
+
+def test_ttl_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.rpc_cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(ttl_s=2.0)
+    cache.put("a", "eth_blockNumber", [], "0x10")
+    assert cache.get("a", "eth_blockNumber", []) == (True, "0x10")
+    now[0] += 2.5
+    assert cache.get("a", "eth_blockNumber", []) == (False, None)
+    assert cache.snapshot()["expired"] == 1
+
+
+def test_uncacheable_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "eth_estimateGas", [{"from": ADDRESS}], "0x5208")
+    assert len(cache) == 0
+    for n in range(3):
+        cache.put("a", "eth_getBlockByNumber", [hex(n), False], {"number": hex(n)})
+    assert len(cache) == 2
+    assert cache.get("a", "eth_getBlockByNumber", ["0x0", False]) == (False, None)
+    assert cache.snapshot()["evictions"] == 1
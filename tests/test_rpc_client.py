@@ -0,0 +1,33 @@
+import pytest
+
+from src.rpc_client import RPCClient, RecordBuffer
+
+
+def test_http_client_records_client_identity(standin):
+    client = RPCClient("local_standin", "metamask", max_records=10, client_id="user-1")
+    client.call("eth_blockNumber", [])
+    client.call_batch([("eth_chainId", []), ("eth_blockNumber", [])])
+    (req, resp), *batch = client.get_records()
+    assert req.client_id == "user-1" and resp.source == "upstream"
+    assert {r.batch_id for r, _ in batch} == {"user-1#1"}
+
+
+def test_default_client_ids_are_unique(standin):
+    a, b = RPCClient("local_standin", "metamask"), RPCClient("local_standin", "metamask")
+    assert a.client_id != b.client_id
+
+
+def test_subscribe_requires_websocket_transport(standin):
+    client = RPCClient("local_standin", "metamask")
+    with pytest.raises(RuntimeError, match="does not support eth_subscribe"):
+        client.subscribe("newHeads")
+
+
+def test_client_record_buffer_is_unbounded_unless_bounded_explicitly(standin):
+    assert RPCClient("local_standin", "metamask")._records.max_records is None
+    assert RPCClient("local_standin", "metamask", max_records=2)._records.max_records == 2
+    ring = RecordBuffer(max_records=2)
+    for n in range(5):
+        ring.append((n, None))
+    assert [pair[0] for pair in ring] == [3, 4]
+    assert (ring.total, ring.dropped) == (5, 3)
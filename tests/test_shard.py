@@ -0,0 +1,58 @@
+import pytest
+
+from src.collectors.runner import run_all
+from src.collectors.shard import merge_shards, run_shard, shard_path
+
+PROVIDERS = ["local_standin", "standin_b"]
+TIMING_DEPENDENT_DIMENSIONS = {"timing_correlation"}
+
+
+def _without_times(obj):
+    """去掉首次 / 末次出现时间（取决于各次运行的实际发送时间）"""
+    if isinstance(obj, dict):
+        return {k: _without_times(v) for k, v in obj.items() if k not in ("first_seen", "last_seen")}
+    if isinstance(obj, list):
+        return [_without_times(v) for v in obj]
+    return obj
+
+
+def _comparable(data: dict) -> dict:
+    return {
+        "scenario_results": data["scenario_results"],
+        "errors": data["errors"],
+        "records": data["records"],
+        "calldata": data["calldata"],
+        "linkage": _without_times(data["linkage"]),
+        "privacy_analysis": {
+            k: v for k, v in data["privacy_analysis"].items() if k not in TIMING_DEPENDENT_DIMENSIONS
+        },
+        "total_requests": data["summary"]["total_requests"],
+        "sources": data["summary"]["sources"],
+    }
+
+
+@pytest.fixture(scope="module")
+def single(standin, tmp_path_factory):
+    return run_all(providers=PROVIDERS, capture_path=tmp_path_factory.mktemp("single") / "capture.ndjson.gz")
+
+
+# 4 个组合：2 个分片按组合拆分，5 个分片按单元格拆分（同一组合分布在多个分片）
+@pytest.mark.parametrize("count", [2, 5])
+def test_merged_shards_match_single_run(standin, single, tmp_path, count):
+    paths = [run_shard(i, count, shard_path(tmp_path, i, count), providers=PROVIDERS) for i in range(1, count + 1)]
+    merged = merge_shards(paths)
+    assert merged["config"]["shards"] == {"count": count, "merged": list(range(1, count + 1))}
+    a, b = _comparable(merged), _comparable(single)
+    if count > 4:
+        # 按单元格拆分时同一组合的请求来自多个分片，预览中按时间排列，只比较条数
+        a["records"], b["records"] = len(a["records"]), len(b["records"])
+    assert a == b
+
+
+def test_partial_merge_covers_only_given_shards(standin, single, tmp_path):
+    paths = [run_shard(i, 2, shard_path(tmp_path, i, 2), providers=PROVIDERS) for i in (1, 2)]
+    part = merge_shards(paths[:1])
+    assert part["config"]["shards"]["merged"] == [1]
+    assert 0 < part["summary"]["total_requests"] < single["summary"]["total_requests"]
+    with pytest.raises(ValueError, match="appears twice"):
+        merge_shards([paths[0], paths[0]])
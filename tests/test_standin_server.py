@@ -0,0 +1,67 @@
+import random
+
+import pytest
+import requests
+
+from src.standin_server import DEFAULT_STANDIN_OPTIONS, SEPOLIA_CHAIN_ID, LatencyModel, StandinChain, StandinServer
+
+from conftest import HEADERS, _free_port
+
+ALICE = "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb1"
+
+
+def _server(**options) -> StandinServer:
+    return StandinServer({
+        **DEFAULT_STANDIN_OPTIONS, **options, "host": "127.0.0.1", "port": _free_port(), "ws_port": _free_port(),
+    })
+
+
+def _post(server: StandinServer, body) -> requests.Response:
+    return requests.post(server.url, json=body, headers=HEADERS["metamask"], timeout=5)
+
+
+def test_chain_answers_are_deterministic():
+    chain = StandinChain(genesis_block=100, block_time_s=12, started=0.0)
+    other = StandinChain(genesis_block=100, block_time_s=12, started=0.0)
+    assert chain.answer("eth_getBalance", [ALICE, "latest"]) == other.answer("eth_getBalance", [ALICE.lower(), "latest"])
+    assert chain.answer("eth_chainId", []) == SEPOLIA_CHAIN_ID
+    assert chain.head() > 100
+    assert chain.answer("eth_getBlockByNumber", [hex(chain.head() + 10)]) is None
+    assert chain.answer("eth_getBlockByNumber", ["0x64"])["hash"] == other.block(100)["hash"]
+    with pytest.raises(KeyError):
+        chain.answer("eth_noSuchMethod", [])
+
+
+def test_latency_model():
+    rng = random.Random(1)
+    assert LatencyModel({"distribution": "fixed", "mean_ms": 25}, rng).sample() == 25
+    samples = [LatencyModel({"distribution": "uniform", "min_ms": 10, "max_ms": 20}, rng).sample() for _ in range(50)]
+    assert all(10 <= s <= 20 for s in samples)
+    with pytest.raises(ValueError):
+        LatencyModel({"distribution": "pareto"}, rng)
+
+
+def test_batch_request_and_log_of_received_headers():
+    with _server() as server:
+        body = [
+            {"jsonrpc": "2.0", "id": 2, "method": "eth_blockNumber", "params": []},
+            {"jsonrpc": "2.0", "id": 1, "method": "eth_noSuchMethod", "params": []},
+        ]
+        replies = {r["id"]: r for r in _post(server, body).json()}
+        assert "result" in replies[2] and replies[1]["error"]["code"] == -32601
+
+        log = requests.get(server.url + "/log", timeout=5).json()
+        assert log["total"] == 1
+        (entry,) = log["entries"]
+        assert entry["batch"] and entry["methods"] == ["eth_blockNumber", "eth_noSuchMethod"]
+        assert entry["headers"]["User-Agent"] == HEADERS["metamask"]["User-Agent"]
+
+
+def test_injected_errors_and_rate_limiting():
+    call = {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []}
+    with _server(error_rate=1.0) as server:
+        assert _post(server, call).json()["error"]["code"] == -32000
+    with _server(rate_limit_rate=1.0, retry_after_s=3) as server:
+        resp = _post(server, call)
+        assert resp.status_code == 429 and resp.headers["Retry-After"] == "3"
+        assert server.log.snapshot()[-1]["status"] == 429
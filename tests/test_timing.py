@@ -0,0 +1,17 @@
+from src.analyzers.timing import TimingAnalyzer
+
+ALICE = "0x1111111111111111111111111111111111111111"
+BOB = "0x2222222222222222222222222222222222222222"
+
+
+def test_precision_uses_client_identity_not_wallet_type(record):
+    # 两个 MetaMask 用户的 balance_check 流程交错：alice 的首步被匹配到 bob 的下一步
+    records = [
+        record("eth_getBalance", [ALICE, "latest"], client_id="metamask#0@p", timestamp=0.0),
+        record("eth_getBalance", [BOB, "latest"], client_id="metamask#1@p", timestamp=0.1),
+        record("eth_getTransactionCount", [BOB, "latest"], client_id="metamask#1@p", timestamp=0.2),
+        record("eth_getTransactionCount", [ALICE, "latest"], client_id="metamask#0@p", timestamp=0.3),
+    ]
+    timing = TimingAnalyzer(windows_s=[0.25], flows={"balance_check": ["eth_getBalance", "eth_getTransactionCount"]})
+    rows = timing.add_records(records).summary()
+    assert [(r["scope"], r["matches"], r["starts"], r["precision"]) for r in rows] == [("p", 2, 2, 0.5)]
@@ -0,0 +1,41 @@
+from src.rpc_client import RPCClient
+from src.transport import HTTPTransport, get_transport
+
+from conftest import HEADERS
+
+PAYLOAD = {"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}
+
+
+def test_keep_alive_reuses_one_connection(standin):
+    transport = HTTPTransport(standin.url)
+    try:
+        start = len(standin.log.snapshot())
+        reused = [transport.post_json(HEADERS["metamask"], PAYLOAD)[1] for _ in range(3)]
+        assert reused == [False, True, True]
+        assert len({e["client_port"] for e in standin.log.snapshot()[start:]}) == 1
+    finally:
+        transport.close()
+
+
+def test_connection_close_opens_a_new_connection_per_request(standin):
+    transport = HTTPTransport(standin.url, keep_alive=False)
+    try:
+        start = len(standin.log.snapshot())
+        assert not any(transport.post_json(HEADERS["metamask"], PAYLOAD)[1] for _ in range(2))
+        assert len({e["client_port"] for e in standin.log.snapshot()[start:]}) == 2
+    finally:
+        transport.close()
+
+
+def test_clients_of_one_provider_share_the_pool_and_keep_wallet_headers(standin):
+    metamask = RPCClient("local_standin", "metamask")
+    trust = RPCClient("local_standin", "trust_wallet")
+    assert metamask._transport is trust._transport is get_transport(standin.url)
+
+    metamask.call("eth_blockNumber", [])
+    trust.call("eth_blockNumber", [])
+    (_, resp), = trust.get_records()
+    assert resp.connection_reused
+    sent = standin.log.snapshot()[-1]["headers"]
+    assert sent["User-Agent"] == HEADERS["trust_wallet"]["User-Agent"]
+    assert "Origin" not in sent